@@ -0,0 +1,91 @@
+"""
+In-memory stand-in for the Browserbase sessions API, for local runs and tests
+
+Run it next to the API and point the service at it:
+
+    uvicorn app.fakes.browserbase:app --port 8100
+    BROWSERBASE_API_URL=http://127.0.0.1:8100/v1 uvicorn app.main:app
+
+FAKE_BB_LATENCY_MS adds a delay to every call to mimic provider round trips.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request
+
+
+def create_app(latency_ms: Optional[float] = None) -> FastAPI:
+    latency = (float(os.getenv("FAKE_BB_LATENCY_MS", "0")) if latency_ms is None else latency_ms) / 1000
+    fake = FastAPI(title="Fake Browserbase")
+    fake.state.sessions = {}
+    fake.state.calls = {"create": 0, "get": 0, "debug": 0, "update": 0}
+
+    async def simulate(api_key: Optional[str]) -> None:
+        if not api_key:
+            raise HTTPException(401, "Missing x-bb-api-key")
+        if latency:
+            await asyncio.sleep(latency)
+
+    def find(session_id: str) -> Dict[str, Any]:
+        session = fake.state.sessions.get(session_id)
+        if not session:
+            raise HTTPException(404, f"Session {session_id} not found")
+        return session
+
+    @fake.post("/v1/sessions", status_code=201)
+    async def create_session(request: Request, x_bb_api_key: Optional[str] = Header(None)):
+        await simulate(x_bb_api_key)
+        body = await request.json()
+        fake.state.calls["create"] += 1
+        session_id = str(uuid.uuid4())
+        session = {
+            "id": session_id,
+            "projectId": body.get("projectId"),
+            "status": "RUNNING",
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "region": "us-west-2",
+            "browserSettings": body.get("browserSettings", {}),
+            "proxies": body.get("proxies", False),
+            "proxyBytes": 0,
+            "connectUrl": f"wss://connect.fake.browserbase/{session_id}",
+            "sessionUrl": f"https://fake.browserbase/sessions/{session_id}",
+        }
+        fake.state.sessions[session_id] = session
+        return session
+
+    @fake.get("/v1/sessions/{session_id}")
+    async def get_session(session_id: str, x_bb_api_key: Optional[str] = Header(None)):
+        await simulate(x_bb_api_key)
+        fake.state.calls["get"] += 1
+        return find(session_id)
+
+    @fake.get("/v1/sessions/{session_id}/debug")
+    async def get_debug(session_id: str, x_bb_api_key: Optional[str] = Header(None)):
+        await simulate(x_bb_api_key)
+        fake.state.calls["debug"] += 1
+        find(session_id)
+        return {
+            "debuggerFullscreenUrl": f"https://fake.browserbase/devtools-fullscreen/{session_id}",
+            "debuggerUrl": f"https://fake.browserbase/devtools/{session_id}",
+            "wsUrl": f"wss://fake.browserbase/devtools/{session_id}",
+            "pages": [],
+        }
+
+    @fake.post("/v1/sessions/{session_id}")
+    async def update_session(session_id: str, request: Request, x_bb_api_key: Optional[str] = Header(None)):
+        await simulate(x_bb_api_key)
+        fake.state.calls["update"] += 1
+        session = find(session_id)
+        body = await request.json()
+        if body.get("status") == "REQUEST_RELEASE":
+            session["status"] = "COMPLETED"
+            session["endedAt"] = datetime.now(timezone.utc).isoformat()
+        return session
+
+    return fake
+
+
+app = create_app()
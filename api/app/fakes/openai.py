@@ -0,0 +1,114 @@
+"""
+In-memory stand-in for the OpenAI chat completions API, for local runs and load tests
+
+Run it next to the API and point the SDK at it:
+
+    uvicorn app.fakes.openai:app --port 8200
+    OPENAI_BASE_URL=http://127.0.0.1:8200/v1 OPENAI_API_KEY=dev uvicorn app.main:app
+
+Replies are canned but shaped like what each caller parses: numbered key
+points, a "### Score" judgement per screenshot, a "Status" verdict and free-text
+robots.txt task suggestions. Usage is estimated from the request (about four
+characters per token, 765 per high-detail image).
+
+FAKE_OPENAI_LATENCY_MS adds a delay to every call and FAKE_OPENAI_TOKENS_PER_SECOND
+a generation delay per completion token, to mimic model round trips.
+"""
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request
+
+IMAGE_TOKENS = 765
+
+REPLIES = {
+    "key_points": "Key Points:\n1. Search for the requested product\n2. Open a matching result\n3. Add it to the cart",
+    "judge": "### Reasoning: The page shows the product detail view with the add-to-cart control.\n### Score: 4",
+    "verdict": "Thoughts: Every key point is visible in the relevant screenshots and the cart was updated.\nStatus: \"success\"",
+    "chat": (
+        "1. Product research - browse public category and product pages, which robots.txt allows.\n"
+        "2. Price monitoring - read listing pages at the crawl delay, skipping disallowed search paths.\n"
+        "3. Store information - collect opening hours and policies from the help pages."
+    ),
+}
+
+
+def _kind(messages: List[Dict[str, Any]]) -> str:
+    """Which caller this is, from its system prompt"""
+    system = next((m.get("content") for m in messages if m.get("role") == "system"), "") or ""
+    if "key points" in system.lower():
+        return "key_points"
+    if "image contains steps" in system:
+        return "judge"
+    if "Status:" in system:
+        return "verdict"
+    return "chat"
+
+
+def _prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    chars, images = 0, 0
+    for message in messages:
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        for part in parts:
+            if part.get("type") == "image_url":
+                images += 1
+            else:
+                chars += len(part.get("text") or "")
+    return chars // 4 + images * IMAGE_TOKENS
+
+
+def create_app(latency_ms: Optional[float] = None, tokens_per_second: Optional[float] = None) -> FastAPI:
+    latency = (float(os.getenv("FAKE_OPENAI_LATENCY_MS", "0")) if latency_ms is None else latency_ms) / 1000
+    rate = float(os.getenv("FAKE_OPENAI_TOKENS_PER_SECOND", "0")) if tokens_per_second is None else tokens_per_second
+    fake = FastAPI(title="Fake OpenAI")
+    fake.state.calls = {kind: 0 for kind in REPLIES}
+    fake.state.tokens = {"prompt": 0, "completion": 0}
+
+    @fake.post("/v1/chat/completions")
+    async def chat_completions(request: Request, authorization: Optional[str] = Header(None)):
+        if not authorization or not authorization.startswith("Bearer "):
+            raise HTTPException(401, {"error": {"message": "Missing API key", "type": "invalid_request_error"}})
+        body = await request.json()
+        messages = body.get("messages") or []
+        kind = _kind(messages)
+        reply = REPLIES[kind]
+        prompt_tokens = _prompt_tokens(messages)
+        completion_tokens = min(len(reply) // 4, body.get("max_tokens") or len(reply))
+
+        delay = latency + (completion_tokens / rate if rate else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        fake.state.calls[kind] += 1
+        fake.state.tokens["prompt"] += prompt_tokens
+        fake.state.tokens["completion"] += completion_tokens
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @fake.get("/v1/stats")
+    async def stats():
+        return {"calls": fake.state.calls, "tokens": fake.state.tokens}
+
+    return fake
+
+
+app = create_app()
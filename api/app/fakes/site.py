@@ -0,0 +1,67 @@
+"""
+Stand-in target website (robots.txt and a sitemap) for local runs and load tests
+
+    uvicorn app.fakes.site:app --port 8300
+    curl -X POST localhost:8000/v1/robots/analyze -d '{"url": "http://127.0.0.1:8300"}' -H 'content-type: application/json'
+
+FAKE_SITE_RULES sets how many Disallow/Allow lines the generic group gets
+(default 200), to make robots.txt parsing as heavy as a large retailer's.
+"""
+import os
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response
+
+SECTIONS = ["account", "cart", "checkout", "search", "api", "review", "wishlist", "help", "product", "category"]
+
+
+def robots_txt(base_url: str, rules: int) -> str:
+    lines = [
+        "# robots.txt for a fake retailer",
+        "User-agent: GPTBot",
+        "Disallow: /",
+        "",
+        "User-agent: ClaudeBot",
+        "Allow: /product/",
+        "Disallow: /checkout/",
+        "",
+        "User-agent: *",
+    ]
+    for i in range(rules):
+        section = SECTIONS[i % len(SECTIONS)]
+        directive = "Allow" if i % 4 == 0 else "Disallow"
+        lines.append(f"{directive}: /{section}/{i}/*?ref=*" if i % 3 == 0 else f"{directive}: /{section}/{i}/")
+    lines += ["Crawl-delay: 1", "", f"Sitemap: {base_url}/sitemap.xml"]
+    return "\n".join(lines) + "\n"
+
+
+def sitemap_xml(base_url: str, urls: int = 200) -> str:
+    entries = "".join(
+        f"<url><loc>{base_url}/{SECTIONS[i % len(SECTIONS)]}/{i}/</loc></url>" for i in range(urls)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+def create_app(rules: Optional[int] = None) -> FastAPI:
+    rules = int(os.getenv("FAKE_SITE_RULES", "200")) if rules is None else rules
+    fake = FastAPI(title="Fake site")
+    fake.state.calls = {"robots": 0, "sitemap": 0}
+
+    def base_url(request: Request) -> str:
+        return str(request.base_url).rstrip("/")
+
+    @fake.get("/robots.txt", response_class=PlainTextResponse)
+    async def robots(request: Request):
+        fake.state.calls["robots"] += 1
+        return robots_txt(base_url(request), rules)
+
+    @fake.get("/sitemap.xml")
+    async def sitemap(request: Request):
+        fake.state.calls["sitemap"] += 1
+        return Response(sitemap_xml(base_url(request)), media_type="application/xml")
+
+    return fake
+
+
+app = create_app()
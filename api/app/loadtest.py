@@ -0,0 +1,524 @@
+"""
+End-to-end load generator for the API, against local stand-ins for every upstream
+
+    cd api
+    python -m app.loadtest --mix evaluate=1,robots=2,sessions=4,add_to_cart=1 --rate 5,10,20 --duration 30
+
+Starts the fake Browserbase, fake OpenAI and fake target-site servers
+(app/fakes/) and the API itself as uvicorn subprocesses wired to them, then
+offers open-loop load: requests arrive as a Poisson process at each --rate in
+turn, whether or not earlier ones have finished, so a saturated server shows up
+as growing latency and errors instead of a politely slower client. Scenarios:
+
+* evaluate    - POST /v1/runs/evaluate_task with generated screenshots
+* robots      - POST /v1/robots/analyze for the fake site
+* sessions    - create, get, batch status and release a session (/v1/sessions/*)
+* add_to_cart - POST /v1/add-to-cart/execute and read the SSE stream to completion
+
+For every stage it reports throughput, p50/p90/p99 latency and error rates per
+operation, plus the API process's resident memory. Use --target to load an API
+you started yourself (with BROWSERBASE_API_URL / OPENAI_BASE_URL pointing at
+the fakes) and --server-pid to still sample its memory.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("evaluate", "robots", "sessions", "add_to_cart")
+PERCENTILES = (50, 90, 99)
+
+
+class BadResponse(Exception):
+    """The API answered, but not with what the scenario expects"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """A uvicorn subprocess serving `app_path` (module:attribute, relative to api/)"""
+
+    def __init__(self, name: str, app_path: str, env: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.app_path = app_path
+        self.env = env or {}
+        self.port = free_port()
+        self.proc: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "Server":
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app_path, "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            cwd=API_DIR,
+            env={**os.environ, **self.env},
+        )
+        return self
+
+    async def wait_ready(self, path: str = "/openapi.json", timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(base_url=self.url, timeout=1.0) as client:
+            while time.monotonic() < deadline:
+                if self.proc.poll() is not None:
+                    raise RuntimeError(f"{self.name} exited with code {self.proc.returncode}")
+                try:
+                    if (await client.get(path)).status_code < 500:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise RuntimeError(f"{self.name} did not start within {timeout:.0f}s")
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+def read_rss(pid: int) -> Optional[int]:
+    """Resident set size in bytes (Linux /proc, else ps); None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=2)
+        return int(out.stdout.strip()) * 1024 if out.stdout.strip() else None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+class RssSampler:
+    """Samples a process's RSS in the background so stages can report start/peak/end"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Tuple[float, int]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.pid is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            rss = await asyncio.to_thread(read_rss, self.pid)
+            if rss is not None:
+                self.samples.append((time.monotonic(), rss))
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def window(self, start: float, end: float) -> Optional[Dict[str, float]]:
+        values = [rss for t, rss in self.samples if start <= t <= end]
+        if not values:
+            return None
+        mb = 1024 * 1024
+        return {"start_mb": round(values[0] / mb, 1), "peak_mb": round(max(values) / mb, 1),
+                "end_mb": round(values[-1] / mb, 1)}
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def error_kind(exc: BaseException) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"http_{exc.response.status_code}"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.TransportError):
+        return "transport"
+    if isinstance(exc, BadResponse):
+        return "bad_response"
+    if isinstance(exc, asyncio.CancelledError):
+        return "unfinished"
+    return type(exc).__name__
+
+
+class Recorder:
+    """Latencies and errors per operation for one stage"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Counter] = {}
+
+    def record(self, op: str, seconds: Optional[float], error: Optional[str] = None) -> None:
+        self.latencies.setdefault(op, [])
+        errors = self.errors.setdefault(op, Counter())
+        if error:
+            errors[error] += 1
+        else:
+            self.latencies[op].append(seconds)
+
+    @asynccontextmanager
+    async def time(self, op: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.record(op, None, error_kind(e))
+            raise
+        self.record(op, time.perf_counter() - start)
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        ops = {}
+        for op in sorted(self.latencies):
+            ordered = sorted(self.latencies[op])
+            errors = self.errors[op]
+            total = len(ordered) + sum(errors.values())
+            stats: Dict[str, Any] = {
+                "count": total,
+                "ok": len(ordered),
+                "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+                "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                "errors": dict(errors),
+            }
+            if ordered:
+                stats.update({f"p{p}_ms": round(percentile(ordered, p) * 1000, 1) for p in PERCENTILES})
+                stats["max_ms"] = round(ordered[-1] * 1000, 1)
+            ops[op] = stats
+        return ops
+
+
+def screenshot_b64(width: int, height: int, seed: int) -> str:
+    """A page-like PNG screenshot, base64-encoded as the evaluate endpoint expects"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, width, height // 12), fill=(35, 47, 62))
+    for top in range(height // 8, height - 120, 160):
+        for left in range(40, width - 300, 320):
+            draw.rectangle((left, top, left + 280, top + 140), fill=(246, 246, 246))
+            draw.rectangle((left + 10, top + 10, left + 110, top + 110),
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+            for line in range(3):
+                draw.rectangle((left + 120, top + 20 + line * 24, left + 120 + rng.randrange(60, 150), top + 32 + line * 24),
+                               fill=(60, 60, 60))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class Scenarios:
+    """One coroutine per scenario; each records its own operations and raises on failure"""
+
+    def __init__(self, client: httpx.AsyncClient, site_url: str, screenshots: List[str], variants: int,
+                 clients: int, rng: random.Random):
+        self.client = client
+        self.site_url = site_url
+        self.variants = variants
+        self.client_ids = [f"loadtest-{i}" for i in range(max(1, clients))]
+        self.rng = rng
+        self.evaluate_payload = {
+            "task_id": "loadtest",
+            "task_description": "Add a pair of wool socks to the cart",
+            "screenshots": screenshots,
+            "action_history": [f"<button aria-label=\"step {i}\"> -> CLICK" for i in range(20)],
+            "thoughts": [f"Step {i}: looking for the add-to-cart button" for i in range(20)],
+            "final_result_response": "Added wool socks to the cart",
+        }
+
+    def headers(self) -> Dict[str, str]:
+        return {"x-client-id": self.rng.choice(self.client_ids)}
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        response = await self.client.request(method, url, headers=self.headers(), **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def evaluate(self, rec: Recorder) -> None:
+        async with rec.time("evaluate"):
+            body = (await self.request("POST", "/v1/runs/evaluate_task", json=self.evaluate_payload)).json()
+            if "predicted_label" not in body:
+                raise BadResponse("no predicted_label")
+
+    async def robots(self, rec: Recorder) -> None:
+        async with rec.time("robots"):
+            body = (await self.request("POST", "/v1/robots/analyze", json={"url": self.site_url})).json()
+            if body.get("error") or body.get("has_robots_txt") is not True:
+                raise BadResponse(body.get("error") or "robots.txt not found")
+
+    async def sessions(self, rec: Recorder) -> None:
+        async with rec.time("sessions"):
+            async with rec.time("sessions.create"):
+                created = await self.request("POST", "/v1/sessions/add-to-cart",
+                                             json={"url": self.site_url, "advanced_stealth": False})
+                session_id = created.json().get("id")
+                if not session_id:
+                    raise BadResponse("no session id")
+            async with rec.time("sessions.get"):
+                await self.request("GET", f"/v1/sessions/{session_id}", params={"slim": "true"})
+            async with rec.time("sessions.status"):
+                body = (await self.request("POST", "/v1/sessions/status", json={"session_ids": [session_id]})).json()
+                if session_id not in body.get("items", {}):
+                    raise BadResponse("status missing")
+            async with rec.time("sessions.delete"):
+                await self.request("DELETE", f"/v1/sessions/{session_id}")
+
+    async def add_to_cart(self, rec: Recorder) -> None:
+        payload = {
+            "url": self.site_url,
+            "searchTerm": "wool socks",
+            "parameters": [{"advancedStealth": False, "deviceType": "linux"} for _ in range(self.variants)],
+        }
+        start = time.perf_counter()
+        async with rec.time("add_to_cart"):
+            async with self.client.stream("POST", "/v1/add-to-cart/execute", json=payload,
+                                          headers=self.headers()) as response:
+                response.raise_for_status()
+                first = True
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    if first:
+                        rec.record("add_to_cart.first_event", time.perf_counter() - start)
+                        first = False
+                    event = json.loads(line[5:])
+                    if "error" in event:
+                        raise BadResponse(event["error"])
+                    if event.get("status") == "completed":
+                        failed = [r for r in event.get("results") or [] if not r or r.get("error")]
+                        if failed:
+                            raise BadResponse(f"{len(failed)} variants failed")
+                        return
+                raise BadResponse("stream ended before completion")
+
+
+async def run_stage(scenarios: Scenarios, mix: Dict[str, float], rate: float, duration: float,
+                    max_in_flight: int, drain_timeout: float, sampler: RssSampler,
+                    rng: random.Random) -> Dict[str, Any]:
+    """Offer Poisson arrivals at `rate`/s for `duration` seconds, then wait for stragglers"""
+    rec = Recorder()
+    names, weights = list(mix), list(mix.values())
+    in_flight: Dict[asyncio.Task, str] = {}
+    offered, shed = Counter(), Counter()
+
+    async def run_one(name: str) -> None:
+        try:
+            await getattr(scenarios, name)(rec)
+        except Exception:
+            pass  # already recorded
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    started = time.monotonic()
+    arrival = start
+    while True:
+        arrival += rng.expovariate(rate)
+        if arrival - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, arrival - loop.time()))
+        name = rng.choices(names, weights)[0]
+        offered[name] += 1
+        if len(in_flight) >= max_in_flight:
+            shed[name] += 1  # the client itself is saturated; don't let it hide server latency
+            continue
+        task = asyncio.create_task(run_one(name))
+        in_flight[task] = name
+        task.add_done_callback(lambda t: in_flight.pop(t, None))
+
+    if in_flight:
+        await asyncio.wait(list(in_flight), timeout=drain_timeout)
+    for task, name in list(in_flight.items()):
+        task.cancel()
+    await asyncio.sleep(0)
+    elapsed = loop.time() - start
+    return {
+        "rate": rate,
+        "duration_s": duration,
+        "elapsed_s": round(elapsed, 2),
+        "offered": dict(offered),
+        "shed_by_client": dict(shed),
+        "ops": rec.summary(elapsed),
+        "server_rss": sampler.window(started, time.monotonic()),
+    }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one scenario with a positive weight")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def parse_rates(text: str) -> List[float]:
+    try:
+        rates = [float(r) for r in text.split(",") if r.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a list of rates: {text!r}")
+    if not rates or min(rates) <= 0:
+        raise argparse.ArgumentTypeError("rates must be positive")
+    return rates
+
+
+def format_stage(stage: Dict[str, Any]) -> str:
+    ok = sum(op["ok"] for name, op in stage["ops"].items() if name in SCENARIOS)
+    lines = [f"rate {stage['rate']:g}/s for {stage['duration_s']:g}s: offered {sum(stage['offered'].values())}, "
+             f"completed {ok} ({ok / stage['elapsed_s']:.1f}/s), shed by client {sum(stage['shed_by_client'].values())}"]
+    rss = stage["server_rss"]
+    if rss:
+        lines.append(f"  server RSS {rss['start_mb']:.0f} -> {rss['end_mb']:.0f} MB (peak {rss['peak_mb']:.0f} MB)")
+    lines.append(f"  {'operation':<24} {'count':>6} {'err%':>6} {'ok/s':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}  errors")
+    for name, op in stage["ops"].items():
+        latencies = " ".join(f"{op.get(f'p{p}_ms', float('nan')):>9.1f}" for p in PERCENTILES)
+        errors = ", ".join(f"{kind}={n}" for kind, n in op["errors"].items())
+        lines.append(f"  {name:<24} {op['count']:>6} {op['error_rate'] * 100:>5.1f}% {op['throughput_rps']:>7.2f} {latencies}  {errors}")
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    servers: List[Server] = []
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    try:
+        site_url = args.site_url
+        if not site_url:
+            site = Server("fake site", "app.fakes.site:app", {"FAKE_SITE_RULES": str(args.robots_rules)}).start()
+            servers.append(site)
+            site_url = site.url
+        target, pid = args.target, args.server_pid
+        fake_openai = None
+        if not target:
+            browserbase = Server("fake Browserbase", "app.fakes.browserbase:app",
+                                 {"FAKE_BB_LATENCY_MS": str(args.browserbase_latency_ms)}).start()
+            fake_openai = Server("fake OpenAI", "app.fakes.openai:app", {
+                "FAKE_OPENAI_LATENCY_MS": str(args.openai_latency_ms),
+                "FAKE_OPENAI_TOKENS_PER_SECOND": str(args.openai_tokens_per_second),
+            }).start()
+            servers += [browserbase, fake_openai]
+            api = Server("API", "app.main:app", {
+                "BROWSERBASE_API_URL": f"{browserbase.url}/v1",
+                "BROWSERBASE_API_KEY": "loadtest",
+                "BROWSERBASE_PROJECT_ID": "loadtest",
+                "OPENAI_API_KEY": "loadtest",
+                "OPENAI_BASE_URL": f"{fake_openai.url}/v1",
+                "RUN_STORE_PATH": os.path.join(workdir, "runs.sqlite3"),
+                "RUN_EVENT_LOG_DIR": os.path.join(workdir, "run_events"),
+                # Every simulated client connects from this host, and quotas are per address
+                "BB_MAX_SESSIONS_PER_CLIENT": "1000",
+                **dict(kv.split("=", 1) for kv in args.server_env),
+            })
+            for server in servers:
+                await server.wait_ready()
+            servers.append(api.start())
+            await api.wait_ready("/v1/health")
+            target, pid = api.url, api.proc.pid
+        else:
+            for server in servers:
+                await server.wait_ready()
+
+        screenshots = [screenshot_b64(*args.screenshot_size, seed=i) for i in range(args.screenshots)]
+        limits = httpx.Limits(max_connections=args.max_in_flight + 10, max_keepalive_connections=args.max_in_flight)
+        sampler = RssSampler(pid)
+        sampler.start()
+        stages = []
+        async with httpx.AsyncClient(base_url=target, timeout=args.request_timeout, limits=limits) as client:
+            scenarios = Scenarios(client, site_url, screenshots, args.variants, args.clients, rng)
+            for i, rate in enumerate(args.rate):
+                if i:
+                    await asyncio.sleep(args.cooldown)
+                stage = await run_stage(scenarios, args.mix, rate, args.duration, args.max_in_flight,
+                                        args.drain_timeout, sampler, rng)
+                print(format_stage(stage), flush=True)
+                stages.append(stage)
+        await sampler.stop()
+
+        report: Dict[str, Any] = {
+            "target": target,
+            "mix": args.mix,
+            "settings": {
+                "duration_s": args.duration, "max_in_flight": args.max_in_flight, "clients": args.clients,
+                "screenshots": args.screenshots, "screenshot_size": list(args.screenshot_size),
+                "variants": args.variants, "browserbase_latency_ms": args.browserbase_latency_ms,
+                "openai_latency_ms": args.openai_latency_ms, "seed": args.seed,
+            },
+            "stages": stages,
+        }
+        if fake_openai:
+            async with httpx.AsyncClient(base_url=fake_openai.url) as client:
+                report["fake_openai"] = (await client.get("/v1/stats")).json()
+        return report
+    finally:
+        for server in reversed(servers):
+            server.stop()
+        # After the API has exited, so its run store and event log are closed
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offer open-loop load to the API with fake upstreams and report throughput, latency, errors and RSS")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("evaluate=1,robots=2,sessions=4,add_to_cart=1"),
+                        help="Scenario weights, e.g. evaluate=1,robots=2,sessions=4,add_to_cart=1")
+    parser.add_argument("--rate", type=parse_rates, default=[5.0], help="Arrivals per second; a comma-separated list runs one stage per rate")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of arrivals per stage")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="Client-side cap on concurrent requests (arrivals beyond it are shed and counted)")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="How long to wait for in-flight requests after a stage")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="Pause between stages")
+    parser.add_argument("--clients", type=int, default=50, help="Distinct x-client-id labels (reported per session; quotas are per address)")
+    parser.add_argument("--screenshots", type=int, default=2, help="Screenshots per evaluate request")
+    parser.add_argument("--screenshot-size", type=lambda s: tuple(int(v) for v in s.lower().split("x")), default=(1280, 720))
+    parser.add_argument("--variants", type=int, default=2, help="Parameter sets per add-to-cart execution")
+    parser.add_argument("--browserbase-latency-ms", type=float, default=50.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=300.0)
+    parser.add_argument("--openai-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--robots-rules", type=int, default=200, help="Rules in the fake site's robots.txt")
+    parser.add_argument("--target", default=None, help="Load an already running API instead of starting one")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID of --target, for RSS sampling")
+    parser.add_argument("--site-url", default=None, help="Site to analyze instead of the fake one")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the API server (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
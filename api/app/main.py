@@ -1,14 +1,55 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import runs
-from app.routes import runs, sessions, add_to_cart
+from app.routes import runs, sessions, add_to_cart, recipes, metrics, analytics
+from app.providers.playwright_local import get_playwright_local
+from app.services.event_streams import get_event_stream_hub
+from app.services.metrics import MetricsMiddleware
+from app.services.http_client import close_http_client, start_http_client
+from app.services.recipes import get_recipe_registry
+from app.services.run_engine import get_run_engine
+from app.services.session_pool import get_session_pool
+from app.services.session_registry import get_session_registry
+from app.services.tracing import TracingMiddleware, get_tracer
+from app.services.sessions import DEFAULT_SESSION_KEY
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One keep-alive HTTP client for every Browserbase call
+    await start_http_client()
+    # Warm Browserbase sessions (no-op unless BB_POOL_MAX_SIZE > 0)
+    pool = get_session_pool()
+    await pool.start(warm_keys=(DEFAULT_SESSION_KEY,))
+    # Track handed-out sessions, reap idle ones
+    registry = get_session_registry()
+    await registry.start()
+    # Compile recipes up front so the first run doesn't pay for it
+    get_recipe_registry().load()
+    # Background workers for POST /v1/runs
+    engine = get_run_engine()
+    await engine.start()
+    yield
+    await engine.stop()
+    # Shared local Chromium (only running if a run used it)
+    await get_playwright_local().close()
+    # Cancel background SSE producers first so they release their sessions
+    await get_event_stream_hub().stop()
+    await registry.stop()
+    await pool.stop()
+    await close_http_client()
+    # Flush the span file exporter, if any
+    get_tracer().close()
+
+
 app = FastAPI(
     title="Agent Navigability Simulator API",
+    lifespan=lifespan,
     openapi_url="/v1/openapi.json",
     docs_url="/v1/docs",       
     redoc_url="/v1/redoc"  
@@ -37,10 +78,19 @@ app.add_middleware(
 )
 
 
+# Route latency and in-flight requests for GET /v1/metrics
+app.add_middleware(MetricsMiddleware)
+
+# Outermost, so request spans cover CORS handling too
+app.add_middleware(TracingMiddleware)
+
 # Routes
 app.include_router(runs.router, prefix="/v1", tags=["runs"])
 app.include_router(sessions.router)
 app.include_router(add_to_cart.router)
+app.include_router(recipes.router)
+app.include_router(metrics.router)
+app.include_router(analytics.router)
 
 @app.get("/v1/health")
 def health():
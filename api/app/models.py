@@ -61,5 +61,12 @@ class RobotsAnalysisResponse(BaseModel):
     robots_url: Optional[str] = None
     robots_content: Optional[str] = None
     ai_rules: Optional[AIRules] = None
+    sitemaps: List[str] = []
     llm_suggestions: Optional[str] = None
     error: Optional[str] = None
+
+class SitemapEnumerationRequest(BaseModel):
+    url: AnyUrl
+    user_agent: str = "*"
+    max_urls: int = 1000
+    max_bytes: int = 10 * 1024 * 1024
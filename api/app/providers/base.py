@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from app.services.captures import NetworkCapture
+from app.services.recipes import RecipePlan
 
 class BrowserProvider(ABC):
+    # Whether run()/run_plan() honour a NetworkCapture (HAR record/replay)
+    supports_capture = False
+
     @abstractmethod
-    async def run(self, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def run(self, steps: List[Dict[str, Any]], capture: Optional[NetworkCapture] = None) -> Dict[str, Any]:
         ...
+
+    async def run_plan(self, plan: RecipePlan, capture: Optional[NetworkCapture] = None) -> Dict[str, Any]:
+        """Execute a compiled recipe; providers override this to use the typed steps directly"""
+        return await self.run([step.model_dump() for step in plan.steps], capture=capture)
@@ -1,7 +1,324 @@
-from typing import Any, Dict, List
+"""
+Local Playwright provider
+
+Keeps one long-lived Chromium process per provider and hands out browser
+contexts from a pool: up to `max_contexts` step lists run concurrently, each in
+its own context. Contexts are reused between runs and closed after
+`max_uses_per_context` runs so memory stays bounded. In between, pages,
+cookies and permissions are cleared and every origin the run sent requests to
+has its storage wiped (local/session storage, IndexedDB, cache storage,
+service workers) over CDP; a context that still holds cookies or local storage
+afterwards is closed instead of reused.
+
+Runs given a NetworkCapture get a dedicated context instead: `record` writes
+the context's traffic to a HAR archive when it closes, `replay` routes every
+request from the archive and aborts anything it doesn't contain.
+
+With a ScreenshotPipeline, a screenshot is taken after every step (skipped when
+the page hasn't changed) and encoded off the event loop.
+
+Playwright is optional: install it with `pip install playwright` and
+`playwright install chromium`.
+"""
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+
+from pydantic import TypeAdapter
+
 from .base import BrowserProvider
+from app.services.captures import NetworkCapture
+from app.services.recipes import ClickStep, RecipePlan, SearchStep, Step, VisitStep, compile_step
+from app.services.screenshots import ScreenshotPipeline, get_screenshot_pipeline
+from app.services.tracing import get_tracer
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    async_playwright = None
+    PLAYWRIGHT_AVAILABLE = False
+
+_STEP = TypeAdapter(Step)
+
+# Where a search step types its query, in order of preference
+SEARCH_INPUT_SELECTOR = (
+    "input[type=search], [role=searchbox], input[name=q], input[name*=search i], "
+    "input[placeholder*=search i], input[aria-label*=search i]"
+)
+
+
+class StepError(RuntimeError):
+    pass
+
+
+def request_origin(url: str) -> Optional[str]:
+    """scheme://host[:port] of an http(s) URL, the key Chromium keeps site storage under"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    return f"{parts.scheme}://{parts.netloc.rpartition('@')[2]}"
+
+
+def to_steps(steps: Sequence[Dict[str, Any]]) -> List[Step]:
+    """Accept typed step dicts ({"kind": "visit", "url": ...}) or recipe shorthand ({"visit": ...})"""
+    return [_STEP.validate_python(raw) if "kind" in raw else compile_step(i, raw) for i, raw in enumerate(steps)]
+
 
 class PlaywrightLocal(BrowserProvider):
-    async def run(self, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
-        # Burcu-TODO: implement with Playwright
-        return {"steps_executed": len(steps)}
+    supports_capture = True
+
+    def __init__(
+        self,
+        max_contexts: int = 4,
+        max_uses_per_context: int = 20,
+        headless: bool = True,
+        step_timeout_ms: float = 15000,
+        context_options: Optional[Dict[str, Any]] = None,
+        launch_args: Optional[List[str]] = None,
+        screenshots: Optional[ScreenshotPipeline] = None,
+    ):
+        self.max_contexts = max_contexts
+        self.max_uses_per_context = max_uses_per_context
+        self.headless = headless
+        self.step_timeout_ms = step_timeout_ms
+        self.context_options = context_options or {"viewport": {"width": 1280, "height": 720}}
+        self.launch_args = launch_args or []
+        self.screenshots = screenshots
+
+        self._playwright = None
+        self._browser = None
+        self._start_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_contexts)
+        self._idle: List[Tuple[Any, int]] = []  # (context, uses so far)
+        self._origins: Dict[Any, Set[str]] = {}  # pooled context -> origins requested since its last wipe
+        self._open_contexts = 0
+        self._counters = {
+            "runs": 0, "contexts_created": 0, "contexts_recycled": 0, "failures": 0, "recorded": 0, "replayed": 0,
+        }
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if not PLAYWRIGHT_AVAILABLE:
+                raise RuntimeError("PlaywrightLocal needs playwright: pip install playwright && playwright install chromium")
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+            self._idle = []
+            self._origins = {}
+            self._open_contexts = 0
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(ctx.close() for ctx, _ in idle), return_exceptions=True)
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._origins = {}
+        self._open_contexts = 0
+
+    # ------------------------------------------------------------
+    # Context pool
+    # ------------------------------------------------------------
+    async def _acquire_context(self) -> Tuple[Any, int]:
+        await self.start()
+        if self._idle:
+            return self._idle.pop()
+        context = await self._browser.new_context(**self.context_options)
+        context.set_default_timeout(self.step_timeout_ms)
+        origins: Set[str] = set()
+
+        def remember(request: Any) -> None:
+            origin = request_origin(request.url)
+            if origin is not None:
+                origins.add(origin)
+
+        context.on("request", remember)
+        self._origins[context] = origins
+        self._open_contexts += 1
+        self._counters["contexts_created"] += 1
+        return context, 0
+
+    async def _release_context(self, context: Any, uses: int, healthy: bool) -> None:
+        uses += 1
+        if healthy and uses < self.max_uses_per_context and self._browser and self._browser.is_connected():
+            try:
+                if await self._wipe_context(context):
+                    self._idle.append((context, uses))
+                    return
+            except Exception:
+                pass
+        self._origins.pop(context, None)
+        self._open_contexts -= 1
+        self._counters["contexts_recycled"] += 1
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _wipe_context(self, context: Any) -> bool:
+        """Clear what the last run left in a pooled context; False if some of it survived"""
+        # Closing the pages also drops their session storage
+        await asyncio.gather(*(page.close() for page in context.pages))
+        origins = self._origins.get(context, set())
+        if origins:
+            page = await context.new_page()
+            try:
+                cdp = await context.new_cdp_session(page)
+                for origin in origins:
+                    await cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+                await cdp.detach()
+            finally:
+                await page.close()
+            origins.clear()
+        await context.clear_cookies()
+        await context.clear_permissions()
+        state = await context.storage_state()
+        return not state["cookies"] and not state["origins"]
+
+    async def _open_capture_context(self, capture: NetworkCapture) -> Tuple[Any, Optional[str]]:
+        """Unpooled context for record/replay; returns it and the temp HAR path being recorded"""
+        await self.start()
+        # Service workers would bypass both recording and routing
+        options = {**self.context_options, "service_workers": "block"}
+        if capture.mode == "record":
+            # Record next to the target and swap in on success, so a failed run keeps the old capture
+            tmp_path = f"{capture.path}.{uuid.uuid4().hex[:8]}.tmp.zip"
+            context = await self._browser.new_context(
+                **options, record_har_path=tmp_path, record_har_content="attach", record_har_mode="full",
+            )
+        else:
+            tmp_path = None
+            context = await self._browser.new_context(**options)
+            await context.route_from_har(capture.path, not_found="abort")
+        context.set_default_timeout(self.step_timeout_ms)
+        return context, tmp_path
+
+    async def _close_capture_context(self, context: Any, capture: NetworkCapture, tmp_path: Optional[str], ok: bool) -> None:
+        try:
+            await context.close()  # flushes the HAR when recording
+        finally:
+            if tmp_path is not None:
+                if ok and os.path.exists(tmp_path):
+                    os.replace(tmp_path, capture.path)
+                    self._counters["recorded"] += 1
+                elif os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        if ok and capture.mode == "replay":
+            self._counters["replayed"] += 1
+
+    # ------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------
+    async def run(self, steps: List[Dict[str, Any]], capture: Optional[NetworkCapture] = None) -> Dict[str, Any]:
+        if not steps:
+            return {"steps_executed": 0}
+        return await self._execute(to_steps(steps), capture)
+
+    async def run_plan(self, plan: RecipePlan, capture: Optional[NetworkCapture] = None) -> Dict[str, Any]:
+        # Steps are already validated and typed; nothing to parse per run
+        result = await self._execute(plan.steps, capture)
+        return {**result, "recipe": plan.id, "recipe_hash": plan.content_hash}
+
+    async def _execute(self, steps: Sequence[Step], capture: Optional[NetworkCapture] = None) -> Dict[str, Any]:
+        tracer = get_tracer()
+        async with self._slots:
+            with tracer.span("browser.context", pooled=capture is None):
+                if capture is None:
+                    context, uses = await self._acquire_context()
+                else:
+                    context, tmp_path = await self._open_capture_context(capture)
+            healthy = True
+            self._counters["runs"] += 1
+            try:
+                page = await context.new_page()
+                shots = self.screenshots.session() if self.screenshots else None
+                timings = []
+                for index, step in enumerate(steps):
+                    started = time.perf_counter()
+                    try:
+                        with tracer.span("browser.step", index=index, kind=step.kind):
+                            await self._run_step(page, step)
+                    except Exception as e:
+                        self._counters["failures"] += 1
+                        raise StepError(f"step {index} ({step.kind}): {e}") from e
+                    timings.append(round((time.perf_counter() - started) * 1000, 1))
+                    if shots is not None:
+                        with tracer.span("screenshot.capture", index=index) as span:
+                            shot = await shots.capture(page, index)
+                            span.set("skipped", "same_as" in shot)
+                result = {
+                    "steps_executed": len(steps),
+                    "final_url": page.url,
+                    "title": await page.title(),
+                    "step_timings_ms": timings,
+                }
+                if shots is not None:
+                    result["screenshots"] = shots.shots
+                if capture is not None:
+                    result["network"] = {"mode": capture.mode, "capture": capture.name}
+                return result
+            except BaseException:
+                # A context that saw a failure or cancellation isn't trusted for reuse
+                healthy = False
+                raise
+            finally:
+                if capture is None:
+                    await asyncio.shield(self._release_context(context, uses, healthy))
+                else:
+                    await asyncio.shield(self._close_capture_context(context, capture, tmp_path, healthy))
+
+    async def _run_step(self, page: Any, step: Step) -> None:
+        if isinstance(step, VisitStep):
+            await page.goto(step.url, wait_until="domcontentloaded")
+        elif isinstance(step, SearchStep):
+            box = page.locator(SEARCH_INPUT_SELECTOR).first
+            await box.fill(step.query)
+            await box.press("Enter")
+            await page.wait_for_load_state("domcontentloaded")
+        elif isinstance(step, ClickStep):
+            target = (
+                page.get_by_role("button", name=step.target)
+                .or_(page.get_by_role("link", name=step.target))
+                .or_(page.get_by_text(step.target, exact=True))
+            )
+            await target.first.click()
+        else:
+            raise StepError(f"unsupported step {step!r}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "browser_connected": bool(self._browser and self._browser.is_connected()),
+            "max_contexts": self.max_contexts,
+            "open_contexts": self._open_contexts,
+            "idle_contexts": len(self._idle),
+            "max_uses_per_context": self.max_uses_per_context,
+            **self._counters,
+        }
+
+
+_provider: Optional[PlaywrightLocal] = None
+
+
+def get_playwright_local() -> PlaywrightLocal:
+    """Process-wide provider so every run shares one Chromium"""
+    global _provider
+    if _provider is None:
+        _provider = PlaywrightLocal(
+            max_contexts=int(os.getenv("PLAYWRIGHT_MAX_CONTEXTS", "4")),
+            max_uses_per_context=int(os.getenv("PLAYWRIGHT_MAX_USES_PER_CONTEXT", "20")),
+            headless=os.getenv("PLAYWRIGHT_HEADLESS", "1") != "0",
+            screenshots=get_screenshot_pipeline(),
+        )
+    return _provider
@@ -1,63 +1,170 @@
-import os, json, asyncio
-from typing import Any, Dict, List
-import httpx
+import os, asyncio
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, field_validator
+from app.services import browserbase
+from app.services.event_streams import BufferedEventStream, get_event_stream_hub, last_event_id_for
+from app.services.session_pool import SessionPoolKey, get_session_pool
+from app.services.session_registry import client_id_for, client_label_for, get_session_registry
 
 router = APIRouter(prefix="/v1/add-to-cart", tags=["add-to-cart"])
 
 BB_KEY = os.getenv("BROWSERBASE_API_KEY")
 BB_PROJECT = os.getenv("BROWSERBASE_PROJECT_ID")
-BB_SESSIONS = "https://www.browserbase.com/v1/sessions"
+
+# Parameter sets run concurrently, bounded so one request can't open every browser at once
+ADD_TO_CART_CONCURRENCY = int(os.getenv("ADD_TO_CART_CONCURRENCY", "4"))
 
 # ----- Request/Response models (superset of UI expectations) -----
 class Params(BaseModel):
     modelName: str | None = "openai/gpt-4o-mini"
     advancedStealth: bool | None = False
-    proxies: Any | None = False
+    proxies: bool | Dict[str, Any] | List[Any] = False  # on/off ("true", 1, ...), or Browserbase proxy configs
     experimental: Any | None = False
     environment: str | None = "BROWSERBASE"
     deviceType: str | None = "mac"   # UI sends "mac"
 
+    @field_validator("proxies", mode="before")
+    @classmethod
+    def _no_proxies_when_null(cls, value: Any) -> Any:
+        # Normalized here once, so the pooled and the direct session get the same setting
+        return False if value is None else value
+
 class AddToCartExecuteRequest(BaseModel):
     url: HttpUrl
     searchTerm: str
     parameters: Params | List[Params] | None = None
 
-def _sse(data: Dict[str, Any]) -> bytes:
-    return f"data: {json.dumps(data)}\n\n".encode("utf-8")
-
-async def _create_browserbase_session(
-    client: httpx.AsyncClient, p: Params
-) -> Dict[str, Any]:
+async def _create_browserbase_session(p: Params) -> Dict[str, Any]:
     if not BB_KEY:
         raise HTTPException(500, "Missing BROWSERBASE_API_KEY")
 
+    # Plain on/off proxy settings can be served from the warm pool
+    pool = get_session_pool()
+    if pool.enabled and isinstance(p.proxies, bool):
+        key = SessionPoolKey(
+            os=p.deviceType or None,
+            advanced_stealth=bool(p.advancedStealth),
+            proxies=p.proxies,
+        )
+        return await pool.acquire(key)
+
     payload = {
         "projectId": BB_PROJECT,
         "browserSettings": {
             "advancedStealth": bool(p.advancedStealth),
             **({"os": p.deviceType} if p.deviceType else {}),
         },
+        "proxies": p.proxies,
+    }
+    data = await browserbase.create_session(BB_KEY, payload)
+    # The create response has no live-view URL; fetch it so the UI can show the browser right away
+    debug = await browserbase.get_debug_urls(BB_KEY, data.get("id") or data.get("sessionId"))
+    return {**data, **{k: v for k, v in debug.items() if v}}
+
+def _params_view(p: Params) -> Dict[str, Any]:
+    return {
+        "modelName": p.modelName,
+        "advancedStealth": p.advancedStealth,
+        "proxies": p.proxies,
+        "experimental": p.experimental,
+        "environment": p.environment,
+        "deviceType": p.deviceType,
     }
-    r = await client.post(
-        BB_SESSIONS,
-        json=payload,
-        headers={"content-type": "application/json", "x-bb-api-key": BB_KEY},
-        timeout=20,
-    )
-    if r.status_code not in (200, 201):
-        raise HTTPException(502, f"Browserbase {r.status_code}: {r.text}")
-    return r.json()
+
+async def _run_variant(
+    index: int, p: Params, client_id: str, label: Optional[str], events: asyncio.Queue
+) -> Dict[str, Any]:
+    """Create a session for one parameter set, run it, and always release the session"""
+    registry = get_session_registry()
+    session_id = None
+    try:
+        # Create Browserbase session (waits for a free slot under the concurrency quotas)
+        async with registry.slot(BB_PROJECT, client_id, label) as slot:
+            data = await _create_browserbase_session(p)
+            session_id = data.get("id") or data.get("sessionId")
+            slot.bind(session_id)
+        debugger_url = data.get("debuggerFullscreenUrl") or data.get("debuggerUrl")
+
+        # emit debugger URL early (UI listens for this)
+        if debugger_url:
+            await events.put({"variant": index, "debuggerUrl": debugger_url})
+
+        # TODO: hook Sophie’s Stagehand v3 "add-to-cart" script here.
+        # For now, stub a small delay and fake result so UI can proceed.
+        await asyncio.sleep(0.5)
+
+        # Simulated result shape the UI expects
+        return {
+            "variant": index,
+            "metrics": data.get("metrics") or None,
+            "aggregateMetrics": data.get("aggregateMetrics") or None,
+            "screenshots": None,  # plug real screenshots later
+            "extractionResults": {
+                "success": True,
+                "cartCount": 1
+            },
+            "params": _params_view(p),
+        }
+    except HTTPException as he:
+        return {"variant": index, "error": str(he.detail), "params": _params_view(p)}
+    except Exception as e:
+        return {"variant": index, "error": str(e), "params": _params_view(p)}
+    finally:
+        # This variant is done with its browser (also on cancellation)
+        if session_id:
+            await asyncio.shield(registry.release(session_id))
+
+async def _execute(
+    params_list: List[Params], client_id: str, label: Optional[str], stream: BufferedEventStream
+) -> None:
+    """Run every parameter set and publish progress; runs in the background, not per connection"""
+    # start
+    await stream.publish({"status": "started", "streamId": stream.stream_id})
+
+    events: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max(1, ADD_TO_CART_CONCURRENCY))
+
+    async def bounded(index: int, p: Params) -> None:
+        async with semaphore:
+            result = await _run_variant(index, p, client_id, label, events)
+        await events.put({"variant": index, "result": result})
+
+    tasks = [asyncio.create_task(bounded(i, p)) for i, p in enumerate(params_list)]
+    results: List[Dict[str, Any] | None] = [None] * len(params_list)
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await events.get()
+            if "result" in event:
+                results[event["variant"]] = event["result"]
+                remaining -= 1
+            await stream.publish(event)
+
+        # final completion
+        await stream.publish({"status": "completed", "results": results})
+
+    except Exception as e:
+        await stream.publish({"error": str(e)})
+    finally:
+        # Abandoned by every client (or shutting down): stop outstanding variants promptly
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 @router.post("/execute")
 async def add_to_cart_execute(req: AddToCartExecuteRequest, request: Request):
     """
     SSE endpoint that mirrors the Next.js route:
-    - emits {"status":"started"}
-    - may emit {"debuggerUrl": "..."}
-    - emits {"status":"completed", "results":[ ... ]}
+    - emits {"status":"started", "streamId": "..."}
+    - may emit {"variant": i, "debuggerUrl": "..."} per parameter set
+    - emits {"variant": i, "result": {...}} as each parameter set finishes
+    - emits {"status":"completed", "results":[ ... ]} in parameter order
+
+    Parameter sets run concurrently (at most ADD_TO_CART_CONCURRENCY at a time) in
+    the background. Events carry ids; after a dropped connection, resume with
+    GET /stream/{streamId} and Last-Event-ID. If nobody reconnects within
+    SSE_ORPHAN_TIMEOUT, outstanding variants are cancelled and their sessions released.
     """
     # normalize parameters -> List[Params]
     if isinstance(req.parameters, list):
@@ -69,58 +176,16 @@ async def add_to_cart_execute(req: AddToCartExecuteRequest, request: Request):
     else:
         params_list = [Params()]  # default one run
 
-    async def event_stream():
-        # start
-        yield _sse({"status": "started"})
-
-        results = []
-        try:
-            async with httpx.AsyncClient() as client:
-                # run each param set in "parallel" (sequential here for simplicity)
-                for p in params_list:
-                    # Create Browserbase session
-                    data = await _create_browserbase_session(client, p)
-                    session_id = data.get("id") or data.get("sessionId")
-                    debugger_url = data.get("debuggerFullscreenUrl") or data.get("debuggerUrl")
-
-                    # emit debugger URL early (UI listens for this)
-                    if debugger_url:
-                        yield _sse({"debuggerUrl": debugger_url})
-
-                    # TODO: hook Sophie’s Stagehand v3 "add-to-cart" script here.
-                    # For now, stub a small delay and fake result so UI can proceed.
-                    await asyncio.sleep(0.5)
-
-                    # Simulated result shape the UI expects
-                    metrics = data.get("metrics") or None
-                    aggregate = data.get("aggregateMetrics") or None
-                    screenshots = None  # plug real screenshots later
-
-                    result_item = {
-                        "metrics": metrics,
-                        "aggregateMetrics": aggregate,
-                        "screenshots": screenshots,
-                        "extractionResults": {
-                            "success": True,
-                            "cartCount": 1
-                        },
-                        "params": {
-                            "modelName": p.modelName,
-                            "advancedStealth": p.advancedStealth,
-                            "proxies": p.proxies,
-                            "experimental": p.experimental,
-                            "environment": p.environment,
-                            "deviceType": p.deviceType,
-                        }
-                    }
-                    results.append(result_item)
-
-            # final completion
-            yield _sse({"status": "completed", "results": results})
-
-        except HTTPException as he:
-            yield _sse({"error": str(he.detail)})
-        except Exception as e:
-            yield _sse({"error": str(e)})
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    client_id, label = client_id_for(request), client_label_for(request)
+    hub = get_event_stream_hub()
+    stream = hub.open(lambda s: _execute(params_list, client_id, label, s))
+    return hub.response(stream, request)
+
+@router.get("/stream/{stream_id}")
+async def add_to_cart_resume(stream_id: str, request: Request):
+    """Reconnect to a running (or recently finished) execution, replaying events after Last-Event-ID"""
+    hub = get_event_stream_hub()
+    stream = hub.get(stream_id)
+    if not stream:
+        raise HTTPException(404, "Unknown or expired stream")
+    return hub.response(stream, request, last_event_id_for(request))
@@ -0,0 +1,43 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from app.services.run_analytics import AnalyticsUnavailable, get_run_analytics
+
+router = APIRouter(prefix="/v1/analytics", tags=["analytics"])
+
+GroupBy = Literal["model", "search_term"]
+
+
+def _serve(compute):
+    try:
+        return compute(get_run_analytics())
+    except AnalyticsUnavailable as e:
+        raise HTTPException(503, str(e))
+
+
+@router.get("/summary")
+def analytics_summary():
+    """Run count, date range and overall latency/token stats"""
+    return _serve(lambda a: a.summary())
+
+
+@router.get("/models")
+def analytics_by_model():
+    """Count, success rate, latency mean/p50/p95/p99 and tokens per model"""
+    return _serve(lambda a: a.groups("model"))
+
+
+@router.get("/search-terms")
+def analytics_by_search_term():
+    return _serve(lambda a: a.groups("search_term"))
+
+
+@router.get("/series")
+def analytics_series(bucket: Literal["hour", "day", "week"] = "day", group_by: Optional[GroupBy] = None):
+    """Time-bucketed counts, latency and tokens/s, optionally one series per model or search term"""
+    return _serve(lambda a: a.series(bucket, group_by))
+
+
+@router.get("/stats")
+def analytics_cache_stats():
+    return _serve(lambda a: a.stats())
@@ -0,0 +1,68 @@
+from typing import Dict, Iterator, List, Tuple
+
+from fastapi import APIRouter, Response
+from app.services.metrics import CONTENT_TYPE, Family, get_metrics
+from app.services.recipes import get_recipe_registry
+from app.services.run_analytics import AnalyticsUnavailable, get_run_analytics
+from app.services.run_engine import get_run_engine
+from app.services.screenshots import get_screenshot_pipeline
+from app.services.session_pool import get_session_pool
+from app.services.session_registry import get_session_registry
+from app.services.session_status import get_session_status_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+def _cache_lookups() -> Dict[str, Dict[str, int]]:
+    """cache -> result -> count, from each cache's own counters"""
+    pool = get_session_pool().stats()
+    status = get_session_status_cache().stats()
+    recipes = get_recipe_registry().stats()
+    caches = {
+        "session_pool": {"hit": pool["hits"], "miss": pool["misses"]},
+        "session_status": {"hit": status["hits"], "coalesced": status["coalesced"], "miss": status["misses"]},
+        "recipes": {"hit": recipes["reused"], "miss": recipes["compiled"]},
+    }
+    screenshots = get_screenshot_pipeline()
+    if screenshots is not None:
+        shots = screenshots.stats()
+        caches["screenshots"] = {"hit": shots["skipped"], "miss": shots["captured"]}
+    try:
+        analytics = get_run_analytics().stats()
+        caches["run_analytics"] = {"hit": analytics["hits"], "miss": analytics["misses"]}
+    except AnalyticsUnavailable:
+        pass
+    return caches
+
+
+def service_families() -> Iterator[Family]:
+    """Gauges and counters read from service stats() at scrape time"""
+    caches = _cache_lookups()
+    lookups: List[Tuple[Dict[str, str], float]] = []
+    ratios: List[Tuple[Dict[str, str], float]] = []
+    for cache, results in caches.items():
+        lookups.extend(({"cache": cache, "result": result}, count) for result, count in results.items())
+        total = sum(results.values())
+        if total:
+            ratios.append(({"cache": cache}, round(1 - results["miss"] / total, 4)))
+    yield "cache_lookups_total", "counter", "Cache lookups by cache and result", lookups
+    yield "cache_hit_ratio", "gauge", "Share of cache lookups served without recomputing", ratios
+
+    engine = get_run_engine().stats()
+    yield "runs_queued", "gauge", "Runs waiting for a worker", [({}, engine["queued"])]
+    yield "runs_running", "gauge", "Runs executing", [({}, engine["running"])]
+    yield "runs_finished_total", "counter", "Runs finished by outcome", [
+        ({"outcome": outcome}, engine[outcome]) for outcome in ("succeeded", "failed")
+    ]
+
+    registry = get_session_registry().stats()
+    yield "browserbase_sessions_active", "gauge", "Browserbase sessions handed out", [({}, registry["active"])]
+    yield "browserbase_session_slot_waiters", "gauge", "Requests waiting for a session slot", [
+        ({}, registry["waiting"])
+    ]
+
+
+@router.get("/v1/metrics")
+def metrics():
+    """Prometheus text exposition format"""
+    return Response(get_metrics().render(service_families), media_type=CONTENT_TYPE)
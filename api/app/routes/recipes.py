@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from app.services.recipes import get_recipe_registry
+
+router = APIRouter(prefix="/v1/recipes", tags=["recipes"])
+
+@router.get("")
+def list_recipes():
+    """Compiled recipes (latest files on disk) plus any that failed to compile"""
+    registry = get_recipe_registry()
+    return {
+        "items": [
+            {"id": p.id, "name": p.name, "version": p.version, "steps": len(p.steps), "content_hash": p.content_hash}
+            for p in registry.list()
+        ],
+        "errors": registry.errors(),
+    }
+
+@router.get("/{recipe_id:path}")
+def get_recipe(recipe_id: str, version: int | None = None):
+    plan = get_recipe_registry().get(recipe_id, version)
+    if not plan:
+        raise HTTPException(404, "Recipe not found")
+    return plan
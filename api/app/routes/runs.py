@@ -1,34 +1,178 @@
 # app/routes/runs.py
-from fastapi import APIRouter, HTTPException
+from urllib.parse import urlparse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from app.models import (
-    RunRequest,
-    RunResponse,
     EvaluationDetailsRequest,
     EvaluationDetailsResponse,
     RobotsAnalysisRequest,
     RobotsAnalysisResponse,
+    SitemapEnumerationRequest,
     AIRules,
     CreateSessionRequest,
     CreateSessionResponse
 )
 
+from app.schemas import MatrixRequest, RunRequest, RunResponse, RunSummary, Score
+from app.services.event_streams import HEARTBEAT, format_sse, get_event_stream_hub, last_event_id_for
+from app.services.run_engine import get_run_engine
+from app.services.run_matrix import MATRIX_MAX_CELLS, MatrixScheduler
+from app.services.run_store import RunRecord
 from app.services.sessions import create_browser_session
-from app.services.robots_service import RobotsAnalysisService
+from app.services.session_registry import client_id_for, client_label_for
+from app.services.tracing import get_tracer, waterfall
+from app.services.robots_service import (
+    RobotsAnalysisService,
+    SITEMAP_MAX_BYTES,
+    SITEMAP_MAX_URLS,
+)
 from app.services.evaluate import EvaluationService
 
 router = APIRouter()  # /v1 prefix comes from main.py
 
 @router.post("/session/create")
-def create_session(req: CreateSessionRequest):
-    return create_browser_session(req.url)
+async def create_session(req: CreateSessionRequest, request: Request):
+    return await create_browser_session(req.url, client_id_for(request), client_label_for(request))
 
 @router.post("/runs", response_model=RunResponse)
-def create_run(req: RunRequest) -> RunResponse:
-    # TODO: enqueue & persist; return real IDs/URLs
-    return RunResponse(
-        run_id="run_demo_1",
-        session_live_view_url="https://provider.live/sessions/sess_demo_1",
-        session_id="sess_demo_1",
+async def create_run(req: RunRequest) -> RunResponse:
+    """Queue a run; it executes in the background (poll GET /runs/{run_id})"""
+    run = await get_run_engine().enqueue(
+        site=req.site,
+        task_id=req.task_id,
+        variant=req.variant.model_dump(),
+        payload=req.payload,
+        priority=req.priority,
+    )
+    return RunResponse(run_id=run.run_id, status=run.status)
+
+
+@router.post("/runs/matrix")
+async def create_run_matrix(req: MatrixRequest, request: Request):
+    """
+    Run every site x task x variant-dimension combination and stream progress (SSE):
+    - emits {"status":"started", "streamId": "...", "cells": n, "dimensions": {...}}
+    - emits {"cell": {...}, "aggregates": {...}} as each cell finishes (or is reused),
+      with latency/success for the dimension values that cell belongs to
+    - emits {"status":"completed", "aggregates": {...}} for every dimension
+
+    Resume with GET /runs/matrix/stream/{streamId} and Last-Event-ID.
+    """
+    scheduler = MatrixScheduler(get_run_engine(), req)
+    if len(scheduler.cells) > MATRIX_MAX_CELLS:
+        raise HTTPException(400, f"Matrix has {len(scheduler.cells)} cells (limit {MATRIX_MAX_CELLS})")
+    hub = get_event_stream_hub()
+    stream = hub.open(scheduler.run)
+    return hub.response(stream, request)
+
+
+@router.get("/runs/matrix/stream/{stream_id}")
+async def resume_run_matrix(stream_id: str, request: Request):
+    hub = get_event_stream_hub()
+    stream = hub.get(stream_id)
+    if not stream:
+        raise HTTPException(404, "Unknown or expired stream")
+    return hub.response(stream, request, last_event_id_for(request))
+
+
+def _get_run_or_404(run_id: str) -> RunRecord:
+    run = get_run_engine().store.get_run(run_id)
+    if not run:
+        raise HTTPException(404, "Run not found")
+    return run
+
+
+@router.get("/runs/stats")
+def run_engine_stats():
+    engine = get_run_engine()
+    return {**engine.stats(), "by_status": engine.store.counts()}
+
+
+@router.get("/runs/{run_id}", response_model=RunSummary)
+def get_run(run_id: str) -> RunSummary:
+    run = _get_run_or_404(run_id)
+    return RunSummary(
+        run_id=run.run_id,
+        site=run.site,
+        task_id=run.task_id,
+        status=run.status,
+        started_at=run.started_at,
+        finished_at=run.finished_at,
+        session_id=run.session_id,
+        session_live_view_url=run.session_live_view_url,
+        links={
+            "events": f"/v1/runs/{run.run_id}/events",
+            "score": f"/v1/runs/{run.run_id}/score",
+        },
+    )
+
+
+@router.get("/runs/{run_id}/events")
+def list_events(
+    run_id: str,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    since: str | None = None,
+):
+    """Page through a run's events; `since` (ISO timestamp) skips older ones"""
+    _get_run_or_404(run_id)
+    try:
+        items, next_cursor = get_run_engine().events.read(run_id, cursor, limit, since)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor or since")
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/runs/{run_id}/events/stream")
+async def follow_events(run_id: str, request: Request):
+    """Tail a run's events as SSE until it finishes; resumes after Last-Event-ID"""
+    _get_run_or_404(run_id)
+    last_event_id = last_event_id_for(request)
+    events = get_run_engine().events
+
+    async def body():
+        async for item in events.follow(run_id, str(last_event_id) if last_event_id else None):
+            if await request.is_disconnected():
+                return
+            if item is None:
+                yield HEARTBEAT
+            else:
+                seq, event = item
+                yield format_sse(event, seq)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/runs/{run_id}/trace")
+def get_run_trace(run_id: str):
+    """Span waterfall for a run (from the request that queued it to completion) and its critical path"""
+    _get_run_or_404(run_id)
+    collector = get_tracer().collector
+    trace_id = collector.trace_id_for_run(run_id)
+    if trace_id is None:
+        raise HTTPException(404, "No trace recorded for this run (tracing off, unsampled or evicted)")
+    return waterfall(collector.trace(trace_id))
+
+
+@router.get("/traces/{trace_id}")
+def get_trace(trace_id: str):
+    spans = get_tracer().collector.trace(trace_id)
+    if not spans:
+        raise HTTPException(404, "Trace not found")
+    return waterfall(spans)
+
+
+@router.get("/runs/{run_id}/score", response_model=Score)
+def get_score(run_id: str) -> Score:
+    run = _get_run_or_404(run_id)
+    if run.status not in ("succeeded", "failed"):
+        raise HTTPException(409, f"Run is {run.status}")
+    result = run.result or {}
+    return Score(
+        success=run.status == "succeeded",
+        time_to_success_ms=result.get("duration_ms") if run.status == "succeeded" else None,
+        fail_reason=run.error,
+        metrics={k: float(v) for k, v in result.items() if isinstance(v, (int, float)) and not isinstance(v, bool)},
     )
 
 
@@ -91,8 +235,11 @@ def analyze_robots(req: RobotsAnalysisRequest) -> RobotsAnalysisResponse:
         # Analyze AI rules if robots.txt exists
         ai_rules = None
         llm_suggestions = None
+        sitemaps = []
         
         if has_robots and content:
+            sitemaps = robots_service.extract_sitemaps(content, robots_url)
+
             # Analyze AI permissions
             ai_analysis = robots_service.analyze_ai_permissions(content)
             ai_rules = AIRules(**ai_analysis)
@@ -105,6 +252,7 @@ def analyze_robots(req: RobotsAnalysisRequest) -> RobotsAnalysisResponse:
             robots_url=robots_url,
             robots_content=content,
             ai_rules=ai_rules,
+            sitemaps=sitemaps,
             llm_suggestions=llm_suggestions
         )
         
@@ -113,3 +261,31 @@ def analyze_robots(req: RobotsAnalysisRequest) -> RobotsAnalysisResponse:
             has_robots_txt=False,
             error=str(e)
         )
+
+
+@router.post("/robots/sitemap")
+def enumerate_sitemap(req: SitemapEnumerationRequest):
+    """Stream (one per line) the sitemap URLs that robots.txt allows for user_agent"""
+    robots_service = RobotsAnalysisService()
+
+    parsed = urlparse(str(req.url))
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+
+    has_robots, robots_url, content = robots_service.check_robots_txt(origin)
+    rules = None
+    sitemaps = []
+    if has_robots is True and content:
+        rules = robots_service.compile_rules(content, req.user_agent)
+        sitemaps = robots_service.extract_sitemaps(content, robots_url)
+
+    # No Sitemap: lines -> try the conventional location
+    if not sitemaps:
+        sitemaps = [f"{origin}/sitemap.xml"]
+
+    urls = robots_service.iter_sitemap_urls(
+        sitemaps,
+        rules,
+        max_urls=max(1, min(req.max_urls, SITEMAP_MAX_URLS)),
+        max_bytes=max(1, min(req.max_bytes, SITEMAP_MAX_BYTES)),
+    )
+    return StreamingResponse((f"{url}\n" for url in urls), media_type="text/plain")
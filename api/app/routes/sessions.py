@@ -1,13 +1,20 @@
 import os
-import httpx
-from fastapi import APIRouter, HTTPException, Path
+import asyncio
+from fastapi import APIRouter, HTTPException, Path, Query, Request
 from pydantic import BaseModel, HttpUrl
+from app.services import browserbase
+from app.services.session_pool import SessionPoolKey, get_session_pool
+from app.services.session_registry import client_id_for, client_label_for, get_session_registry
+from app.services.session_status import TERMINAL_STATUSES, get_session_status_cache
 
 router = APIRouter(prefix="/v1/sessions", tags=["sessions"])
 
 BB_KEY = os.getenv("BROWSERBASE_API_KEY")
 BB_PROJECT = os.getenv("BROWSERBASE_PROJECT_ID")
-BB_URL = "https://www.browserbase.com/v1/sessions"
+
+# Batch status lookups
+BATCH_MAX_SESSIONS = 100
+BATCH_CONCURRENCY = int(os.getenv("BB_STATUS_BATCH_CONCURRENCY", "10"))
 
 class AddToCartRequest(BaseModel):
     url: HttpUrl
@@ -16,6 +23,10 @@ class AddToCartRequest(BaseModel):
     proxies: list[str] | None = None
     experimental: dict | None = None
 
+class SessionStatusBatchRequest(BaseModel):
+    session_ids: list[str]
+    slim: bool = True                        # only id/status/debuggerFullscreenUrl
+
 class SessionResponse(BaseModel):
     id: str | None = None
     status: str | None = None
@@ -33,8 +44,18 @@ def _normalize_os(device_type: str | None) -> str | None:
         return "linux"
     return None  # unknown -> omit
 
+def _session_view(data: dict, slim: bool = False) -> dict:
+    view = {
+        "id": data.get("id") or data.get("sessionId"),
+        "status": data.get("status"),
+        "debuggerFullscreenUrl": data.get("debuggerFullscreenUrl") or data.get("debuggerUrl"),
+    }
+    if not slim:
+        view["raw"] = data  # full Browserbase payload
+    return view
+
 @router.post("/add-to-cart", response_model=SessionResponse)
-async def create_add_to_cart_session(req: AddToCartRequest):
+async def create_add_to_cart_session(req: AddToCartRequest, request: Request):
     if not BB_KEY:
         raise HTTPException(status_code=500, detail="Missing BROWSERBASE_API_KEY")
 
@@ -58,18 +79,20 @@ async def create_add_to_cart_session(req: AddToCartRequest):
         payload["proxies"] = req.proxies
 
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            r = await client.post(
-                BB_URL,
-                json=payload,
-                headers={
-                    "content-type": "application/json",
-                    "x-bb-api-key": BB_KEY,   # REQUIRED
-                },
-            )
-        if r.status_code not in (200, 201):
-            raise HTTPException(status_code=502, detail=f"Browserbase {r.status_code}: {r.text}")
-        data = r.json()
+        # Queue for a free slot under the project/client concurrency quotas
+        async with get_session_registry().slot(
+            BB_PROJECT, client_id_for(request), client_label_for(request)
+        ) as slot:
+            pool = get_session_pool()
+            if pool.enabled and not req.proxies:
+                data = await pool.acquire(SessionPoolKey(
+                    os=browser_settings.get("os"),
+                    advanced_stealth=req.advanced_stealth,
+                ))
+            else:
+                data = await browserbase.create_session(BB_KEY, payload)
+            slot.bind(data.get("id") or data.get("sessionId"))
+
         return SessionResponse(
             id=data.get("id") or data.get("sessionId"),
             status=data.get("status"),
@@ -80,24 +103,79 @@ async def create_add_to_cart_session(req: AddToCartRequest):
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
+@router.get("/pool")
+async def get_session_pool_stats():
+    """Warm session pool sizes and hit-rate metrics"""
+    return get_session_pool().stats()
+
+@router.get("/registry")
+async def get_session_registry_stats():
+    """Tracked sessions, quota utilization and warm-pool idle counts"""
+    pool = get_session_pool().stats()
+    return {
+        **get_session_registry().stats(),
+        "pool_idle": sum(key["idle"] for key in pool["keys"].values()),
+    }
+
+@router.get("/status/cache")
+async def get_session_status_cache_stats():
+    """Status cache hit/coalesce counters"""
+    return get_session_status_cache().stats()
+
+@router.post("/status")
+async def get_session_statuses(req: SessionStatusBatchRequest):
+    """Fetch status for many sessions concurrently in one round trip"""
+    if not BB_KEY:
+        raise HTTPException(500, "Missing BROWSERBASE_API_KEY")
+    session_ids = list(dict.fromkeys(req.session_ids))  # de-dupe, keep order
+    if len(session_ids) > BATCH_MAX_SESSIONS:
+        raise HTTPException(400, f"At most {BATCH_MAX_SESSIONS} session ids per request")
+
+    cache = get_session_status_cache()
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def lookup(session_id: str):
+        async with limit:
+            try:
+                return session_id, _session_view(await cache.get(session_id), req.slim), None
+            except HTTPException as e:
+                return session_id, None, str(e.detail)
+            except Exception as e:
+                return session_id, None, str(e)
+
+    results = await asyncio.gather(*(lookup(sid) for sid in session_ids))
+    return {
+        "items": {sid: view for sid, view, error in results if error is None},
+        "errors": {sid: error for sid, _, error in results if error is not None},
+    }
+
 @router.get("/{session_id}")
-async def get_session(session_id: str = Path(..., description="Browserbase session id")):
+async def get_session(
+    session_id: str = Path(..., description="Browserbase session id"),
+    slim: bool = Query(False, description="Omit the raw Browserbase payload"),
+):
     if not BB_KEY:
         raise HTTPException(500, "Missing BROWSERBASE_API_KEY")
-    url = f"{BB_URL}/{session_id}"
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            r = await client.get(url, headers={"x-bb-api-key": BB_KEY})
-        if r.status_code != 200:
-            raise HTTPException(502, f"Browserbase {r.status_code}: {r.text}")
-        data = r.json()
-        return {
-            "id": data.get("id") or data.get("sessionId"),
-            "status": data.get("status"),
-            "debuggerFullscreenUrl": data.get("debuggerFullscreenUrl") or data.get("debuggerUrl"),
-            "raw": data,  # optional: remove if you don’t want extra fields
-        }
+        data = await get_session_status_cache().get(session_id)
+        registry = get_session_registry()
+        if data.get("status") in TERMINAL_STATUSES:
+            await registry.forget(session_id)
+        else:
+            registry.touch(session_id)  # someone is still watching this session
+        return _session_view(data, slim)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(502, str(e))
+
+@router.delete("/{session_id}")
+async def release_session(session_id: str = Path(..., description="Browserbase session id")):
+    """Release a session now instead of waiting for the idle reaper / provider timeout"""
+    if not BB_KEY:
+        raise HTTPException(500, "Missing BROWSERBASE_API_KEY")
+    if not await get_session_registry().release(session_id):
+        # Not created through this process; release it upstream anyway
+        await browserbase.release_session(BB_KEY, BB_PROJECT, session_id)
+    get_session_status_cache().invalidate(session_id)
+    return {"id": session_id, "released": True}
@@ -1,9 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, conint, model_validator
 from typing import Optional, Dict, Any, List
 
 class Variant(BaseModel):
+    # Other variant dimensions (model, env, stealth, proxies, ...) are kept as given
+    model_config = ConfigDict(extra="allow")
     perception: Optional[str] = "dom"           # dom|vision
     runtime: Optional[str] = "playwright_local" # playwright_local|browser_provider
+    network: Optional[str] = "live"             # live|record|replay (HAR capture)
     
 class CreateSessionRequest(BaseModel):
     url: str
@@ -20,6 +23,26 @@ class RunRequest(BaseModel):
     task_id: str
     variant: Variant
     payload: Optional[Dict[str, Any]] = None
+    priority: int = 0  # higher runs first; FIFO within a priority
+
+class MatrixRequest(BaseModel):
+    sites: List[str] = Field(min_length=1)
+    task_ids: List[str] = Field(min_length=1)
+    variant: Variant = Variant()                      # base variant every cell starts from
+    dimensions: Dict[str, List[Any]] = {}             # variant field -> values to sweep
+    payload: Optional[Dict[str, Any]] = None
+    priority: int = 0
+    concurrency: int = Field(4, ge=1)                 # cells in flight at once
+    dimension_limits: Dict[str, conint(ge=1)] = {}    # e.g. {"model": 2, "site": 1}: cells in flight per value
+    max_age_seconds: float = Field(3600, ge=0)        # reuse succeeded cells this fresh; 0 always re-runs
+
+    @model_validator(mode="after")
+    def _limits_name_dimensions(self):
+        # A limit on a dimension no cell has would be silently ignored
+        unknown = set(self.dimension_limits) - {"site", "task_id"} - set(self.dimensions)
+        if unknown:
+            raise ValueError(f"dimension_limits for unknown dimensions: {', '.join(sorted(unknown))}")
+        return self
 
 class RunResponse(BaseModel):
     run_id: str
@@ -32,6 +55,8 @@ class RunSummary(BaseModel):
     status: str
     started_at: Optional[str] = None
     finished_at: Optional[str] = None
+    session_id: Optional[str] = None
+    session_live_view_url: Optional[str] = None
     links: Dict[str, str] = {}
 
 class RunEvent(BaseModel):
@@ -0,0 +1,93 @@
+"""
+Browserbase REST helpers shared by the session routes, services and the warm session pool
+
+All calls go through the shared client from app.services.http_client.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.services.http_client import get_http_client
+from app.services.metrics import get_metrics
+from app.services.tracing import get_tracer
+
+# Point at the fake server (app/fakes/browserbase.py) for local runs and tests
+BB_API_URL = os.getenv("BROWSERBASE_API_URL", "https://www.browserbase.com/v1").rstrip("/")
+BB_SESSIONS_URL = f"{BB_API_URL}/sessions"
+
+
+def bb_headers(api_key: str) -> Dict[str, str]:
+    return {"content-type": "application/json", "x-bb-api-key": api_key}
+
+
+async def create_session(
+    api_key: str, payload: Dict[str, Any], client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """POST /sessions; raises HTTPException(502) on a non-2xx response"""
+    client = client or get_http_client()
+    with (
+        get_tracer().span("browserbase.create_session") as span,
+        get_metrics().browserbase_call("create_session") as call,
+    ):
+        r = await client.post(BB_SESSIONS_URL, json=payload, headers=bb_headers(api_key))
+        span.set("status_code", r.status_code)
+        call.status_code = r.status_code
+    if r.status_code not in (200, 201):
+        raise HTTPException(502, f"Browserbase {r.status_code}: {r.text}")
+    return r.json()
+
+
+async def get_session(
+    api_key: str, session_id: str, client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """GET /sessions/{id}"""
+    client = client or get_http_client()
+    with (
+        get_tracer().span("browserbase.get_session", session_id=session_id) as span,
+        get_metrics().browserbase_call("get_session", ok=(200,)) as call,
+    ):
+        r = await client.get(f"{BB_SESSIONS_URL}/{session_id}", headers=bb_headers(api_key))
+        span.set("status_code", r.status_code)
+        call.status_code = r.status_code
+    if r.status_code != 200:
+        raise HTTPException(502, f"Browserbase {r.status_code}: {r.text}")
+    return r.json()
+
+
+async def get_debug_urls(
+    api_key: str, session_id: str, client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """GET /sessions/{id}/debug (live view + CDP URLs)"""
+    client = client or get_http_client()
+    with (
+        get_tracer().span("browserbase.get_debug_urls", session_id=session_id) as span,
+        get_metrics().browserbase_call("get_debug_urls", ok=(200,)) as call,
+    ):
+        r = await client.get(f"{BB_SESSIONS_URL}/{session_id}/debug", headers=bb_headers(api_key))
+        span.set("status_code", r.status_code)
+        call.status_code = r.status_code
+    if r.status_code != 200:
+        raise HTTPException(502, f"Browserbase {r.status_code}: {r.text}")
+    return r.json()
+
+
+async def release_session(
+    api_key: str, project_id: Optional[str], session_id: str, client: Optional[httpx.AsyncClient] = None
+) -> None:
+    """Ask Browserbase to end a session early so it stops billing"""
+    client = client or get_http_client()
+    with (
+        get_tracer().span("browserbase.release_session", session_id=session_id) as span,
+        get_metrics().browserbase_call("release_session") as call,
+    ):
+        r = await client.post(
+            f"{BB_SESSIONS_URL}/{session_id}",
+            json={"projectId": project_id, "status": "REQUEST_RELEASE"},
+            headers=bb_headers(api_key),
+        )
+        span.set("status_code", r.status_code)
+        call.status_code = r.status_code
+    if r.status_code not in (200, 201):
+        raise HTTPException(502, f"Browserbase {r.status_code}: {r.text}")
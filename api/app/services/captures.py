@@ -0,0 +1,84 @@
+"""
+Network captures for deterministic reruns
+
+A run in `record` mode saves every request/response the browser makes to a HAR
+archive (`<name>.har.zip`: the HAR index plus response bodies stored as
+separate entries in the zip). A run in `replay` mode serves every request from
+that archive and aborts anything that wasn't captured, so reruns need no network
+and see exactly the same site. `live` (the default) does neither.
+
+Captures are named; by default the recipe id (or a hash of ad-hoc steps) so a
+recorded recipe is replayed by simply re-running it with `network: replay`.
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Sequence, Union
+
+from pydantic import BaseModel, ConfigDict
+
+NetworkMode = Literal["live", "record", "replay"]
+NETWORK_MODES = ("live", "record", "replay")
+CAPTURE_SUFFIX = ".har.zip"
+
+DEFAULT_CAPTURE_DIR = Path(__file__).resolve().parents[2] / "captures"
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class CaptureNotFound(FileNotFoundError):
+    pass
+
+
+class NetworkCapture(BaseModel):
+    """Where and how a single run records or replays its traffic"""
+    model_config = ConfigDict(frozen=True)
+    mode: NetworkMode
+    name: str
+    path: str
+
+
+def capture_name_for_steps(steps: Sequence[Dict[str, Any]]) -> str:
+    digest = hashlib.sha256(json.dumps(list(steps), sort_keys=True).encode()).hexdigest()
+    return f"steps-{digest[:16]}"
+
+
+class CaptureStore:
+    def __init__(self, directory: Union[str, Path] = DEFAULT_CAPTURE_DIR):
+        self.directory = Path(directory)
+
+    def path_for(self, name: str) -> Path:
+        return self.directory / f"{_UNSAFE.sub('_', name)}{CAPTURE_SUFFIX}"
+
+    def capture(self, mode: Optional[str], name: str) -> Optional[NetworkCapture]:
+        """Capture settings for a run, or None for live traffic"""
+        mode = mode or "live"
+        if mode not in NETWORK_MODES:
+            raise ValueError(f"Unsupported network mode: {mode} (expected one of {list(NETWORK_MODES)})")
+        if mode == "live":
+            return None
+        path = self.path_for(name)
+        if mode == "replay" and not path.is_file():
+            raise CaptureNotFound(f"No capture recorded for {name!r}; run it once with network 'record'")
+        if mode == "record":
+            self.directory.mkdir(parents=True, exist_ok=True)
+        return NetworkCapture(mode=mode, name=name, path=str(path))
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.directory.is_dir():
+            return []
+        return [
+            {"file": p.name, "bytes": p.stat().st_size, "modified": p.stat().st_mtime}
+            for p in sorted(self.directory.glob(f"*{CAPTURE_SUFFIX}"))
+        ]
+
+
+_store: Optional[CaptureStore] = None
+
+
+def get_capture_store() -> CaptureStore:
+    global _store
+    if _store is None:
+        _store = CaptureStore(os.getenv("HAR_CAPTURE_DIR", str(DEFAULT_CAPTURE_DIR)))
+    return _store
@@ -9,6 +9,9 @@ from PIL import Image
 import backoff
 from openai import APIConnectionError, APIError, RateLimitError, OpenAI
 
+from app.services.metrics import get_metrics
+from app.services.tracing import get_tracer
+
 
 class EvaluationService:
     MAX_IMAGE = 50
@@ -34,7 +37,7 @@ class EvaluationService:
     def log_error(details):
         print(f"Retrying in {details['wait']:0.1f}s due to {details['exception']}")
 
-    def generate(self, messages, max_new_tokens=512, temperature=0, model=None, **kwargs):
+    def generate(self, messages, max_new_tokens=512, temperature=0, model=None, call_type="generate", **kwargs):
         model = model if model else self.model
 
         @backoff.on_exception(
@@ -51,9 +54,19 @@ class EvaluationService:
                 temperature=temperature,
                 **kwargs
             )
-            return [choice.message.content for choice in response.choices]
+            return response
 
-        return _call()
+        with (
+            get_tracer().span("llm.generate", model=model, call_type=call_type) as span,
+            get_metrics().llm_call(model, call_type) as call,
+        ):
+            response = _call()
+            usage = getattr(response, "usage", None)
+            call.record_usage(usage)
+            if usage is not None:
+                span.set("prompt_tokens", usage.prompt_tokens)
+                span.set("completion_tokens", usage.completion_tokens)
+        return [choice.message.content for choice in response.choices]
 
     @staticmethod
     def extract_prediction(response: str) -> int:
@@ -132,7 +145,7 @@ class EvaluationService:
             {"role": "system", "content": system_msg},
             {"role": "user", "content": [{"type": "text", "text": prompt}] + input_images_msg},
         ]
-        responses = await asyncio.to_thread(self.generate, messages)
+        responses = await asyncio.to_thread(self.generate, messages, call_type="key_points")
         return responses[0]
 
     async def judge_image(self, task, input_images, image_input, key_points):
@@ -160,7 +173,7 @@ class EvaluationService:
                 {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{eval_img_b64}", "detail": "high"}},
             ]
         })
-        responses = await asyncio.to_thread(self.generate, messages)
+        responses = await asyncio.to_thread(self.generate, messages, call_type="judge")
         return responses[0]
 
     async def WebJudge_general_eval(
@@ -201,12 +214,15 @@ class EvaluationService:
         final_result_response: Optional[str], input_image_paths: Optional[List[str]],
         score_threshold: int = 3
     ) -> dict:
-        decoded_images = self.decode_base64_screenshots(screenshots)
-        messages, text, system_msg, record, key_points = asyncio.run(
-            self.WebJudge_general_eval(task_description, input_image_paths, thoughts, action_history, decoded_images, score_threshold)
-        )
-        response = self.generate(messages)[0]
-        predicted_label = self.extract_prediction(response)
+        tracer = get_tracer()
+        with tracer.span("eval.task", task_id=task_id, screenshots=len(screenshots)):
+            with tracer.span("eval.decode_screenshots"):
+                decoded_images = self.decode_base64_screenshots(screenshots)
+            messages, text, system_msg, record, key_points = asyncio.run(
+                self.WebJudge_general_eval(task_description, input_image_paths, thoughts, action_history, decoded_images, score_threshold)
+            )
+            response = self.generate(messages, call_type="verdict")[0]
+            predicted_label = self.extract_prediction(response)
         return {
             "task_id": task_id,
             "task_description": task_description,
@@ -0,0 +1,463 @@
+"""
+Append-only, segmented run event log
+
+Run steps are appended in memory and written to disk by a background task in
+batches, so emitting an event never blocks a run on I/O. Records go to
+newline-delimited JSON segment files (`events-00000001.jsonl`, ...) that roll
+over at `segment_max_bytes`; an in-memory index per run (sequence number,
+timestamp, segment, offset) serves cursor-paginated reads and time filters
+without scanning other runs' events, and lets followers tail a run live.
+
+Retention drops events older than `retention_seconds`; compaction rewrites
+sealed segments once most of their records are dead and deletes empty ones.
+The index is rebuilt from the segments on startup.
+"""
+import asyncio
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def as_utc(ts: str) -> str:
+    """An ISO timestamp in utc_now()'s form, so it orders correctly against stored ones; naive means UTC"""
+    parsed = datetime.fromisoformat(ts)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+class IndexEntry(NamedTuple):
+    seq: int
+    ts: str
+    segment: int
+    offset: int
+    length: int
+
+
+class RunIndex:
+    """Per-run entries in sequence order, with a parallel list of timestamps for bisecting"""
+
+    def __init__(self):
+        self.entries: List[IndexEntry] = []
+        self.seqs: List[int] = []
+        self.timestamps: List[str] = []
+
+    def add(self, entry: IndexEntry) -> None:
+        self.entries.append(entry)
+        self.seqs.append(entry.seq)
+        self.timestamps.append(entry.ts)
+
+    def replace(self, entries: List[IndexEntry]) -> None:
+        self.entries = entries
+        self.seqs = [e.seq for e in entries]
+        self.timestamps = [e.ts for e in entries]
+
+
+def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "ts": record["ts"],
+        "step": record["step"],
+        "action": record["action"],
+        "status": record["status"],
+        "details": record.get("details") or {},
+    }
+
+
+class RunEventLog:
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 8 * 1024 * 1024,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        retention_seconds: Optional[float] = None,
+        compact_interval: float = 300.0,
+        compact_dead_ratio: float = 0.5,
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_seconds = retention_seconds
+        self.compact_interval = compact_interval
+        self.compact_dead_ratio = compact_dead_ratio
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()  # index / segment bookkeeping (reads may come from worker threads)
+        self._index: Dict[str, RunIndex] = {}
+        self._closed: Set[str] = set()
+        self._segments: Dict[int, int] = {}  # segment number -> record count
+        # Bumped whenever compaction replaces or deletes a segment, invalidating offsets readers copied
+        self._generations: Dict[int, int] = {}
+        self._active = 1
+        self._active_size = 0
+        self._seq = 0
+
+        self._pending: List[Dict[str, Any]] = []
+        self._flushing: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._new_events = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._maintenance: Optional[asyncio.Task] = None
+        self._counters = {"appended": 0, "flushes": 0, "compactions": 0, "expired": 0}
+
+        self._recover()
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}")
+
+    def _recover(self) -> None:
+        """Rebuild the index from whatever segments are on disk"""
+        segments = sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        for segment in segments:
+            self._segments[segment] = 0
+            offset = 0
+            torn = False
+            with open(self._segment_path(segment), "rb") as f:
+                for line in f:
+                    length = len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        break
+                    self._index_record(record, segment, offset, length)
+                    self._seq = max(self._seq, record["seq"])
+                    offset += length
+            if torn:
+                # Crash mid-write: drop the partial tail so later appends stay readable
+                os.truncate(self._segment_path(segment), offset)
+            self._active, self._active_size = segment, offset
+
+    async def start(self) -> None:
+        self._ensure_writer()
+        if self._maintenance is None and self.compact_interval:
+            self._maintenance = asyncio.create_task(self._maintenance_loop())
+
+    async def close(self) -> None:
+        """Flush what's buffered and stop background tasks"""
+        for task in (self._writer, self._maintenance):
+            if task:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._writer, self._maintenance) if t), return_exceptions=True)
+        self._writer = self._maintenance = None
+        await self.flush()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._writer_loop())
+
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+    def append(
+        self,
+        run_id: str,
+        step: str,
+        action: str,
+        status: str = "ok",
+        details: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Buffer one event and return its sequence number; never touches disk"""
+        self._seq += 1
+        self._pending.append(
+            {"seq": self._seq, "run_id": run_id, "ts": utc_now(), "step": step, "action": action,
+             "status": status, "details": details or {}}
+        )
+        self._counters["appended"] += 1
+        self._signal()
+        return self._seq
+
+    def close_run(self, run_id: str) -> None:
+        """Mark a run as finished so followers stop once they've drained it"""
+        self._seq += 1
+        self._pending.append({"seq": self._seq, "run_id": run_id, "ts": utc_now(), "type": "close"})
+        self._closed.add(run_id)
+        self._signal()
+
+    def _signal(self) -> None:
+        self._new_events.set()
+        self._new_events = asyncio.Event()
+        self._wake.set()
+        try:
+            self._ensure_writer()
+        except RuntimeError:
+            # No running loop (sync caller); the next flush() picks the buffer up
+            pass
+
+    async def _writer_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if len(self._pending) < self.batch_size:
+                # Let a burst accumulate into one write
+                await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            # Swap under the lock so a reader thread always sees each record somewhere
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._flushing = batch
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            finally:
+                with self._lock:
+                    self._flushing = []
+            self._counters["flushes"] += 1
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        lines = [(json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8") for record in batch]
+        chunks: List[Tuple[int, List[Tuple[Dict[str, Any], bytes]]]] = []
+        with self._lock:
+            segment, size = self._active, self._active_size
+            for record, line in zip(batch, lines):
+                if size and size + len(line) > self.segment_max_bytes:
+                    segment, size = segment + 1, 0
+                if not chunks or chunks[-1][0] != segment:
+                    chunks.append((segment, []))
+                chunks[-1][1].append((record, line))
+                size += len(line)
+
+        for segment, items in chunks:
+            with open(self._segment_path(segment), "ab") as f:
+                offset = f.tell()
+                f.write(b"".join(line for _, line in items))
+            with self._lock:
+                self._segments.setdefault(segment, 0)
+                for record, line in items:
+                    self._index_record(record, segment, offset, len(line))
+                    offset += len(line)
+                self._active, self._active_size = segment, offset
+
+    def _index_record(self, record: Dict[str, Any], segment: int, offset: int, length: int) -> None:
+        self._segments[segment] = self._segments.get(segment, 0) + 1
+        if record.get("type") == "close":
+            self._closed.add(record["run_id"])
+            return
+        index = self._index.setdefault(record["run_id"], RunIndex())
+        index.add(IndexEntry(record["seq"], record["ts"], segment, offset, length))
+
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+    def _records(
+        self, run_id: str, after: int = 0, limit: int = 100, since: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Up to limit raw records for run_id with seq > after (and ts >= since), oldest first"""
+        if since:
+            since = as_utc(since)
+        while True:
+            with self._lock:
+                index = self._index.get(run_id)
+                entries: List[IndexEntry] = []
+                if index:
+                    start = bisect.bisect_right(index.seqs, after)
+                    if since:
+                        start = max(start, bisect.bisect_left(index.timestamps, since))
+                    entries = index.entries[start:start + limit]
+                generations = {e.segment: self._generations.get(e.segment, 0) for e in entries}
+                unflushed = self._flushing + self._pending
+
+            # Files are read outside the lock; if compaction rewrote one of the segments meanwhile,
+            # the copied offsets are stale, so start over from the updated index
+            try:
+                records = self._read_entries(entries)
+            except (OSError, ValueError):
+                if self._segments_changed(generations):
+                    continue
+                raise
+            if self._segments_changed(generations):
+                continue
+            break
+
+        if len(records) < limit:
+            last = records[-1]["seq"] if records else after
+            for record in unflushed:
+                if (
+                    record["run_id"] == run_id
+                    and record["seq"] > last
+                    and record.get("type") != "close"
+                    and (not since or record["ts"] >= since)
+                ):
+                    records.append(record)
+                    if len(records) >= limit:
+                        break
+        return records
+
+    def _read_entries(self, entries: List[IndexEntry]) -> List[Dict[str, Any]]:
+        records = []
+        handles: Dict[int, Any] = {}
+        try:
+            for entry in entries:
+                f = handles.get(entry.segment)
+                if f is None:
+                    f = handles[entry.segment] = open(self._segment_path(entry.segment), "rb")
+                f.seek(entry.offset)
+                records.append(json.loads(f.read(entry.length)))
+        finally:
+            for f in handles.values():
+                f.close()
+        return records
+
+    def _segments_changed(self, generations: Dict[int, int]) -> bool:
+        with self._lock:
+            return any(self._generations.get(segment, 0) != gen for segment, gen in generations.items())
+
+    def read(
+        self, run_id: str, cursor: Optional[str] = None, limit: int = 100, since: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of RunEvents after cursor, plus the cursor for the next page (None at the end)"""
+        after = int(cursor) if cursor else 0
+        records = self._records(run_id, after, limit + 1, since)
+        next_cursor = str(records[limit - 1]["seq"]) if len(records) > limit else None
+        return [_public(r) for r in records[:limit]], next_cursor
+
+    def is_closed(self, run_id: str) -> bool:
+        return run_id in self._closed
+
+    async def follow(
+        self, run_id: str, cursor: Optional[str] = None, heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[Optional[Tuple[int, Dict[str, Any]]]]:
+        """Yield (seq, event) as the run emits them until it is closed; None means 'still alive'"""
+        after = int(cursor) if cursor else 0
+        while True:
+            waiter = self._new_events
+            records = self._records(run_id, after, limit=500)
+            for record in records:
+                yield record["seq"], _public(record)
+                after = record["seq"]
+            if records:
+                continue
+            if self.is_closed(run_id):
+                return
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None
+
+    # ------------------------------------------------------------
+    # Retention / compaction
+    # ------------------------------------------------------------
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drop expired events from the index, then rewrite or delete mostly-dead sealed segments"""
+        cutoff = None
+        if self.retention_seconds is not None:
+            cutoff_dt = datetime.fromtimestamp(now if now is not None else time.time(), timezone.utc)
+            cutoff = (cutoff_dt - timedelta(seconds=self.retention_seconds)).isoformat()
+
+        with self._lock:
+            expired = 0
+            if cutoff:
+                for run_id, index in list(self._index.items()):
+                    keep_from = bisect.bisect_left(index.timestamps, cutoff)
+                    if keep_from:
+                        expired += keep_from
+                        index.replace(index.entries[keep_from:])
+                    if not index.entries:
+                        del self._index[run_id]
+                        self._closed.discard(run_id)
+            live: Dict[int, int] = {}
+            for index in self._index.values():
+                for entry in index.entries:
+                    live[entry.segment] = live.get(entry.segment, 0) + 1
+            sealed = [s for s in self._segments if s != self._active]
+            targets = [
+                s for s in sealed
+                if self._segments[s] and 1 - live.get(s, 0) / self._segments[s] >= self.compact_dead_ratio
+            ]
+
+        rewritten = deleted = 0
+        for segment in targets:
+            if self._rewrite_segment(segment, cutoff):
+                rewritten += 1
+            else:
+                deleted += 1
+        self._counters["expired"] += expired
+        self._counters["compactions"] += rewritten + deleted
+        return {"expired": expired, "rewritten": rewritten, "deleted": deleted}
+
+    def _rewrite_segment(self, segment: int, cutoff: Optional[str]) -> bool:
+        """Keep only the segment's live records; returns False if the segment was deleted instead"""
+        path = self._segment_path(segment)
+        with self._lock:
+            live_seqs = {
+                e.seq for index in self._index.values() for e in index.entries if e.segment == segment
+            }
+        kept: List[bytes] = []
+        with open(path, "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["seq"] in live_seqs or (
+                    record.get("type") == "close" and record["run_id"] in self._index
+                    and (not cutoff or record["ts"] >= cutoff)
+                ):
+                    kept.append(line)
+
+        with self._lock:
+            self._generations[segment] = self._generations.get(segment, 0) + 1
+            if not kept:
+                os.remove(path)
+                del self._segments[segment]
+                return False
+            tmp = path + ".compact"
+            with open(tmp, "wb") as f:
+                f.write(b"".join(kept))
+            os.replace(tmp, path)
+
+            locations: Dict[int, Tuple[int, int]] = {}
+            offset = 0
+            for line in kept:
+                locations[json.loads(line)["seq"]] = (offset, len(line))
+                offset += len(line)
+            for index in self._index.values():
+                if any(e.segment == segment for e in index.entries):
+                    index.replace([
+                        e._replace(offset=locations[e.seq][0], length=locations[e.seq][1])
+                        if e.segment == segment else e
+                        for e in index.entries
+                    ])
+            self._segments[segment] = len(kept)
+            return True
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            await asyncio.to_thread(self.compact)
+
+    # ------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": len(self._index),
+                "indexed_events": sum(len(i.entries) for i in self._index.values()),
+                "pending": len(self._pending) + len(self._flushing),
+                "segments": len(self._segments),
+                "active_segment": self._active,
+                "active_segment_bytes": self._active_size,
+                **self._counters,
+            }
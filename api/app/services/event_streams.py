@@ -0,0 +1,236 @@
+"""
+Resumable server-sent event streams
+
+A producer (e.g. an add-to-cart run) publishes events into a BufferedEventStream
+that lives independently of any HTTP connection. Each event gets an increasing
+id and is kept in a bounded replay buffer, so a client whose connection was
+dropped by a proxy can reconnect with `Last-Event-ID` and pick up where it left
+off instead of restarting the run. Idle connections get heartbeat comments.
+
+Work whose stream has had no subscriber for `orphan_timeout_seconds` is
+cancelled; finished streams are kept for `retention_seconds` for late replays.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def format_sse(data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def last_event_id_for(request: Request) -> Optional[int]:
+    """Resume point from the Last-Event-ID header (EventSource) or ?last_event_id= (fetch clients)"""
+    raw = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+class BufferedEventStream:
+    def __init__(self, stream_id: str, buffer_size: int = 1000):
+        self.stream_id = stream_id
+        self._events: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._changed = asyncio.Condition()
+        self.done = False
+        self.subscribers = 0
+        self.detached_at: Optional[float] = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    async def publish(self, data: Dict[str, Any]) -> int:
+        async with self._changed:
+            self._last_id += 1
+            self._events.append((self._last_id, data))
+            self._changed.notify_all()
+            return self._last_id
+
+    async def close(self) -> None:
+        async with self._changed:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    def _pending(self, cursor: int):
+        return [(eid, data) for eid, data in self._events if eid > cursor]
+
+    async def subscribe(
+        self,
+        last_event_id: Optional[int] = None,
+        heartbeat_seconds: float = 15.0,
+        poll_seconds: float = 0.25,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncIterator[bytes]:
+        """Replay everything after last_event_id, then follow live events until the stream ends"""
+        self.subscribers += 1
+        self.detached_at = None
+        try:
+            cursor = last_event_id or 0
+            oldest = self._events[0][0] if self._events else self._last_id + 1
+            if cursor and cursor + 1 < oldest:
+                # The buffer has rolled past the resume point
+                yield format_sse({"warning": "replay buffer overflow", "missedEvents": oldest - cursor - 1})
+
+            last_write = time.monotonic()
+            while True:
+                for event_id, data in self._pending(cursor):
+                    yield format_sse(data, event_id)
+                    cursor = event_id
+                    last_write = time.monotonic()
+                if self.done and cursor >= self._last_id:
+                    return
+
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: self._last_id > cursor or self.done),
+                            timeout=poll_seconds,
+                        )
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                if is_disconnected and await is_disconnected():
+                    return
+                if time.monotonic() - last_write >= heartbeat_seconds:
+                    yield HEARTBEAT
+                    last_write = time.monotonic()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers:
+                self.detached_at = time.monotonic()
+
+
+Producer = Callable[[BufferedEventStream], Awaitable[None]]
+
+
+class EventStreamHub:
+    """Owns running streams and their background producers"""
+
+    def __init__(
+        self,
+        buffer_size: int = 1000,
+        orphan_timeout_seconds: float = 30.0,
+        retention_seconds: float = 300.0,
+        heartbeat_seconds: float = 15.0,
+        sweep_interval: Optional[float] = None,
+    ):
+        self.buffer_size = buffer_size
+        self.orphan_timeout_seconds = orphan_timeout_seconds
+        self.retention_seconds = retention_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.sweep_interval = sweep_interval or min(1.0, orphan_timeout_seconds / 2)
+        self._streams: Dict[str, BufferedEventStream] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._counters = {"opened": 0, "resumed": 0, "orphaned": 0, "evicted": 0}
+
+    def open(self, producer: Producer) -> BufferedEventStream:
+        """Start producer in the background, publishing into a new stream"""
+        stream = BufferedEventStream(uuid.uuid4().hex, self.buffer_size)
+        self._streams[stream.stream_id] = stream
+        stream.task = asyncio.create_task(self._run(stream, producer))
+        self._counters["opened"] += 1
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+        return stream
+
+    def get(self, stream_id: str) -> Optional[BufferedEventStream]:
+        return self._streams.get(stream_id)
+
+    async def _run(self, stream: BufferedEventStream, producer: Producer) -> None:
+        try:
+            await producer(stream)
+        finally:
+            await asyncio.shield(stream.close())
+
+    def response(
+        self, stream: BufferedEventStream, request: Request, last_event_id: Optional[int] = None
+    ) -> StreamingResponse:
+        if last_event_id is not None:
+            self._counters["resumed"] += 1
+
+        async def body() -> AsyncIterator[bytes]:
+            # Tell EventSource clients how quickly to reconnect
+            yield b"retry: 3000\n\n"
+            async for chunk in stream.subscribe(
+                last_event_id, self.heartbeat_seconds, is_disconnected=request.is_disconnected
+            ):
+                yield chunk
+
+        return StreamingResponse(
+            body(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Stream-Id": stream.stream_id},
+        )
+
+    async def sweep(self) -> None:
+        now = time.monotonic()
+        for stream_id, stream in list(self._streams.items()):
+            if stream.done:
+                if now - (stream.finished_at or now) >= self.retention_seconds:
+                    del self._streams[stream_id]
+                    self._counters["evicted"] += 1
+            elif (
+                not stream.subscribers
+                and stream.detached_at is not None
+                and now - stream.detached_at >= self.orphan_timeout_seconds
+                and stream.task
+            ):
+                # Nobody came back for it: stop paying for sessions and LLM calls
+                stream.task.cancel()
+                self._counters["orphaned"] += 1
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            await self.sweep()
+
+    async def stop(self) -> None:
+        """Cancel the sweeper and every producer still running"""
+        tasks = [s.task for s in self._streams.values() if s.task and not s.task.done()]
+        if self._sweeper:
+            tasks.append(self._sweeper)
+            self._sweeper = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        running = [s for s in self._streams.values() if not s.done]
+        return {
+            "streams": len(self._streams),
+            "running": len(running),
+            "subscribers": sum(s.subscribers for s in self._streams.values()),
+            "buffer_size": self.buffer_size,
+            **self._counters,
+        }
+
+
+_hub: Optional[EventStreamHub] = None
+
+
+def get_event_stream_hub() -> EventStreamHub:
+    global _hub
+    if _hub is None:
+        _hub = EventStreamHub(
+            buffer_size=int(os.getenv("SSE_REPLAY_BUFFER_SIZE", "1000")),
+            orphan_timeout_seconds=float(os.getenv("SSE_ORPHAN_TIMEOUT", "30")),
+            retention_seconds=float(os.getenv("SSE_RETENTION_SECONDS", "300")),
+            heartbeat_seconds=float(os.getenv("SSE_HEARTBEAT_SECONDS", "15")),
+        )
+    return _hub
@@ -0,0 +1,68 @@
+"""
+Process-wide async HTTP client for outbound calls (Browserbase)
+
+One keep-alive connection pool (HTTP/2 when `h2` is installed) is created in the
+FastAPI lifespan and shared by every route and service, so calls reuse TCP/TLS
+connections and share one set of connection limits.
+"""
+import os
+from typing import Optional
+
+import httpx
+
+from app.services.tracing import inject_traceparent
+
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Session creation is the slowest Browserbase call; connect/pool waits should fail fast
+HTTP_TIMEOUT = httpx.Timeout(
+    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    read=float(os.getenv("HTTP_READ_TIMEOUT", "20")),
+    write=float(os.getenv("HTTP_WRITE_TIMEOUT", "10")),
+    pool=float(os.getenv("HTTP_POOL_TIMEOUT", "5")),
+)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def build_http_client(**kwargs) -> httpx.AsyncClient:
+    kwargs.setdefault("http2", HTTP2_AVAILABLE)
+    kwargs.setdefault("event_hooks", {"request": [inject_traceparent]})
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    kwargs.setdefault("limits", httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    ))
+    return httpx.AsyncClient(**kwargs)
+
+
+async def start_http_client(**kwargs) -> httpx.AsyncClient:
+    """Create the shared client (called from the FastAPI lifespan)"""
+    global _client
+    if _client is None:
+        _client = build_http_client(**kwargs)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client; created on first use if the lifespan did not run (e.g. bare TestClient)"""
+    global _client
+    if _client is None:
+        _client = build_http_client()
+    return _client
@@ -0,0 +1,330 @@
+"""
+Prometheus text-format metrics (no prometheus_client dependency)
+
+    get_metrics().llm_tokens.labels("gpt-4o", "judge", "prompt").inc(812)
+
+Counters, gauges and histograms keep one child per label combination. A child
+is created (and its label string pre-rendered) the first time it is used, so
+an update afterwards is a dict lookup plus a short lock-held add: around a
+microsecond, cheap enough for every request and every LLM call. State that
+already lives in the services (queue depth, cache hits, active sessions) is
+not mirrored here; collectors read their stats() when GET /v1/metrics is
+scraped.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.tracing import route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+BROWSERBASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# (name, type, help, [(labels, value), ...]) produced by a collector at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+Collector = Callable[[], Iterable[Family]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_string(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _with_label(labels: str, name: str, value: str) -> str:
+    extra = f'{name}="{value}"'
+    return "{" + extra + "}" if not labels else labels[:-1] + "," + extra + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._child(_label_string(self.labelnames, key))
+        return child
+
+    def _child(self, labels: str) -> Any:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for child in list(self._children.values()):
+            lines.extend(child.render(self.name))
+        return lines
+
+
+class _Value:
+    __slots__ = ("labels", "value", "_lock")
+
+    def __init__(self, labels: str, lock: threading.Lock):
+        self.labels = labels
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self, name: str) -> List[str]:
+        return [f"{name}{self.labels} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _child(self, labels: str) -> _Value:
+        return _Value(labels, self._lock)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _child(self, labels: str) -> _Value:
+        return _Value(labels, self._lock)
+
+
+class _HistogramValue:
+    __slots__ = ("labels", "bounds", "counts", "sum", "_lock")
+
+    def __init__(self, labels: str, bounds: Tuple[float, ...], lock: threading.Lock):
+        self.labels = labels
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = lock
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def render(self, name: str) -> List[str]:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.bounds, math.inf), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_with_label(self.labels, 'le', _format_value(bound))} {cumulative}")
+        lines.append(f"{name}_sum{self.labels} {_format_value(total)}")
+        lines.append(f"{name}_count{self.labels} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _child(self, labels: str) -> _HistogramValue:
+        return _HistogramValue(labels, self.buckets, self._lock)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self, *collectors: Collector) -> str:
+        """Exposition text for every metric, plus families from registered and extra collectors"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in (*self._collectors, *collectors):
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_label_string(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _LLMCall:
+    __slots__ = ("_metrics", "_labels")
+
+    def __init__(self, metrics: "ServiceMetrics", labels: Tuple[str, str]):
+        self._metrics = metrics
+        self._labels = labels
+
+    def record_usage(self, usage: Any) -> None:
+        """Count tokens from an OpenAI `usage` object (ignored when the response has none)"""
+        if usage is None:
+            return
+        model, call_type = self._labels
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if isinstance(tokens, int):
+                self._metrics.llm_tokens.labels(model, call_type, kind).inc(tokens)
+
+
+class _BrowserbaseCall:
+    __slots__ = ("status_code",)
+
+    def __init__(self) -> None:
+        self.status_code: Optional[int] = None
+
+
+class ServiceMetrics(MetricsRegistry):
+    """The API's metrics; instrumented code reaches them through get_metrics()"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.http_duration = self.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route template (streams: until closed)",
+            ("method", "route"),
+        )
+        self.http_requests = self.counter(
+            "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+        )
+        self.http_in_flight = self.gauge("http_requests_in_flight", "HTTP requests being handled")
+        self.llm_duration = self.histogram(
+            "llm_request_duration_seconds", "LLM call latency, retries included", ("model", "call_type"), LLM_BUCKETS
+        )
+        self.llm_tokens = self.counter(
+            "llm_tokens_total", "LLM tokens by model, call type and kind (prompt/completion)",
+            ("model", "call_type", "kind"),
+        )
+        self.llm_errors = self.counter("llm_errors_total", "LLM calls that raised", ("model", "call_type"))
+        self.browserbase_duration = self.histogram(
+            "browserbase_request_duration_seconds", "Browserbase API latency by operation", ("operation",),
+            BROWSERBASE_BUCKETS,
+        )
+        self.browserbase_errors = self.counter(
+            "browserbase_errors_total", "Browserbase calls that failed, by HTTP status or exception type",
+            ("operation", "reason"),
+        )
+
+    @contextmanager
+    def llm_call(self, model: str, call_type: str) -> Iterator[_LLMCall]:
+        labels = (model, call_type)
+        start = time.perf_counter()
+        try:
+            yield _LLMCall(self, labels)
+        except BaseException:
+            self.llm_errors.labels(*labels).inc()
+            raise
+        finally:
+            self.llm_duration.labels(*labels).observe(time.perf_counter() - start)
+
+    @contextmanager
+    def browserbase_call(self, operation: str, ok: Sequence[int] = (200, 201)) -> Iterator[_BrowserbaseCall]:
+        """Times the block; set `call.status_code` inside it so non-`ok` responses count as errors"""
+        call = _BrowserbaseCall()
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            self.browserbase_errors.labels(operation, type(e).__name__).inc()
+            raise
+        finally:
+            self.browserbase_duration.labels(operation).observe(time.perf_counter() - start)
+        if call.status_code is not None and call.status_code not in ok:
+            self.browserbase_errors.labels(operation, call.status_code).inc()
+
+
+class MetricsMiddleware:
+    """Per-route latency histogram, request counter and in-flight gauge"""
+
+    def __init__(self, app: Any, metrics: Optional[ServiceMetrics] = None):
+        self.app = app
+        self._metrics = metrics
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = self._metrics or get_metrics()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = metrics.http_in_flight.labels()
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            # Unmatched paths (404s, scanners) share one label instead of one series each
+            route = route_template(scope) or "unmatched"
+            metrics.http_duration.labels(scope["method"], route).observe(elapsed)
+            metrics.http_requests.labels(scope["method"], route, status).inc()
+
+
+_metrics: Optional[ServiceMetrics] = None
+
+
+def get_metrics() -> ServiceMetrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = ServiceMetrics()
+    return _metrics
@@ -0,0 +1,260 @@
+"""
+Recipe registry: compiles api/recipes/*.yaml into typed, validated step plans
+
+A recipe file looks like
+
+    version: 1                                  # recipe format version
+    id: ecommerce/add_white_tshirt_to_cart.v1   # name + ".v<recipe version>"
+    steps:
+      - visit: "https://example.com"
+      - search: "white tshirt"
+      - click: "Add to cart"
+
+Plans are compiled once and cached by file content hash. Lookups re-stat the
+recipe directory at most every `reload_interval` seconds, so edited, added or
+removed files are picked up without a restart (only changed content is
+recompiled). Providers execute the compiled plan directly instead of
+re-parsing YAML on every run.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple, Union
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+SUPPORTED_FORMAT_VERSIONS = {1}
+RECIPE_SUFFIXES = (".yaml", ".yml")
+_ID_VERSION = re.compile(r"^(?P<name>.+)\.v(?P<version>\d+)$")
+
+DEFAULT_RECIPES_DIR = Path(__file__).resolve().parents[2] / "recipes"
+
+
+class RecipeError(ValueError):
+    pass
+
+
+class VisitStep(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    kind: Literal["visit"] = "visit"
+    url: str
+
+
+class SearchStep(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    kind: Literal["search"] = "search"
+    query: str
+
+
+class ClickStep(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    kind: Literal["click"] = "click"
+    target: str
+
+
+Step = Annotated[Union[VisitStep, SearchStep, ClickStep], Field(discriminator="kind")]
+
+# YAML shorthand key -> (step model, field the value goes into)
+STEP_TYPES: Dict[str, Tuple[type, str]] = {
+    "visit": (VisitStep, "url"),
+    "search": (SearchStep, "query"),
+    "click": (ClickStep, "target"),
+}
+
+
+class RecipePlan(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    id: str
+    name: str
+    version: int
+    format_version: int
+    steps: Tuple[Step, ...]
+    content_hash: str
+    source: str
+
+
+def recipe_key(recipe_id: str) -> str:
+    """Ids may use '/' or '.' as the namespace separator (task ids use dots)"""
+    return recipe_id.replace("/", ".")
+
+
+def split_id(recipe_id: str) -> Tuple[str, Optional[int]]:
+    match = _ID_VERSION.match(recipe_id)
+    if not match:
+        return recipe_id, None
+    return match.group("name"), int(match.group("version"))
+
+
+def compile_step(index: int, raw: Any) -> Step:
+    if not isinstance(raw, dict) or len(raw) != 1:
+        raise RecipeError(f"step {index}: expected a single-key mapping like {{visit: <url>}}, got {raw!r}")
+    (kind, value), = raw.items()
+    if kind not in STEP_TYPES:
+        raise RecipeError(f"step {index}: unknown step type {kind!r} (expected one of {sorted(STEP_TYPES)})")
+    model, field = STEP_TYPES[kind]
+    try:
+        return model(**{field: value})
+    except ValidationError as e:
+        raise RecipeError(f"step {index} ({kind}): {e.errors()[0]['msg']}") from None
+
+
+def compile_recipe(content: bytes, source: str = "<memory>") -> RecipePlan:
+    """Parse and validate one recipe document into an immutable plan"""
+    try:
+        doc = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        raise RecipeError(f"{source}: invalid YAML: {e}") from None
+    if not isinstance(doc, dict):
+        raise RecipeError(f"{source}: expected a mapping at the top level")
+
+    format_version = doc.get("version")
+    if format_version not in SUPPORTED_FORMAT_VERSIONS:
+        raise RecipeError(f"{source}: unsupported recipe format version {format_version!r}")
+    recipe_id = doc.get("id")
+    if not isinstance(recipe_id, str) or not recipe_id:
+        raise RecipeError(f"{source}: missing 'id'")
+    name, version = split_id(recipe_id)
+    if version is None:
+        raise RecipeError(f"{source}: id {recipe_id!r} must end with a version suffix like '.v1'")
+    steps = doc.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise RecipeError(f"{source}: 'steps' must be a non-empty list")
+
+    try:
+        compiled = tuple(compile_step(i, raw) for i, raw in enumerate(steps))
+    except RecipeError as e:
+        raise RecipeError(f"{source}: {e}") from None
+    return RecipePlan(
+        id=recipe_id,
+        name=name,
+        version=version,
+        format_version=format_version,
+        steps=compiled,
+        content_hash=hashlib.sha256(content).hexdigest(),
+        source=source,
+    )
+
+
+class _FileEntry(BaseModel):
+    stat: Tuple[int, int]  # (mtime_ns, size)
+    content_hash: str
+    plan: Optional[RecipePlan] = None
+    error: Optional[str] = None
+
+
+class RecipeRegistry:
+    def __init__(self, directory: Union[str, Path] = DEFAULT_RECIPES_DIR, reload_interval: float = 1.0):
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._files: Dict[Path, _FileEntry] = {}
+        self._by_hash: Dict[str, RecipePlan] = {}
+        # recipe key (name, '.'-separated) -> {version: plan}
+        self._plans: Dict[str, Dict[int, RecipePlan]] = {}
+        self._last_scan = 0.0
+        self._counters = {"compiled": 0, "reused": 0, "reloads": 0}
+
+    def load(self) -> Dict[str, str]:
+        """Compile everything now (start-up); returns {file: error} for recipes that failed"""
+        self.refresh(force=True)
+        return self.errors()
+
+    def refresh(self, force: bool = False) -> None:
+        """Pick up added, changed and removed recipe files (cheap stat unless something changed)"""
+        now = time.monotonic()
+        if not force and now - self._last_scan < self.reload_interval:
+            return
+        with self._lock:
+            self._last_scan = now
+            paths = (
+                [p for p in self.directory.rglob("*") if p.suffix in RECIPE_SUFFIXES and p.is_file()]
+                if self.directory.is_dir() else []
+            )
+            changed = False
+            for path in paths:
+                st = path.stat()
+                stat = (st.st_mtime_ns, st.st_size)
+                entry = self._files.get(path)
+                if entry and entry.stat == stat:
+                    continue
+                content = path.read_bytes()
+                content_hash = hashlib.sha256(content).hexdigest()
+                if entry and entry.content_hash == content_hash:
+                    self._files[path] = entry.model_copy(update={"stat": stat})
+                    continue
+                self._files[path] = self._compile(path, content, content_hash, stat)
+                changed = True
+            for path in set(self._files) - set(paths):
+                del self._files[path]
+                changed = True
+            if changed:
+                self._rebuild()
+                self._counters["reloads"] += 1
+
+    def _compile(self, path: Path, content: bytes, content_hash: str, stat: Tuple[int, int]) -> _FileEntry:
+        plan = self._by_hash.get(content_hash)
+        if plan is not None:
+            self._counters["reused"] += 1
+            return _FileEntry(stat=stat, content_hash=content_hash, plan=plan)
+        try:
+            plan = compile_recipe(content, str(path.relative_to(self.directory)))
+        except RecipeError as e:
+            return _FileEntry(stat=stat, content_hash=content_hash, error=str(e))
+        self._by_hash[content_hash] = plan
+        self._counters["compiled"] += 1
+        return _FileEntry(stat=stat, content_hash=content_hash, plan=plan)
+
+    def _rebuild(self) -> None:
+        plans: Dict[str, Dict[int, RecipePlan]] = {}
+        for entry in self._files.values():
+            if entry.plan:
+                plans.setdefault(recipe_key(entry.plan.name), {})[entry.plan.version] = entry.plan
+        live = {entry.content_hash for entry in self._files.values()}
+        self._by_hash = {h: p for h, p in self._by_hash.items() if h in live}
+        self._plans = plans
+
+    def get(self, recipe_id: str, version: Optional[int] = None) -> Optional[RecipePlan]:
+        """Plan for an id like 'ecommerce/add_white_tshirt_to_cart.v1' (or name + version; latest if omitted)"""
+        self.refresh()
+        name, id_version = split_id(recipe_id)
+        versions = self._plans.get(recipe_key(name))
+        if not versions:
+            return None
+        wanted = version if version is not None else id_version
+        if wanted is None:
+            return versions[max(versions)]
+        return versions.get(wanted)
+
+    def list(self) -> List[RecipePlan]:
+        self.refresh()
+        return sorted(
+            (plan for versions in self._plans.values() for plan in versions.values()),
+            key=lambda p: (p.name, p.version),
+        )
+
+    def errors(self) -> Dict[str, str]:
+        return {
+            str(path.relative_to(self.directory)): entry.error
+            for path, entry in self._files.items()
+            if entry.error
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recipes": sum(len(v) for v in self._plans.values()), "errors": len(self.errors()), **self._counters}
+
+
+_registry: Optional[RecipeRegistry] = None
+
+
+def get_recipe_registry() -> RecipeRegistry:
+    global _registry
+    if _registry is None:
+        _registry = RecipeRegistry(
+            os.getenv("RECIPES_DIR", str(DEFAULT_RECIPES_DIR)),
+            reload_interval=float(os.getenv("RECIPES_RELOAD_INTERVAL", "1")),
+        )
+    return _registry
@@ -4,15 +4,61 @@ Analyzes robots.txt files for AI agent permissions and compliance
 """
 import requests
 import os
-from typing import Dict, List, Optional, Tuple, Any
+import re
+import zlib
+import xml.etree.ElementTree as ET
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from urllib.parse import urljoin, urlparse
 
+from app.services.metrics import get_metrics
+
 try:
     from openai import OpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
 
+# Sitemap enumeration limits (the sitemaps protocol caps a file at 50,000 URLs / 50MB uncompressed)
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+SITEMAP_MAX_FILES = 50
+SITEMAP_CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class RobotsRules:
+    """Allow/disallow rules for a single user agent, compiled once for fast URL checks"""
+
+    def __init__(self, allowed_paths: List[str], disallowed_paths: List[str]):
+        self.allowed_paths = allowed_paths
+        self.disallowed_paths = disallowed_paths
+        # Longest (most specific) pattern wins; on a tie allow beats disallow
+        rules = [(len(p), True, self._compile(p)) for p in allowed_paths if p]
+        rules += [(len(p), False, self._compile(p)) for p in disallowed_paths if p]
+        self._rules = sorted(rules, key=lambda rule: (-rule[0], not rule[1]))
+
+    @staticmethod
+    def _compile(path: str) -> "re.Pattern[str]":
+        """Translate a robots.txt path pattern (supports * and $) into a regex"""
+        anchored = path.endswith('$')
+        if anchored:
+            path = path[:-1]
+        regex = '.*'.join(re.escape(part) for part in path.split('*'))
+        return re.compile(regex + ('$' if anchored else ''))
+
+    def is_allowed(self, url: str) -> bool:
+        """Check whether a URL (or path) may be visited under these rules"""
+        parsed = urlparse(url)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+
+        for _, allowed, pattern in self._rules:
+            if pattern.match(path):
+                return allowed
+        return True
+
 
 class RobotsAnalysisService:
     """Service for analyzing robots.txt files and AI agent permissions"""
@@ -178,6 +224,153 @@ class RobotsAnalysisService:
         # If no specific rules, assume allowed
         return True
 
+    def compile_rules(self, robots_content: str, user_agent: str = "*") -> RobotsRules:
+        """Compile the robots.txt group that applies to user_agent (falls back to '*')"""
+        groups: Dict[str, Tuple[List[str], List[str]]] = {}
+        current_agents: List[str] = []
+        previous_was_agent = False
+
+        for line in robots_content.split('\n'):
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+
+            directive, value = line.split(':', 1)
+            directive = directive.strip().lower()
+            value = value.strip()
+
+            if directive == 'user-agent':
+                # Consecutive user-agent lines share one group of rules
+                if not previous_was_agent:
+                    current_agents = []
+                agent = value.lower()
+                current_agents.append(agent)
+                groups.setdefault(agent, ([], []))
+            elif directive in ('allow', 'disallow'):
+                for agent in current_agents:
+                    groups[agent][0 if directive == 'allow' else 1].append(value)
+            previous_was_agent = directive == 'user-agent'
+
+        token = user_agent.split('/')[0].strip().lower()
+        if token in groups:
+            allowed, disallowed = groups[token]
+        else:
+            # Otherwise use the most specific group naming part of the agent, then '*'
+            matches = sorted((a for a in groups if a != '*' and a and a in token), key=len, reverse=True)
+            allowed, disallowed = groups[matches[0]] if matches else groups.get('*', ([], []))
+
+        return RobotsRules(allowed, disallowed)
+
+    def extract_sitemaps(self, robots_content: str, robots_url: Optional[str] = None) -> List[str]:
+        """Return the sitemap URLs referenced by Sitemap: lines, in order and de-duplicated"""
+        sitemaps = []
+        for line in robots_content.split('\n'):
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+
+            directive, value = line.split(':', 1)
+            if directive.strip().lower() != 'sitemap' or not value.strip():
+                continue
+
+            # Sitemap values are absolute URLs, but tolerate relative ones
+            sitemap_url = urljoin(robots_url, value.strip()) if robots_url else value.strip()
+            if sitemap_url not in sitemaps:
+                sitemaps.append(sitemap_url)
+        return sitemaps
+
+    def iter_sitemap_urls(
+        self,
+        sitemap_urls: List[str],
+        rules: Optional[RobotsRules] = None,
+        max_urls: int = SITEMAP_MAX_URLS,
+        max_bytes: int = SITEMAP_MAX_BYTES,
+        max_sitemaps: int = SITEMAP_MAX_FILES,
+    ) -> Iterator[str]:
+        """Stream page URLs from sitemaps and nested sitemap indexes, filtered through rules
+
+        max_bytes bounds the total (decompressed) sitemap bytes read across all files.
+        """
+        queue = deque(sitemap_urls)
+        seen = set()
+        budget = {'bytes': max_bytes}
+        emitted = 0
+
+        while queue and len(seen) < max_sitemaps and budget['bytes'] > 0:
+            sitemap_url = queue.popleft()
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+
+            for kind, loc in self._stream_sitemap_entries(sitemap_url, budget):
+                if kind == 'sitemap':
+                    queue.append(loc)
+                elif rules is None or rules.is_allowed(loc):
+                    yield loc
+                    emitted += 1
+                    if emitted >= max_urls:
+                        return
+
+    def _stream_sitemap_entries(self, sitemap_url: str, budget: Dict[str, int]) -> Iterator[Tuple[str, str]]:
+        """Incrementally parse one sitemap, yielding ('url' | 'sitemap', loc) pairs"""
+        try:
+            response = requests.get(sitemap_url, stream=True, timeout=10)
+        except requests.exceptions.RequestException:
+            return
+
+        try:
+            if response.status_code != 200:
+                return
+
+            parser = ET.XMLPullParser(events=('start', 'end'))
+            decompressor = None
+            first_chunk = True
+            root = None
+            depth = 0
+            loc = None
+
+            for chunk in response.iter_content(chunk_size=SITEMAP_CHUNK_SIZE):
+                if not chunk:
+                    continue
+
+                # .xml.gz files are usually served as-is rather than with Content-Encoding
+                if first_chunk:
+                    if chunk[:2] == GZIP_MAGIC:
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    first_chunk = False
+
+                data = decompressor.decompress(chunk, budget['bytes'] + 1) if decompressor else chunk
+                data = data[:budget['bytes']]
+                budget['bytes'] -= len(data)
+
+                try:
+                    parser.feed(data)
+                    for event, elem in parser.read_events():
+                        if event == 'start':
+                            if root is None:
+                                root = elem
+                            depth += 1
+                            continue
+
+                        depth -= 1
+                        tag = elem.tag.rsplit('}', 1)[-1]
+                        # Only <urlset>/<url>/<loc>; nested extension tags like <image:loc> are ignored
+                        if tag == 'loc' and depth == 2:
+                            loc = (elem.text or '').strip()
+                        elif tag in ('url', 'sitemap') and depth == 1:
+                            if loc:
+                                yield tag, loc
+                            loc = None
+                            # Drop parsed entries so memory stays flat regardless of sitemap size
+                            root.clear()
+                except ET.ParseError:
+                    return
+
+                if budget['bytes'] <= 0:
+                    return
+        finally:
+            response.close()
+
     def suggest_agent_tasks_with_llm(self, website: str, ai_rules: Dict[str, Any], robots_content: str) -> Optional[str]:
         """Use LLM to suggest potential agent tasks based on robots.txt analysis"""
         
@@ -216,15 +409,17 @@ Provide 3-4 practical task suggestions that respect the robots.txt rules. For ea
 
 Keep suggestions concise and practical."""
 
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an AI assistant specializing in web scraping ethics and robots.txt compliance."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            with get_metrics().llm_call("gpt-3.5-turbo", "robots") as call:
+                response = client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are an AI assistant specializing in web scraping ethics and robots.txt compliance."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=500,
+                    temperature=0.7
+                )
+                call.record_usage(getattr(response, "usage", None))
             
             return response.choices[0].message.content
             
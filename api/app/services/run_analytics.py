@@ -0,0 +1,219 @@
+"""
+Pre-aggregated run-log statistics behind /v1/analytics/*
+
+The dashboards used to recompute everything in the browser from raw CSV rows.
+Here the workflow-runs log is ingested incrementally into the columnar cache
+of app.services.run_log_ingest (shared with the dataviz scripts), and each
+aggregate (per model / per search term stats, time-bucketed series) is
+computed once with pandas and memoized.
+The memo is keyed on the ingest checkpoint, so it is dropped only when new rows
+arrive; a request against an unchanged log costs one stat() and a dict lookup.
+"""
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import pandas as pd
+
+    from app.services.run_log_ingest import DEFAULT_RUN_LOG, RunLogIngestor, succeeded
+except ImportError:  # optional: `pip install pandas pyarrow` (poetry extra "analytics")
+    pd = None
+    RunLogIngestor = None
+    DEFAULT_RUN_LOG = Path(__file__).resolve().parents[3] / "dataviz" / "workflow-runs.csv"
+INGEST_AVAILABLE = RunLogIngestor is not None
+
+GROUP_COLUMNS = {"model": "modelName", "search_term": "searchTerm"}
+BUCKETS = ("hour", "day", "week")
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class AnalyticsUnavailable(RuntimeError):
+    pass
+
+
+def _num(value: Any, digits: int = 2) -> Optional[float]:
+    """JSON-safe rounded number (NaN -> None)"""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or pd.isna(value):
+        return None
+    return round(float(value), digits)
+
+
+def _prepare(df: "pd.DataFrame") -> "pd.DataFrame":
+    # Same rule as the dashboards: completed and extracted something
+    return df.assign(_succeeded=succeeded(df))
+
+
+def group_stats(df: "pd.DataFrame", column: str) -> List[Dict[str, Any]]:
+    """Count, success rate, latency mean/p50/p95/p99 and token stats per value of `column`"""
+    if df.empty:
+        return []
+    grouped = df.groupby(column, observed=True, sort=False)
+    agg = grouped.agg(
+        count=("executionTimeMs", "size"),
+        succeeded=("_succeeded", "sum"),
+        latency_mean=("executionTimeMs", "mean"),
+        tokens_mean=("totalTokens", "mean"),
+        tokens_total=("totalTokens", "sum"),
+        tps_mean=("tokensPerSecond", "mean"),
+        products_mean=("productCount", "mean"),
+    )
+    quantiles = grouped["executionTimeMs"].quantile(list(PERCENTILES)).unstack()
+    agg = agg.join(quantiles).sort_values("count", ascending=False)
+    return [
+        {
+            "key": str(key),
+            "count": int(row["count"]),
+            "success_rate": _num(row["succeeded"] / row["count"], 4),
+            "latency_ms": {
+                "mean": _num(row["latency_mean"], 1),
+                "p50": _num(row[0.5], 1),
+                "p95": _num(row[0.95], 1),
+                "p99": _num(row[0.99], 1),
+            },
+            "tokens": {"mean": _num(row["tokens_mean"], 1), "total": int(row["tokens_total"])},
+            "tokens_per_second": {"mean": _num(row["tps_mean"])},
+            "products": {"mean": _num(row["products_mean"])},
+        }
+        for key, row in agg.iterrows()
+    ]
+
+
+def _bucket_start(timestamps: "pd.Series", bucket: str) -> "pd.Series":
+    if bucket == "hour":
+        return timestamps.dt.floor("h")
+    days = timestamps.dt.floor("D")
+    # Weeks start on Monday
+    return days - pd.to_timedelta(days.dt.dayofweek, unit="D") if bucket == "week" else days
+
+
+def time_series(df: "pd.DataFrame", bucket: str, group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Runs per time bucket (optionally split by model / search term) with latency and throughput"""
+    if df.empty:
+        return []
+    keys = [_bucket_start(df["timestamp"], bucket)]
+    names = ["start"]
+    if group_by:
+        keys.append(df[GROUP_COLUMNS[group_by]].astype(str))
+        names.append("group")
+    grouped = df.groupby(keys, observed=True)
+    agg = grouped.agg(
+        count=("executionTimeMs", "size"),
+        succeeded=("_succeeded", "sum"),
+        latency_mean=("executionTimeMs", "mean"),
+        latency_p95=("executionTimeMs", lambda s: s.quantile(0.95)),
+        tps_mean=("tokensPerSecond", "mean"),
+        tokens_total=("totalTokens", "sum"),
+    )
+    agg.index.names = names
+    points = []
+    for index, row in agg.iterrows():
+        start, *group = index if isinstance(index, tuple) else (index,)
+        point = {
+            "start": start.isoformat(),
+            "count": int(row["count"]),
+            "success_rate": _num(row["succeeded"] / row["count"], 4),
+            "latency_ms": {"mean": _num(row["latency_mean"], 1), "p95": _num(row["latency_p95"], 1)},
+            "tokens_per_second": {"mean": _num(row["tps_mean"])},
+            "tokens": {"total": int(row["tokens_total"])},
+        }
+        if group:
+            point["group"] = group[0]
+        points.append(point)
+    return points
+
+
+class RunAnalytics:
+    """Memoized aggregates over one run log, refreshed when the log grows"""
+
+    def __init__(self, csv_path: str, cache_dir: Optional[str] = None):
+        if not INGEST_AVAILABLE:
+            raise AnalyticsUnavailable("Run analytics need pandas and pyarrow")
+        self.csv_path = csv_path
+        self._ingestor = RunLogIngestor(csv_path, cache_dir)
+        self._lock = threading.Lock()
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._generation: Optional[Tuple[Any, ...]] = None
+        self._df: Optional["pd.DataFrame"] = None
+        self._memo: Dict[Tuple[Any, ...], Any] = {}
+        self._counters = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    def _refresh(self) -> None:
+        """Ingest new rows if the file changed; drop the memo only if the ingested data did"""
+        try:
+            st = os.stat(self.csv_path)
+        except FileNotFoundError:
+            raise AnalyticsUnavailable(f"Run log not found at {self.csv_path}; set RUN_LOG_CSV to the workflow-runs.csv to serve")
+        file_state = (st.st_size, st.st_mtime_ns)
+        if file_state == self._file_state:
+            return
+        self._ingestor.ingest()
+        checkpoint = self._ingestor.checkpoint() or {}
+        generation = (checkpoint.get("offset"), checkpoint.get("tail"), tuple(checkpoint.get("parts", ())))
+        if generation != self._generation:
+            self._df = _prepare(self._ingestor.load())
+            self._memo.clear()
+            self._generation = generation
+            self._counters["refreshes"] += 1
+        self._file_state = file_state
+
+    def _cached(self, key: Tuple[Any, ...], compute: Callable[["pd.DataFrame"], Any]) -> Any:
+        with self._lock:
+            self._refresh()
+            if key in self._memo:
+                self._counters["hits"] += 1
+                return self._memo[key]
+            self._counters["misses"] += 1
+            value = self._memo[key] = {
+                "rows": len(self._df),
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                **compute(self._df),
+            }
+            return value
+
+    def summary(self) -> Dict[str, Any]:
+        def compute(df: "pd.DataFrame") -> Dict[str, Any]:
+            if df.empty:
+                return {"date_range": None, "overall": None}
+            overall = group_stats(df.assign(_all="all"), "_all")[0]
+            overall.pop("key")
+            return {
+                "date_range": {"start": df["timestamp"].min().isoformat(), "end": df["timestamp"].max().isoformat()},
+                "overall": overall,
+            }
+        return self._cached(("summary",), compute)
+
+    def groups(self, by: str) -> Dict[str, Any]:
+        return self._cached(("groups", by), lambda df: {"by": by, "items": group_stats(df, GROUP_COLUMNS[by])})
+
+    def series(self, bucket: str, group_by: Optional[str] = None) -> Dict[str, Any]:
+        return self._cached(
+            ("series", bucket, group_by),
+            lambda df: {"bucket": bucket, "group_by": group_by, "points": time_series(df, bucket, group_by)},
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "csv_path": self.csv_path,
+            "rows": None if self._df is None else len(self._df),
+            "memoized": len(self._memo),
+            **self._counters,
+            "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+_analytics: Optional[RunAnalytics] = None
+
+
+def get_run_analytics() -> RunAnalytics:
+    global _analytics
+    if _analytics is None:
+        _analytics = RunAnalytics(
+            os.getenv("RUN_LOG_CSV", str(DEFAULT_RUN_LOG)),
+            os.getenv("RUN_LOG_CACHE_DIR") or None,
+        )
+    return _analytics
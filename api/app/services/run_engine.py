@@ -0,0 +1,313 @@
+"""
+Asynchronous run engine behind POST /v1/runs
+
+Runs are persisted as 'queued' and returned immediately; a fixed pool of worker
+tasks picks them up by priority (higher first), FIFO within a priority, while
+capping how many runs hit the same site at once. Each run moves
+queued -> running -> succeeded/failed and records its steps as RunEvents in the
+run event log.
+"""
+import asyncio
+import heapq
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.providers.base import BrowserProvider
+from app.providers.playwright_local import get_playwright_local
+from app.services.captures import NetworkCapture, capture_name_for_steps, get_capture_store
+from app.services.event_log import RunEventLog
+from app.services.recipes import get_recipe_registry
+from app.services.run_store import FINISHED_STATUSES, RunRecord, RunStore, utc_now
+from app.services.tracing import current_traceparent, get_tracer, remote_parent
+
+# Run store and event log live here unless RUN_STORE_PATH / RUN_EVENT_LOG_DIR say otherwise,
+# so they don't end up wherever the server (or a test) happens to be started from
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+EmitFn = Callable[..., Awaitable[None]]
+Executor = Callable[[RunRecord, EmitFn], Awaitable[Dict[str, Any]]]
+
+
+def site_key(site: str) -> str:
+    """Sites may be given as a name ("target") or a URL; limit by host either way"""
+    return (urlparse(site).hostname or site).lower()
+
+
+def provider_for(runtime: Optional[str]) -> BrowserProvider:
+    if runtime in (None, "playwright_local"):
+        return get_playwright_local()
+    raise ValueError(f"Unsupported runtime: {runtime}")
+
+
+def capture_for(provider: BrowserProvider, mode: Optional[str], name: str) -> Optional[NetworkCapture]:
+    capture = get_capture_store().capture(mode, name)
+    if capture is not None and not provider.supports_capture:
+        raise ValueError(f"Runtime does not support network mode {capture.mode!r}")
+    return capture
+
+
+async def execute_run(run: RunRecord, emit: EmitFn) -> Dict[str, Any]:
+    """Default executor: run ad-hoc payload steps, or the compiled recipe named by task_id"""
+    provider = provider_for(run.variant.get("runtime"))
+    payload = run.payload or {}
+    network = run.variant.get("network")
+    steps: Optional[List[Dict[str, Any]]] = payload.get("steps")
+    with get_tracer().span("provider.run", runtime=run.variant.get("runtime"), network=network or "live") as span:
+        if steps is not None:
+            capture = capture_for(provider, network, payload.get("capture") or capture_name_for_steps(steps))
+            await emit("provider", "start", details={
+                "runtime": run.variant.get("runtime"), "steps": len(steps), "network": network or "live",
+            })
+            result = await provider.run(steps, capture=capture)
+        else:
+            plan = get_recipe_registry().get(run.task_id)
+            if plan is None:
+                raise ValueError(f"Unknown recipe: {run.task_id}")
+            span.set("recipe", plan.id)
+            capture = capture_for(provider, network, payload.get("capture") or plan.id)
+            await emit("provider", "start", details={
+                "runtime": run.variant.get("runtime"), "recipe": plan.id, "steps": len(plan.steps),
+                "network": network or "live",
+            })
+            result = await provider.run_plan(plan, capture=capture)
+    await emit("provider", "finish", details=result)
+    return result
+
+
+class RunEngine:
+    def __init__(
+        self,
+        store: RunStore,
+        events: RunEventLog,
+        executor: Executor = execute_run,
+        concurrency: int = 4,
+        per_site_limit: int = 2,
+    ):
+        self.store = store
+        self.events = events
+        self.executor = executor
+        self.concurrency = concurrency
+        self.per_site_limit = per_site_limit
+
+        # site key -> heap of (-priority, seq, run_id); seq keeps FIFO order within a priority
+        self._queues: Dict[str, List[Tuple[int, int, str]]] = {}
+        # (-priority, seq, site) of each site's head while the site is under its limit. Entries go
+        # stale when the head is taken or the site fills up and are dropped when popped.
+        self._ready: List[Tuple[int, int, str]] = []
+        self._queued = 0
+        self._running_by_site: Dict[str, int] = {}
+        self._changed = asyncio.Condition()
+        self._workers: List[asyncio.Task] = []
+        self._finished: Dict[str, asyncio.Event] = {}
+        # run_id -> traceparent of the request that queued it, so execution joins that trace
+        self._trace_parents: Dict[str, str] = {}
+        self._counters = {"enqueued": 0, "succeeded": 0, "failed": 0}
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    async def start(self) -> None:
+        if self._workers:
+            return
+        await self.events.start()
+        self.store.requeue_interrupted()
+        for run in self.store.list_runs(status="queued"):
+            self._push(site_key(run.site), (-run.priority, run.seq, run.run_id))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(max(1, self.concurrency))]
+
+    async def stop(self) -> None:
+        """Cancel workers; interrupted runs are requeued on the next start()"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.events.close()
+
+    # ------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------
+    async def enqueue(
+        self,
+        site: str,
+        task_id: str,
+        variant: Dict[str, Any],
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+    ) -> RunRecord:
+        """Persist the run as queued and wake a worker; O(log n) in queue depth"""
+        run = self.store.create_run(site, task_id, variant, payload, priority)
+        traceparent = current_traceparent()
+        if traceparent:
+            self._trace_parents[run.run_id] = traceparent
+        async with self._changed:
+            self._push(site_key(site), (-priority, run.seq, run.run_id))
+            self._counters["enqueued"] += 1
+            self._changed.notify()
+        return run
+
+    async def wait(self, run_id: str) -> Optional[RunRecord]:
+        """Block until the run succeeds or fails; returns its final record"""
+        run = self.store.get_run(run_id)
+        if run is None or run.status in FINISHED_STATUSES:
+            return run
+        await self._finished.setdefault(run_id, asyncio.Event()).wait()
+        return self.store.get_run(run_id)
+
+    def _notify_finished(self, run_id: str) -> None:
+        event = self._finished.pop(run_id, None)
+        if event is not None:
+            event.set()
+
+    # ------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------
+    def _push(self, site: str, item: Tuple[int, int, str]) -> None:
+        queue = self._queues.setdefault(site, [])
+        heapq.heappush(queue, item)
+        self._queued += 1
+        if queue[0] is item:
+            self._mark_ready(site)
+
+    def _mark_ready(self, site: str) -> None:
+        """Offer the site's head to workers if the site has a free slot"""
+        queue = self._queues.get(site)
+        if queue and self._running_by_site.get(site, 0) < self.per_site_limit:
+            priority, seq, _ = queue[0]
+            heapq.heappush(self._ready, (priority, seq, site))
+
+    def _next_runnable(self) -> Optional[Tuple[str, str]]:
+        """Pop the highest-priority run whose site is under its limit; O(log n) in queue depth"""
+        while self._ready:
+            priority, seq, site = heapq.heappop(self._ready)
+            queue = self._queues.get(site)
+            if not queue or queue[0][:2] != (priority, seq) or self._running_by_site.get(site, 0) >= self.per_site_limit:
+                continue  # stale
+            _, _, run_id = heapq.heappop(queue)
+            if not queue:
+                del self._queues[site]
+            self._queued -= 1
+            self._running_by_site[site] = self._running_by_site.get(site, 0) + 1
+            self._mark_ready(site)
+            return run_id, site
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._changed:
+                picked = self._next_runnable()
+                while picked is None:
+                    await self._changed.wait()
+                    picked = self._next_runnable()
+                run_id, site = picked
+            try:
+                await self._execute(run_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Persisting the result or logging the finish failed after the executor returned;
+                # fail the run rather than lose this worker
+                self._fail(run_id, e)
+            finally:
+                async with self._changed:
+                    self._running_by_site[site] -= 1
+                    if not self._running_by_site[site]:
+                        del self._running_by_site[site]
+                    # A slot for this site opened up; this worker picks again too, so one waiter is enough
+                    self._mark_ready(site)
+                    self._changed.notify()
+
+    async def _execute(self, run_id: str) -> None:
+        traceparent = self._trace_parents.pop(run_id, None)
+        run = self.store.get_run(run_id)
+        if run is None or run.status != "queued":
+            return
+        tracer = get_tracer()
+        parent = remote_parent(traceparent)
+        if parent is not None:
+            created_ns = int(datetime.fromisoformat(run.created_at).timestamp() * 1e9)
+            tracer.record("run.queued", created_ns, time.time_ns(), parent=parent, run_id=run_id)
+        with tracer.span("run.execute", traceparent=traceparent, run_id=run_id, site=run.site, task_id=run.task_id) as span:
+            await self._run(run, span)
+
+    async def _run(self, run: RunRecord, span: Any) -> None:
+        run_id = run.run_id
+        started = time.monotonic()
+        self.store.update_run(run_id, status="running", started_at=utc_now())
+
+        async def emit(step: str, action: str, status: str = "ok", details: Optional[Dict[str, Any]] = None) -> None:
+            # Buffered; the event log writes in batches off the run's path
+            self.events.append(run_id, step, action, status, details)
+
+        await emit("run", "start")
+        try:
+            result = await self.executor(run, emit)
+        except asyncio.CancelledError:
+            # Shutting down: leave it 'running' so the next start() requeues it
+            raise
+        except Exception as e:
+            span.set("error", str(e))
+            await emit("run", "finish", "fail", {"error": str(e)})
+            self._fail(run_id, e)
+            return
+
+        result = {**(result or {}), "duration_ms": int((time.monotonic() - started) * 1000)}
+        await emit("run", "finish", details={"duration_ms": result["duration_ms"]})
+        self.store.update_run(
+            run_id,
+            status="succeeded",
+            finished_at=utc_now(),
+            result=result,
+            session_id=result.get("session_id"),
+            session_live_view_url=result.get("session_live_view_url"),
+        )
+        self.events.close_run(run_id)
+        self._counters["succeeded"] += 1
+        self._notify_finished(run_id)
+
+    def _fail(self, run_id: str, error: Exception) -> None:
+        try:
+            self.store.update_run(run_id, status="failed", finished_at=utc_now(), error=str(error))
+            self.events.close_run(run_id)
+        finally:
+            self._counters["failed"] += 1
+            self._notify_finished(run_id)
+
+    # ------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queued,
+            "running": sum(self._running_by_site.values()),
+            "running_by_site": dict(self._running_by_site),
+            "concurrency": self.concurrency,
+            "per_site_limit": self.per_site_limit,
+            "workers": len(self._workers),
+            **self._counters,
+        }
+
+
+_engine: Optional[RunEngine] = None
+
+
+def get_run_engine() -> RunEngine:
+    global _engine
+    if _engine is None:
+        retention = os.getenv("RUN_EVENT_RETENTION_SECONDS")
+        store_path = os.getenv("RUN_STORE_PATH") or str(DEFAULT_DATA_DIR / "runs.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+        _engine = RunEngine(
+            RunStore(store_path),
+            RunEventLog(
+                os.getenv("RUN_EVENT_LOG_DIR") or str(DEFAULT_DATA_DIR / "run_events"),
+                segment_max_bytes=int(os.getenv("RUN_EVENT_SEGMENT_BYTES", str(8 * 1024 * 1024))),
+                retention_seconds=float(retention) if retention else None,
+            ),
+            concurrency=int(os.getenv("RUN_CONCURRENCY", "4")),
+            per_site_limit=int(os.getenv("RUN_PER_SITE_LIMIT", "2")),
+        )
+    return _engine
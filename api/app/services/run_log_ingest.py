@@ -0,0 +1,340 @@
+"""
+Incremental ingest of workflow-runs.csv into a columnar cache
+
+    python -m app.services.run_log_ingest ../dataviz/workflow-runs.csv --compact
+
+The run log only ever grows, so each ingest reads the bytes appended since the
+last checkpoint, parses those rows in one vectorized pass and writes them as a
+new part file. /v1/analytics and the dataviz scripts then load the parts
+instead of re-parsing the whole CSV. Parts are Parquet files (model, search term,
+URL and the other repeated strings dictionary-encoded), so pandas and pyarrow
+are both needed (poetry extra "analytics").
+
+The log writer doesn't escape the quotes inside the trailing `extractionResults`
+JSON, so rows are split at the start of that blob before the CSV parser sees
+them, and products are counted from the blob text without parsing it. Rows are
+parsed PARSE_CHUNK_ROWS at a time to bound the memory of a cold ingest. A
+record still open at the end of the log (partially written, or inside a quoted
+field that holds a newline) is left for the next ingest. If the log
+was truncated or rewritten (header or the last ingested bytes changed), the
+cache is rebuilt from scratch.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow  # noqa: F401  (Parquet engine for the part files)
+
+# 3: Parquet only; older caches may hold pickled parts, which are never loaded
+CACHE_VERSION = 3
+DICTIONARY_COLUMNS = ["modelName", "searchTerm", "url", "environment", "browserbaseStatus", "browserbaseRegion"]
+BOOL_COLUMNS = ["advancedStealth", "proxies"]
+BLOB_COLUMN = "extractionResults"
+# Bytes before the checkpoint that must be unchanged for an append-only ingest
+TAIL_FINGERPRINT_BYTES = 4096
+PARSE_CHUNK_ROWS = 5000
+BLOB_MARKER = ',"{'
+# A blob holding only a product list, after BLOB_MARKER and up to the closing quote
+PRODUCTS_PREFIX = '"products":['
+PRODUCTS_SUFFIX = ']}"'
+DEFAULT_RUN_LOG = Path(__file__).resolve().parents[3] / "dataviz" / "workflow-runs.csv"
+
+
+def _product_count(blob):
+    try:
+        results = json.loads(blob)
+    except (TypeError, ValueError):
+        return 0
+    products = results.get("products") if isinstance(results, dict) else None
+    return len(products) if isinstance(products, list) else 0
+
+
+def _product_counts(tail):
+    """Products per row from the blob text after BLOB_MARKER (NaN where there is no blob)
+
+    Product-list blobs are counted by their '"name":' keys without parsing
+    them; a quote inside a JSON string is escaped, so those can only be keys.
+    Blobs of any other shape are parsed.
+    """
+    products_only = tail.str.startswith(PRODUCTS_PREFIX, na=False) & tail.str.endswith(PRODUCTS_SUFFIX, na=False)
+    counts = tail.where(products_only).str.count('"name":').fillna(0).astype(np.int64)
+    other = tail[tail.notna() & ~products_only]
+    if len(other):
+        counts.loc[other.index] = [_product_count("{" + t.removesuffix('"')) for t in other]
+    return counts.to_numpy()
+
+
+def run_succeeded(status, product_count, has_extraction_results):
+    """The dashboards' success rule: a COMPLETED session that extracted products or results
+
+    Works on one row's values and on whole columns alike; runSucceeded in
+    dataviz/dashboard_simple.js is the same rule.
+    """
+    return (status == "COMPLETED") & ((product_count > 0) | has_extraction_results)
+
+
+def succeeded(df):
+    """run_succeeded per row of a parsed frame, as a bool array"""
+    if "browserbaseStatus" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    products = df["productCount"].fillna(0) if "productCount" in df.columns else 0
+    has_results = df["hasExtractionResults"].fillna(False).astype(bool) if "hasExtractionResults" in df.columns else False
+    return np.asarray(run_succeeded(df["browserbaseStatus"].astype(str), products, has_results), dtype=bool)
+
+
+def _opens_record(line):
+    """Only the first line of a record that spans lines has no blob and an odd number of quotes"""
+    return line.count('"') % 2 == 1 and BLOB_MARKER not in line
+
+
+def complete_records(data):
+    """(records, consumed): the complete CSV records in raw log bytes and how many bytes they span
+
+    A record ends at a newline unless a quoted field before its JSON blob is
+    still open; the blob itself never holds a raw newline. A record still open
+    at the end is left out of `consumed` for the next read.
+    """
+    end = data.rfind(b"\n")
+    if end < 0:
+        return [], 0
+    # Decoded line by line: one non-ASCII character would widen a whole-log str to 2 or 4 bytes a character
+    lines = data.split(b"\n")
+    lines.pop()  # after the last newline
+    lines = [line.decode("utf-8").removesuffix("\r") for line in lines]
+    if not any(_opens_record(line) for line in lines):
+        return lines, end + 1
+
+    records, pending = [], []
+    for line in lines:
+        if pending:
+            pending.append(line)
+            record = "\n".join(pending)
+            if record.partition(BLOB_MARKER)[0].count('"') % 2 == 0:
+                records.append(record)
+                pending = []
+        elif _opens_record(line):
+            pending = [line]
+        else:
+            records.append(line)
+    consumed = end
+    for _ in pending:
+        consumed = data.rfind(b"\n", 0, consumed)
+    return records, consumed + 1
+
+
+def parse_rows(lines, columns):
+    """Parse CSV records (no header; see complete_records) into the analyzer's columns"""
+    raw = pd.Series(lines, dtype=object)
+    raw = raw[raw.str.len() > 0]
+    if raw.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Split off the unescaped JSON blob, then let the C parser handle the rest
+    head, sep, blob = (raw.str.partition(BLOB_MARKER)[i] for i in range(3))
+    has_blob = sep != ""
+    head = head.where(~has_blob, head + ",")
+    dtypes = {c: str for c in DICTIONARY_COLUMNS if c in columns}
+    df = pd.read_csv(io.StringIO("\n".join(head)), header=None, names=columns, dtype=dtypes)
+    df.index = raw.index
+
+    if BLOB_COLUMN in columns:
+        blob = blob.where(has_blob)
+        # Rows written by a CSV-aware writer double their quotes
+        escaped = blob.str.startswith('""', na=False)
+        if escaped.any():
+            blob = blob.where(~escaped, blob[escaped].str.replace('""', '"', regex=False))
+        df["productCount"] = _product_counts(blob)
+        df["hasExtractionResults"] = has_blob.to_numpy()
+        df = df.drop(columns=[BLOB_COLUMN])
+
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601", utc=True, errors="coerce")
+    ms = pd.to_numeric(df["executionTime"].astype(str).str.removesuffix("ms"), errors="coerce")
+    df["executionTimeMs"] = ms
+    df["executionTimeSeconds"] = ms / 1000
+    df = df.drop(columns=["executionTime"])
+    for col in BOOL_COLUMNS:
+        if col in df.columns and df[col].dtype != bool:
+            df[col] = df[col].astype(str).str.lower().map({"true": True, "false": False})
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df.reset_index(drop=True)
+
+
+class RunLogIngestor:
+    """Checkpointed, append-only ingest of one CSV log into a cache directory"""
+
+    def __init__(self, csv_path, cache_dir=None, max_parts=16):
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.dirname(os.path.abspath(csv_path)),
+            f".{os.path.splitext(os.path.basename(csv_path))[0]}-cache",
+        )
+        self.max_parts = max_parts
+        self.checkpoint_path = os.path.join(self.cache_dir, "checkpoint.json")
+
+    # ------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("version") != CACHE_VERSION:
+            return None
+        return checkpoint
+
+    def _write_checkpoint(self, checkpoint):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp, self.checkpoint_path)
+
+    @staticmethod
+    def _tail_digest(f, offset):
+        start = max(0, offset - TAIL_FINGERPRINT_BYTES)
+        f.seek(start)
+        return hashlib.blake2b(f.read(offset - start), digest_size=16).hexdigest()
+
+    def _still_valid(self, checkpoint, f, size):
+        return size >= checkpoint["offset"] and self._tail_digest(f, checkpoint["offset"]) == checkpoint["tail"]
+
+    def reset(self):
+        """Forget everything ingested so far"""
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.startswith("part-") or name == "checkpoint.json":
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    # ------------------------------------------------------------
+    # Parts
+    # ------------------------------------------------------------
+    def _part_path(self, index):
+        return os.path.join(self.cache_dir, f"part-{index:05d}.parquet")
+
+    def _write_part(self, df, path):
+        tmp = path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    def _read_part(self, path):
+        return pd.read_parquet(path)
+
+    def _concat(self, frames):
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        # Parts carry their own dictionaries; re-encode against the combined one
+        for col in DICTIONARY_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        return df
+
+    # ------------------------------------------------------------
+    # Ingest / load
+    # ------------------------------------------------------------
+    def ingest(self, rebuild=False):
+        """Parse rows appended since the last checkpoint; returns how many were added"""
+        checkpoint = None if rebuild else self._read_checkpoint()
+        with open(self.csv_path, "rb") as f:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            size = os.fstat(f.fileno()).st_size
+            if checkpoint is not None and not self._still_valid(checkpoint, f, size):
+                checkpoint = None
+            if checkpoint is None:
+                self.reset()
+                f.seek(0)
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return 0  # nothing complete yet
+                checkpoint = {
+                    "version": CACHE_VERSION,
+                    "columns": header.decode("utf-8").strip().split(","),
+                    "offset": len(header),
+                    "rows": 0,
+                    "parts": [],
+                    "next_part": 0,
+                }
+            offset = checkpoint["offset"]
+            f.seek(offset)
+            records, consumed = complete_records(f.read(size - offset))
+            offset += consumed
+            checkpoint["tail"] = self._tail_digest(f, offset)
+
+        columns = checkpoint["columns"]
+        df = self._concat([
+            parse_rows(records[i:i + PARSE_CHUNK_ROWS], columns) for i in range(0, len(records), PARSE_CHUNK_ROWS)
+        ])
+        if len(df):
+            path = self._part_path(checkpoint["next_part"])
+            self._write_part(df, path)
+            checkpoint["next_part"] += 1
+            checkpoint["parts"].append(os.path.basename(path))
+            checkpoint["rows"] += len(df)
+        checkpoint["offset"] = offset
+        self._write_checkpoint(checkpoint)
+        if len(checkpoint["parts"]) > self.max_parts:
+            self.compact()
+        return len(df)
+
+    def compact(self):
+        """Merge all parts into one"""
+        checkpoint = self._read_checkpoint()
+        if checkpoint is None or len(checkpoint["parts"]) <= 1:
+            return
+        df = self._concat([self._read_part(os.path.join(self.cache_dir, p)) for p in checkpoint["parts"]])
+        old = checkpoint["parts"]
+        path = self._part_path(checkpoint["next_part"])
+        self._write_part(df, path)
+        checkpoint["parts"] = [os.path.basename(path)]
+        checkpoint["next_part"] += 1
+        # Only drop the old parts once the checkpoint points at the merged one
+        self._write_checkpoint(checkpoint)
+        for name in old:
+            os.remove(os.path.join(self.cache_dir, name))
+
+    def checkpoint(self):
+        """Current checkpoint (offset, rows, parts, ...), or None before the first ingest"""
+        return self._read_checkpoint()
+
+    def load(self):
+        """Every ingested row as one DataFrame (call ingest() first to pick up new rows)"""
+        checkpoint = self._read_checkpoint()
+        if checkpoint is None:
+            return pd.DataFrame()
+        return self._concat([self._read_part(os.path.join(self.cache_dir, p)) for p in checkpoint["parts"]])
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest new workflow-runs.csv rows into the columnar cache")
+    parser.add_argument("csv_path", nargs="?", default=str(DEFAULT_RUN_LOG))
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (default: .<csv name>-cache next to the CSV)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-ingest the whole log")
+    parser.add_argument("--compact", action="store_true", help="Merge part files after ingesting")
+    args = parser.parse_args()
+
+    ingestor = RunLogIngestor(args.csv_path, args.cache_dir)
+    try:
+        added = ingestor.ingest(rebuild=args.rebuild)
+    except FileNotFoundError:
+        print(f"CSV file not found at {args.csv_path}")
+        sys.exit(1)
+    if args.compact:
+        ingestor.compact()
+    checkpoint = ingestor.checkpoint() or {}
+    print(f"Ingested {added} new rows ({checkpoint.get('rows', 0)} total, "
+          f"{len(checkpoint.get('parts', []))} parquet parts in {ingestor.cache_dir})")
+
+
+if __name__ == "__main__":
+    main()
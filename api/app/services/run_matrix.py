@@ -0,0 +1,239 @@
+"""
+Variant-matrix scheduler behind POST /v1/runs/matrix
+
+Expands sites x task_ids x the cartesian product of variant dimensions into
+cells and runs each cell as an ordinary run on the run engine. Cells whose exact
+site/task/variant/payload already succeeded within `max_age_seconds` reuse that
+run instead of executing again. At most `concurrency` cells are in flight, and
+`dimension_limits` caps cells in flight per value of a dimension (e.g. one
+per site, two per model). Per-dimension latency and success aggregates are
+published as each cell completes.
+"""
+import asyncio
+import itertools
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.schemas import MatrixRequest
+from app.services.event_streams import BufferedEventStream
+from app.services.run_engine import RunEngine
+from app.services.run_store import RunRecord
+
+MATRIX_MAX_CELLS = int(os.getenv("MATRIX_MAX_CELLS", "500"))
+
+
+class MatrixCell(BaseModel):
+    index: int
+    site: str
+    task_id: str
+    variant: Dict[str, Any]
+    dims: Dict[str, str]  # dimension -> value label, including "site" and "task_id"
+
+
+def dimension_label(value: Any) -> str:
+    return value if isinstance(value, str) else repr(value)
+
+
+def expand_matrix(req: MatrixRequest) -> List[MatrixCell]:
+    base = req.variant.model_dump()
+    names = list(req.dimensions)
+    cells = []
+    for site, task_id, *values in itertools.product(req.sites, req.task_ids, *req.dimensions.values()):
+        dims = {"site": site, "task_id": task_id}
+        dims.update((name, dimension_label(value)) for name, value in zip(names, values))
+        cells.append(MatrixCell(
+            index=len(cells),
+            site=site,
+            task_id=task_id,
+            variant={**base, **dict(zip(names, values))},
+            dims=dims,
+        ))
+    return cells
+
+
+def cell_latency_ms(run: RunRecord) -> Optional[float]:
+    if run.started_at is None or run.finished_at is None:
+        return None
+    delta = datetime.fromisoformat(run.finished_at) - datetime.fromisoformat(run.started_at)
+    return round(delta.total_seconds() * 1000, 1)
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class MatrixAggregator:
+    """Running success/latency stats per dimension value"""
+
+    def __init__(self, cells: List[MatrixCell]):
+        self._groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for cell in cells:
+            for name, value in cell.dims.items():
+                group = self._groups.setdefault(name, {}).setdefault(value, {
+                    "cells": 0, "completed": 0, "succeeded": 0, "reused": 0, "latencies": [],
+                })
+                group["cells"] += 1
+
+    def add(self, cell: MatrixCell, run: RunRecord, reused: bool = False) -> None:
+        latency = cell_latency_ms(run)
+        for name, value in cell.dims.items():
+            group = self._groups[name][value]
+            group["completed"] += 1
+            group["succeeded"] += run.status == "succeeded"
+            group["reused"] += reused
+            if latency is not None:
+                group["latencies"].append(latency)
+
+    def add_error(self, cell: MatrixCell) -> None:
+        """A cell that never produced a run (e.g. it couldn't be enqueued)"""
+        for name, value in cell.dims.items():
+            self._groups[name][value]["completed"] += 1
+
+    @staticmethod
+    def _summary(group: Dict[str, Any]) -> Dict[str, Any]:
+        ordered = sorted(group["latencies"])
+        return {
+            "cells": group["cells"],
+            "completed": group["completed"],
+            "succeeded": group["succeeded"],
+            "reused": group["reused"],
+            "success_rate": round(group["succeeded"] / group["completed"], 4) if group["completed"] else None,
+            "latency_ms": {
+                "mean": round(sum(ordered) / len(ordered), 1) if ordered else None,
+                "p50": _percentile(ordered, 0.5),
+                "p95": _percentile(ordered, 0.95),
+            },
+        }
+
+    def snapshot(self, cell: Optional[MatrixCell] = None) -> Dict[str, Dict[str, Any]]:
+        """Every group, or only the groups a cell belongs to"""
+        if cell is not None:
+            return {name: {value: self._summary(self._groups[name][value])} for name, value in cell.dims.items()}
+        return {
+            name: {value: self._summary(group) for value, group in values.items()}
+            for name, values in self._groups.items()
+        }
+
+
+class MatrixScheduler:
+    def __init__(self, engine: RunEngine, req: MatrixRequest):
+        self.engine = engine
+        self.req = req
+        self.cells = expand_matrix(req)
+        self.aggregator = MatrixAggregator(self.cells)
+        self._pending: List[MatrixCell] = []
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._changed = asyncio.Condition()
+
+    def _fresh_run(self, cell: MatrixCell) -> Optional[RunRecord]:
+        if self.req.max_age_seconds <= 0:
+            return None
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.req.max_age_seconds)).isoformat()
+        return self.engine.store.find_recent(cell.site, cell.task_id, cell.variant, self.req.payload, cutoff)
+
+    def _fits(self, cell: MatrixCell) -> bool:
+        return all(
+            self._in_flight.get((name, value), 0) < self.req.dimension_limits[name]
+            for name, value in cell.dims.items()
+            if name in self.req.dimension_limits
+        )
+
+    def _next_runnable(self) -> Optional[MatrixCell]:
+        for i, cell in enumerate(self._pending):
+            if self._fits(cell):
+                return self._pending.pop(i)
+        return None
+
+    def _track(self, cell: MatrixCell, delta: int) -> None:
+        for key in cell.dims.items():
+            self._in_flight[key] = self._in_flight.get(key, 0) + delta
+
+    async def _worker(self, done: asyncio.Queue) -> None:
+        while True:
+            async with self._changed:
+                cell = self._next_runnable()
+                while cell is None:
+                    if not self._pending:
+                        return
+                    await self._changed.wait()
+                    cell = self._next_runnable()
+                self._track(cell, 1)
+            try:
+                run = await self.engine.enqueue(
+                    site=cell.site,
+                    task_id=cell.task_id,
+                    variant=cell.variant,
+                    payload=self.req.payload,
+                    priority=self.req.priority,
+                )
+                await done.put((cell, await self.engine.wait(run.run_id)))
+            except Exception as e:
+                # Report the cell as failed rather than stalling the matrix
+                await done.put((cell, e))
+            finally:
+                async with self._changed:
+                    self._track(cell, -1)
+                    self._changed.notify_all()
+
+    def _cell_event(self, cell: MatrixCell, outcome: Any, reused: bool = False) -> Dict[str, Any]:
+        if isinstance(outcome, RunRecord):
+            self.aggregator.add(cell, outcome, reused)
+            info = {
+                "run_id": outcome.run_id,
+                "status": outcome.status,
+                "latency_ms": cell_latency_ms(outcome),
+                "error": outcome.error,
+            }
+        else:
+            self.aggregator.add_error(cell)
+            info = {"run_id": None, "status": "failed", "latency_ms": None, "error": str(outcome)}
+        return {
+            "cell": {"index": cell.index, "dims": cell.dims, **info, "reused": reused},
+            "aggregates": self.aggregator.snapshot(cell),
+        }
+
+    def _dimension_values(self) -> Dict[str, set]:
+        values: Dict[str, set] = {}
+        for cell in self.cells:
+            for name, value in cell.dims.items():
+                values.setdefault(name, set()).add(value)
+        return values
+
+    async def run(self, stream: BufferedEventStream) -> None:
+        await stream.publish({
+            "status": "started",
+            "streamId": stream.stream_id,
+            "cells": len(self.cells),
+            "dimensions": {name: sorted(values) for name, values in self._dimension_values().items()},
+        })
+        done: asyncio.Queue = asyncio.Queue()
+        completed = 0
+        for cell in self.cells:
+            cached = self._fresh_run(cell)
+            if cached is None:
+                self._pending.append(cell)
+            else:
+                completed += 1
+                await stream.publish(self._cell_event(cell, cached, True))
+
+        workers = [
+            asyncio.create_task(self._worker(done))
+            for _ in range(min(self.req.concurrency, len(self._pending)))
+        ]
+        try:
+            while completed < len(self.cells):
+                cell, outcome = await done.get()
+                completed += 1
+                await stream.publish(self._cell_event(cell, outcome))
+            await stream.publish({"status": "completed", "aggregates": self.aggregator.snapshot()})
+        finally:
+            # Abandoned or shutting down: stop scheduling; runs already queued finish on their own
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
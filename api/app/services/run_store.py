@@ -0,0 +1,193 @@
+"""
+Persistent run store (SQLite, WAL mode)
+
+Holds every run so /v1/runs survives restarts (step events live in the run
+event log). Writes are single-row inserts/updates on one shared connection; WAL
+keeps readers from blocking the writer, so enqueueing stays in the
+sub-millisecond range however many runs are queued.
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+RUN_STATUSES = ("queued", "running", "succeeded", "failed")
+FINISHED_STATUSES = ("succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL UNIQUE,
+    site TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    payload TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    session_id TEXT,
+    session_live_view_url TEXT,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, priority, seq);
+CREATE INDEX IF NOT EXISTS runs_cell ON runs (site, task_id, status, finished_at);
+"""
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RunRecord(BaseModel):
+    seq: int
+    run_id: str
+    site: str
+    task_id: str
+    variant: Dict[str, Any]
+    payload: Optional[Dict[str, Any]] = None
+    priority: int = 0
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    session_id: Optional[str] = None
+    session_live_view_url: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+_JSON_COLUMNS = ("variant", "payload", "result")
+
+
+def _record(row: sqlite3.Row) -> RunRecord:
+    data = dict(row)
+    for column in _JSON_COLUMNS:
+        data[column] = json.loads(data[column]) if data[column] else None
+    return RunRecord(**data)
+
+
+class RunStore:
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Durable enough with WAL and much cheaper per commit than FULL
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------
+    # Runs
+    # ------------------------------------------------------------
+    def create_run(
+        self,
+        site: str,
+        task_id: str,
+        variant: Dict[str, Any],
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+    ) -> RunRecord:
+        run_id = f"run_{uuid.uuid4().hex[:16]}"
+        created_at = utc_now()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (run_id, site, task_id, variant, payload, priority, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (
+                    run_id,
+                    site,
+                    task_id,
+                    json.dumps(variant, sort_keys=True),
+                    # Canonical JSON so identical payloads compare equal (see find_recent)
+                    json.dumps(payload, sort_keys=True) if payload is not None else None,
+                    priority,
+                    created_at,
+                ),
+            )
+        return RunRecord(
+            seq=cursor.lastrowid,
+            run_id=run_id,
+            site=site,
+            task_id=task_id,
+            variant=variant,
+            payload=payload,
+            priority=priority,
+            status="queued",
+            created_at=created_at,
+        )
+
+    def get_run(self, run_id: str) -> Optional[RunRecord]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return _record(row) if row else None
+
+    def list_runs(self, status: Optional[str] = None) -> List[RunRecord]:
+        query = "SELECT * FROM runs"
+        params: Tuple[Any, ...] = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY priority DESC, seq", params).fetchall()
+        return [_record(row) for row in rows]
+
+    def find_recent(
+        self,
+        site: str,
+        task_id: str,
+        variant: Dict[str, Any],
+        payload: Optional[Dict[str, Any]],
+        finished_after: str,
+    ) -> Optional[RunRecord]:
+        """Latest succeeded run of exactly this site/task/variant/payload finished after the given time"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM runs WHERE site = ? AND task_id = ? AND status = 'succeeded' AND finished_at >= ?"
+                " AND variant = ? AND payload IS ? ORDER BY finished_at DESC LIMIT 1",
+                (
+                    site,
+                    task_id,
+                    finished_after,
+                    json.dumps(variant, sort_keys=True),
+                    json.dumps(payload, sort_keys=True) if payload is not None else None,
+                ),
+            ).fetchone()
+        return _record(row) if row else None
+
+    def update_run(self, run_id: str, **fields: Any) -> None:
+        if not fields:
+            return
+        if "status" in fields and fields["status"] not in RUN_STATUSES:
+            raise ValueError(f"Unknown run status: {fields['status']}")
+        for column in _JSON_COLUMNS:
+            if column in fields and fields[column] is not None:
+                fields[column] = json.dumps(fields[column])
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE runs SET {assignments} WHERE run_id = ?", (*fields.values(), run_id))
+
+    def requeue_interrupted(self) -> int:
+        """Runs left 'running' by a previous process go back to the queue"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE runs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM runs GROUP BY status").fetchall()
+        return {status: 0 for status in RUN_STATUSES} | {row[0]: row[1] for row in rows}
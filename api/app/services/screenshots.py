@@ -0,0 +1,173 @@
+"""
+Capture-time screenshot pipeline for browser providers
+
+The browser hands back a PNG; re-encoding it to JPEG/WebP (and cropping it to
+`max_height`) happens on a small thread pool so the event loop driving the
+browser never blocks on Pillow. Before capturing, a cheap in-page fingerprint
+(URL, scroll position, size and a hash of the DOM) is compared with the
+previous step's; unchanged pages aren't captured again and the step points at
+the earlier screenshot instead.
+
+Screenshots are written to `output_dir` when set, otherwise returned inline as
+data URIs (the form /v1/runs/evaluate_task accepts).
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from PIL import Image
+from pydantic import BaseModel, ConfigDict
+
+ScreenshotFormat = Literal["jpeg", "webp"]
+_EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+
+# Evaluated in the page: [url, scrollX, scrollY, width, height, dom hash]
+PAGE_FINGERPRINT_JS = """() => {
+  const html = document.documentElement ? document.documentElement.outerHTML : "";
+  let h = 0x811c9dc5;
+  for (let i = 0; i < html.length; i++) {
+    h ^= html.charCodeAt(i);
+    h = Math.imul(h, 0x01000193);
+  }
+  const root = document.scrollingElement || document.documentElement || {};
+  return [location.href, scrollX, scrollY, innerWidth, root.scrollHeight || innerHeight, h >>> 0];
+}"""
+
+
+class ScreenshotSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    format: ScreenshotFormat = "jpeg"
+    quality: int = 75
+    full_page: bool = False
+    max_height: int = 4096
+    skip_unchanged: bool = True
+    output_dir: Optional[str] = None
+
+
+def encode_screenshot(png: bytes, fmt: ScreenshotFormat, quality: int, max_height: int) -> Tuple[bytes, int, int]:
+    """PNG bytes -> (encoded bytes, width, height), cropped to max_height"""
+    with Image.open(io.BytesIO(png)) as image:
+        if image.height > max_height:
+            image = image.crop((0, 0, image.width, max_height))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        buffered = io.BytesIO()
+        image.save(buffered, format=fmt.upper(), quality=quality)
+        return buffered.getvalue(), image.width, image.height
+
+
+class ScreenshotPipeline:
+    """Shared encoder pool; one ScreenshotSession per run tracks what it already captured"""
+
+    def __init__(self, settings: ScreenshotSettings = ScreenshotSettings(), workers: int = 2):
+        self.settings = settings
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshot")
+        self._counters = {"captured": 0, "skipped": 0, "png_bytes": 0, "encoded_bytes": 0}
+
+    def session(self) -> "ScreenshotSession":
+        return ScreenshotSession(self)
+
+    async def encode(self, png: bytes) -> Tuple[bytes, int, int]:
+        s = self.settings
+        encoded = await asyncio.get_running_loop().run_in_executor(
+            self._pool, encode_screenshot, png, s.format, s.quality, s.max_height
+        )
+        self._counters["png_bytes"] += len(png)
+        self._counters["encoded_bytes"] += len(encoded[0])
+        return encoded
+
+    async def store(self, data: bytes, name: str) -> str:
+        ext = _EXTENSIONS[self.settings.format]
+        if self.settings.output_dir is None:
+            return f"data:image/{self.settings.format};base64,{base64.b64encode(data).decode('ascii')}"
+        path = Path(self.settings.output_dir) / f"{name}.{ext}"
+        await asyncio.get_running_loop().run_in_executor(self._pool, _write_file, path, data)
+        return str(path)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.settings.model_dump(), **self._counters}
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+class ScreenshotSession:
+    def __init__(self, pipeline: ScreenshotPipeline):
+        self.pipeline = pipeline
+        self.prefix = uuid.uuid4().hex[:12]
+        self.shots: List[Dict[str, Any]] = []
+        self._last_fingerprint: Optional[List[Any]] = None
+        self._last_digest: Optional[str] = None
+
+    async def capture(self, page: Any, step: int) -> Dict[str, Any]:
+        s = self.pipeline.settings
+        fingerprint = await page.evaluate(PAGE_FINGERPRINT_JS)
+        if s.skip_unchanged and self.shots and fingerprint == self._last_fingerprint:
+            return self._skip(step)
+        self._last_fingerprint = fingerprint
+
+        if s.full_page:
+            # Don't rasterise more of a very long page than we'll keep
+            width, height = fingerprint[3], min(fingerprint[4], s.max_height)
+            png = await page.screenshot(full_page=True, clip={"x": 0, "y": 0, "width": width, "height": height})
+        else:
+            png = await page.screenshot()
+        digest = hashlib.blake2b(png, digest_size=16).hexdigest()
+        if s.skip_unchanged and self.shots and digest == self._last_digest:
+            return self._skip(step)
+        self._last_digest = digest
+
+        data, width, height = await self.pipeline.encode(png)
+        shot = {
+            "step": step,
+            "format": s.format,
+            "width": width,
+            "height": height,
+            "bytes": len(data),
+            "image": await self.pipeline.store(data, f"{self.prefix}-step-{step:02d}"),
+        }
+        self.pipeline._counters["captured"] += 1
+        self.shots.append(shot)
+        return shot
+
+    def _skip(self, step: int) -> Dict[str, Any]:
+        previous = next(shot for shot in reversed(self.shots) if "image" in shot)
+        shot = {"step": step, "same_as": previous["step"]}
+        self.pipeline._counters["skipped"] += 1
+        self.shots.append(shot)
+        return shot
+
+
+_pipeline: Optional[ScreenshotPipeline] = None
+
+
+def get_screenshot_pipeline() -> Optional[ScreenshotPipeline]:
+    """Pipeline configured from env, or None when SCREENSHOT_FORMAT is unset/'none'"""
+    global _pipeline
+    fmt = os.getenv("SCREENSHOT_FORMAT", "none").lower()
+    if fmt in ("", "none", "off"):
+        return None
+    if _pipeline is None:
+        _pipeline = ScreenshotPipeline(
+            ScreenshotSettings(
+                format="jpeg" if fmt == "jpg" else fmt,
+                quality=int(os.getenv("SCREENSHOT_QUALITY", "75")),
+                full_page=os.getenv("SCREENSHOT_FULL_PAGE", "0") == "1",
+                max_height=int(os.getenv("SCREENSHOT_MAX_HEIGHT", "4096")),
+                skip_unchanged=os.getenv("SCREENSHOT_SKIP_UNCHANGED", "1") != "0",
+                output_dir=os.getenv("SCREENSHOT_DIR") or None,
+            ),
+            workers=int(os.getenv("SCREENSHOT_WORKERS", "2")),
+        )
+    return _pipeline
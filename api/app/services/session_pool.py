@@ -0,0 +1,251 @@
+"""
+Warm pool of pre-created Browserbase sessions, keyed by browser settings
+
+Creating a session (plus fetching its debug URLs) is two sequential round trips to
+Browserbase before a run can start. The pool keeps a few ready sessions per
+(os, advancedStealth, proxies, viewport) combination, refills them in the background,
+and drops them before the provider's own session timeout.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, NamedTuple, Optional, Set, Tuple
+
+from app.services import browserbase
+from app.services.tracing import get_tracer
+
+
+class SessionPoolKey(NamedTuple):
+    os: Optional[str] = None
+    advanced_stealth: bool = False
+    proxies: bool = False
+    viewport: Optional[Tuple[int, int]] = None
+
+    def label(self) -> str:
+        viewport = f"{self.viewport[0]}x{self.viewport[1]}" if self.viewport else "default"
+        return f"os={self.os or 'default'},advancedStealth={self.advanced_stealth},proxies={self.proxies},viewport={viewport}"
+
+
+def session_payload(key: SessionPoolKey, project_id: Optional[str]) -> Dict[str, Any]:
+    """Browserbase create-session body for a pool key"""
+    browser_settings: Dict[str, Any] = {"advancedStealth": key.advanced_stealth}
+    if key.os:
+        browser_settings["os"] = key.os
+    if key.viewport:
+        browser_settings["viewport"] = {"width": key.viewport[0], "height": key.viewport[1]}
+    return {"projectId": project_id, "browserSettings": browser_settings, "proxies": key.proxies}
+
+
+CreateFn = Callable[[SessionPoolKey], Awaitable[Dict[str, Any]]]
+ReleaseFn = Callable[[str], Awaitable[None]]
+
+
+class BrowserbaseSessionPool:
+    """Hands out pre-created sessions; a miss falls back to creating one inline"""
+
+    def __init__(
+        self,
+        create_session: CreateFn,
+        release_session: Optional[ReleaseFn] = None,
+        min_size: int = 1,
+        max_size: int = 4,
+        ttl_seconds: float = 240.0,
+        refill_interval: float = 1.0,
+    ):
+        self.create_session = create_session
+        self.release_session = release_session
+        self.min_size = min_size
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.refill_interval = refill_interval
+
+        self._idle: Dict[SessionPoolKey, Deque[Tuple[float, Dict[str, Any]]]] = {}
+        # Warm target per key: starts at min_size and grows (up to max_size) on misses
+        self._targets: Dict[SessionPoolKey, int] = {}
+        self._pending: Dict[SessionPoolKey, int] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"hits": 0, "misses": 0, "created": 0, "expired": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    async def start(self, warm_keys: Tuple[SessionPoolKey, ...] = ()) -> None:
+        if not self.enabled or self._task:
+            return
+        for key in warm_keys:
+            self._targets.setdefault(key, max(self.min_size, 1))
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        """Stop refilling and release every idle session"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._background):
+            task.cancel()
+
+        idle = [session for sessions in self._idle.values() for _, session in sessions]
+        self._idle.clear()
+        await asyncio.gather(*(self._release(session) for session in idle))
+
+    # ------------------------------------------------------------
+    # Acquire
+    # ------------------------------------------------------------
+    async def acquire(self, key: SessionPoolKey) -> Dict[str, Any]:
+        """Take a warm session for key, or create one if none is ready"""
+        with get_tracer().span("session_pool.acquire", pooled=self.enabled) as span:
+            if not self.enabled:
+                return await self.create_session(key)
+
+            now = time.monotonic()
+            idle = self._idle.get(key)
+            while idle:
+                created_at, session = idle.popleft()
+                if now - created_at < self.ttl_seconds:
+                    self._counters["hits"] += 1
+                    self._targets.setdefault(key, self.min_size)
+                    self._kick()
+                    span.set("hit", True)
+                    return session
+                self._expire(session)
+
+            self._counters["misses"] += 1
+            span.set("hit", False)
+            if key in self._targets:
+                self._targets[key] = min(self._targets[key] + 1, self.max_size)
+            else:
+                self._targets[key] = min(max(self.min_size, 1), self.max_size)
+            self._kick()
+            session = await self.create_session(key)
+            self._counters["created"] += 1
+            return session
+
+    # ------------------------------------------------------------
+    # Background refill / expiry
+    # ------------------------------------------------------------
+    def _kick(self) -> None:
+        if self._wake:
+            self._wake.set()
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._evict_expired()
+            await self._refill()
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for idle in self._idle.values():
+            while idle and now - idle[0][0] >= self.ttl_seconds:
+                _, session = idle.popleft()
+                self._expire(session)
+
+    def _expire(self, session: Dict[str, Any]) -> None:
+        self._counters["expired"] += 1
+        task = asyncio.create_task(self._release(session))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _release(self, session: Dict[str, Any]) -> None:
+        session_id = session.get("id") or session.get("sessionId")
+        if not self.release_session or not session_id:
+            return
+        try:
+            await self.release_session(session_id)
+        except Exception:
+            # The provider times the session out anyway
+            pass
+
+    async def _refill(self) -> None:
+        fills = []
+        for key, target in self._targets.items():
+            have = len(self._idle.get(key, ())) + self._pending.get(key, 0)
+            for _ in range(max(0, min(target, self.max_size) - have)):
+                self._pending[key] = self._pending.get(key, 0) + 1
+                fills.append(self._fill_one(key))
+        if fills:
+            await asyncio.gather(*fills)
+
+    async def _fill_one(self, key: SessionPoolKey) -> None:
+        try:
+            session = await self.create_session(key)
+            self._counters["created"] += 1
+            self._idle.setdefault(key, deque()).append((time.monotonic(), session))
+        except Exception:
+            self._counters["errors"] += 1
+        finally:
+            self._pending[key] -= 1
+
+    # ------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            **self._counters,
+            "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else None,
+            "keys": {
+                key.label(): {
+                    "idle": len(self._idle.get(key, ())),
+                    "pending": self._pending.get(key, 0),
+                    "target": target,
+                }
+                for key, target in self._targets.items()
+            },
+        }
+
+
+# ------------------------------------------------------------
+# Process-wide pool configured from the environment
+# ------------------------------------------------------------
+async def create_browserbase_session(key: SessionPoolKey) -> Dict[str, Any]:
+    """Create a session and fetch its debug URLs in one go, so pooled sessions are ready to use"""
+    api_key = os.getenv("BROWSERBASE_API_KEY")
+    data = await browserbase.create_session(api_key, session_payload(key, os.getenv("BROWSERBASE_PROJECT_ID")))
+    session_id = data.get("id") or data.get("sessionId")
+    debug = await browserbase.get_debug_urls(api_key, session_id)
+    return {**data, **{k: v for k, v in debug.items() if v}}
+
+
+async def release_browserbase_session(session_id: str) -> None:
+    await browserbase.release_session(
+        os.getenv("BROWSERBASE_API_KEY"), os.getenv("BROWSERBASE_PROJECT_ID"), session_id
+    )
+
+
+_pool: Optional[BrowserbaseSessionPool] = None
+
+
+def get_session_pool() -> BrowserbaseSessionPool:
+    """Shared pool; disabled (pass-through) unless BB_POOL_MAX_SIZE > 0 since warm sessions are billed"""
+    global _pool
+    if _pool is None:
+        _pool = BrowserbaseSessionPool(
+            create_session=create_browserbase_session,
+            release_session=release_browserbase_session,
+            min_size=int(os.getenv("BB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("BB_POOL_MAX_SIZE", "0")),
+            ttl_seconds=float(os.getenv("BB_POOL_TTL_SECONDS", "240")),
+            refill_interval=float(os.getenv("BB_POOL_REFILL_INTERVAL", "1.0")),
+        )
+    return _pool
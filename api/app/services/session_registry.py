@@ -0,0 +1,276 @@
+"""
+In-process registry of the Browserbase sessions this API has handed out
+
+Tracks owner (client), project, creation time and last activity for every session,
+enforces per-project and per-client concurrency quotas (callers wait for a free
+slot), and reaps sessions that have gone idle so a crashed client can't leak a
+billable browser until the provider timeout.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.services import browserbase
+from app.services.tracing import get_tracer
+
+ReleaseFn = Callable[[str], Awaitable[None]]
+
+MAX_LABEL_CHARS = 64
+
+
+class TrackedSession(BaseModel):
+    session_id: str
+    project_id: Optional[str] = None
+    client_id: str
+    label: Optional[str] = None
+    created_at: float
+    last_activity: float
+
+
+class SessionSlot:
+    """A reserved quota slot; bind() it to the session it was used for"""
+
+    def __init__(self, project_id: Optional[str], client_id: str, label: Optional[str] = None):
+        self.project_id = project_id
+        self.client_id = client_id
+        self.label = label
+        self.session_id: Optional[str] = None
+
+    def bind(self, session_id: str) -> None:
+        self.session_id = session_id
+
+
+class SessionRegistry:
+    def __init__(
+        self,
+        release_session: ReleaseFn,
+        max_per_project: int = 25,
+        max_per_client: int = 5,
+        idle_timeout_seconds: float = 300.0,
+        queue_timeout_seconds: float = 30.0,
+        reap_interval: float = 15.0,
+    ):
+        self.release_session = release_session
+        self.max_per_project = max_per_project
+        self.max_per_client = max_per_client
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.reap_interval = reap_interval
+
+        self._sessions: Dict[str, TrackedSession] = {}
+        # Slots reserved while a session is being created count against the quotas too
+        self._reserved: Dict[str, int] = {}
+        self._reserved_by_client: Dict[str, int] = {}
+        self._waiting = 0
+        self._changed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"registered": 0, "released": 0, "reaped": 0, "queued": 0, "rejected": 0}
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    async def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.create_task(self._reap_loop())
+
+    async def stop(self) -> None:
+        """Stop reaping and release everything still tracked"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.gather(*(self.release(sid) for sid in list(self._sessions)))
+
+    # ------------------------------------------------------------
+    # Quotas
+    # ------------------------------------------------------------
+    def _project_count(self, project_id: Optional[str]) -> int:
+        active = sum(1 for s in self._sessions.values() if s.project_id == project_id)
+        return active + self._reserved.get(project_id or "", 0)
+
+    def _client_count(self, client_id: str) -> int:
+        active = sum(1 for s in self._sessions.values() if s.client_id == client_id)
+        return active + self._reserved_by_client.get(client_id, 0)
+
+    def _has_capacity(self, project_id: Optional[str], client_id: str) -> bool:
+        return (
+            self._project_count(project_id) < self.max_per_project
+            and self._client_count(client_id) < self.max_per_client
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self, project_id: Optional[str], client_id: str, label: Optional[str] = None
+    ) -> AsyncIterator[SessionSlot]:
+        """Wait (up to queue_timeout_seconds) for quota, then hold a slot while a session is created
+
+        Waiters are not served in arrival order: whichever wakes first after a
+        release and finds capacity takes the slot. Raises HTTPException(429) if
+        no slot frees up in time. If the body doesn't bind() a session id (e.g.
+        creation failed), the slot is simply returned. `label` is only reported
+        in stats(); quotas count client_id.
+        """
+        async with self._changed:
+            if not self._has_capacity(project_id, client_id):
+                self._counters["queued"] += 1
+                self._waiting += 1
+                try:
+                    with get_tracer().span("session.slot_wait", client_id=client_id):
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: self._has_capacity(project_id, client_id)),
+                            timeout=self.queue_timeout_seconds,
+                        )
+                except asyncio.TimeoutError:
+                    self._counters["rejected"] += 1
+                    raise HTTPException(429, "Concurrent session quota reached; try again later")
+                finally:
+                    self._waiting -= 1
+            self._reserve(project_id, client_id, 1)
+
+        slot = SessionSlot(project_id, client_id, label)
+        try:
+            yield slot
+        finally:
+            async with self._changed:
+                self._reserve(project_id, client_id, -1)
+                if slot.session_id:
+                    self._track(slot)
+                self._changed.notify_all()
+
+    def _reserve(self, project_id: Optional[str], client_id: str, delta: int) -> None:
+        self._reserved[project_id or ""] = self._reserved.get(project_id or "", 0) + delta
+        self._reserved_by_client[client_id] = self._reserved_by_client.get(client_id, 0) + delta
+
+    def _track(self, slot: SessionSlot) -> None:
+        now = time.time()
+        self._sessions[slot.session_id] = TrackedSession(
+            session_id=slot.session_id,
+            project_id=slot.project_id,
+            client_id=slot.client_id,
+            label=slot.label,
+            created_at=now,
+            last_activity=now,
+        )
+        self._counters["registered"] += 1
+
+    # ------------------------------------------------------------
+    # Activity / release
+    # ------------------------------------------------------------
+    def touch(self, session_id: str) -> None:
+        session = self._sessions.get(session_id)
+        if session:
+            session.last_activity = time.time()
+
+    def get(self, session_id: str) -> Optional[TrackedSession]:
+        return self._sessions.get(session_id)
+
+    async def forget(self, session_id: str) -> None:
+        """Stop tracking a session that has already ended on the provider side"""
+        async with self._changed:
+            if self._sessions.pop(session_id, None):
+                self._changed.notify_all()
+
+    async def release(self, session_id: str) -> bool:
+        """Release the session upstream and free its slot; False if it wasn't tracked"""
+        async with self._changed:
+            session = self._sessions.pop(session_id, None)
+            if session:
+                self._counters["released"] += 1
+                self._changed.notify_all()
+        if not session:
+            return False
+        try:
+            await self.release_session(session_id)
+        except Exception:
+            # Already gone upstream, or the provider timeout will catch it
+            pass
+        return True
+
+    async def reap_idle(self) -> int:
+        cutoff = time.time() - self.idle_timeout_seconds
+        idle = [sid for sid, s in self._sessions.items() if s.last_activity < cutoff]
+        released = await asyncio.gather(*(self.release(sid) for sid in idle))
+        self._counters["reaped"] += sum(released)
+        return sum(released)
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            await self.reap_idle()
+
+    # ------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        by_project: Dict[str, int] = {}
+        by_client: Dict[str, int] = {}
+        by_label: Dict[str, int] = {}
+        for s in self._sessions.values():
+            by_project[s.project_id or ""] = by_project.get(s.project_id or "", 0) + 1
+            by_client[s.client_id] = by_client.get(s.client_id, 0) + 1
+            if s.label:
+                by_label[s.label] = by_label.get(s.label, 0) + 1
+
+        now = time.time()
+        return {
+            "active": len(self._sessions),
+            "reserved": sum(self._reserved.values()),
+            "waiting": self._waiting,
+            "max_per_project": self.max_per_project,
+            "max_per_client": self.max_per_client,
+            "idle_timeout_seconds": self.idle_timeout_seconds,
+            "utilization": {
+                project: round(count / self.max_per_project, 4) for project, count in by_project.items()
+            } if self.max_per_project else {},
+            "by_project": by_project,
+            "by_client": by_client,
+            "by_label": by_label,
+            "oldest_idle_seconds": round(max((now - s.last_activity for s in self._sessions.values()), default=0), 1),
+            **self._counters,
+        }
+
+
+_registry: Optional[SessionRegistry] = None
+
+
+def get_session_registry() -> SessionRegistry:
+    global _registry
+    if _registry is None:
+        async def release(session_id: str) -> None:
+            await browserbase.release_session(
+                os.getenv("BROWSERBASE_API_KEY"), os.getenv("BROWSERBASE_PROJECT_ID"), session_id
+            )
+
+        _registry = SessionRegistry(
+            release,
+            max_per_project=int(os.getenv("BB_MAX_SESSIONS_PER_PROJECT", "25")),
+            max_per_client=int(os.getenv("BB_MAX_SESSIONS_PER_CLIENT", "5")),
+            idle_timeout_seconds=float(os.getenv("BB_SESSION_IDLE_TIMEOUT", "300")),
+            queue_timeout_seconds=float(os.getenv("BB_SESSION_QUEUE_TIMEOUT", "30")),
+            reap_interval=float(os.getenv("BB_SESSION_REAP_INTERVAL", "15")),
+        )
+    return _registry
+
+
+def client_id_for(request) -> str:
+    """Quota owner of a session: the caller's address
+
+    Not the x-client-id header, which any caller can rotate to get a fresh
+    quota. Behind a reverse proxy, run uvicorn with --forwarded-allow-ips so
+    the address is the real client's.
+    """
+    return request.client.host if request.client else "unknown"
+
+
+def client_label_for(request) -> Optional[str]:
+    """Caller-chosen x-client-id, reported per session but never used for quotas"""
+    label = request.headers.get("x-client-id")
+    return label[:MAX_LABEL_CHARS] if label else None
@@ -0,0 +1,111 @@
+"""
+Coalesced, short-TTL cache in front of Browserbase session status lookups
+
+Every live-session tile in the UI polls GET /v1/sessions/{id}. Concurrent lookups
+for the same session share one upstream request (single flight), and results are
+reused for a few seconds, so N open dashboards cost about one Browserbase call per
+session per TTL instead of N.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services import browserbase
+
+# Statuses that can no longer change, so they are safe to cache for longer
+TERMINAL_STATUSES = {"COMPLETED", "ERROR", "TIMED_OUT"}
+
+FetchFn = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class SessionStatusCache:
+    """Single-flight + TTL cache keyed by session id"""
+
+    def __init__(
+        self,
+        fetch: FetchFn,
+        ttl_seconds: float = 2.0,
+        terminal_ttl_seconds: float = 60.0,
+        max_entries: int = 10000,
+    ):
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.terminal_ttl_seconds = terminal_ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    async def get(self, session_id: str) -> Dict[str, Any]:
+        cached = self._fresh(session_id)
+        if cached is not None:
+            self._counters["hits"] += 1
+            return cached
+
+        task = self._inflight.get(session_id)
+        if task is not None:
+            self._counters["coalesced"] += 1
+        else:
+            self._counters["misses"] += 1
+            # Run the fetch as its own task so a caller that disconnects doesn't cancel it for the others
+            task = asyncio.ensure_future(self.fetch(session_id))
+            self._inflight[session_id] = task
+            task.add_done_callback(lambda t, sid=session_id: self._on_done(sid, t))
+        return await asyncio.shield(task)
+
+    def invalidate(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    def _fresh(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return data
+
+    def _on_done(self, session_id: str, task: asyncio.Task) -> None:
+        self._inflight.pop(session_id, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._counters["errors"] += 1
+            return
+
+        data = task.result()
+        ttl = self.terminal_ttl_seconds if data.get("status") in TERMINAL_STATUSES else self.ttl_seconds
+        self._entries[session_id] = (time.monotonic() + ttl, data)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"] + self._counters["coalesced"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_rate": round((self._counters["hits"] + self._counters["coalesced"]) / lookups, 4) if lookups else None,
+        }
+
+
+_cache: Optional[SessionStatusCache] = None
+
+
+def get_session_status_cache() -> SessionStatusCache:
+    global _cache
+    if _cache is None:
+        async def fetch(session_id: str) -> Dict[str, Any]:
+            return await browserbase.get_session(os.getenv("BROWSERBASE_API_KEY"), session_id)
+
+        _cache = SessionStatusCache(
+            fetch,
+            ttl_seconds=float(os.getenv("BB_STATUS_CACHE_TTL", "2")),
+            terminal_ttl_seconds=float(os.getenv("BB_STATUS_TERMINAL_CACHE_TTL", "60")),
+        )
+    return _cache
@@ -1,46 +1,63 @@
 import os
-import requests
+from typing import Optional
+
+import httpx
 from fastapi import HTTPException
+from app.services import browserbase
+from app.services.session_pool import SessionPoolKey, get_session_pool
+from app.services.session_registry import get_session_registry
+from app.services.tracing import get_tracer
+
+# Settings used for /v1/session/create; pre-warmed at start-up when the pool is enabled
+DEFAULT_SESSION_KEY = SessionPoolKey(viewport=(1280, 720))
 
-def create_browser_session(url: str) -> dict:
+async def create_browser_session(url: str, client_id: str = "anonymous", label: Optional[str] = None) -> dict:
     BB_API_KEY = os.getenv("BROWSERBASE_API_KEY")
     BB_PROJECT_ID = os.getenv("BROWSERBASE_PROJECT_ID")
 
     if not BB_API_KEY or not BB_PROJECT_ID:
         raise HTTPException(status_code=500, detail="Browserbase API key or project ID not set")
 
+    with get_tracer().span("session.create", client_id=client_id) as span:
+        # Queue for a free slot under the project/client concurrency quotas
+        async with get_session_registry().slot(BB_PROJECT_ID, client_id, label) as slot:
+            session = await _create_session(BB_API_KEY, BB_PROJECT_ID)
+            slot.bind(session["sessionId"])
+        span.set("session_id", session["sessionId"])
+    return session
+
+
+async def _create_session(api_key: str, project_id: str) -> dict:
+    # Warm pool: session and debug URLs were already fetched in the background
+    pool = get_session_pool()
+    if pool.enabled:
+        session_data = await pool.acquire(DEFAULT_SESSION_KEY)
+        return {
+            "sessionId": session_data.get("id"),
+            "sessionUrl": session_data.get("sessionUrl"),
+            "debuggerFullscreenUrl": session_data.get("debuggerFullscreenUrl"),
+            "debuggerUrl": session_data.get("debuggerUrl"),
+            "wsUrl": session_data.get("wsUrl")
+        }
+
     # Step 1: Create session
     try:
-        create_resp = requests.post(
-            "https://www.browserbase.com/v1/sessions",
-            headers={"Content-Type": "application/json", "X-BB-API-Key": BB_API_KEY},
-            json={
-                "projectId": BB_PROJECT_ID,
-                "browserSettings": {"viewport": {"width": 1280, "height": 720}},
-                "proxies": False
-            },
-            timeout=10
-        )
-        create_resp.raise_for_status()
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create browser session: {e}")
-
-    session_data = create_resp.json()
+        session_data = await browserbase.create_session(api_key, {
+            "projectId": project_id,
+            "browserSettings": {"viewport": {"width": 1280, "height": 720}},
+            "proxies": False
+        })
+    except (httpx.HTTPError, HTTPException) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create browser session: {getattr(e, 'detail', e)}")
+
     session_id = session_data.get("id")
     session_url = session_data.get("sessionUrl")
 
     # Step 2: Get debug URLs
     try:
-        debug_resp = requests.get(
-            f"https://www.browserbase.com/v1/sessions/{session_id}/debug",
-            headers={"X-BB-API-Key": BB_API_KEY},
-            timeout=10
-        )
-        debug_resp.raise_for_status()
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get session debug URLs: {e}")
-
-    debug_data = debug_resp.json()
+        debug_data = await browserbase.get_debug_urls(api_key, session_id)
+    except (httpx.HTTPError, HTTPException) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get session debug URLs: {getattr(e, 'detail', e)}")
 
     return {
         "sessionId": session_id,
@@ -0,0 +1,423 @@
+"""
+Lightweight span tracing (W3C trace context, no OpenTelemetry dependency)
+
+    with tracer.span("browserbase.create_session", project=project_id) as span:
+        ...
+        span.set("session_id", session_id)
+
+Spans nest through a contextvar, so children created in awaited coroutines,
+tasks and asyncio.to_thread() calls attach to the right parent. The ASGI
+middleware continues an incoming `traceparent` header (or starts a trace) per
+request and returns the request's `traceparent`; the shared HTTP client
+forwards the current one on outbound calls.
+
+Finished spans go to an in-memory collector (the most recent TRACE_MAX_TRACES
+traces, indexed by run_id so GET /v1/runs/{id}/trace can build a waterfall and
+critical path) and, when TRACE_FILE is set, to a JSONL file written in batches
+by a background thread. A span costs a few microseconds; unsampled traces
+(TRACE_SAMPLE_RATE) skip recording and export entirely but still propagate.
+"""
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    sampled = True
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _UnsampledSpan:
+    """Stand-in for a span nobody will see; keeps the trace id so propagation still works"""
+    __slots__ = ("trace_id", "span_id")
+    sampled = False
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-00"
+
+
+_current: contextvars.ContextVar[Any] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Any:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """'00-<trace id>-<parent id>-<flags>' -> (trace_id, parent_id, sampled); None if absent/invalid"""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "ff":
+        return None
+    _, trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+# ------------------------------------------------------------
+# Exporters
+# ------------------------------------------------------------
+class InMemoryCollector:
+    """Keeps whole traces for the most recent `max_traces` trace ids"""
+
+    def __init__(self, max_traces: int = 1000):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._runs: Dict[str, str] = {}  # run_id -> trace_id
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    evicted, _ = self._traces.popitem(last=False)
+                    self._runs = {r: t for r, t in self._runs.items() if t != evicted}
+            spans.append(span)
+            run_id = span.attributes.get("run_id")
+            if run_id:
+                self._runs[run_id] = span.trace_id
+
+    def trace(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            return list(self._traces.get(trace_id, ()))
+
+    def trace_id_for_run(self, run_id: str) -> Optional[str]:
+        return self._runs.get(run_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+            self._runs.clear()
+
+
+class JsonlFileExporter:
+    """Appends finished spans as JSON lines; a daemon thread does the writing in batches"""
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._writer, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span.to_dict())
+
+    def _writer(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                while True:
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+# ------------------------------------------------------------
+# Tracer
+# ------------------------------------------------------------
+class Tracer:
+    def __init__(
+        self,
+        collector: Optional[InMemoryCollector] = None,
+        exporters: Tuple[Any, ...] = (),
+        sample_rate: float = 1.0,
+        enabled: bool = True,
+    ):
+        self.collector = collector or InMemoryCollector()
+        self.exporters = exporters
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self._counters = {"spans": 0, "unsampled": 0}
+
+    def _start(self, name: str, parent: Any, attributes: Dict[str, Any]) -> Any:
+        if parent is None:
+            if not self.enabled or random.random() >= self.sample_rate:
+                self._counters["unsampled"] += 1
+                return _UnsampledSpan(f"{random.getrandbits(128):032x}", f"{random.getrandbits(64):016x}")
+            return Span(name, f"{random.getrandbits(128):032x}", None, attributes)
+        if not parent.sampled:
+            return _UnsampledSpan(parent.trace_id, parent.span_id)
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+
+    def _finish(self, span: Span, end_ns: Optional[int] = None) -> None:
+        span.end_ns = end_ns or time.time_ns()
+        self._counters["spans"] += 1
+        self.collector.export(span)
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Any]:
+        """Child of the current span, or of `traceparent` when given (e.g. from a request header)"""
+        parent = _current.get()
+        if traceparent is not None:
+            remote = parse_traceparent(traceparent)
+            if remote is not None:
+                trace_id, parent_id, sampled = remote
+                parent = _RemoteParent(trace_id, parent_id, sampled and self.enabled)
+        span = self._start(name, parent, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if span.sampled:
+                span.status = "error"
+                span.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            if isinstance(span, Span):
+                self._finish(span)
+
+    def record(self, name: str, start_ns: int, end_ns: int, parent: Any = None, **attributes: Any) -> None:
+        """Add an already-finished span (e.g. time a run spent queued)"""
+        parent = parent if parent is not None else _current.get()
+        span = self._start(name, parent, attributes)
+        if isinstance(span, Span):
+            span.start_ns = start_ns
+            self._finish(span, end_ns)
+
+    def close(self) -> None:
+        for exporter in self.exporters:
+            close = getattr(exporter, "close", None)
+            if close:
+                close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "sample_rate": self.sample_rate, **self._counters}
+
+
+class _RemoteParent:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def remote_parent(traceparent: Optional[str]) -> Optional[_RemoteParent]:
+    parsed = parse_traceparent(traceparent)
+    return _RemoteParent(*parsed) if parsed else None
+
+
+# ------------------------------------------------------------
+# Waterfall / critical path
+# ------------------------------------------------------------
+def waterfall(spans: List[Span]) -> Dict[str, Any]:
+    """Spans in start order with depth and offsets, plus the critical path through the trace"""
+    if not spans:
+        return {"trace_id": None, "duration_ms": 0, "spans": [], "critical_path": []}
+    by_id = {s.span_id: s for s in spans}
+    children: Dict[Optional[str], List[Span]] = {}
+    for s in spans:
+        parent = s.parent_id if s.parent_id in by_id else None
+        children.setdefault(parent, []).append(s)
+
+    origin = min(s.start_ns for s in spans)
+    ends: Dict[str, int] = {}
+
+    def effective_end(s: Span) -> int:
+        # Async children (e.g. a run executing after POST /runs returned) can outlive their parent
+        if s.span_id not in ends:
+            ends[s.span_id] = max([s.end_ns or s.start_ns] + [effective_end(c) for c in children.get(s.span_id, ())])
+        return ends[s.span_id]
+
+    rows: List[Dict[str, Any]] = []
+
+    def visit(s: Span, depth: int) -> None:
+        rows.append({
+            **s.to_dict(),
+            "depth": depth,
+            "offset_ms": round((s.start_ns - origin) / 1e6, 3),
+        })
+        for c in sorted(children.get(s.span_id, ()), key=lambda c: c.start_ns):
+            visit(c, depth + 1)
+
+    roots = sorted(children.get(None, ()), key=lambda s: s.start_ns)
+    for root in roots:
+        visit(root, 0)
+
+    path: Dict[str, float] = {}
+
+    def walk(s: Span, cursor: int) -> None:
+        # Walk backwards from the cursor: whichever child finished last blocked this span
+        for c in sorted(children.get(s.span_id, ()), key=effective_end, reverse=True):
+            end = min(effective_end(c), cursor)
+            if end <= s.start_ns or c.start_ns >= cursor:
+                continue
+            path[s.span_id] = path.get(s.span_id, 0) + (cursor - end)
+            walk(c, end)
+            cursor = max(c.start_ns, s.start_ns)
+        path[s.span_id] = path.get(s.span_id, 0) + max(0, cursor - s.start_ns)
+
+    last_root = max(roots, key=effective_end)
+    walk(last_root, effective_end(last_root))
+    critical = [
+        {"span_id": s.span_id, "name": s.name, "self_ms": round(path[s.span_id] / 1e6, 3)}
+        for s in sorted((by_id[i] for i in path), key=lambda s: s.start_ns)
+        if path[s.span_id] > 0
+    ]
+    return {
+        "trace_id": spans[0].trace_id,
+        "duration_ms": round((max(effective_end(r) for r in roots) - origin) / 1e6, 3),
+        "spans": rows,
+        "critical_path": critical,
+    }
+
+
+# ------------------------------------------------------------
+# ASGI middleware and HTTP propagation
+# ------------------------------------------------------------
+def route_template(scope: Dict[str, Any]) -> Optional[str]:
+    """'/v1/runs/{run_id}' for '/v1/runs/run_123' (keeps span names low-cardinality)"""
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if not path_format:
+        return None
+    # Routes of included routers don't carry the include prefix; recover it from the concrete path
+    try:
+        concrete = path_format.format(**{k: str(v) for k, v in scope.get("path_params", {}).items()})
+    except (KeyError, IndexError, ValueError):
+        return path_format
+    path = scope["path"]
+    return path[: len(path) - len(concrete)] + path_format if path.endswith(concrete) else path_format
+
+
+class TracingMiddleware:
+    """Server span per HTTP request; honours and returns `traceparent`"""
+
+    def __init__(self, app: Any, tracer: Optional[Tracer] = None):
+        self.app = app
+        self._tracer = tracer
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tracer = self._tracer or get_tracer()
+        incoming = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                incoming = value.decode("latin-1")
+                break
+        with tracer.span(f"HTTP {scope['method']}", traceparent=incoming, path=scope["path"]) as span:
+            async def send_with_traceparent(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.set("status_code", message["status"])
+                    message = {**message, "headers": [*message.get("headers", ()), (b"traceparent", span.traceparent.encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_traceparent)
+            finally:
+                template = route_template(scope)
+                if span.sampled and template:
+                    span.name = f"HTTP {scope['method']} {template}"
+
+
+async def inject_traceparent(request: Any) -> None:
+    """httpx request hook: forward the current trace to outbound calls"""
+    traceparent = current_traceparent()
+    if traceparent and "traceparent" not in request.headers:
+        request.headers["traceparent"] = traceparent
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        path = os.getenv("TRACE_FILE")
+        _tracer = Tracer(
+            InMemoryCollector(int(os.getenv("TRACE_MAX_TRACES", "1000"))),
+            exporters=(JsonlFileExporter(path),) if path else (),
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1")),
+            enabled=os.getenv("TRACING_ENABLED", "1") != "0",
+        )
+    return _tracer
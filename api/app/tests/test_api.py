@@ -1,39 +1,141 @@
+import json
+import time
+
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services import run_engine
 
-client = TestClient(app)
 
-def test_health():
-    r = client.get("/v1/health")
-    assert r.status_code == 200
-    assert r.json()["status"] == "ok"
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_STORE_PATH", str(tmp_path / "runs.sqlite3"))
+    monkeypatch.setenv("RUN_EVENT_LOG_DIR", str(tmp_path / "run_events"))
+    monkeypatch.setattr(run_engine, "_engine", None)
+    with TestClient(app) as c:
+        yield c
 
-def test_create_run():
+def create_run(client):
     payload = {
         "site": "target",
         "task_id": "ecommerce.add_white_tshirt_to_cart.v1",
         "variant": {"perception": "dom", "runtime": "playwright_local"},
+        "payload": {"steps": []},  # no browser needed
     }
     r = client.post("/v1/runs", json=payload)
     assert r.status_code == 200
-    body = r.json()
-    assert "run_id" in body and "status" in body
+    return r.json()
+
+def wait_until_finished(client, run_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"/v1/runs/{run_id}").json()
+        if body["status"] in ("succeeded", "failed"):
+            return body
+        time.sleep(0.02)
+    raise AssertionError("run did not finish")
 
-def test_get_run_and_score():
-    # use the known demo id
-    r = client.get("/v1/runs/run_demo_1")
+def test_health(client):
+    r = client.get("/v1/health")
     assert r.status_code == 200
-    body = r.json()
-    assert body["run_id"] == "run_demo_1"
+    assert r.json()["status"] == "ok"
+
+def test_create_run(client):
+    body = create_run(client)
+    assert "run_id" in body and "status" in body
+    assert body["status"] == "queued"
+
+def test_get_run_and_score(client):
+    run_id = create_run(client)["run_id"]
+    body = wait_until_finished(client, run_id)
+    assert body["run_id"] == run_id
+    assert body["status"] == "succeeded"
     assert "links" in body and "score" in body["links"]
 
-    r2 = client.get("/v1/runs/run_demo_1/score")
+    r2 = client.get(f"/v1/runs/{run_id}/score")
     assert r2.status_code == 200
     score = r2.json()
     assert "success" in score and "metrics" in score
+    assert score["success"] is True
 
-def test_list_events():
-    r = client.get("/v1/runs/run_demo_1/events")
+def test_list_events(client):
+    run_id = create_run(client)["run_id"]
+    wait_until_finished(client, run_id)
+    r = client.get(f"/v1/runs/{run_id}/events")
     assert r.status_code == 200
     body = r.json()
     assert "items" in body and isinstance(body["items"], list)
+    assert body["items"][0]["action"] == "start"
+
+    page = client.get(f"/v1/runs/{run_id}/events", params={"limit": 1}).json()
+    assert len(page["items"]) == 1 and page["next_cursor"]
+
+def test_unknown_run_is_404(client):
+    assert client.get("/v1/runs/run_missing").status_code == 404
+
+def test_run_matrix_streams_cells(client):
+    spec = {
+        "sites": ["target"],
+        "task_ids": ["ecommerce.add_white_tshirt_to_cart.v1"],
+        "dimensions": {"model": ["gpt-4o", "gpt-4o-mini"]},
+        "payload": {"steps": []},
+    }
+    events = []
+    with client.stream("POST", "/v1/runs/matrix", json=spec) as r:
+        assert r.status_code == 200
+        for line in r.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+                if events[-1].get("status") == "completed":
+                    break
+    assert events[0]["cells"] == 2
+    assert [e["cell"]["status"] for e in events if "cell" in e] == ["succeeded", "succeeded"]
+    assert events[-1]["aggregates"]["model"]["gpt-4o"]["success_rate"] == 1.0
+
+def test_run_trace_joins_the_creating_request(client):
+    r = client.post("/v1/runs", json={
+        "site": "target",
+        "task_id": "ecommerce.add_white_tshirt_to_cart.v1",
+        "variant": {"perception": "dom", "runtime": "playwright_local"},
+        "payload": {"steps": []},
+    })
+    trace_id = r.headers["traceparent"].split("-")[1]
+    run_id = r.json()["run_id"]
+    wait_until_finished(client, run_id)
+
+    trace = client.get(f"/v1/runs/{run_id}/trace").json()
+    assert trace["trace_id"] == trace_id
+    names = [span["name"] for span in trace["spans"]]
+    assert names[0] == "HTTP POST /v1/runs"
+    assert {"run.queued", "run.execute", "provider.run"} <= set(names)
+    assert trace["critical_path"][-1]["name"] in ("run.execute", "provider.run")
+
+def test_metrics_exposition(client):
+    client.get("/v1/health")
+    r = client.get("/v1/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/v1/health",status="200"}' in r.text
+    assert "# TYPE cache_lookups_total counter" in r.text
+    assert 'cache_lookups_total{cache="session_pool",result="hit"}' in r.text
+    assert "runs_queued 0" in r.text
+
+def test_analytics_endpoints(client, tmp_path, monkeypatch):
+    import shutil
+    from pathlib import Path
+    from app.services import run_analytics
+
+    log = tmp_path / "workflow-runs.csv"
+    shutil.copy(Path(__file__).resolve().parents[3] / "dataviz" / "workflow-runs.csv", log)
+    monkeypatch.setenv("RUN_LOG_CSV", str(log))
+    monkeypatch.setenv("RUN_LOG_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(run_analytics, "_analytics", None)
+
+    assert client.get("/v1/analytics/summary").json()["rows"] == 154
+    models = client.get("/v1/analytics/models").json()["items"]
+    assert {"p50", "p95", "p99"} <= set(models[0]["latency_ms"])
+    series = client.get("/v1/analytics/series", params={"bucket": "day", "group_by": "search_term"}).json()
+    assert all("group" in p for p in series["points"])
+    assert client.get("/v1/analytics/series", params={"bucket": "minute"}).status_code == 422
+    client.get("/v1/analytics/models")
+    assert client.get("/v1/analytics/stats").json()["hits"] == 1
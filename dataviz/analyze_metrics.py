@@ -13,42 +13,25 @@ import json
 import os
 import sys
 
+import phase_attribution
+from regression_detect import build_report, format_result
+from run_log_ingest import RunLogIngestor
+
 class MetricsAnalyzer:
-    def __init__(self, csv_path="../ui/logs/workflow-runs.csv"):
-        """Initialize with path to CSV file"""
+    def __init__(self, csv_path="../ui/logs/workflow-runs.csv", cache_dir=None):
+        """Initialize with path to CSV file (and optionally where to keep its columnar cache)"""
         self.csv_path = csv_path
+        self.cache_dir = cache_dir
         self.df = None
         self.load_data()
     
     def load_data(self):
-        """Load and preprocess the CSV data"""
+        """Ingest rows appended since the last run, then load the columnar cache"""
         try:
-            self.df = pd.read_csv(self.csv_path)
-            print(f"Loaded {len(self.df)} records from {self.csv_path}")
-            
-            # Parse timestamps
-            self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
-            
-            # Parse execution time (remove 'ms' suffix and convert to int)
-            self.df['executionTimeMs'] = self.df['executionTime'].str.replace('ms', '').astype(int)
-            self.df['executionTimeSeconds'] = self.df['executionTimeMs'] / 1000
-            
-            # Convert boolean columns
-            bool_columns = ['advancedStealth', 'proxies']
-            for col in bool_columns:
-                if col in self.df.columns:
-                    self.df[col] = self.df[col].map({'true': True, 'false': False})
-            
-            # Parse extraction results JSON
-            self.df['productCount'] = 0
-            for idx, row in self.df.iterrows():
-                try:
-                    if pd.notna(row['extractionResults']):
-                        results = json.loads(row['extractionResults'])
-                        if 'products' in results:
-                            self.df.loc[idx, 'productCount'] = len(results['products'])
-                except:
-                    pass
+            ingestor = RunLogIngestor(self.csv_path, self.cache_dir)
+            added = ingestor.ingest()
+            self.df = ingestor.load()
+            print(f"Loaded {len(self.df)} records from {self.csv_path} ({added} new since last run)")
             
             print("Data preprocessing completed")
             print(f"Date range: {self.df['timestamp'].min()} to {self.df['timestamp'].max()}")
@@ -275,6 +258,36 @@ class MetricsAnalyzer:
         if len(low_efficiency) > 0:
             print(f"  • {len(low_efficiency)} runs had low token efficiency")
             print(f"    Common factors: {', '.join(low_efficiency['searchTerm'].value_counts().head(3).index)}")
+        
+        # Distribution-level comparisons between configurations
+        print(f"\n📉 SIGNIFICANT SHIFTS (bootstrap CI + rank test, vs. the most-run configuration):")
+        shifts = []
+        for by in (['modelName'], ['advancedStealth', 'proxies']):
+            report = build_report(self.df, by=by, n_boot=1000)
+            shifts += [r for r in report['results'] if r['verdict'] in ('regression', 'improvement')]
+        if shifts:
+            for result in shifts:
+                print(f"  • {format_result(result)}")
+        else:
+            print("  • No configuration differs significantly from its baseline")
+    
+    def generate_phase_breakdown(self):
+        """Attribute wall time and cost to act/extract/observe, browser session and overhead"""
+        print("\n=== PHASE BREAKDOWN ===")
+        if 'actInferenceTimeMs' not in self.df.columns:
+            print("No per-phase columns in this data")
+            return
+        
+        report = phase_attribution.build_report(self.df, limit=5)
+        print(phase_attribution.format_summary(report['phases']))
+        if report['cost_usd'] is not None:
+            print(f"\nLLM cost across {report['runs']} runs: ${report['cost_usd']:.2f}")
+        
+        high = report['high_overhead']
+        print(f"\n⏱️  {high['count']} runs with unusually large non-LLM overhead for their search term")
+        for run in high['runs']:
+            print(f"  • {run['searchTerm']} at {run['timestamp']}: {run['overheadMs'] / 1000:.1f}s "
+                  f"(typical {run['typicalOverheadMs'] / 1000:.1f}s)")
     
     def export_for_d3(self, output_path="processed_data.json"):
         """Export processed data for D3 visualization"""
@@ -311,6 +324,7 @@ class MetricsAnalyzer:
         print("Running full analysis...")
         self.generate_summary_stats()
         self.generate_insights()
+        self.generate_phase_breakdown()
         self.create_visualizations()
         self.export_for_d3()
         print("\n✅ Analysis complete!")
@@ -1,6 +1,11 @@
 // Simplified Dashboard for Agent Navigation Metrics
 // Three key visualizations: Execution Time, Tokens per Run, Success Rate
 
+// A completed session that extracted something; run_succeeded in run_log_ingest.py is the same rule
+function runSucceeded(browserbaseStatus, productCount, hasExtractionResults) {
+    return browserbaseStatus === "COMPLETED" && (productCount > 0 || Boolean(hasExtractionResults));
+}
+
 class MetricsDashboard {
     constructor() {
         this.data = [];
@@ -47,6 +52,7 @@ class MetricsDashboard {
             this.createCharts();
             console.log("🔄 Updating all charts with data...");
             this.updateAllCharts();
+            this.connectLive();
             console.log("✅ Dashboard initialization complete at", new Date().toLocaleTimeString());
         } catch (error) {
             console.error("❌ Dashboard initialization failed:", error);
@@ -100,7 +106,7 @@ class MetricsDashboard {
                     }
                     
                     // Determine success: completed status and either has products or extraction results exist
-                    success = d.browserbaseStatus === "COMPLETED" && (productCount > 0 || (d.extractionResults && d.extractionResults.trim() !== ''));
+                    success = runSucceeded(d.browserbaseStatus, productCount, d.extractionResults && d.extractionResults.trim() !== '');
                     
                     if (index < 5) {
                         console.log(`Record ${index} success logic:`, {
@@ -161,6 +167,71 @@ class MetricsDashboard {
         }
     }
 
+    // Live mode (serve_dashboard.py --live): new runs arrive over SSE as they are logged
+    connectLive() {
+        if (!window.EventSource) return;
+        this.liveModelCount = new Set(this.data.map(d => d.modelShortName)).size;
+        this.liveSearchTermCount = new Set(this.data.map(d => d.searchTerm)).size;
+        const source = new EventSource("/events");
+        source.addEventListener("snapshot", async (event) => {
+            const snapshot = JSON.parse(event.data);
+            // Rows were logged between our CSV load and this connection (or the log was rotated)
+            if (snapshot.total !== this.data.length) {
+                await this.loadData();
+                this.refreshAfterNewData();
+            }
+        });
+        source.addEventListener("delta", (event) => {
+            const delta = JSON.parse(event.data);
+            if (delta.first !== this.data.length) {
+                // Missed a delta; let the server resend a snapshot
+                source.close();
+                setTimeout(() => this.connectLive(), 1000);
+                return;
+            }
+            this.data.push(...delta.rows.map(row => this.liveRecord(row)));
+            console.log(`📡 ${delta.rows.length} new run(s), ${delta.total} total`);
+            this.refreshAfterNewData();
+        });
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                console.log("Live updates unavailable (static server)");
+            }
+        };
+    }
+
+    liveRecord(row) {
+        const modelName = row.modelName || 'unknown';
+        return {
+            timestamp: this.parseDate(row.timestamp),
+            modelName: modelName,
+            modelShortName: modelName.split('/').pop(),
+            searchTerm: row.searchTerm || 'unknown',
+            executionTime: row.executionTimeMs || 0,
+            totalTokens: row.totalTokens || 0,
+            tokensPerSecond: row.tokensPerSecond || 0,
+            browserbaseStatus: row.browserbaseStatus || 'UNKNOWN',
+            success: runSucceeded(row.browserbaseStatus, row.productCount, row.hasExtractionResults),
+            productCount: row.productCount || 0,
+            extractionResults: null
+        };
+    }
+
+    refreshAfterNewData() {
+        const models = [...new Set(this.data.map(d => d.modelShortName))];
+        const searchTermCount = new Set(this.data.map(d => d.searchTerm)).size;
+        // Rebuilding the filter menus resets the selection, so only do it when a new model or term shows up
+        if (models.length !== this.liveModelCount || searchTermCount !== this.liveSearchTermCount) {
+            this.modelColorScale.domain(models);
+            this.setupFilters();
+            this.setupModelFilter();
+        }
+        this.liveModelCount = models.length;
+        this.liveSearchTermCount = searchTermCount;
+        this.filterData();
+        this.updateAllCharts();
+    }
+
     parseExecutionTime(executionTimeStr) {
         if (!executionTimeStr) return 0;
         // Handle formats like "42386ms" or just numbers
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Phase-level latency, token and cost attribution for workflow runs
+
+Each run's wall time (the Browserbase session when it was recorded, otherwise
+the workflow's own executionTime) is split into:
+
+* act / extract / observe - the LLM inference time the workflow logged per phase;
+* session - Browserbase session time outside the workflow (create, connect,
+  release);
+* overhead - the rest of executionTime: navigation, page loads and DOM work
+  between LLM calls, plus anything else nothing measures.
+
+Per phase the report gives tokens per second (ratio of sums, so long runs
+weigh more than short ones) and cost from MODEL_PRICING. Runs whose overhead
+is far above the typical run for the same search term (modified z-score on
+the median absolute deviation) are listed - that is where browser
+infrastructure, not prompts or models, is the bottleneck.
+"""
+
+import itertools
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from run_log_ingest import RunLogIngestor
+
+PHASES = ["act", "extract", "observe"]
+COMPONENTS = [*PHASES, "session", "overhead"]
+# USD per million (prompt, completion) tokens, keyed by model name without the provider prefix
+MODEL_PRICING = {
+    "claude-3-5-sonnet-20240620": (3.00, 15.00),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-3-7-sonnet-20250219": (3.00, 15.00),
+    "claude-sonnet-4-20250514": (3.00, 15.00),
+    "claude-opus-4-20250514": (15.00, 75.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+# Modified z-score above which a run's overhead counts as unusually large
+OVERHEAD_Z_THRESHOLD = 3.5
+
+
+def _price_columns(models, pricing):
+    """Per-row (prompt, completion) USD per token; NaN for models without a price"""
+    names = pd.Series(models, dtype=object).astype(str).str.rsplit("/", n=1).str[-1]
+    prompt = names.map({m: p[0] / 1e6 for m, p in pricing.items()}).to_numpy(dtype=float)
+    completion = names.map({m: p[1] / 1e6 for m, p in pricing.items()}).to_numpy(dtype=float)
+    return prompt, completion
+
+
+def attribute(df, pricing=None):
+    """Per-run breakdown: <component>Ms, wallMs, llmMs, overheadShare and per-phase costUsd
+
+    Runs that never executed (executionTime 0) are dropped.
+    """
+    pricing = MODEL_PRICING if pricing is None else pricing
+    df = df[df["executionTimeMs"] > 0]
+    execution = df["executionTimeMs"].to_numpy(dtype=float)
+    session = df["browserbaseDurationMs"].to_numpy(dtype=float) if "browserbaseDurationMs" in df else np.full(len(df), np.nan)
+    wall = np.where(np.isnan(session), execution, np.maximum(session, execution))
+
+    out = pd.DataFrame(index=df.index)
+    for col in ("timestamp", "modelName", "searchTerm", "url", "browserbaseSessionId"):
+        if col in df:
+            out[col] = df[col]
+    out["wallMs"] = wall
+    out["executionTimeMs"] = execution
+    prompt_price, completion_price = _price_columns(df["modelName"], pricing)
+    llm = np.zeros(len(df))
+    cost = np.zeros(len(df))
+    for phase in PHASES:
+        ms = df[f"{phase}InferenceTimeMs"].to_numpy(dtype=float)
+        prompt = df[f"{phase}PromptTokens"].to_numpy(dtype=float)
+        completion = df[f"{phase}CompletionTokens"].to_numpy(dtype=float)
+        out[f"{phase}Ms"] = ms
+        out[f"{phase}PromptTokens"] = prompt
+        out[f"{phase}CompletionTokens"] = completion
+        out[f"{phase}CostUsd"] = prompt * prompt_price + completion * completion_price
+        llm += ms
+        cost += out[f"{phase}CostUsd"].to_numpy()
+    out["llmMs"] = llm
+    out["sessionMs"] = wall - execution
+    # LLM calls logged as longer than the run itself (clock skew, concurrent calls) leave no overhead
+    out["overheadMs"] = np.clip(execution - llm, 0, None)
+    out["overheadShare"] = out["overheadMs"] / wall
+    out["costUsd"] = cost
+    return out
+
+
+def phase_summary(runs, by="modelName"):
+    """Per group and component: total/mean time, share of wall time, tokens/s and cost (one dict each)"""
+    rows = []
+    for key, group in runs.groupby(by, observed=True, sort=True):
+        wall = group["wallMs"].sum()
+        for component in COMPONENTS:
+            ms = group[f"{component}Ms"].sum()
+            row = {
+                "group": str(key),
+                "component": component,
+                "runs": len(group),
+                "total_ms": float(ms),
+                "mean_ms": round(float(ms / len(group)), 1),
+                "share_of_wall": round(float(ms / wall), 4) if wall else None,
+            }
+            if component in PHASES:
+                prompt = group[f"{component}PromptTokens"].sum()
+                completion = group[f"{component}CompletionTokens"].sum()
+                seconds = ms / 1000
+                # NaN (reported as None) if any run's model is unpriced, rather than a partial total
+                cost = group[f"{component}CostUsd"].sum(min_count=len(group))
+                row.update(
+                    prompt_tokens=int(prompt),
+                    completion_tokens=int(completion),
+                    tokens_per_second=round(float((prompt + completion) / seconds), 1) if seconds else None,
+                    completion_tokens_per_second=round(float(completion / seconds), 1) if seconds else None,
+                    cost_usd=round(float(cost), 4) if np.isfinite(cost) else None,
+                    cost_per_run_usd=round(float(cost / len(group)), 5) if np.isfinite(cost) else None,
+                )
+            rows.append(row)
+    return rows
+
+
+def high_overhead_runs(runs, by="searchTerm", threshold=OVERHEAD_Z_THRESHOLD):
+    """Runs whose overhead is unusually large for their group, worst first
+
+    Uses the modified z-score 0.6745 * (x - median) / MAD within each group, so
+    one slow page doesn't hide another the way a mean/std rule would. Groups
+    where most runs share one value (MAD 0) fall back to the mean absolute
+    deviation, scaled to match.
+    """
+    overhead = runs["overheadMs"]
+    key = runs[by] if by else pd.Series(0, index=runs.index)
+    median = overhead.groupby(key, observed=True).transform("median")
+    deviation = (overhead - median).abs()
+    mad = deviation.groupby(key, observed=True).transform("median") / 0.6745
+    mean_ad = deviation.groupby(key, observed=True).transform("mean") / 0.7979
+    scale = mad.where(mad > 0, mean_ad)
+    z = ((overhead - median) / scale.where(scale > 0)).fillna(0.0)
+    flagged = runs.assign(overheadZ=z, typicalOverheadMs=median)[z > threshold]
+    return flagged.sort_values("overheadZ", ascending=False)
+
+
+def build_report(df, by="modelName", outlier_by="searchTerm", threshold=OVERHEAD_Z_THRESHOLD, pricing=None, limit=20):
+    """Phase summary, overall cost and high-overhead runs as a JSON-ready dict"""
+    runs = attribute(df, pricing)
+    summary = phase_summary(runs, by)
+    outliers = high_overhead_runs(runs, outlier_by, threshold)
+    columns = [c for c in ("timestamp", "modelName", "searchTerm", "browserbaseSessionId", "wallMs", "llmMs",
+                           "sessionMs", "overheadMs", "typicalOverheadMs", "overheadShare", "overheadZ") if c in outliers]
+    listed = outliers[columns].head(limit).copy()
+    if "timestamp" in listed:
+        listed["timestamp"] = listed["timestamp"].map(lambda t: t.isoformat())
+    listed = listed.round({"overheadShare": 4, "overheadZ": 2, "typicalOverheadMs": 1})
+    return {
+        "runs": len(runs),
+        "wall_ms": float(runs["wallMs"].sum()),
+        "cost_usd": round(float(runs["costUsd"].sum()), 4) if runs["costUsd"].notna().all() else None,
+        "unpriced_models": sorted(runs.loc[runs["costUsd"].isna(), "modelName"].astype(str).unique()),
+        "phases": summary,
+        "high_overhead": {"threshold": threshold, "by": outlier_by, "count": len(outliers),
+                          "runs": listed.astype(object).where(listed.notna(), None).to_dict(orient="records")},
+    }
+
+
+def format_summary(summary):
+    """Text table of phase_summary() output"""
+    lines = []
+    for group, rows in itertools.groupby(summary, key=lambda row: row["group"]):
+        rows = list(rows)
+        lines.append(f"{group} ({rows[0]['runs']} runs)")
+        for row in rows:
+            share = f"{row['share_of_wall'] * 100:5.1f}%" if row["share_of_wall"] is not None else "    -"
+            line = f"  {row['component']:<9} {row['mean_ms'] / 1000:7.1f}s/run {share}"
+            if row.get("tokens_per_second") is not None:
+                cost = f"${row['cost_per_run_usd']:.4f}/run" if row["cost_per_run_usd"] is not None else "unpriced"
+                line += (f"  {row['tokens_per_second']:8.1f} tok/s"
+                         f"  {row['completion_tokens_per_second']:6.1f} out tok/s  {cost}")
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Attribute workflow run time and cost to act/extract/observe, browser session and overhead")
+    parser.add_argument("csv_path", nargs="?", default="../ui/logs/workflow-runs.csv")
+    parser.add_argument("--cache-dir", default=None, help="Ingest cache directory (see run_log_ingest.py)")
+    parser.add_argument("--by", default="modelName", help="Column to break the phase summary down by")
+    parser.add_argument("--outlier-by", default="searchTerm", help="Column whose groups define a typical overhead")
+    parser.add_argument("--threshold", type=float, default=OVERHEAD_Z_THRESHOLD, help="Modified z-score for a high-overhead run")
+    parser.add_argument("--pricing", default=None, help='JSON file of {"model": [prompt, completion] USD per 1M tokens} to add or override')
+    parser.add_argument("--output", default=None, help="Write the JSON report here ('-' for stdout)")
+    args = parser.parse_args()
+
+    pricing = dict(MODEL_PRICING)
+    if args.pricing:
+        with open(args.pricing) as f:
+            pricing.update({model: tuple(prices) for model, prices in json.load(f).items()})
+
+    ingestor = RunLogIngestor(args.csv_path, args.cache_dir)
+    try:
+        ingestor.ingest()
+    except FileNotFoundError:
+        print(f"CSV file not found at {args.csv_path}", file=sys.stderr)
+        sys.exit(1)
+    df = ingestor.load()
+
+    report = build_report(df, args.by, args.outlier_by, args.threshold, pricing)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    print(format_summary(report["phases"]))
+    cost = f"${report['cost_usd']:.2f}" if report["cost_usd"] is not None else "n/a (unpriced: " + ", ".join(report["unpriced_models"]) + ")"
+    print(f"\n{report['runs']} runs, {report['wall_ms'] / 3.6e6:.2f}h wall time, LLM cost {cost}")
+    high = report["high_overhead"]
+    print(f"{high['count']} runs with unusually large overhead for their {args.outlier_by}:")
+    for run in high["runs"]:
+        print(f"  {run.get('timestamp', '')} {run.get(args.outlier_by, '')}: {run['overheadMs'] / 1000:.1f}s overhead "
+              f"(typical {run['typicalOverheadMs'] / 1000:.1f}s, {run['overheadShare'] * 100:.0f}% of wall)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
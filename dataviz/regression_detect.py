@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Statistical regression detection for workflow runs
+
+Compares latency, tokens per second and success rate between configurations
+(model, advancedStealth, proxies, ...) or between a recent time window and the
+runs before it. Success is the dashboards' rule (run_succeeded: completed and
+extracted products or results). Each comparison gets:
+
+* the relative change in the median (latency, tokens/s) or the change in
+  success rate, with a bootstrap confidence interval. Resamples are drawn as
+  one index matrix per chunk, so the bootstrap is a handful of numpy calls
+  rather than a Python loop;
+* a Mann-Whitney U test (tie-corrected normal approximation) for the
+  continuous metrics and a two-proportion z-test for success, with p-values
+  Holm-adjusted across the whole report.
+
+A shift is only called a regression when it is significant, its interval
+excludes zero and it is at least `min_effect`, so the report can gate model or
+stealth-setting changes: the CLI exits 1 when any regression is found.
+"""
+
+import json
+import math
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from run_log_ingest import RunLogIngestor, succeeded
+
+# name -> (column, lower_is_better)
+CONTINUOUS_METRICS = {
+    "latency": ("executionTimeMs", True),
+    "tokens_per_second": ("tokensPerSecond", False),
+}
+SUCCESS_METRIC = "success"
+METRICS = [*CONTINUOUS_METRICS, SUCCESS_METRIC]
+# Upper bound on resampled values held in memory per bootstrap chunk
+BOOTSTRAP_CHUNK_ELEMENTS = 2_000_000
+
+
+def rankdata(values):
+    """Average ranks (1-based) and the tie correction term sum(t^3 - t)"""
+    values = np.asarray(values)
+    sorter = np.argsort(values, kind="mergesort")
+    inverse = np.empty(sorter.size, dtype=np.intp)
+    inverse[sorter] = np.arange(sorter.size)
+    ordered = values[sorter]
+    first = np.r_[True, ordered[1:] != ordered[:-1]]
+    dense = first.cumsum()[inverse]
+    bounds = np.r_[np.nonzero(first)[0], first.size]
+    ranks = 0.5 * (bounds[dense] + bounds[dense - 1] + 1)
+    ties = np.diff(bounds).astype(float)
+    return ranks, float(np.sum(ties ** 3 - ties))
+
+
+def mann_whitney(x, y):
+    """Two-sided Mann-Whitney U test: (U of x, p-value, rank-biserial correlation)"""
+    n1, n2 = len(x), len(y)
+    ranks, tie_term = rankdata(np.concatenate([x, y]))
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2)
+    n = n1 + n2
+    mu = n1 * n2 / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    if sigma == 0:
+        return u, 1.0, 0.0
+    z = (abs(u - mu) - 0.5) / sigma
+    p = min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+    return u, p, 1 - 2 * u / (n1 * n2)
+
+
+def two_proportion_test(k1, n1, k2, n2):
+    """Two-sided pooled z-test p-value for k1/n1 vs k2/n2"""
+    pooled = (k1 + k2) / (n1 + n2)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    if se == 0:
+        return 1.0
+    z = abs(k2 / n2 - k1 / n1) / se
+    return math.erfc(z / math.sqrt(2))
+
+
+def _bootstrap_statistic(values, statistic, n_boot, rng):
+    """`statistic` of `n_boot` resamples of `values`, drawn a chunk of rows at a time"""
+    reduce = np.median if statistic == "median" else np.mean
+    rows = max(1, BOOTSTRAP_CHUNK_ELEMENTS // len(values))
+    out = np.empty(n_boot)
+    for start in range(0, n_boot, rows):
+        stop = min(n_boot, start + rows)
+        idx = rng.integers(0, len(values), size=(stop - start, len(values)))
+        out[start:stop] = reduce(values[idx], axis=1)
+    return out
+
+
+def bootstrap_relative_ci(baseline, candidate, statistic="median", n_boot=2000, confidence=0.95, rng=None):
+    """Percentile CI for statistic(candidate) / statistic(baseline) - 1"""
+    rng = rng if rng is not None else np.random.default_rng(0)
+    base = _bootstrap_statistic(baseline, statistic, n_boot, rng)
+    cand = _bootstrap_statistic(candidate, statistic, n_boot, rng)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = cand / base - 1
+    ratio = ratio[np.isfinite(ratio)]
+    if ratio.size == 0:
+        return float("nan"), float("nan")
+    tail = (1 - confidence) / 2
+    lo, hi = np.quantile(ratio, [tail, 1 - tail])
+    return float(lo), float(hi)
+
+
+def bootstrap_rate_ci(k1, n1, k2, n2, n_boot=2000, confidence=0.95, rng=None):
+    """Percentile CI for k2/n2 - k1/n1 (resampling Bernoulli outcomes is a binomial draw)"""
+    rng = rng if rng is not None else np.random.default_rng(0)
+    diff = rng.binomial(n2, k2 / n2, n_boot) / n2 - rng.binomial(n1, k1 / n1, n_boot) / n1
+    tail = (1 - confidence) / 2
+    lo, hi = np.quantile(diff, [tail, 1 - tail])
+    return float(lo), float(hi)
+
+
+def holm_adjust(p_values):
+    """Holm-Bonferroni adjusted p-values, in input order"""
+    p = np.asarray(p_values, dtype=float)
+    if p.size == 0:
+        return p
+    order = np.argsort(p)
+    scaled = np.maximum.accumulate((p.size - np.arange(p.size)) * p[order])
+    adjusted = np.empty_like(p)
+    adjusted[order] = np.minimum(scaled, 1.0)
+    return adjusted
+
+
+def _values(df, column):
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+    return values[np.isfinite(values) & (values > 0)]
+
+
+def _round(value, digits=4):
+    return None if value is None or not math.isfinite(value) else round(float(value), digits)
+
+
+def compare(baseline, candidate, metric, n_boot=2000, confidence=0.95, min_samples=5, rng=None):
+    """Compare one metric between two sets of runs (verdicts are filled in by classify())"""
+    rng = rng if rng is not None else np.random.default_rng(0)
+    result = {"metric": metric}
+    if metric == SUCCESS_METRIC:
+        b, c = succeeded(baseline), succeeded(candidate)
+        result.update(n_baseline=len(b), n_candidate=len(c), lower_is_better=False)
+        if min(len(b), len(c)) < min_samples:
+            return result
+        k1, k2 = int(b.sum()), int(c.sum())
+        rate_b, rate_c = k1 / len(b), k2 / len(c)
+        lo, hi = bootstrap_rate_ci(k1, len(b), k2, len(c), n_boot, confidence, rng)
+        result.update(baseline=_round(rate_b), candidate=_round(rate_c), effect=_round(rate_c - rate_b),
+                      ci=[_round(lo), _round(hi)], p_value=two_proportion_test(k1, len(b), k2, len(c)))
+        return result
+
+    column, lower_is_better = CONTINUOUS_METRICS[metric]
+    b, c = _values(baseline, column), _values(candidate, column)
+    result.update(n_baseline=len(b), n_candidate=len(c), lower_is_better=lower_is_better)
+    if min(len(b), len(c)) < min_samples:
+        return result
+    med_b, med_c = float(np.median(b)), float(np.median(c))
+    lo, hi = bootstrap_relative_ci(b, c, "median", n_boot, confidence, rng)
+    _, p, rank_biserial = mann_whitney(b, c)
+    result.update(baseline=_round(med_b, 2), candidate=_round(med_c, 2), effect=_round(med_c / med_b - 1),
+                  ci=[_round(lo), _round(hi)], p_value=p, rank_biserial=_round(rank_biserial))
+    return result
+
+
+def classify(results, alpha=0.05, min_effect=0.05):
+    """Holm-adjust p-values across `results` and set each one's verdict in place"""
+    tested = [r for r in results if "p_value" in r]
+    for r, adjusted in zip(tested, holm_adjust([r["p_value"] for r in tested])):
+        r["p_value"] = _round(r["p_value"], 6)
+        r["p_adjusted"] = _round(adjusted, 6)
+    for r in results:
+        if "p_value" not in r:
+            r["verdict"] = "insufficient_data"
+            continue
+        lo, hi = r["ci"]
+        significant = (r["p_adjusted"] < alpha and lo is not None and hi is not None
+                       and (lo > 0 or hi < 0) and abs(r["effect"]) >= min_effect)
+        if not significant:
+            r["verdict"] = "no_change"
+        else:
+            worse = r["effect"] > 0 if r["lower_is_better"] else r["effect"] < 0
+            r["verdict"] = "regression" if worse else "improvement"
+    return results
+
+
+def _group_labels(df, by):
+    """One label per row: the value of `by`, or "col=value,..." for several columns"""
+    if len(by) == 1:
+        return df[by[0]].astype(str)
+    return pd.Series([
+        ",".join(f"{col}={value}" for col, value in zip(by, values))
+        for values in zip(*(df[col].astype(str) for col in by))
+    ], index=df.index)
+
+
+def _metrics_for(df, metrics):
+    return [m for m in metrics if m != SUCCESS_METRIC or "browserbaseStatus" in df.columns]
+
+
+def compare_groups(df, by, baseline=None, metrics=METRICS, **kwargs):
+    """Compare every configuration of `by` against `baseline` (default: the one with most runs)"""
+    by = [by] if isinstance(by, str) else list(by)
+    labels = _group_labels(df, by)
+    counts = labels.value_counts()
+    if counts.empty:
+        return []
+    baseline = baseline if baseline is not None else counts.index[0]
+    if baseline not in counts.index:
+        raise ValueError(f"No runs with {'/'.join(by)} = {baseline} (have: {', '.join(counts.index)})")
+    base_df = df[labels == baseline]
+    results = []
+    for label in counts.index:
+        if label == baseline:
+            continue
+        cand_df = df[labels == label]
+        for metric in _metrics_for(df, metrics):
+            result = {"mode": "group", "by": by, "baseline_label": baseline, "candidate_label": label}
+            result.update(compare(base_df, cand_df, metric, **kwargs))
+            results.append(result)
+    return results
+
+
+def compare_windows(df, window="1D", baseline_window=None, by=None, metrics=METRICS, **kwargs):
+    """Compare the last `window` of runs with the `baseline_window` before it (default: everything earlier)"""
+    if df.empty:
+        return []
+    window = pd.Timedelta(window)
+    end = df["timestamp"].max()
+    split = end - window
+    start = split - pd.Timedelta(baseline_window) if baseline_window else df["timestamp"].min()
+    recent = df["timestamp"] > split
+    earlier = (df["timestamp"] <= split) & (df["timestamp"] >= start)
+    by = [by] if isinstance(by, str) else list(by or [])
+    labels = _group_labels(df, by) if by else pd.Series("all", index=df.index)
+    window_labels = (f"{start.isoformat()}..{split.isoformat()}", f"{split.isoformat()}..{end.isoformat()}")
+    results = []
+    for label in labels[recent].unique():
+        group = labels == label
+        for metric in _metrics_for(df, metrics):
+            result = {"mode": "window", "by": by, "group": label,
+                      "baseline_label": window_labels[0], "candidate_label": window_labels[1]}
+            result.update(compare(df[group & earlier], df[group & recent], metric, **kwargs))
+            results.append(result)
+    return results
+
+
+def build_report(df, by=None, baseline=None, window=None, baseline_window=None, metrics=METRICS,
+                 alpha=0.05, min_effect=0.05, n_boot=2000, confidence=0.95, min_samples=5, seed=0):
+    """Group and/or window comparisons, classified together, as a JSON-ready dict"""
+    rng = np.random.default_rng(seed)
+    options = dict(n_boot=n_boot, confidence=confidence, min_samples=min_samples, rng=rng)
+    results = []
+    if by and not window:
+        results += compare_groups(df, by, baseline, metrics, **options)
+    if window:
+        results += compare_windows(df, window, baseline_window, by, metrics, **options)
+    classify(results, alpha, min_effect)
+    verdicts = pd.Series([r["verdict"] for r in results], dtype=object).value_counts()
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "rows": len(df),
+        "settings": {"by": by, "baseline": baseline, "window": window, "baseline_window": baseline_window,
+                     "alpha": alpha, "min_effect": min_effect, "n_boot": n_boot, "confidence": confidence,
+                     "min_samples": min_samples, "seed": seed},
+        "counts": {v: int(verdicts.get(v, 0)) for v in ("regression", "improvement", "no_change", "insufficient_data")},
+        "passed": not verdicts.get("regression", 0),
+        "results": results,
+    }
+
+
+def format_result(result):
+    """One human-readable line for a classified comparison"""
+    scope = f"[{result['group']}] " if result.get("group") else ""
+    head = f"{scope}{result['metric']}: {result['baseline_label']} -> {result['candidate_label']}"
+    if result["verdict"] == "insufficient_data":
+        return f"{head}: insufficient data (n={result['n_baseline']}/{result['n_candidate']})"
+    unit = " pts" if result["metric"] == SUCCESS_METRIC else "%"
+    lo, hi = result["ci"]
+    return (f"{head}: {result['effect'] * 100:+.1f}{unit} "
+            f"[{lo * 100:+.1f}, {hi * 100:+.1f}] p={result['p_adjusted']:.3g} {result['verdict']}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect latency, tokens/s and success regressions between run configurations or time windows")
+    parser.add_argument("csv_path", nargs="?", default="../ui/logs/workflow-runs.csv")
+    parser.add_argument("--cache-dir", default=None, help="Ingest cache directory (see run_log_ingest.py)")
+    parser.add_argument("--by", default=None, help="Comma-separated columns defining a configuration, e.g. modelName or advancedStealth,proxies")
+    parser.add_argument("--baseline", default=None, help="Baseline configuration label (default: the one with most runs)")
+    parser.add_argument("--window", default=None, help="Compare the last WINDOW of runs (e.g. 1D, 12h) with the runs before it")
+    parser.add_argument("--baseline-window", default=None, help="Only use this much history before the window as the baseline")
+    parser.add_argument("--metrics", default=",".join(METRICS), help=f"Comma-separated subset of {', '.join(METRICS)}")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level after Holm adjustment")
+    parser.add_argument("--min-effect", type=float, default=0.05, help="Smallest shift worth flagging (relative for latency and tokens/s, absolute for success)")
+    parser.add_argument("--n-boot", type=int, default=2000, help="Bootstrap resamples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here ('-' for stdout)")
+    parser.add_argument("--no-fail", action="store_true", help="Exit 0 even when regressions are found")
+    args = parser.parse_args()
+
+    if not args.by and not args.window:
+        parser.error("pass --by, --window or both")
+    metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(sorted(unknown))}")
+
+    ingestor = RunLogIngestor(args.csv_path, args.cache_dir)
+    try:
+        ingestor.ingest()
+    except FileNotFoundError:
+        print(f"CSV file not found at {args.csv_path}", file=sys.stderr)
+        sys.exit(2)
+    df = ingestor.load()
+
+    by = args.by.split(",") if args.by else None
+    try:
+        report = build_report(df, by, args.baseline, args.window, args.baseline_window, metrics,
+                              alpha=args.alpha, min_effect=args.min_effect, n_boot=args.n_boot, seed=args.seed)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    report["source"] = args.csv_path
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for result in report["results"]:
+            print(format_result(result))
+        counts = report["counts"]
+        print(f"\n{counts['regression']} regressions, {counts['improvement']} improvements, "
+              f"{counts['no_change']} unchanged, {counts['insufficient_data']} with too few runs")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote report to {args.output}")
+
+    sys.exit(0 if report["passed"] or args.no_fail else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Incremental ingest of workflow-runs.csv into a columnar cache
+
+The ingestor lives in api/app/services/run_log_ingest.py, shared with
+/v1/analytics; this module makes it importable from the dataviz scripts and
+keeps `python run_log_ingest.py` working.
+"""
+
+import os
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+# RunLogIngestor, parse_rows, main and the cache constants
+from app.services.run_log_ingest import *  # noqa: E402,F401,F403
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,393 @@
 #!/usr/bin/env python3
 """
-Simple HTTP server for serving the D3 metrics dashboard
+HTTP server for the D3 metrics dashboard
+
+Static files are served by a threaded server with ETag revalidation and gzip,
+so many open dashboards don't queue behind each other. With --live the server
+also tails the run log: appended rows are parsed as they land, per-model and
+per-search-term aggregates are updated incrementally, and each append is
+pushed to connected dashboards over server-sent events (GET /events). The
+current aggregates are at GET /api/aggregates.
 """
 
+import bisect
+import functools
+import gzip
+import hashlib
 import http.server
-import socketserver
+import json
+import math
 import os
+import queue
 import sys
-import webbrowser
 import threading
 import time
+import webbrowser
+from collections import OrderedDict
+
+try:
+    from run_log_ingest import complete_records, parse_rows, run_succeeded
+except ImportError:  # live mode needs pandas and pyarrow
+    complete_records = parse_rows = run_succeeded = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+GZIP_MIN_BYTES = 1024
+GZIP_CACHE_ENTRIES = 64
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 256
+# Row fields pushed to dashboards (what dashboard_simple.js plots)
+ROW_FIELDS = ["timestamp", "modelName", "searchTerm", "executionTimeMs", "totalTokens", "tokensPerSecond",
+              "browserbaseStatus", "productCount", "hasExtractionResults"]
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class LiveAggregates:
+    """Running per-model and per-search-term stats, updated row by row"""
+
+    DIMENSIONS = {"models": "modelName", "searchTerms": "searchTerm"}
+
+    def __init__(self):
+        self.total = 0
+        self.generation = 0
+        self._groups = {name: {} for name in self.DIMENSIONS}
+
+    def add(self, rows):
+        """Fold rows (dicts) in; returns {dimension: {key: stats}} for the groups that changed"""
+        touched = {name: set() for name in self.DIMENSIONS}
+        for row in rows:
+            succeeded = bool(run_succeeded(
+                row.get("browserbaseStatus"), row.get("productCount") or 0, bool(row.get("hasExtractionResults"))
+            ))
+            latency = row.get("executionTimeMs")
+            for name, column in self.DIMENSIONS.items():
+                key = str(row.get(column) or "unknown")
+                group = self._groups[name].setdefault(key, {
+                    "count": 0, "succeeded": 0, "tokens": 0, "tokensPerSecond": 0.0, "products": 0, "latencies": [],
+                })
+                group["count"] += 1
+                group["succeeded"] += succeeded
+                group["tokens"] += row.get("totalTokens") or 0
+                group["tokensPerSecond"] += row.get("tokensPerSecond") or 0
+                group["products"] += row.get("productCount") or 0
+                if latency is not None and not (isinstance(latency, float) and math.isnan(latency)):
+                    bisect.insort(group["latencies"], latency)
+                touched[name].add(key)
+        self.total += len(rows)
+        self.generation += 1
+        return {name: {key: self._summary(self._groups[name][key]) for key in keys} for name, keys in touched.items()}
+
+    @staticmethod
+    def _summary(group):
+        n = group["count"]
+        latencies = group["latencies"]
+        return {
+            "count": n,
+            "successRate": round(group["succeeded"] / n, 4),
+            "latencyMs": {
+                "mean": round(sum(latencies) / len(latencies), 1) if latencies else None,
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+            },
+            "avgTokens": round(group["tokens"] / n, 1),
+            "avgTokensPerSecond": round(group["tokensPerSecond"] / n, 2),
+            "avgProducts": round(group["products"] / n, 2),
+        }
+
+    def snapshot(self):
+        return {
+            "total": self.total,
+            "generation": self.generation,
+            **{name: {key: self._summary(g) for key, g in groups.items()} for name, groups in self._groups.items()},
+        }
+
+
+class LogTail:
+    """Follows an append-only CSV log, returning complete new records as they land"""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = None
+        self.offset = 0
+
+    def poll(self):
+        """(reset, records): reset is True when the log was truncated or replaced and is read from the start"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False, []
+        reset = size < self.offset
+        if reset:
+            self.columns, self.offset = None, 0
+        if size == self.offset:
+            return reset, []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        records, consumed = complete_records(data)
+        self.offset += consumed
+        if self.columns is None and records:
+            self.columns, records = records[0].strip().split(","), records[1:]
+        return reset, records
+
+
+class LiveFeed:
+    """Polls the log on a background thread and fans deltas out to SSE subscribers"""
+
+    def __init__(self, log_path, poll_interval=1.0):
+        self.tail = LogTail(log_path)
+        self.poll_interval = poll_interval
+        self.aggregates = LiveAggregates()
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._seq = 0
+        self._thread = None
+
+    def start(self):
+        self.poll()
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:  # keep tailing through a bad row
+                print(f"Live feed error: {e}")
+
+    def poll(self):
+        """Pick up appended rows; returns how many were added"""
+        reset, lines = self.tail.poll()
+        if reset:
+            with self._lock:
+                self.aggregates = LiveAggregates()
+        rows = self._parse(lines)
+        with self._lock:
+            first = self.aggregates.total
+            changed = self.aggregates.add(rows) if rows else None
+            if reset:
+                self._broadcast("snapshot", self.aggregates.snapshot())
+            elif changed:
+                self._broadcast("delta", {
+                    "first": first,
+                    "total": self.aggregates.total,
+                    "generation": self.aggregates.generation,
+                    "rows": rows,
+                    **changed,
+                })
+        return len(rows)
+
+    def _parse(self, lines):
+        if not lines:
+            return []
+        df = parse_rows(lines, self.tail.columns)
+        df = df[[c for c in ROW_FIELDS if c in df.columns]]
+        df = df.astype(object).where(df.notna(), None)
+        if "timestamp" in df.columns:
+            df["timestamp"] = [t.isoformat().replace("+00:00", "Z") if t is not None else None for t in df["timestamp"]]
+        return df.to_dict("records")
+
+    # ------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------
+    def _broadcast(self, event, data):
+        self._seq += 1
+        message = (self._seq, event, json.dumps(data, default=str))
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Too far behind to catch up with deltas: end its stream; it reconnects to a fresh snapshot
+                self._subscribers.discard(q)
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(None)
+
+    def subscribe(self):
+        """Queue primed with the current snapshot, then every delta"""
+        q = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            q.put((self._seq, "snapshot", json.dumps(self.aggregates.snapshot())))
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
 
-def start_server(port=8000, directory=None):
+    def snapshot(self):
+        with self._lock:
+            return self.aggregates.snapshot()
+
+
+class DashboardHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with ETag/gzip, plus /events and /api/aggregates in live mode"""
+
+    protocol_version = "HTTP/1.1"
+    live = None  # LiveFeed, set by start_server
+    _gzip_cache = OrderedDict()
+    _gzip_lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if self.live is not None and path == "/events":
+            return self._serve_events()
+        if self.live is not None and path == "/api/aggregates":
+            return self._serve_json(self.live.snapshot())
+        if not self._serve_file(head_only=False):
+            super().do_GET()
+
+    def do_HEAD(self):
+        if not self._serve_file(head_only=True):
+            super().do_HEAD()
+
+    # ------------------------------------------------------------
+    # Static files
+    # ------------------------------------------------------------
+    def _accepts_gzip(self):
+        return "gzip" in self.headers.get("Accept-Encoding", "")
+
+    def _gzipped(self, fs_path, st):
+        key = (fs_path, st.st_mtime_ns, st.st_size)
+        with self._gzip_lock:
+            if key in self._gzip_cache:
+                self._gzip_cache.move_to_end(key)
+                return self._gzip_cache[key]
+        with open(fs_path, "rb") as f:
+            body = gzip.compress(f.read(), compresslevel=6)
+        with self._gzip_lock:
+            self._gzip_cache[key] = body
+            while len(self._gzip_cache) > GZIP_CACHE_ENTRIES:
+                self._gzip_cache.popitem(last=False)
+        return body
+
+    def _serve_file(self, head_only):
+        """Serve a regular file; returns False for anything else (directories, 404s)"""
+        fs_path = self.translate_path(self.path)
+        if not os.path.isfile(fs_path):
+            return False
+        st = os.stat(fs_path)
+        ctype = self.guess_type(fs_path)
+        compress = self._accepts_gzip() and st.st_size >= GZIP_MIN_BYTES and ctype.startswith(COMPRESSIBLE_TYPES)
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}{"-gz" if compress else ""}"'
+
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return True
+
+        body = self._gzipped(fs_path, st) if compress else None
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body) if compress else st.st_size))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+        self.send_header("Cache-Control", "no-cache")  # always revalidate; cheap with the ETag
+        self.send_header("Vary", "Accept-Encoding")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if head_only:
+            return True
+        if compress:
+            self.wfile.write(body)
+        else:
+            with open(fs_path, "rb") as f:
+                self.copyfile(f, self.wfile)
+        return True
+
+    def _serve_json(self, data):
+        raw = json.dumps(data).encode("utf-8")
+        etag = f'"{hashlib.blake2b(raw, digest_size=8).hexdigest()}"'
+        if etag == self.headers.get("If-None-Match"):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = gzip.compress(raw) if self._accepts_gzip() and len(raw) >= GZIP_MIN_BYTES else raw
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if body is not raw:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    # ------------------------------------------------------------
+    # Server-sent events
+    # ------------------------------------------------------------
+    def _serve_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        q = self.live.subscribe()
+        try:
+            while True:
+                try:
+                    message = q.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                if message is None:
+                    return
+                seq, event, data = message
+                self.wfile.write(f"id: {seq}\nevent: {event}\ndata: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.live.unsubscribe(q)
+
+    def log_message(self, format, *args):
+        if self.path.split("?", 1)[0] != "/events":
+            super().log_message(format, *args)
+
+
+def make_server(port=8000, directory=None, live=None):
+    """Threaded dashboard server; `live` is an optional started LiveFeed"""
+    handler = type("Handler", (DashboardHandler,), {"live": live})
+    server = http.server.ThreadingHTTPServer(("", port), functools.partial(handler, directory=directory))
+    server.daemon_threads = True
+    return server
+
+
+def start_server(port=8000, directory=None, live_log=None, poll_interval=1.0, open_browser=True):
     """Start HTTP server"""
     if directory:
         os.chdir(directory)
-    
-    handler = http.server.SimpleHTTPRequestHandler
-    
-    with socketserver.TCPServer(("", port), handler) as httpd:
+
+    live = None
+    if live_log:
+        if parse_rows is None:
+            print("Live mode needs pandas (and run_log_ingest.py next to this script)")
+            sys.exit(1)
+        live = LiveFeed(live_log, poll_interval)
+        live.start()
+
+    with make_server(port, live=live) as httpd:
         print(f"Metrics Dashboard Server")
         print(f"Serving directory: {os.getcwd()}")
         print(f"Server running at: http://localhost:{port}")
-        
+        if live:
+            print(f"Live mode: tailing {live_log} ({live.aggregates.total} rows so far), events at /events")
+
         # Determine the correct dashboard URL based on serving directory
         current_dir = os.path.basename(os.getcwd())
         if current_dir == 'dataviz':
@@ -32,31 +397,39 @@ def start_server(port=8000, directory=None):
             dashboard_url = f"http://localhost:{port}/dataviz/index.html"
             print(f"Dashboard URL: {dashboard_url}")
             print(f"Alternative URL: http://localhost:{port}/dataviz/")
-        
+
         print("Press Ctrl+C to stop the server")
-        
+
         # Open browser after a short delay
-        def open_browser():
+        def open_browser_later():
             time.sleep(1)
             webbrowser.open(dashboard_url)
-        
-        browser_thread = threading.Thread(target=open_browser)
-        browser_thread.daemon = True
-        browser_thread.start()
-        
+
+        if open_browser:
+            browser_thread = threading.Thread(target=open_browser_later)
+            browser_thread.daemon = True
+            browser_thread.start()
+
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n🛑 Server stopped")
-            httpd.shutdown()
+        finally:
+            if live:
+                live.stop()
 
 if __name__ == "__main__":
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Serve D3 Metrics Dashboard')
     parser.add_argument('--port', type=int, default=8000, help='Port to serve on (default: 8000)')
     parser.add_argument('--dir', type=str, default='.', help='Directory to serve (default: current)')
-    
+    parser.add_argument('--live', action='store_true', help='Tail the run log and push updates to dashboards')
+    parser.add_argument('--log', type=str, default='workflow-runs.csv',
+                        help='Run log to tail in live mode, relative to --dir (default: workflow-runs.csv)')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between log checks (default: 1)')
+    parser.add_argument('--no-browser', action='store_true', help="Don't open a browser")
+
     args = parser.parse_args()
-    
-    start_server(args.port, args.dir)
+
+    start_server(args.port, args.dir, args.log if args.live else None, args.poll_interval, not args.no_browser)
@@ -1,5 +1,7 @@
-from typing import Any, Iterable, List
-from bs4 import BeautifulSoup
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Any, FrozenSet, Iterable, List, Optional, Tuple
 
 SALIENT_ATTRIBUTES = (
     "alt",
@@ -21,8 +23,126 @@ SALIENT_ATTRIBUTES = (
     "role",
 )
 
+# Cleaned elements remembered across calls; action histories repeat the same elements a lot
+CLEAN_CACHE_SIZE = 8192
+
+# What BeautifulSoup's html.parser builder treats as void and as whitespace-separated lists,
+# so the output matches process_element_tag_bs4 exactly
+VOID_ELEMENTS = frozenset((
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image",
+    "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source",
+    "spacer", "track", "wbr",
+))
+LIST_ATTRIBUTES = {
+    "*": frozenset(("class", "accesskey", "dropzone")),
+    "a": frozenset(("rel", "rev")),
+    "link": frozenset(("rel", "rev")),
+    "td": frozenset(("headers",)),
+    "th": frozenset(("headers",)),
+    "form": frozenset(("accept-charset",)),
+    "object": frozenset(("archive",)),
+    "area": frozenset(("rel",)),
+    "icon": frozenset(("sizes",)),
+    "iframe": frozenset(("sandbox",)),
+    "output": frozenset(("for",)),
+}
+_NO_LIST_ATTRIBUTES: FrozenSet[str] = frozenset()
+_NON_WHITESPACE = re.compile(r"\S+")
+_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+class _FirstTag(Exception):
+    pass
+
+
+class _FirstTagParser(HTMLParser):
+    """Stops at the first start tag; the rest of the action string is never tokenized"""
+
+    def __init__(self):
+        # Same tokenizer settings as BeautifulSoup's html.parser builder
+        super().__init__(convert_charrefs=False)
+        self.tag: Optional[Tuple[str, List[Tuple[str, Optional[str]]]]] = None
+
+    def handle_starttag(self, tag, attrs):
+        self.tag = (tag, attrs)
+        raise _FirstTag
+
+
+def _first_tag(element: str) -> Optional[Tuple[str, List[Tuple[str, Optional[str]]]]]:
+    parser = _FirstTagParser()
+    try:
+        parser.feed(element)
+        parser.close()
+    except _FirstTag:
+        pass
+    return parser.tag
+
+
+def _quote(value: str) -> str:
+    value = value.translate(_ESCAPES)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"' + value.replace('"', "&quot;") + '"'
+
+
+def render_tag(tag: str, attrs: Iterable[Tuple[str, Optional[str]]], salient_attributes: FrozenSet[str]) -> str:
+    """Opening tag with only the salient attributes, formatted the way BeautifulSoup prints it"""
+    kept = {}
+    for key, value in attrs:
+        if key in salient_attributes:
+            kept[key] = "" if value is None else value
+    if not kept.get("name"):
+        kept.pop("name", None)
+
+    list_attributes = LIST_ATTRIBUTES["*"] | LIST_ATTRIBUTES.get(tag, _NO_LIST_ATTRIBUTES)
+    rendered = []
+    for key in sorted(kept):
+        value = kept[key]
+        if key in list_attributes:
+            value = " ".join(_NON_WHITESPACE.findall(value))
+        rendered.append(f"{key}={_quote(value)}")
+    attributes = " " + " ".join(rendered) if rendered else ""
+    return f"<{tag}{attributes}/>" if tag in VOID_ELEMENTS else f"<{tag}{attributes}>"
+
+
+def _clean_element(element: str, salient_attributes: FrozenSet[str]) -> str:
+    if not element.endswith(">"):
+        element += "'>"
+    first = _first_tag(element)
+    if first is None:
+        return element
+    tag, attrs = first
+    return render_tag(tag, attrs, salient_attributes)
+
+
+_clean_element_cached = lru_cache(maxsize=CLEAN_CACHE_SIZE)(_clean_element)
+
+
+def _salient_set(salient_attributes: Iterable[str]) -> FrozenSet[str]:
+    return salient_attributes if isinstance(salient_attributes, frozenset) else frozenset(salient_attributes)
+
+
 def process_element_tag(element: str, salient_attributes: Iterable[str]) -> str:
-    """Clean an HTML element string, keeping only salient_attributes."""
+    """Clean an HTML element string, keeping only salient_attributes.
+
+    Only the first tag is kept, with its attributes sorted and the rest of the
+    string dropped. If there is no tag, the element is returned as is.
+    """
+    return _clean_element_cached(element, _salient_set(salient_attributes))
+
+
+def clean_many(elements: Iterable[str], salient_attributes: Iterable[str] = SALIENT_ATTRIBUTES) -> List[str]:
+    """process_element_tag over a whole action history"""
+    salient = _salient_set(salient_attributes)
+    return [_clean_element_cached(element, salient) for element in elements]
+
+
+def process_element_tag_bs4(element: str, salient_attributes: Iterable[str]) -> str:
+    """The original BeautifulSoup implementation, kept as the reference for process_element_tag."""
+    from bs4 import BeautifulSoup
+
     if not element.endswith(">"):
         element += "'>"
 
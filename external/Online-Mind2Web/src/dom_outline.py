@@ -0,0 +1,306 @@
+"""
+Compact text outline of a page HTML snapshot, for judging on DOM evidence instead of screenshots
+
+    python dom_outline.py page.html --max-chars 6000
+
+The snapshot is parsed as a stream and pruned as it goes:
+
+* script, style, template and similar subtrees are dropped, as is anything
+  marked invisible (hidden, aria-hidden="true", inline display:none or
+  visibility:hidden, hidden inputs, closed <details> bodies)
+* svg, canvas, iframe and media keep their own line but not their contents
+* wrappers with no salient attributes (div, span, section, ...) are collapsed,
+  so their text and children move up to the nearest element worth showing
+
+Elements are printed the way clean_html prints action-history elements, so a
+judge can match "<button aria-label="Add to cart"> -> CLICK" against the page.
+The outline is indented by nesting and cut at max_chars with a note of what
+was left out.
+"""
+import argparse
+import re
+from html.parser import HTMLParser
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+from clean_html import SALIENT_ATTRIBUTES, VOID_ELEMENTS, render_tag
+
+# Salient attributes plus the form state a judge needs to see applied filters
+OUTLINE_ATTRIBUTES = SALIENT_ATTRIBUTES + (
+    "type",
+    "checked",
+    "selected",
+    "disabled",
+    "aria-checked",
+    "aria-selected",
+    "aria-current",
+    "aria-expanded",
+)
+
+MAX_OUTLINE_CHARS = 8000
+MAX_TEXT_CHARS = 300
+MAX_ATTRIBUTE_CHARS = 100
+CHUNK_SIZE = 1 << 16
+
+# Subtrees that never carry visible page content
+DROP_TAGS = frozenset(("script", "style", "noscript", "template", "head", "meta", "link", "base"))
+# Shown as one line, without their contents
+OPAQUE_TAGS = frozenset(("svg", "math", "canvas", "iframe", "object", "embed", "video", "audio"))
+# Shown even without salient attributes
+KEEP_TAGS = frozenset((
+    "a", "button", "input", "select", "option", "textarea", "img", "form", "dialog", "summary",
+    "table", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6",
+) + tuple(OPAQUE_TAGS))
+# Collapsed wrappers whose text runs on into the surrounding text
+INLINE_TAGS = frozenset((
+    "span", "b", "i", "em", "strong", "small", "u", "s", "font", "abbr", "code", "sup", "sub",
+    "mark", "time", "bdi", "bdo", "cite", "q", "kbd", "var", "data", "label",
+))
+# A new tag of the key closes the nearest open tag from the first set, and whatever is still open
+# inside it, as HTML parsers do; the search stops at a tag from the second set (None: at any
+# tag that is not inline)
+_CELLS = (frozenset(("td", "th")), frozenset(("tr", "table")))
+_TERMS = (frozenset(("dt", "dd")), frozenset(("dl",)))
+IMPLIED_END = {
+    "li": (frozenset(("li",)), frozenset(("ul", "ol", "menu"))),
+    "option": (frozenset(("option",)), frozenset(("select", "datalist", "optgroup"))),
+    "p": (frozenset(("p",)), None),
+    "tr": (frozenset(("tr",)), frozenset(("table", "thead", "tbody", "tfoot"))),
+    "td": _CELLS,
+    "th": _CELLS,
+    "dt": _TERMS,
+    "dd": _TERMS,
+}
+
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "children", "keep", "opaque", "summary_only")
+
+    def __init__(self, tag: str, attrs: List[Tuple[str, str]], keep: bool, opaque: bool = False):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Union[str, "_Node"]] = []
+        self.keep = keep
+        self.opaque = opaque
+        self.summary_only = False
+
+    def add_text(self, text: str, join: bool = True) -> None:
+        """Add whitespace-collapsed text; joined runs keep the source's spacing ("$12<b>.99</b>")"""
+        if join and self.children and isinstance(self.children[-1], str):
+            last = self.children[-1]
+            self.children[-1] = last + (text[1:] if last.endswith(" ") and text.startswith(" ") else text)
+        elif text.strip():
+            self.children.append(text)
+
+    def text(self) -> str:
+        return " ".join(child.strip() for child in self.children if isinstance(child, str) and child.strip())
+
+    def elements(self) -> List["_Node"]:
+        return [child for child in self.children if isinstance(child, _Node) and child is not _BREAK]
+
+
+# Ends a run of text where a collapsed block wrapper ended
+_BREAK = _Node("#break", [], keep=False)
+
+
+def is_hidden(tag: str, attrs: List[Tuple[str, Optional[str]]]) -> bool:
+    """Whether the element is invisible from its own attributes"""
+    for key, value in attrs:
+        if key == "hidden":
+            return True
+        if key == "aria-hidden" and (value or "").strip().lower() == "true":
+            return True
+        if key == "style" and value and _HIDDEN_STYLE.search(value):
+            return True
+        if key == "type" and tag == "input" and (value or "").lower() == "hidden":
+            return True
+    return False
+
+
+class DomOutliner(HTMLParser):
+    """Streaming HTML parser that keeps only the outline; feed() chunks, close(), then outline()"""
+
+    def __init__(self, salient_attributes: Iterable[str] = OUTLINE_ATTRIBUTES):
+        super().__init__(convert_charrefs=True)
+        self.salient_attributes: FrozenSet[str] = frozenset(salient_attributes)
+        self.title = ""
+        self.elements_seen = 0
+        self.subtrees_dropped = 0
+        self._root = _Node("#root", [], keep=False)
+        # (tag, node) per open element; node is None inside a dropped subtree
+        self._stack: List[Tuple[str, Optional[_Node]]] = [("#root", self._root)]
+        self._title: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        self.elements_seen += 1
+        if tag == "body":
+            self.handle_endtag("head")
+        if tag in IMPLIED_END:
+            self._close_implied(tag)
+
+        parent = self._stack[-1][1]
+        if parent is None or parent.opaque or (parent.summary_only and tag != "summary"):
+            skip = True
+        elif tag in DROP_TAGS or tag == "title" or is_hidden(tag, attrs):
+            skip = True
+            self.subtrees_dropped += 1
+        else:
+            skip = False
+        if skip:
+            if tag not in VOID_ELEMENTS:
+                self._stack.append((tag, None))
+            return
+
+        kept = [(key, "" if value is None else value) for key, value in attrs if key in self.salient_attributes]
+        node = _Node(tag, kept, keep=bool(kept) or tag in KEEP_TAGS, opaque=tag in OPAQUE_TAGS)
+        if tag == "details":
+            node.summary_only = not any(key == "open" for key, _ in attrs)
+        if tag in VOID_ELEMENTS:
+            self._finish(node, parent)
+        else:
+            self._stack.append((tag, node))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._stack[depth][0] == tag:
+                while len(self._stack) > depth:
+                    self._pop()
+                return
+
+    def _close_implied(self, tag: str) -> None:
+        closes, scope = IMPLIED_END[tag]
+        for depth in range(len(self._stack) - 1, 0, -1):
+            open_tag = self._stack[depth][0]
+            if open_tag in closes:
+                while len(self._stack) > depth:
+                    self._pop()
+                return
+            outside = open_tag not in INLINE_TAGS if scope is None else open_tag in scope
+            if outside:
+                return
+
+    def handle_data(self, data):
+        tag, node = self._stack[-1]
+        if tag == "title" and not self.title and not any(t in OPAQUE_TAGS for t, _ in self._stack):
+            self._title.append(data)
+            return
+        if node is None or node.opaque or node.summary_only:
+            return
+        node.add_text(_WHITESPACE.sub(" ", data))
+
+    def close(self):
+        super().close()
+        while len(self._stack) > 1:
+            self._pop()
+
+    def _pop(self) -> None:
+        tag, node = self._stack.pop()
+        if tag == "title" and self._title:
+            self.title = _WHITESPACE.sub(" ", "".join(self._title)).strip()
+            self._title = []
+        if node is not None:
+            self._finish(node, self._stack[-1][1])
+
+    def _finish(self, node: _Node, parent: _Node) -> None:
+        """Attach a closed element to its parent, or splice its contents in if it is only a wrapper"""
+        if node.children and node.children[-1] is _BREAK:
+            node.children.pop()
+        if node.keep:
+            if not node.attrs:
+                elements = node.elements()
+                if not elements and not node.text() and not node.opaque:
+                    return  # nothing to show; an iframe or chart is still worth a line
+                if len(node.children) == 1 and elements:
+                    node = elements[0]  # a bare <li><a ...></a></li> says no more than the <a>
+            parent.children.append(node)
+            return
+        inline = node.tag in INLINE_TAGS
+        for i, child in enumerate(node.children):
+            if isinstance(child, str):
+                # Text of inline wrappers runs on; a block wrapper's text is a run of its own
+                parent.add_text(child, join=inline and i == 0)
+            else:
+                parent.children.append(child)
+        if not inline and node.children and isinstance(node.children[-1], str):
+            parent.children.append(_BREAK)
+
+    def lines(self, max_text_chars: int = MAX_TEXT_CHARS,
+              max_attribute_chars: int = MAX_ATTRIBUTE_CHARS) -> Iterator[Tuple[int, str]]:
+        """(depth, line) pairs in document order; call after close()"""
+        for child in self._root.children:
+            if isinstance(child, str):
+                if child.strip():
+                    yield 0, _truncate(child.strip(), max_text_chars)
+            elif child is not _BREAK:
+                yield from self._lines(child, 0, max_text_chars, max_attribute_chars)
+
+    def _lines(self, node: _Node, depth: int, max_text: int, max_attribute: int) -> Iterator[Tuple[int, str]]:
+        # Explicit stack: snapshots can nest deeper than the recursion limit
+        pending = [(node, depth)]
+        while pending:
+            node, depth = pending.pop()
+            attrs = [(key, _truncate(value, max_attribute)) for key, value in node.attrs]
+            line = render_tag(node.tag, attrs, self.salient_attributes)
+            text = node.text()
+            if text:
+                line += " " + _truncate(text, max_text)
+            yield depth, line
+            pending.extend((child, depth + 1) for child in reversed(node.elements()))
+
+    def outline(self, max_chars: int = MAX_OUTLINE_CHARS, max_text_chars: int = MAX_TEXT_CHARS,
+                max_attribute_chars: int = MAX_ATTRIBUTE_CHARS) -> str:
+        """The outline as text, at most max_chars long; call after close()"""
+        out = [_truncate(f"Page title: {self.title}", max_chars)] if self.title else []
+        size = len(out[0]) if out else 0
+        lines = list(self.lines(max_text_chars, max_attribute_chars))
+        for shown, (depth, line) in enumerate(lines):
+            line = "  " * depth + line
+            left = len(lines) - shown
+            # Keep room for the note about what was cut, unless this is the last line
+            note = f"... [{left} more lines not shown]"
+            room = max_chars if left == 1 else max_chars - len(note) - 1
+            if size + len(line) + bool(out) > room:
+                if size + len(note) + bool(out) <= max_chars:
+                    out.append(note)
+                break
+            size += len(line) + bool(out)
+            out.append(line)
+        return "\n".join(out)
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: max(0, limit - 3)] + "..."
+
+
+def outline_html(html: str, max_chars: int = MAX_OUTLINE_CHARS, salient_attributes: Iterable[str] = OUTLINE_ATTRIBUTES) -> str:
+    """Outline of an HTML snapshot already in memory"""
+    outliner = DomOutliner(salient_attributes)
+    outliner.feed(html)
+    outliner.close()
+    return outliner.outline(max_chars)
+
+
+def outline_file(path: str, max_chars: int = MAX_OUTLINE_CHARS, salient_attributes: Iterable[str] = OUTLINE_ATTRIBUTES,
+                 chunk_size: int = CHUNK_SIZE) -> str:
+    """Outline of an HTML snapshot on disk, read in chunks"""
+    outliner = DomOutliner(salient_attributes)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            outliner.feed(chunk)
+    outliner.close()
+    return outliner.outline(max_chars)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a compact text outline of an HTML snapshot")
+    parser.add_argument("path", help="HTML file")
+    parser.add_argument("--max-chars", type=int, default=MAX_OUTLINE_CHARS)
+    args = parser.parse_args()
+    print(outline_file(args.path, args.max_chars))
@@ -0,0 +1,351 @@
+"""
+Micro-benchmark harness and fixtures for the CPU-bound hot paths
+
+Each benchmark calls `bench(name, fn, *args, units=..., unit=...)`, which:
+
+* calibrates how many calls fill BENCHMARK_MIN_TIME seconds, runs that many
+  BENCHMARK_ROUNDS times and keeps the best round (the least disturbed one);
+* runs one more call under tracemalloc for the peak Python-heap allocation
+  (buffers allocated in C by Pillow or numpy aren't traced);
+* compares against pytest/benchmarks/baselines.json.
+
+They are skipped unless selected with `-m benchmark` (or BENCHMARK=1).
+Set BENCHMARK_SAVE=1 to write the results as the new baselines, and
+BENCHMARK_MAX_REGRESSION=0.2 to fail any benchmark that got more than 20%
+slower, or allocates 20% more, than its baseline. BENCHMARK_JSON=path writes
+this run's results for comparing branches.
+"""
+import base64
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+REPO_ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+SAMPLE_CSV = os.path.join(REPO_ROOT, "dataviz", "workflow-runs.csv")
+
+MIN_TIME = float(os.getenv("BENCHMARK_MIN_TIME", "0.2"))
+ROUNDS = int(os.getenv("BENCHMARK_ROUNDS", "3"))
+MAX_REGRESSION = os.getenv("BENCHMARK_MAX_REGRESSION")
+
+RESULTS = {}
+
+
+def _load_baselines():
+    try:
+        with open(BASELINES_PATH) as f:
+            return json.load(f).get("benchmarks", {})
+    except FileNotFoundError:
+        return {}
+
+
+BASELINES = _load_baselines()
+
+
+def measure(fn, *args, units=1, unit="ops"):
+    """Best-of-rounds time per call, throughput and tracemalloc peak for fn(*args)"""
+    start = time.perf_counter()
+    fn(*args)  # warm-up, also sizes the rounds
+    first = time.perf_counter() - start
+    number = max(1, math.ceil(MIN_TIME / max(first, 1e-9)))
+
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "sec_per_op": round(best, 9),
+        "ops_per_sec": round(1 / best, 3),
+        "units_per_sec": round(units / best, 3),
+        "unit": unit,
+        "peak_bytes": peak,
+        "calls": number * ROUNDS + 2,
+    }
+
+
+def compare(result, baseline):
+    """Relative change against the baseline: speed (>0 is faster) and peak memory (>0 is more)"""
+    return {
+        "speed": result["ops_per_sec"] / baseline["ops_per_sec"] - 1,
+        "memory": (result["peak_bytes"] + 1) / (baseline["peak_bytes"] + 1) - 1,
+    }
+
+
+@pytest.fixture
+def bench():
+    """Measure a hot path, record it for the summary and check it against its baseline"""
+
+    def run(name, fn, *args, units=1, unit="ops"):
+        result = measure(fn, *args, units=units, unit=unit)
+        RESULTS[name] = result
+        baseline = BASELINES.get(name)
+        if baseline is not None:
+            result["change"] = change = compare(result, baseline)
+            if MAX_REGRESSION is not None:
+                limit = float(MAX_REGRESSION)
+                assert change["speed"] >= -limit, (
+                    f"{name} is {-change['speed']:.0%} slower than its baseline "
+                    f"({result['sec_per_op'] * 1e3:.3f}ms vs {baseline['sec_per_op'] * 1e3:.3f}ms per op)"
+                )
+                assert change["memory"] <= limit, (
+                    f"{name} allocates {change['memory']:.0%} more than its baseline "
+                    f"({result['peak_bytes']} vs {baseline['peak_bytes']} bytes peak)"
+                )
+        return result
+
+    return run
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: Hot-path micro-benchmarks (pytest/benchmarks)")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Benchmarks take about a minute, so they only run when asked for"""
+    markexpr = config.getoption("markexpr") or ""
+    if ("benchmark" in markexpr and "not benchmark" not in markexpr) or os.getenv("BENCHMARK"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with -m benchmark or BENCHMARK=1")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
+def _machine():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _format_bytes(n):
+    for suffix in ("B", "KB", "MB", "GB"):
+        if n < 1024 or suffix == "GB":
+            return f"{n:.0f}{suffix}" if suffix == "B" else f"{n:.1f}{suffix}"
+        n /= 1024
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'benchmark':<44} {'per op':>10} {'throughput':>22} {'peak mem':>10} {'vs baseline':>18}")
+    for name, r in sorted(RESULTS.items()):
+        change = r.get("change")
+        delta = f"{change['speed']:+.0%} / {change['memory']:+.0%}" if change else "-"
+        throughput = f"{r['units_per_sec']:,.1f} {r['unit']}/s"
+        terminalreporter.write_line(
+            f"{name:<44} {r['sec_per_op'] * 1e3:>8.3f}ms {throughput:>22} {_format_bytes(r['peak_bytes']):>10} {delta:>18}"
+        )
+    terminalreporter.write_line("vs baseline: throughput change / peak memory change")
+
+    document = {"machine": _machine(), "benchmarks": {
+        name: {k: v for k, v in r.items() if k != "change"} for name, r in sorted(RESULTS.items())
+    }}
+    if os.getenv("BENCHMARK_SAVE"):
+        merged = {**BASELINES, **document["benchmarks"]}
+        with open(BASELINES_PATH, "w") as f:
+            json.dump({"machine": document["machine"], "benchmarks": dict(sorted(merged.items()))}, f, indent=2)
+            f.write("\n")
+        terminalreporter.write_line(f"Saved {len(RESULTS)} baselines to {BASELINES_PATH}")
+    if os.getenv("BENCHMARK_JSON"):
+        with open(os.getenv("BENCHMARK_JSON"), "w") as f:
+            json.dump(document, f, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# Fixtures: realistic inputs, generated once per session and deterministic
+# ---------------------------------------------------------------------------
+
+AGENTS = ["*", "GPTBot", "ChatGPT-User", "ClaudeBot", "anthropic-ai", "Googlebot", "Bingbot", "CCBot",
+          "PerplexityBot", "Amazonbot", "Applebot", "facebookexternalhit", "Bytespider", "YandexBot"]
+
+
+@pytest.fixture(scope="session")
+def large_robots_txt():
+    """~10k-line robots.txt: many agent groups with wildcard/anchored rules, comments and sitemaps"""
+    rng = random.Random(0)
+    segments = ["account", "cart", "checkout", "search", "api", "gp", "dp", "review", "wishlist", "s", "help",
+                "images", "static", "private", "ajax", "product", "category", "compare", "tracking"]
+    lines = ["# robots.txt for www.example-retailer.com", ""]
+    for group in range(60):
+        agents = rng.sample(AGENTS, rng.randint(1, 3)) if group else ["*"]
+        lines += [f"User-agent: {agent}" for agent in agents]
+        if rng.random() < 0.15:
+            lines.append("Disallow: /")
+        for _ in range(rng.randint(80, 250)):
+            path = "/" + "/".join(rng.choice(segments) for _ in range(rng.randint(1, 4)))
+            if rng.random() < 0.3:
+                path += rng.choice(["*", "*?ref=*", "?", "/*.json$", "$"])
+            directive = "Allow" if rng.random() < 0.25 else "Disallow"
+            lines.append(f"{directive}: {path}")
+            if rng.random() < 0.05:
+                lines.append(f"# {rng.choice(segments)} rules added for crawl budget")
+        if rng.random() < 0.3:
+            lines.append(f"Crawl-delay: {rng.randint(1, 10)}")
+        lines.append("")
+    lines += [f"Sitemap: https://www.example-retailer.com/sitemaps/sitemap-{i}.xml.gz" for i in range(40)]
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="session")
+def compliance_urls():
+    rng = random.Random(1)
+    segments = ["account", "cart", "search", "dp", "product", "category", "review", "static", "help", "deals"]
+    return [
+        "https://www.example-retailer.com/" + "/".join(rng.choice(segments) for _ in range(rng.randint(1, 5)))
+        + (f"?ref=sr_{rng.randint(1, 99)}" if rng.random() < 0.4 else "")
+        for _ in range(100)
+    ]
+
+
+def _page_image(width, height, seed):
+    """A page-like screenshot: flat backgrounds, text rows, cards and a few photos"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 4), 255, dtype=np.uint8)
+    page[:160, :, :3] = (35, 47, 62)  # header bar
+    for top in range(220, height - 400, 480):
+        for left in range(80, width - 700, 720):
+            page[top:top + 440, left:left + 660, :3] = (246, 246, 246)  # card
+            page[top + 20:top + 280, left + 20:left + 640, :3] = rng.integers(0, 255, (260, 620, 3))  # product photo
+            for line in range(300, 420, 36):
+                length = int(rng.integers(200, 600))
+                page[top + line:top + line + 14, left + 20:left + 20 + length, :3] = (60, 60, 60)  # text row
+    return Image.fromarray(page, "RGBA")
+
+
+@pytest.fixture(scope="session")
+def screenshots_4k():
+    """4K images: one viewport (3840x2160) and one full page (3840x6480), RGBA like browser captures"""
+    return [_page_image(3840, 2160, 0), _page_image(3840, 6480, 1)]
+
+
+@pytest.fixture(scope="session")
+def screenshots_4k_b64(screenshots_4k):
+    """The 4K screenshots as the base64 PNG strings the evaluate endpoint receives (one with a data URI, one unpadded)"""
+    encoded = []
+    for image in screenshots_4k:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", compress_level=1)
+        encoded.append(base64.b64encode(buffer.getvalue()).decode("ascii"))
+    return ["data:image/png;base64," + encoded[0], encoded[1].rstrip("=")]
+
+
+@pytest.fixture(scope="session")
+def action_history():
+    """2,000 recorded agent actions: raw element HTML followed by the action taken"""
+    rng = random.Random(2)
+    templates = [
+        '<input type="text" name="q" id="search-{i}" class="nav-input nav-progressive-attribute" '
+        'placeholder="Search Example" autocomplete="off" aria-label="Search Example" spellcheck="false" '
+        'value="" style="" data-gtm-label="search box"> -> TYPE {term}',
+        '<a class="a-link-normal s-no-outline" href="/dp/B0{i:08d}?ref=sr_1_{i}" data-cy="title-recipe" '
+        'title="Result {i}" tabindex="-1" data-component-id="{i}"> -> CLICK',
+        '<button type="submit" class="btn btn-primary add-to-cart js-add-{i}" aria-label="Add to cart" '
+        'aria-describedby="price-{i}" data-action="add" data-sku="SKU{i}" role="button" value="add"> -> CLICK',
+        '<select name="sort" id="sort-{i}" class="select-dropdown" aria-controls="results" '
+        'data-gtm-label="sort order" option_selected="Price: Low to High" onchange="sort(this)"> -> SELECT Price',
+        '<div class="s-result-item s-asin sg-col-0-of-12 sg-col-16-of-20 AdHolder" data-asin="B0{i:08d}" '
+        'data-index="{i}" data-uuid="{i}-uuid" role="listitem" aria-label="Sponsored result -> CLICK',
+    ]
+    terms = ["wool socks", "running shoes size 10", "gaming laptop rtx", "cargo pants", "sulfate free shampoo"]
+    return [rng.choice(templates).format(i=i, term=rng.choice(terms)) for i in range(2000)]
+
+
+@pytest.fixture(scope="session")
+def judge_responses():
+    """1,000 long judge outputs ending in a status line (a few malformed)"""
+    rng = random.Random(3)
+    reasoning = ("The agent opened the search page, typed the query, applied the price filter and "
+                 "verified the product details against each key point of the task. ")
+    responses = []
+    for i in range(1000):
+        body = "Thoughts: " + reasoning * rng.randint(5, 30)
+        status = rng.choice(["success", "failure", "Success", "FAILURE"])
+        responses.append(body if i % 50 == 0 else f"{body}\nStatus: \"{status}\"")
+    return responses
+
+
+@pytest.fixture(scope="session")
+def large_run_log(tmp_path_factory):
+    """workflow-runs.csv repeated to ~20,000 rows"""
+    with open(SAMPLE_CSV, encoding="utf-8") as f:
+        header, *rows = f.read().splitlines()
+    path = tmp_path_factory.mktemp("run-log") / "workflow-runs.csv"
+    copies = math.ceil(20000 / len(rows))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for _ in range(copies):
+            f.write("\n".join(rows) + "\n")
+    return path, copies * len(rows)
+
+
+MIND2WEB_SRC = os.path.join(REPO_ROOT, "external", "Online-Mind2Web", "src")
+
+
+def _load_module(name, path):
+    """Import a file under a unique module name (the Mind2Web sources have generic names like utils.py)"""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def mind2web_utils():
+    return _load_module("mind2web_utils", os.path.join(MIND2WEB_SRC, "utils.py"))
+
+
+@pytest.fixture(scope="session")
+def mind2web_clean_html():
+    return _load_module("mind2web_clean_html", os.path.join(MIND2WEB_SRC, "clean_html.py"))
+
+
+@pytest.fixture(scope="session")
+def mind2web_dom_outline(mind2web_clean_html):
+    sys.modules.setdefault("clean_html", mind2web_clean_html)  # dom_outline imports it by its plain name
+    return _load_module("mind2web_dom_outline", os.path.join(MIND2WEB_SRC, "dom_outline.py"))
+
+
+@pytest.fixture(scope="session")
+def page_snapshot():
+    """~1MB search-results page: 3,000 product cards in nested wrappers, with scripts, svgs and styles"""
+    card = (
+        '<div class="s-result-item" data-asin="B{i:08d}"><div class="a-section"><div class="a-row">'
+        '<a class="a-link-normal" href="/dp/B{i:08d}?ref=sr_1_{i}" title="Product {i}">'
+        '<img src="/images/{i}.jpg" alt="Product {i}" class="s-image"></a></div>'
+        '<div class="a-row"><span class="a-price">$<span class="whole">{i}</span>.99</span>'
+        '<script>track("impression", {i})</script><svg class="star"><path d="M0 0L10 10"/></svg></div>'
+        '<div class="a-row" style="display:none">Sponsored tracking {i}</div>'
+        '<button class="a-button" aria-label="Add to cart">Add to cart</button></div></div>'
+    )
+    return (
+        "<html><head><title>Results</title><style>" + ".a-row{margin:0}" * 2000 + "</style></head><body>"
+        + "".join(card.format(i=i) for i in range(3000)) + "</body></html>"
+    )
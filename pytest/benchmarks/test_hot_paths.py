@@ -0,0 +1,169 @@
+"""
+Micro-benchmarks for the CPU-bound hot paths (see conftest.py for the harness)
+"""
+import os
+import sys
+
+import pytest
+
+from app.services.evaluate import EvaluationService
+from app.services.robots_service import RobotsAnalysisService
+
+DATAVIZ_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "dataviz")
+sys.path.insert(0, DATAVIZ_DIR)
+
+from run_log_ingest import RunLogIngestor  # noqa: E402
+
+pytestmark = pytest.mark.benchmark
+
+MB = 1024 * 1024
+
+
+class TestScreenshotBenchmarks:
+    """Screenshot decode/encode on 4K viewport and full-page captures"""
+
+    def test_decode_base64_screenshots(self, bench, screenshots_4k_b64):
+        size = sum(len(s) for s in screenshots_4k_b64) / MB
+        images = bench("evaluate.decode_base64_screenshots", EvaluationService.decode_base64_screenshots,
+                       screenshots_4k_b64, units=size, unit="MB")
+        assert images["ops_per_sec"] > 0
+
+    def test_decode_base64_screenshots_with_pixels(self, bench, screenshots_4k_b64):
+        """Image.open is lazy; the evaluator pays for the pixel decode when it re-encodes"""
+
+        def decode_and_load(screenshots):
+            for image in EvaluationService.decode_base64_screenshots(screenshots):
+                image.load()
+
+        size = sum(len(s) for s in screenshots_4k_b64) / MB
+        bench("evaluate.decode_base64_screenshots+load", decode_and_load, screenshots_4k_b64, units=size, unit="MB")
+
+    @pytest.mark.parametrize("mode", ["RGBA", "RGB"])
+    def test_evaluate_encode_image(self, bench, screenshots_4k, mode):
+        images = [image.convert(mode) for image in screenshots_4k]
+        megapixels = sum(image.width * image.height for image in images) / 1e6
+
+        def encode_all(images):
+            return [EvaluationService.encode_image(image) for image in images]
+
+        assert encode_all(images)[0]
+        bench(f"evaluate.encode_image[{mode}]", encode_all, images, units=megapixels, unit="MP")
+
+    def test_mind2web_encode_image(self, bench, screenshots_4k, mind2web_utils):
+        megapixels = sum(image.width * image.height for image in screenshots_4k) / 1e6
+
+        def encode_all(images):
+            return [mind2web_utils.encode_image(image) for image in images]
+
+        bench("mind2web.encode_image[RGBA]", encode_all, screenshots_4k, units=megapixels, unit="MP")
+
+
+class TestRobotsBenchmarks:
+    """robots.txt analysis on a ~10k-line file"""
+
+    def test_analyze_ai_permissions(self, bench, large_robots_txt):
+        service = RobotsAnalysisService()
+        assert service.analyze_ai_permissions(large_robots_txt)["general_access"] != "unknown"
+        lines = large_robots_txt.count("\n") + 1
+        bench("robots.analyze_ai_permissions", service.analyze_ai_permissions, large_robots_txt,
+              units=lines, unit="lines")
+
+    def test_check_url_compliance(self, bench, large_robots_txt, compliance_urls):
+        service = RobotsAnalysisService()
+
+        def check_all(urls):
+            return [service.check_url_compliance(url, large_robots_txt, "GPTBot") for url in urls]
+
+        bench("robots.check_url_compliance", check_all, compliance_urls, units=len(compliance_urls), unit="urls")
+
+    def test_compiled_rules(self, bench, large_robots_txt, compliance_urls):
+        """The compile-once path the API uses for sitemap filtering, for comparison"""
+        service = RobotsAnalysisService()
+
+        def check_all(urls):
+            rules = service.compile_rules(large_robots_txt, "GPTBot")
+            return [rules.is_allowed(url) for url in urls]
+
+        bench("robots.compile_rules+is_allowed", check_all, compliance_urls, units=len(compliance_urls), unit="urls")
+
+
+class TestActionHistoryBenchmarks:
+    """Per-step string processing over long agent trajectories"""
+
+    def test_process_element_tag_bs4(self, bench, action_history, mind2web_clean_html):
+        """The BeautifulSoup reference the tokenizer path replaced"""
+        clean = mind2web_clean_html.process_element_tag_bs4
+        attributes = mind2web_clean_html.SALIENT_ATTRIBUTES
+
+        def clean_all(history):
+            return [clean(step, attributes) for step in history]
+
+        bench("mind2web.process_element_tag[bs4]", clean_all, action_history, units=len(action_history), unit="elements")
+
+    def test_process_element_tag(self, bench, action_history, mind2web_clean_html):
+        """Tokenizer path with the memo cleared, i.e. every element seen for the first time"""
+        clean = mind2web_clean_html.process_element_tag
+        attributes = mind2web_clean_html.SALIENT_ATTRIBUTES
+        reference = [mind2web_clean_html.process_element_tag_bs4(step, attributes) for step in action_history[:200]]
+
+        def clean_all(history):
+            mind2web_clean_html._clean_element_cached.cache_clear()
+            return [clean(step, attributes) for step in history]
+
+        assert clean_all(action_history[:200]) == reference
+        bench("mind2web.process_element_tag", clean_all, action_history, units=len(action_history), unit="elements")
+
+    def test_clean_many_memoized(self, bench, action_history, mind2web_clean_html):
+        """Re-cleaning a history whose elements are already in the memo"""
+        clean_many = mind2web_clean_html.clean_many
+        clean_many(action_history)
+        bench("mind2web.clean_many[memo]", clean_many, action_history, units=len(action_history), unit="elements")
+
+    def test_extract_prediction(self, bench, judge_responses):
+        def extract_all(responses):
+            return [EvaluationService.extract_prediction(response) for response in responses]
+
+        assert set(extract_all(judge_responses)) == {0, 1}
+        bench("evaluate.extract_prediction", extract_all, judge_responses, units=len(judge_responses), unit="responses")
+
+
+class TestDomOutlineBenchmarks:
+    """Pruning a full page snapshot to a text outline"""
+
+    def test_outline_html(self, bench, page_snapshot, mind2web_dom_outline):
+        outline = mind2web_dom_outline.outline_html(page_snapshot)
+        assert len(outline) <= mind2web_dom_outline.MAX_OUTLINE_CHARS and "script" not in outline
+        size = len(page_snapshot) / MB
+        bench("mind2web.outline_html", mind2web_dom_outline.outline_html, page_snapshot, units=size, unit="MB")
+
+
+class TestRunLogBenchmarks:
+    """Loading a ~20k-row run log"""
+
+    def test_ingest_cold(self, bench, large_run_log, tmp_path):
+        path, rows = large_run_log
+        ingestor = RunLogIngestor(str(path), str(tmp_path / "cache"))
+        assert ingestor.ingest(rebuild=True) == rows
+        bench("run_log.ingest[cold]", ingestor.ingest, True, units=rows, unit="rows")
+
+    def test_load_warm(self, bench, large_run_log, tmp_path):
+        path, rows = large_run_log
+        ingestor = RunLogIngestor(str(path), str(tmp_path / "cache"))
+        ingestor.ingest()
+
+        def ingest_and_load():
+            ingestor.ingest()
+            return ingestor.load()
+
+        assert len(ingest_and_load()) == rows
+        bench("run_log.ingest+load[warm]", ingest_and_load, units=rows, unit="rows")
+
+    def test_metrics_analyzer_load_data(self, bench, large_run_log, tmp_path, capsys):
+        pytest.importorskip("matplotlib")
+        pytest.importorskip("seaborn")
+        from analyze_metrics import MetricsAnalyzer
+
+        path, rows = large_run_log
+        analyzer = MetricsAnalyzer(str(path), str(tmp_path / "cache"))
+        assert len(analyzer.df) == rows
+        bench("analyze_metrics.load_data[warm]", analyzer.load_data, units=rows, unit="rows")
@@ -8,6 +8,15 @@ import os
 # Add the api directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
 
+@pytest.fixture
+def isolated_run_engine(tmp_path, monkeypatch):
+    """Point the run engine singleton at a temporary store, for tests that run the app lifespan"""
+    from app.services import run_engine
+
+    monkeypatch.setenv("RUN_STORE_PATH", str(tmp_path / "runs.sqlite3"))
+    monkeypatch.setenv("RUN_EVENT_LOG_DIR", str(tmp_path / "run_events"))
+    monkeypatch.setattr(run_engine, "_engine", None)
+
 @pytest.fixture
 def robots_service():
     """Fixture to provide a RobotsAnalysisService instance"""
@@ -39,6 +39,7 @@ def main():
         print("  network      - Run tests that require network")
         print("  fast         - Run fast tests (skip slow ones)")
         print("  verbose      - Run with verbose output")
+        print("  benchmark    - Run hot-path benchmarks against the stored baselines")
         print("\nExamples:")
         print("  python pytest/test_runner.py all")
         print("  python pytest/test_runner.py unit")
@@ -103,6 +104,12 @@ def main():
             "All Tests (Verbose Output)"
         )
     
+    elif command == "benchmark":
+        return run_command(
+            f'{python_cmd} -m pytest pytest/benchmarks/ -m benchmark',
+            "Hot-path Benchmarks"
+        )
+    
     elif command == "coverage":
         return run_command(
             f'{python_cmd} -m pytest pytest/ --cov=api.app --cov-report=html --cov-report=term',
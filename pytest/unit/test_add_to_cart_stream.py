@@ -0,0 +1,224 @@
+"""
+Pytest tests for concurrent parameter-set fan-out and resumable streams in the add-to-cart SSE endpoint
+"""
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock
+
+from app.fakes.browserbase import create_app
+from app.routes import add_to_cart
+from app.routes.add_to_cart import AddToCartExecuteRequest, add_to_cart_execute, add_to_cart_resume
+from app.services import event_streams, http_client, session_registry
+from app.services.event_streams import BufferedEventStream
+
+
+def parse_frames(chunks):
+    """(id, data) for each data frame; heartbeats and retry hints are skipped"""
+    frames = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n") if ": " in line)
+        if "data" in fields:
+            frames.append((int(fields["id"]) if "id" in fields else None, json.loads(fields["data"])))
+    return frames
+
+
+def parse_events(chunks):
+    return [data for _, data in parse_frames(chunks)]
+
+
+def make_request(disconnect_after=None, last_event_id=None):
+    """Starlette-like request whose client disconnects after the given number of seconds"""
+    started = time.monotonic()
+    request = MagicMock()
+    request.headers = {"x-client-id": "tester"}
+    request.client.host = "127.0.0.1"
+    if last_event_id is not None:
+        request.headers["last-event-id"] = str(last_event_id)
+    request.query_params = {}
+
+    async def is_disconnected():
+        return disconnect_after is not None and time.monotonic() - started >= disconnect_after
+
+    request.is_disconnected = is_disconnected
+    return request
+
+
+class TestAddToCartFanOut:
+    """Test that variants run concurrently, stream as they finish and clean up on disconnect"""
+
+    @pytest.fixture(autouse=True)
+    def fake_browserbase(self, monkeypatch):
+        fake = create_app(latency_ms=0)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake")
+        monkeypatch.setattr(http_client, "_client", client)
+        monkeypatch.setattr(session_registry, "_registry", None)
+        monkeypatch.setattr(event_streams, "_hub", None)
+        monkeypatch.setenv("SSE_ORPHAN_TIMEOUT", "0.1")
+        monkeypatch.setenv("BROWSERBASE_API_KEY", "test-key")
+        monkeypatch.setenv("BROWSERBASE_PROJECT_ID", "proj")
+        monkeypatch.setattr(add_to_cart, "BB_KEY", "test-key")
+        monkeypatch.setattr(add_to_cart, "BB_PROJECT", "proj")
+        monkeypatch.setattr(add_to_cart, "ADD_TO_CART_CONCURRENCY", 4)
+        self.fake = fake
+
+    def make_body(self, n):
+        return AddToCartExecuteRequest(
+            url="https://example.com",
+            searchTerm="white t-shirt",
+            parameters=[{"modelName": f"model-{i}"} for i in range(n)],
+        )
+
+    @pytest.mark.asyncio
+    async def test_variants_run_concurrently_and_are_tagged(self):
+        response = await add_to_cart_execute(self.make_body(4), make_request())
+
+        started = time.monotonic()
+        events = parse_events([chunk async for chunk in response.body_iterator])
+        elapsed = time.monotonic() - started
+
+        # Four 0.5s variants in parallel, not 2s back to back
+        assert elapsed < 1.5
+        assert events[0]["status"] == "started"
+        assert {e["variant"] for e in events if "debuggerUrl" in e} == {0, 1, 2, 3}
+        assert {e["variant"] for e in events if "result" in e} == {0, 1, 2, 3}
+
+        completed = events[-1]
+        assert completed["status"] == "completed"
+        assert [r["params"]["modelName"] for r in completed["results"]] == [f"model-{i}" for i in range(4)]
+        assert all(s["status"] == "COMPLETED" for s in self.fake.state.sessions.values())
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(add_to_cart, "ADD_TO_CART_CONCURRENCY", 2)
+        response = await add_to_cart_execute(self.make_body(4), make_request())
+
+        started = time.monotonic()
+        [chunk async for chunk in response.body_iterator]
+
+        assert time.monotonic() - started >= 1.0
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_cancels_and_releases_sessions(self, monkeypatch):
+        monkeypatch.setenv("SSE_ORPHAN_TIMEOUT", "0.05")
+        response = await add_to_cart_execute(self.make_body(3), make_request(disconnect_after=0.02))
+
+        events = parse_events([chunk async for chunk in response.body_iterator])
+        assert not any(e.get("status") == "completed" for e in events)
+
+        # Nobody reconnects within the orphan timeout, so the run is cancelled well before it would finish
+        hub = event_streams.get_event_stream_hub()
+        stream = hub.get(events[0]["streamId"])
+        await asyncio.wait([stream.task], timeout=1)
+        assert stream.task.cancelled()
+        assert hub.stats()["orphaned"] == 1
+        assert stream.last_event_id < 7  # no results / completed event
+        assert self.fake.state.sessions
+        assert all(s["status"] == "COMPLETED" for s in self.fake.state.sessions.values())
+        assert session_registry.get_session_registry().stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_reconnect_with_last_event_id_resumes(self, monkeypatch):
+        monkeypatch.setenv("SSE_ORPHAN_TIMEOUT", "5")
+        response = await add_to_cart_execute(self.make_body(2), make_request(disconnect_after=0.05))
+        first = parse_frames([chunk async for chunk in response.body_iterator])
+        last_id = first[-1][0]
+        stream_id = first[0][1]["streamId"]
+
+        resumed = await add_to_cart_resume(stream_id, make_request(last_event_id=last_id))
+        rest = parse_frames([chunk async for chunk in resumed.body_iterator])
+
+        ids = [event_id for event_id, _ in first + rest]
+        assert ids == list(range(1, len(ids) + 1))
+        assert rest[-1][1]["status"] == "completed"
+        # Execution kept going: one session per variant, nothing repeated
+        assert len(self.fake.state.sessions) == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_stream_is_404(self):
+        with pytest.raises(HTTPException) as exc:
+            await add_to_cart_resume("nope", make_request())
+        assert exc.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_variant_errors_do_not_abort_others(self, monkeypatch):
+        original = add_to_cart._create_browserbase_session
+
+        async def flaky(p):
+            if p.modelName == "model-1":
+                raise RuntimeError("boom")
+            return await original(p)
+
+        monkeypatch.setattr(add_to_cart, "_create_browserbase_session", flaky)
+        response = await add_to_cart_execute(self.make_body(3), make_request())
+
+        events = parse_events([chunk async for chunk in response.body_iterator])
+
+        results = events[-1]["results"]
+        assert results[1]["error"] == "boom"
+        assert results[0]["extractionResults"]["success"] and results[2]["extractionResults"]["success"]
+
+    @pytest.mark.asyncio
+    async def test_pooled_and_direct_sessions_get_the_same_proxy_setting(self, monkeypatch):
+        direct = await add_to_cart._create_browserbase_session(add_to_cart.Params(proxies="true"))
+        assert self.fake.state.sessions[direct["id"]]["proxies"] is True
+
+        keys = []
+
+        class Pool:
+            enabled = True
+
+            async def acquire(self, key):
+                keys.append(key)
+                return {}
+
+        monkeypatch.setattr(add_to_cart, "get_session_pool", lambda: Pool())
+        for proxies in ("true", None, [{"type": "browserbase"}]):
+            await add_to_cart._create_browserbase_session(add_to_cart.Params(proxies=proxies))
+        assert [key.proxies for key in keys] == [True, False]
+        assert len(self.fake.state.sessions) == 2  # custom proxy configs bypass the pool
+
+
+class TestBufferedEventStream:
+    """Test replay buffer, overflow notice and heartbeats"""
+
+    @pytest.mark.asyncio
+    async def test_replay_after_last_event_id(self):
+        stream = BufferedEventStream("s", buffer_size=10)
+        for i in range(5):
+            await stream.publish({"n": i})
+        await stream.close()
+
+        frames = parse_frames([chunk async for chunk in stream.subscribe(last_event_id=3)])
+
+        assert frames == [(4, {"n": 3}), (5, {"n": 4})]
+
+    @pytest.mark.asyncio
+    async def test_buffer_overflow_is_reported(self):
+        stream = BufferedEventStream("s", buffer_size=2)
+        for i in range(5):
+            await stream.publish({"n": i})
+        await stream.close()
+
+        frames = parse_frames([chunk async for chunk in stream.subscribe(last_event_id=1)])
+
+        assert frames[0] == (None, {"warning": "replay buffer overflow", "missedEvents": 2})
+        assert [event_id for event_id, _ in frames[1:]] == [4, 5]
+
+    @pytest.mark.asyncio
+    async def test_idle_subscriber_gets_heartbeats(self):
+        stream = BufferedEventStream("s")
+
+        async def finish_later():
+            await asyncio.sleep(0.1)
+            await stream.publish({"done": True})
+            await stream.close()
+
+        asyncio.create_task(finish_later())
+        chunks = [c async for c in stream.subscribe(heartbeat_seconds=0.02, poll_seconds=0.01)]
+
+        assert event_streams.HEARTBEAT in chunks
+        assert parse_frames(chunks) == [(1, {"done": True})]
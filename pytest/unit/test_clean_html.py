@@ -0,0 +1,56 @@
+"""
+Pytest tests for the Online-Mind2Web action-history element cleaner
+"""
+import importlib.util
+import os
+
+import pytest
+
+CLEAN_HTML = os.path.join(os.path.dirname(__file__), "..", "..", "external", "Online-Mind2Web", "src", "clean_html.py")
+
+spec = importlib.util.spec_from_file_location("mind2web_clean_html", CLEAN_HTML)
+clean_html = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(clean_html)
+
+ELEMENTS = [
+    '<input type="text" name="q" id="search" class="nav-input" placeholder="Find a recipe" '
+    'required="required" value="" autocomplete="off" style=""> -> TYPE beef sirloin',
+    '<a class="a-link-normal" href="/dp/B01?ref=sr_1&amp;th=1" title="Result" tabindex="-1"> -> CLICK',
+    '<button type="submit" aria-label="Add to cart" role="button" value="add"> -> CLICK',
+    '<div role="listitem" aria-label="Sponsored result -> CLICK',
+    '<span title=\'say "hi"\' alt="it\'s"> -> HOVER',
+    '<input readonly name="" label=x label=y>',
+    '<select name="sort" option_selected="Price: Low to High" onchange="sort(this)"> -> SELECT Price',
+    "scroll down",
+    '<!-- banner --><img alt="<logo>" src="/logo.png"> -> CLICK',
+    "<svg:path aria-label=icon> -> CLICK",
+]
+
+
+class TestProcessElementTag:
+    """The tokenizer cleaner against the BeautifulSoup reference"""
+
+    @pytest.mark.parametrize("element", ELEMENTS)
+    def test_matches_bs4(self, element):
+        pytest.importorskip("bs4")
+        for attributes in (clean_html.SALIENT_ATTRIBUTES, ("class", "rel", "name", "id")):
+            expected = clean_html.process_element_tag_bs4(element, attributes)
+            assert clean_html.process_element_tag(element, attributes) == expected
+
+    def test_output(self):
+        assert clean_html.process_element_tag(ELEMENTS[0], clean_html.SALIENT_ATTRIBUTES) == (
+            '<input name="q" placeholder="Find a recipe" value=""/>'
+        )
+        assert clean_html.process_element_tag(ELEMENTS[1], ["href", "class"]) == (
+            '<a class="a-link-normal" href="/dp/B01?ref=sr_1&amp;th=1">'
+        )
+        assert clean_html.process_element_tag("scroll down", clean_html.SALIENT_ATTRIBUTES) == "scroll down'>"
+
+    def test_clean_many_and_memo(self):
+        clean_html._clean_element_cached.cache_clear()
+        history = ELEMENTS * 3
+        cleaned = clean_html.clean_many(history)
+        assert cleaned == [clean_html.process_element_tag(e, clean_html.SALIENT_ATTRIBUTES) for e in history]
+        info = clean_html._clean_element_cached.cache_info()
+        assert info.currsize == len(ELEMENTS)
+        assert info.hits == len(history) * 2 - len(ELEMENTS)
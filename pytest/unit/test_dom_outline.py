@@ -0,0 +1,131 @@
+"""
+Pytest tests for the Online-Mind2Web DOM snapshot outline
+"""
+import importlib.util
+import os
+import sys
+
+MIND2WEB_SRC = os.path.join(os.path.dirname(__file__), "..", "..", "external", "Online-Mind2Web", "src")
+
+
+def _load_module(name, filename):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(MIND2WEB_SRC, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+sys.modules.setdefault("clean_html", _load_module("mind2web_clean_html", "clean_html.py"))
+dom_outline = _load_module("mind2web_dom_outline", "dom_outline.py")
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Wool Socks | Example Shop</title>
+<meta name="description" content="socks"><style>.a{color:red}</style>
+<script>var banner = "<div>injected</div>";</script></head>
+<body><div class="page"><div class="wrap"><div class="inner">
+  <nav aria-label="Main"><ul><li><a href="/">Home</a></li><li><a href="/socks">Socks</a></li></ul></nav>
+  <form role="search"><input type="text" name="q" placeholder="Search" value="wool socks">
+    <input type="hidden" name="csrf" value="secret"><button type="submit"><svg><path d="M0"/></svg>Search</button></form>
+  <h1>Results for <b>wool socks</b></h1>
+  <label><input type="checkbox" checked name="brand" value="smartwool"> Smartwool</label>
+  <div style="display: none">Secret promo</div>
+  <div class="card"><div><div><a href="/dp/1" title="Merino Wool Socks"><img src="a.jpg" alt="Merino socks"></a></div></div>
+    <div class="price">Price: $<span>12</span>.99</div><p>In stock</p>
+    <button aria-label="Add to cart">Add</button></div>
+  <details><summary>More info</summary><p>Folded away</p></details>
+  <table><tr><th>Size</th><td>M</td></tr><tr><th>Color</th><td>Gray</td></tr></table>
+  <div hidden>invisible</div><span aria-hidden="true">decoration</span><noscript>Enable JS</noscript>
+</div></div></div>
+<footer><p>&copy; 2025 Example</p></footer></body></html>
+"""
+
+
+class TestDomOutline:
+    """Pruning, wrapper collapsing and the size bound"""
+
+    def test_outline(self):
+        assert dom_outline.outline_html(PAGE).splitlines() == [
+            "Page title: Wool Socks | Example Shop",
+            '<nav aria-label="Main">',
+            '  <a href="/"> Home',
+            '  <a href="/socks"> Socks',
+            '<form role="search">',
+            '  <input name="q" placeholder="Search" type="text" value="wool socks"/>',
+            '  <button type="submit"> Search',
+            "    <svg>",
+            "<h1> Results for wool socks",
+            '<input checked="" name="brand" type="checkbox" value="smartwool"/>',
+            "Smartwool",
+            '<a href="/dp/1" title="Merino Wool Socks">',
+            '  <img alt="Merino socks"/>',
+            "Price: $12.99",
+            "In stock",
+            '<button aria-label="Add to cart"> Add',
+            "<summary> More info",
+            "<table>",
+            "  <tr> Size M",
+            "  <tr> Color Gray",
+            "© 2025 Example",
+        ]
+
+    def test_drops_invisible_and_non_content(self):
+        outline = dom_outline.outline_html(PAGE)
+        for text in ("injected", "color:red", "secret", "Secret promo", "Folded away", "invisible",
+                     "decoration", "Enable JS", "description", "<div", "<span"):
+            assert text not in outline
+
+    def test_streaming_matches_whole_document(self):
+        expected = dom_outline.outline_html(PAGE)
+        for chunk in (1, 5, 64):
+            outliner = dom_outline.DomOutliner()
+            for start in range(0, len(PAGE), chunk):
+                outliner.feed(PAGE[start:start + chunk])
+            outliner.close()
+            assert outliner.outline() == expected
+
+    def test_outline_file(self, tmp_path):
+        path = tmp_path / "page.html"
+        path.write_text(PAGE, encoding="utf-8")
+        assert dom_outline.outline_file(str(path), chunk_size=16) == dom_outline.outline_html(PAGE)
+
+    def test_size_bound(self):
+        page = "<ul>" + "".join(f'<li><a href="/p/{i}">Product {i}</a></li>' for i in range(500)) + "</ul>"
+        for max_chars in (40, 200, 1000, 4000):
+            outline = dom_outline.outline_html(page, max_chars=max_chars)
+            assert len(outline) <= max_chars
+            assert outline.endswith("more lines not shown]")
+        assert "Product 499" in dom_outline.outline_html(page, max_chars=100_000)
+
+    def test_long_values_are_truncated(self):
+        page = f'<a href="/{"x" * 500}">{"word " * 200}</a>'
+        line = dom_outline.outline_html(page)
+        assert len(line) < dom_outline.MAX_ATTRIBUTE_CHARS + dom_outline.MAX_TEXT_CHARS + 20
+        assert line.endswith("...")
+
+    def test_opaque_elements_keep_a_line(self):
+        page = ('<div><iframe src="/ad"><p>fallback</p></iframe><canvas></canvas>'
+                '<video><source src="a.mp4"></video><p>After</p></div>')
+        assert dom_outline.outline_html(page).splitlines() == ["<iframe>", "<canvas>", "<video>", "After"]
+
+    def test_unclosed_tags(self):
+        page = "<ul><li>One<li>Two<li><a href='/3'>Three</ul><p>After"
+        assert dom_outline.outline_html(page).splitlines() == [
+            "<li> One",
+            "<li> Two",
+            '<a href="/3"> Three',
+            "After",
+        ]
+
+    def test_implied_end_closes_what_is_still_open_inside(self):
+        table = "<table><tr><td>a<td>b<tr><td>c</table>"
+        assert dom_outline.outline_html(table).splitlines() == ["<table>", "  <tr> a b", "  <tr> c"]
+        nested = "<ul><li>One <b>bold<li>Two<ul><li>Inner</ul><li>Three</ul>"
+        assert dom_outline.outline_html(nested).splitlines() == ["<li> One bold", "<li> Two", "  <li> Inner", "<li> Three"]
+        select = "<select><option>S<b>mall</b><option><i>Large</select>"
+        assert dom_outline.outline_html(select).splitlines() == ["<select>", "  <option> Small", "  <option> Large"]
+
+    def test_deep_nesting(self):
+        lines = dom_outline.outline_html('<div role="group">' * 1500 + "x", max_chars=10 ** 7).splitlines()
+        assert len(lines) == 1500
+        assert lines[-1] == "  " * 1499 + '<div role="group"> x'
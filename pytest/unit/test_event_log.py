@@ -0,0 +1,182 @@
+"""
+Pytest tests for the segmented, append-only run event log
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+
+from app.services.event_log import RunEventLog
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+
+class TestRunEventLog:
+    """Test batching, pagination, recovery, following and compaction"""
+
+    @pytest.mark.asyncio
+    async def test_append_is_buffered_and_batched(self, tmp_path):
+        log = RunEventLog(str(tmp_path), flush_interval=0.02)
+        for i in range(200):
+            log.append("run-a", f"step-{i}", "act")
+
+        # Readable immediately, before anything hits disk
+        assert segment_files(tmp_path) == []
+        items, _ = log.read("run-a", limit=500)
+        assert len(items) == 200
+
+        await asyncio.sleep(0.1)
+        assert log.stats()["flushes"] == 1
+        assert log.stats()["pending"] == 0
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_cursor_pagination_and_since(self, tmp_path):
+        log = RunEventLog(str(tmp_path))
+        for i in range(5):
+            log.append("run-a", f"step-{i}", "act")
+            log.append("run-b", f"other-{i}", "act")
+        await log.flush()
+        # Mix flushed and still-buffered events
+        log.append("run-a", "step-5", "act")
+
+        pages, cursor = [], None
+        while True:
+            items, cursor = log.read("run-a", cursor, limit=2)
+            pages.append([e["step"] for e in items])
+            if cursor is None:
+                break
+
+        assert pages == [["step-0", "step-1"], ["step-2", "step-3"], ["step-4", "step-5"]]
+        items, _ = log.read("run-a")
+        later, _ = log.read("run-a", since=items[3]["ts"])
+        assert later[0]["ts"] >= items[3]["ts"]
+        assert all(e["step"].startswith("step-") for e in later)
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_since_accepts_any_utc_offset(self, tmp_path):
+        log = RunEventLog(str(tmp_path))
+        for i in range(4):
+            log.append("run-a", f"step-{i}", "act")
+            await asyncio.sleep(0.002)
+        await log.flush()
+        items, _ = log.read("run-a")
+        pivot = datetime.fromisoformat(items[2]["ts"])
+
+        for since in (
+            pivot.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            pivot.astimezone(timezone(timedelta(hours=2))).isoformat(),
+            pivot.replace(tzinfo=None).isoformat(),
+        ):
+            later, _ = log.read("run-a", since=since)
+            assert [e["step"] for e in later] == ["step-2", "step-3"], since
+        with pytest.raises(ValueError):
+            log.read("run-a", since="yesterday")
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_segments_roll_and_index_is_recovered(self, tmp_path):
+        log = RunEventLog(str(tmp_path), segment_max_bytes=1024)
+        for i in range(50):
+            log.append("run-a", f"step-{i}", "act", details={"i": i})
+        log.close_run("run-a")
+        await log.close()
+        assert len(segment_files(tmp_path)) > 1
+
+        reopened = RunEventLog(str(tmp_path), segment_max_bytes=1024)
+        items, _ = reopened.read("run-a", limit=100)
+
+        assert [e["details"]["i"] for e in items] == list(range(50))
+        assert reopened.is_closed("run-a")
+        seq = reopened.append("run-a", "late", "act")
+        assert seq > 50
+
+    @pytest.mark.asyncio
+    async def test_torn_tail_is_truncated_on_recovery(self, tmp_path):
+        log = RunEventLog(str(tmp_path))
+        log.append("run-a", "step-0", "act")
+        await log.close()
+        with open(tmp_path / segment_files(tmp_path)[-1], "ab") as f:
+            f.write(b'{"seq": 2, "run_id": "run-')
+
+        reopened = RunEventLog(str(tmp_path))
+        reopened.append("run-a", "step-1", "act")
+        await reopened.close()
+
+        items, _ = RunEventLog(str(tmp_path)).read("run-a")
+        assert [e["step"] for e in items] == ["step-0", "step-1"]
+
+    @pytest.mark.asyncio
+    async def test_follow_tails_until_closed(self, tmp_path):
+        log = RunEventLog(str(tmp_path), flush_interval=0.01)
+        log.append("run-a", "step-0", "act")
+
+        async def produce():
+            for i in range(1, 4):
+                await asyncio.sleep(0.01)
+                log.append("run-a", f"step-{i}", "act")
+            log.close_run("run-a")
+
+        producer = asyncio.create_task(produce())
+        seen = [item async for item in log.follow("run-a", heartbeat_seconds=1)]
+        await producer
+
+        assert [event["step"] for _, event in seen] == ["step-0", "step-1", "step-2", "step-3"]
+        resumed = [item async for item in log.follow("run-a", cursor=str(seen[1][0]))]
+        assert [event["step"] for _, event in resumed] == ["step-2", "step-3"]
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_retention_and_compaction(self, tmp_path):
+        log = RunEventLog(str(tmp_path), segment_max_bytes=2048, retention_seconds=60)
+        for i in range(40):
+            log.append("old-run", f"step-{i}", "act")
+        await log.flush()
+        before = len(segment_files(tmp_path))
+        for i in range(5):
+            log.append("new-run", f"step-{i}", "act")
+        await log.flush()
+
+        result = log.compact(now=time.time() + 120)
+
+        assert result["expired"] == 45
+        assert log.read("old-run")[0] == []
+        assert len(segment_files(tmp_path)) < before + 1
+
+        # Everything recent survives compaction
+        log.retention_seconds = 3600
+        for i in range(40):
+            log.append("keep", f"step-{i}", "act")
+        await log.flush()
+        log.compact()
+        items, _ = log.read("keep", limit=100)
+        assert [e["step"] for e in items] == [f"step-{i}" for i in range(40)]
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_read_retries_when_compaction_rewrites_segment(self, tmp_path):
+        log = RunEventLog(str(tmp_path), segment_max_bytes=2048)
+        for i in range(40):
+            log.append("dead", f"dead-{i}", "act")
+            log.append("live", f"step-{i}", "act")
+        await log.flush()
+        del log._index["dead"]  # as if retention had expired it
+
+        read_entries = log._read_entries
+        calls = []
+
+        def compact_mid_read(entries):
+            # Compaction lands between copying the offsets and reading the files
+            if not calls:
+                calls.append(log.compact())
+            return read_entries(entries)
+
+        log._read_entries = compact_mid_read
+        items, _ = log.read("live", limit=100)
+        assert calls[0]["rewritten"] > 0
+        assert [e["step"] for e in items] == [f"step-{i}" for i in range(40)]
+        await log.close()
@@ -0,0 +1,70 @@
+"""
+Pytest tests for the shared Browserbase HTTP client
+"""
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.fakes.browserbase import create_app
+from app.main import app
+from app.services import http_client, session_registry
+
+
+@pytest.fixture
+def fake_browserbase(monkeypatch):
+    """Route the shared client to an in-process fake Browserbase"""
+    fake = create_app(latency_ms=0)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake")
+    monkeypatch.setattr(http_client, "_client", client)
+    monkeypatch.setattr(session_registry, "_registry", None)
+    monkeypatch.setenv("BROWSERBASE_API_KEY", "test-key")
+    monkeypatch.setenv("BROWSERBASE_PROJECT_ID", "proj")
+    monkeypatch.setattr("app.routes.sessions.BB_KEY", "test-key")
+    return fake
+
+
+class TestSharedHttpClient:
+    """Test client construction and that routes reuse it"""
+
+    def test_client_is_tuned(self):
+        client = http_client.build_http_client()
+
+        assert client.timeout.connect == http_client.HTTP_TIMEOUT.connect
+        assert client.timeout.read == http_client.HTTP_TIMEOUT.read
+
+    def test_get_http_client_is_shared(self, monkeypatch):
+        monkeypatch.setattr(http_client, "_client", None)
+
+        assert http_client.get_http_client() is http_client.get_http_client()
+
+    def test_lifespan_creates_and_closes_client(self, monkeypatch, isolated_run_engine):
+        monkeypatch.setattr(http_client, "_client", None)
+
+        with TestClient(app) as client:
+            shared = http_client._client
+            assert shared is not None
+            assert client.get("/v1/health").status_code == 200
+
+        assert shared.is_closed
+        assert http_client._client is None
+
+    def test_session_create_is_async_and_uses_shared_client(self, fake_browserbase):
+        client = TestClient(app)
+
+        first = client.post("/v1/session/create", json={"url": "https://example.com"})
+        second = client.post("/v1/session/create", json={"url": "https://example.com"})
+
+        assert first.status_code == 200 and second.status_code == 200
+        body = first.json()
+        assert body["debuggerFullscreenUrl"].endswith(body["sessionId"])
+        assert fake_browserbase.state.calls["create"] == 2
+        assert fake_browserbase.state.calls["debug"] == 2
+
+    def test_session_status_goes_through_shared_client(self, fake_browserbase):
+        client = TestClient(app)
+        created = client.post("/v1/sessions/add-to-cart", json={"url": "https://example.com"}).json()
+
+        status = client.get(f"/v1/sessions/{created['id']}")
+
+        assert status.status_code == 200
+        assert status.json()["status"] == "RUNNING"
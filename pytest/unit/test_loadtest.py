@@ -0,0 +1,96 @@
+"""
+Pytest tests for the load harness helpers and the fake OpenAI / target-site servers
+"""
+import argparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.fakes import openai as fake_openai
+from app.fakes import site as fake_site
+from app.loadtest import Recorder, parse_mix, parse_rates, percentile
+from app.services.evaluate import EvaluationService
+from app.services.robots_service import RobotsAnalysisService
+
+
+def chat(client, system, user="hi", **body):
+    return client.post(
+        "/v1/chat/completions",
+        headers={"Authorization": "Bearer test"},
+        json={"model": "gpt-4o", "messages": [{"role": "system", "content": system},
+                                               {"role": "user", "content": user}], **body},
+    )
+
+
+class TestFakeOpenAI:
+    """Canned replies are shaped like what the evaluator parses"""
+
+    def test_replies_by_caller(self):
+        client = TestClient(fake_openai.create_app(latency_ms=0))
+        key_points = chat(client, "Identify the key points of the task").json()
+        assert key_points["choices"][0]["message"]["content"].startswith("Key Points:")
+        judge = chat(client, "Each image contains steps ... ### Score: [1-5]").json()
+        assert "### Score: 4" in judge["choices"][0]["message"]["content"]
+        verdict = chat(client, 'Answer with Status: "success" or "failure"').json()
+        assert EvaluationService.extract_prediction(verdict["choices"][0]["message"]["content"]) == 1
+
+        stats = client.get("/v1/stats").json()
+        assert stats["calls"] == {"key_points": 1, "judge": 1, "verdict": 1, "chat": 0}
+        assert stats["tokens"]["prompt"] > 0
+
+    def test_usage_counts_images(self):
+        client = TestClient(fake_openai.create_app(latency_ms=0))
+        content = [{"type": "text", "text": "look"},
+                   {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}]
+        usage = chat(client, "system", user=content).json()["usage"]
+        assert usage["prompt_tokens"] >= fake_openai.IMAGE_TOKENS
+        assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+
+    def test_requires_api_key(self):
+        client = TestClient(fake_openai.create_app(latency_ms=0))
+        assert client.post("/v1/chat/completions", json={"messages": []}).status_code == 401
+
+
+class TestFakeSite:
+    """robots.txt and sitemap served by the fake target site"""
+
+    def test_robots_txt_parses(self):
+        client = TestClient(fake_site.create_app(rules=50))
+        robots = client.get("/robots.txt").text
+        assert robots.count("\n") > 50
+        assert "Sitemap: http://testserver/sitemap.xml" in robots
+        service = RobotsAnalysisService()
+        assert not service.check_url_compliance("http://testserver/product/1", robots, "GPTBot")
+        assert service.check_url_compliance("http://testserver/product/1", robots, "ClaudeBot")
+        assert "<urlset" in client.get("/sitemap.xml").text
+
+
+class TestLoadtestHelpers:
+    """Percentiles, recording and argument parsing"""
+
+    def test_percentile_nearest_rank(self):
+        ordered = [float(i) for i in range(1, 101)]
+        assert percentile(ordered, 50) == 50
+        assert percentile(ordered, 99) == 99
+        assert percentile(ordered, 100) == 100
+        assert percentile([7.0], 99) == 7.0
+
+    def test_recorder_summary(self):
+        rec = Recorder()
+        for ms in (10, 20, 30, 40):
+            rec.record("robots", ms / 1000)
+        rec.record("robots", None, "http_503")
+        summary = rec.summary(elapsed=2.0)["robots"]
+        assert summary["count"] == 5 and summary["ok"] == 4
+        assert summary["error_rate"] == 0.2
+        assert summary["throughput_rps"] == 2.0
+        assert summary["p50_ms"] == 20.0 and summary["max_ms"] == 40.0
+        assert summary["errors"] == {"http_503": 1}
+
+    def test_parse_mix_and_rates(self):
+        assert parse_mix("robots=2,sessions,evaluate=0") == {"robots": 2.0, "sessions": 1.0}
+        assert parse_rates("5, 10") == [5.0, 10.0]
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix("nope=1")
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_rates("0")
@@ -0,0 +1,164 @@
+"""
+Pytest tests for the Prometheus metrics registry and instrumentation
+"""
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import metrics as metrics_module
+from app.services.evaluate import EvaluationService
+from app.services.metrics import MetricsMiddleware, MetricsRegistry, ServiceMetrics
+
+
+def samples(text):
+    """{'name{labels}': value} for every sample line"""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+class TestRegistry:
+    """Test exposition format"""
+
+    def test_counter_gauge_and_label_escaping(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs", ("queue",))
+        gauge = registry.gauge("depth", "Depth")
+        counter.labels('a"b\\c').inc()
+        counter.labels('a"b\\c').inc(2)
+        gauge.labels().set(1.5)
+
+        text = registry.render()
+
+        assert "# TYPE jobs_total counter" in text
+        assert samples(text) == {'jobs_total{queue="a\\"b\\\\c"}': 3, "depth": 1.5}
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        hist = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            hist.labels("/a").observe(value)
+
+        got = samples(registry.render())
+
+        assert got['latency_seconds_bucket{route="/a",le="0.1"}'] == 2
+        assert got['latency_seconds_bucket{route="/a",le="1"}'] == 3
+        assert got['latency_seconds_bucket{route="/a",le="+Inf"}'] == 4
+        assert got['latency_seconds_count{route="/a"}'] == 4
+        assert got['latency_seconds_sum{route="/a"}'] == pytest.approx(3.65)
+
+    def test_rejects_wrong_label_count_and_duplicate_names(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("x_total", "X", ("a", "b"))
+        with pytest.raises(ValueError):
+            counter.labels("only-one")
+        with pytest.raises(ValueError):
+            registry.gauge("x_total", "X again")
+
+    def test_concurrent_increments_are_not_lost(self):
+        counter = MetricsRegistry().counter("hits_total", "Hits")
+        child = counter.labels()
+
+        def work():
+            for _ in range(10_000):
+                child.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert child.value == 40_000
+
+    def test_collectors_render_at_scrape_time(self):
+        registry = MetricsRegistry()
+        state = {"depth": 1}
+        registry.add_collector(lambda: [("queue_depth", "gauge", "Depth", [({"queue": "runs"}, state["depth"])])])
+        state["depth"] = 7
+
+        assert samples(registry.render())['queue_depth{queue="runs"}'] == 7
+
+
+class TestServiceMetrics:
+    """Test LLM and Browserbase helpers"""
+
+    def test_llm_call_records_latency_tokens_and_errors(self):
+        metrics = ServiceMetrics()
+        with metrics.llm_call("gpt-4o", "judge") as call:
+            call.record_usage(SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+        with pytest.raises(RuntimeError):
+            with metrics.llm_call("gpt-4o", "judge"):
+                raise RuntimeError("rate limited")
+
+        got = samples(metrics.render())
+
+        assert got['llm_tokens_total{model="gpt-4o",call_type="judge",kind="prompt"}'] == 120
+        assert got['llm_tokens_total{model="gpt-4o",call_type="judge",kind="completion"}'] == 30
+        assert got['llm_request_duration_seconds_count{model="gpt-4o",call_type="judge"}'] == 2
+        assert got['llm_errors_total{model="gpt-4o",call_type="judge"}'] == 1
+
+    def test_generate_is_instrumented_by_call_type(self, monkeypatch):
+        metrics = ServiceMetrics()
+        monkeypatch.setattr(metrics_module, "_metrics", metrics)
+        service = EvaluationService.__new__(EvaluationService)
+        service.model = "gpt-4o-mini"
+        service.client = MagicMock()
+        service.client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Status: success"))],
+            usage=SimpleNamespace(prompt_tokens=50, completion_tokens=5),
+        )
+
+        service.generate([{"role": "user", "content": "hi"}], call_type="verdict")
+
+        got = samples(metrics.render())
+        assert got['llm_tokens_total{model="gpt-4o-mini",call_type="verdict",kind="prompt"}'] == 50
+
+    def test_browserbase_call_counts_bad_statuses_and_exceptions(self):
+        metrics = ServiceMetrics()
+        with metrics.browserbase_call("create_session") as call:
+            call.status_code = 201
+        with metrics.browserbase_call("create_session") as call:
+            call.status_code = 429
+        with pytest.raises(TimeoutError):
+            with metrics.browserbase_call("create_session"):
+                raise TimeoutError()
+
+        got = samples(metrics.render())
+
+        assert got['browserbase_request_duration_seconds_count{operation="create_session"}'] == 3
+        assert got['browserbase_errors_total{operation="create_session",reason="429"}'] == 1
+        assert got['browserbase_errors_total{operation="create_session",reason="TimeoutError"}'] == 1
+
+
+class TestMetricsMiddleware:
+    """Test per-route request metrics"""
+
+    def test_records_route_templates_statuses_and_in_flight(self):
+        metrics = ServiceMetrics()
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+        seen = {}
+
+        @app.get("/items/{item_id}")
+        def item(item_id: str):
+            seen["in_flight"] = metrics.http_in_flight.labels().value
+            return {"id": item_id}
+
+        with TestClient(app) as client:
+            client.get("/items/1")
+            client.get("/items/2")
+            client.get("/nope")
+
+        got = samples(metrics.render())
+        assert seen["in_flight"] == 1
+        assert got["http_requests_in_flight"] == 0
+        assert got['http_requests_total{method="GET",route="/items/{item_id}",status="200"}'] == 2
+        assert got['http_requests_total{method="GET",route="unmatched",status="404"}'] == 1
+        assert got['http_request_duration_seconds_count{method="GET",route="/items/{item_id}"}'] == 2
@@ -0,0 +1,113 @@
+"""
+Pytest tests for per-phase latency, token and cost attribution
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+DATAVIZ_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "dataviz")
+sys.path.insert(0, DATAVIZ_DIR)
+
+from phase_attribution import attribute, build_report, high_overhead_runs, phase_summary  # noqa: E402
+from run_log_ingest import RunLogIngestor  # noqa: E402
+
+SAMPLE_CSV = os.path.join(DATAVIZ_DIR, "workflow-runs.csv")
+
+
+def run(execution_ms, act=(1000, 10, 1000), extract=(0, 0, 0), session_ms=None,
+        model="anthropic/claude-sonnet-4-20250514", term="socks"):
+    """One log row; phases are (prompt tokens, completion tokens, inference ms)"""
+    row = {"modelName": model, "searchTerm": term, "executionTimeMs": execution_ms,
+           "browserbaseDurationMs": session_ms}
+    for phase, (prompt, completion, ms) in {"act": act, "extract": extract, "observe": (0, 0, 0)}.items():
+        row.update({f"{phase}PromptTokens": prompt, f"{phase}CompletionTokens": completion,
+                    f"{phase}InferenceTimeMs": ms})
+    return row
+
+
+class TestAttribute:
+    """Test the per-run split of wall time"""
+
+    def test_components_add_up_to_wall_time(self):
+        df = pd.DataFrame([run(10000, act=(2000, 100, 2000), extract=(1000, 500, 5000), session_ms=12500)])
+
+        r = attribute(df).iloc[0]
+
+        assert (r["actMs"], r["extractMs"], r["sessionMs"], r["overheadMs"]) == (2000, 5000, 2500, 3000)
+        assert r["actMs"] + r["extractMs"] + r["observeMs"] + r["sessionMs"] + r["overheadMs"] == r["wallMs"] == 12500
+        assert r["overheadShare"] == pytest.approx(0.24)
+
+    def test_cost_uses_model_pricing(self):
+        df = pd.DataFrame([
+            run(10000, act=(1_000_000, 0, 1000)),
+            run(10000, act=(1_000_000, 0, 1000), model="acme/unknown"),
+        ])
+
+        runs = attribute(df, pricing={"claude-sonnet-4-20250514": (3.0, 15.0)})
+
+        assert runs["actCostUsd"].iloc[0] == pytest.approx(3.0)
+        assert pd.isna(runs["costUsd"].iloc[1])
+        assert build_report(df, pricing={"claude-sonnet-4-20250514": (3.0, 15.0)})["unpriced_models"] == ["acme/unknown"]
+
+    def test_runs_that_never_executed_are_dropped_and_missing_sessions_fall_back(self):
+        df = pd.DataFrame([run(0, act=(0, 0, 0)), run(4000, session_ms=None)])
+
+        runs = attribute(df)
+
+        assert len(runs) == 1
+        assert runs["wallMs"].iloc[0] == 4000 and runs["sessionMs"].iloc[0] == 0
+
+
+class TestSummary:
+    """Test per-phase aggregates and overhead outliers"""
+
+    def test_tokens_per_second_is_a_ratio_of_sums(self):
+        df = pd.DataFrame([run(5000, act=(900, 100, 1000)), run(20000, act=(2900, 100, 4000))])
+
+        act = next(r for r in phase_summary(attribute(df)) if r["component"] == "act")
+
+        assert act["tokens_per_second"] == 800.0
+        assert act["completion_tokens_per_second"] == 40.0
+        observe = next(r for r in phase_summary(attribute(df)) if r["component"] == "observe")
+        assert observe["tokens_per_second"] is None
+
+    def test_cost_is_none_unless_every_run_is_priced(self):
+        df = pd.DataFrame([
+            run(5000, act=(1_000_000, 0, 1000), term="socks"),
+            run(5000, act=(1_000_000, 0, 1000), term="socks", model="openai/gpt-5"),
+            run(5000, act=(1_000_000, 0, 1000), term="hats", model="openai/gpt-5"),
+            run(5000, act=(1_000_000, 0, 1000), term="shoes"),
+        ])
+        pricing = {"claude-sonnet-4-20250514": (3.0, 15.0)}
+
+        summary = phase_summary(attribute(df, pricing=pricing), by="searchTerm")
+        act = {r["group"]: r for r in summary if r["component"] == "act"}
+
+        assert act["socks"]["cost_usd"] is None and act["socks"]["cost_per_run_usd"] is None
+        assert act["hats"]["cost_usd"] is None
+        assert act["shoes"]["cost_usd"] == pytest.approx(3.0)
+
+    def test_high_overhead_runs_are_relative_to_their_group(self):
+        typical = [run(11000 + 100 * i, term="socks") for i in range(10)]
+        slow_pages = [run(41000 + 100 * i, term="laptop") for i in range(10)]
+        df = pd.DataFrame(typical + slow_pages + [run(60000, term="socks")])
+
+        flagged = high_overhead_runs(attribute(df))
+
+        assert flagged.index.tolist() == [20]
+        assert flagged["typicalOverheadMs"].iloc[0] == 10500
+
+    def test_sample_log(self, tmp_path):
+        ingestor = RunLogIngestor(SAMPLE_CSV, str(tmp_path / "cache"))
+        ingestor.ingest()
+
+        report = build_report(ingestor.load())
+
+        assert report["runs"] == 147
+        assert report["cost_usd"] > 0
+        assert {r["component"] for r in report["phases"]} == {"act", "extract", "observe", "session", "overhead"}
+        shares = [r["share_of_wall"] for r in report["phases"] if r["group"] == report["phases"][0]["group"]]
+        assert sum(shares) == pytest.approx(1, abs=1e-3)
+        assert report["high_overhead"]["count"] > 0
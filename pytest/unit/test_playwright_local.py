@@ -0,0 +1,246 @@
+"""
+Pytest tests for the pooled local Playwright provider
+
+Browser tests run against a static site served from tmp_path (no network) and
+are skipped when Chromium isn't installed.
+"""
+import asyncio
+import os
+import functools
+import http.server
+import threading
+import pytest
+import pytest_asyncio
+
+from app.providers.playwright_local import PlaywrightLocal, StepError, request_origin, to_steps
+from app.services.captures import CaptureNotFound, CaptureStore
+from app.services.screenshots import ScreenshotPipeline, ScreenshotSettings
+from app.services.recipes import ClickStep, RecipeError, SearchStep, VisitStep
+
+INDEX_HTML = """<!doctype html>
+<html><head><title>Test Shop</title></head>
+<body>
+  <form action="/results.html" method="get">
+    <input type="search" name="q" aria-label="Search">
+  </form>
+</body></html>
+"""
+
+RESULTS_HTML = """<!doctype html>
+<html><head><title>Results</title></head>
+<body>
+  <p>White tshirt</p>
+  <button onclick="document.getElementById('cart').textContent = '1'; document.title = 'Cart 1'">Add to cart</button>
+  <span id="cart">0</span>
+</body></html>
+"""
+
+
+class StaticSite:
+    def __init__(self, directory):
+        directory.mkdir(exist_ok=True)
+        (directory / "index.html").write_text(INDEX_HTML)
+        (directory / "results.html").write_text(RESULTS_HTML)
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(directory))
+        handler.log_message = lambda *args: None
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def static_site(tmp_path):
+    site = StaticSite(tmp_path / "site")
+    yield site
+    site.stop()
+
+
+@pytest.fixture
+def site(static_site):
+    return static_site.url
+
+
+@pytest_asyncio.fixture
+async def provider():
+    pytest.importorskip("playwright")
+    local = PlaywrightLocal(max_contexts=2, max_uses_per_context=2, step_timeout_ms=5000)
+    try:
+        await local.start()
+    except Exception as e:
+        await local.close()
+        pytest.skip(f"Chromium not available: {e}")
+    yield local
+    await local.close()
+
+
+def shop_steps(site):
+    return [{"visit": f"{site}/index.html"}, {"search": "white tshirt"}, {"click": "Add to cart"}]
+
+
+class TestSteps:
+    """Test step normalisation (no browser needed)"""
+
+    def test_accepts_shorthand_and_typed_steps(self):
+        steps = to_steps([
+            {"visit": "https://shop.example.com"},
+            {"kind": "search", "query": "socks"},
+            {"click": "Add to cart"},
+        ])
+
+        assert steps == [
+            VisitStep(url="https://shop.example.com"),
+            SearchStep(query="socks"),
+            ClickStep(target="Add to cart"),
+        ]
+
+    def test_rejects_unknown_steps(self):
+        with pytest.raises(RecipeError, match="unknown step type"):
+            to_steps([{"hover": "menu"}])
+
+    def test_request_origin(self):
+        assert request_origin("https://user:pw@shop.example.com:8443/cart?q=1") == "https://shop.example.com:8443"
+        assert request_origin("http://127.0.0.1:8000/") == "http://127.0.0.1:8000"
+        assert request_origin("data:text/html,hi") is None
+        assert request_origin("about:blank") is None
+
+    @pytest.mark.asyncio
+    async def test_empty_step_list_does_not_launch_a_browser(self):
+        local = PlaywrightLocal()
+
+        assert await local.run([]) == {"steps_executed": 0}
+        assert local.stats()["browser_connected"] is False
+
+
+class TestCaptureStore:
+    """Test capture naming and mode validation (no browser needed)"""
+
+    def test_live_needs_no_capture(self, tmp_path):
+        assert CaptureStore(tmp_path).capture(None, "shop") is None
+        assert CaptureStore(tmp_path).capture("live", "shop") is None
+
+    def test_record_and_replay_paths(self, tmp_path):
+        store = CaptureStore(tmp_path / "captures")
+
+        capture = store.capture("record", "ecommerce/add white tshirt.v1")
+        assert capture.path == str(tmp_path / "captures" / "ecommerce_add_white_tshirt.v1.har.zip")
+        assert os.path.isdir(tmp_path / "captures")
+
+        with pytest.raises(CaptureNotFound, match="No capture recorded"):
+            store.capture("replay", "ecommerce/add white tshirt.v1")
+        open(capture.path, "wb").close()
+        assert store.capture("replay", "ecommerce/add white tshirt.v1").mode == "replay"
+
+    def test_rejects_unknown_modes(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported network mode"):
+            CaptureStore(tmp_path).capture("offline", "shop")
+
+
+class TestPlaywrightLocal:
+    """Test execution, pooling and recycling against a local static site"""
+
+    @pytest.mark.asyncio
+    async def test_runs_steps_end_to_end(self, provider, site):
+        result = await provider.run(shop_steps(site))
+
+        assert result["steps_executed"] == 3
+        assert result["final_url"].startswith(f"{site}/results.html?q=white+tshirt")
+        assert result["title"] == "Cart 1"
+        assert len(result["step_timings_ms"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_by_max_contexts(self, provider, site):
+        results = await asyncio.gather(*(provider.run(shop_steps(site)) for _ in range(4)))
+
+        assert all(r["title"] == "Cart 1" for r in results)
+        stats = provider.stats()
+        assert stats["runs"] == 4
+        # Never more than two contexts alive, and both were recycled after two uses
+        assert stats["contexts_created"] == 2
+        assert stats["contexts_recycled"] == 2
+        assert stats["open_contexts"] == 0
+
+    @pytest.mark.asyncio
+    async def test_contexts_are_reused_and_isolated(self, provider, site):
+        provider.max_uses_per_context = 10
+        await provider.run([{"visit": f"{site}/index.html"}])
+        context, _ = provider._idle[0]
+        await context.add_cookies([{"name": "session", "value": "x", "url": site}])
+
+        await provider.run([{"visit": f"{site}/index.html"}])
+
+        assert provider.stats()["contexts_created"] == 1
+        assert await context.cookies() == []
+
+    @pytest.mark.asyncio
+    async def test_reused_contexts_start_with_empty_storage(self, provider, site):
+        provider.max_uses_per_context = 10
+        await provider.run([{"visit": f"{site}/index.html"}])
+        context, _ = provider._idle[0]
+        page = await context.new_page()
+        await page.goto(f"{site}/index.html")
+        await page.evaluate("""() => new Promise(done => {
+            localStorage.setItem("cart", "1");
+            indexedDB.open("shop").onsuccess = event => { event.target.result.close(); done(); };
+        })""")
+
+        await provider.run([{"visit": f"{site}/index.html"}])
+
+        assert provider.stats()["contexts_created"] == 1
+        page = await context.new_page()
+        await page.goto(f"{site}/index.html")
+        assert await page.evaluate("localStorage.length") == 0
+        assert await page.evaluate("indexedDB.databases().then(dbs => dbs.length)") == 0
+        await page.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_step_raises_and_discards_context(self, provider, site):
+        provider.step_timeout_ms = 500
+        with pytest.raises(StepError, match=r"step 1 \(click\)"):
+            await provider.run([{"visit": f"{site}/index.html"}, {"click": "Checkout"}])
+
+        stats = provider.stats()
+        assert stats["failures"] == 1
+        assert stats["idle_contexts"] == 0 and stats["open_contexts"] == 0
+
+    @pytest.mark.asyncio
+    async def test_record_then_replay_without_network(self, provider, static_site, tmp_path):
+        store = CaptureStore(tmp_path / "captures")
+        steps = shop_steps(static_site.url)
+
+        recorded = await provider.run(steps, capture=store.capture("record", "shop"))
+        assert os.path.isfile(store.path_for("shop"))
+        assert recorded["network"] == {"mode": "record", "capture": "shop"}
+
+        # The site is gone; replay serves everything from the capture
+        static_site.stop()
+        replayed = await provider.run(steps, capture=store.capture("replay", "shop"))
+
+        assert replayed["title"] == recorded["title"] == "Cart 1"
+        assert replayed["final_url"] == recorded["final_url"]
+        assert provider.stats()["replayed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_aborts_uncaptured_requests(self, provider, site, tmp_path):
+        provider.step_timeout_ms = 2000
+        store = CaptureStore(tmp_path / "captures")
+        await provider.run([{"visit": f"{site}/index.html"}], capture=store.capture("record", "index"))
+
+        with pytest.raises(StepError, match=r"step 0 \(visit\)"):
+            await provider.run([{"visit": f"{site}/results.html"}], capture=store.capture("replay", "index"))
+
+    @pytest.mark.asyncio
+    async def test_screenshots_skip_unchanged_steps(self, provider, site):
+        provider.screenshots = ScreenshotPipeline(ScreenshotSettings(format="webp", quality=60))
+        steps = [{"visit": f"{site}/index.html"}, {"visit": f"{site}/index.html"}, {"visit": f"{site}/results.html"}]
+
+        result = await provider.run(steps)
+
+        shots = result["screenshots"]
+        assert shots[0]["image"].startswith("data:image/webp;base64,")
+        assert shots[1] == {"step": 1, "same_as": 0}
+        assert shots[2]["width"] == 1280 and shots[2]["height"] == 720
+        provider.screenshots.close()
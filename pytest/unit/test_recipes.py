@@ -0,0 +1,125 @@
+"""
+Pytest tests for the recipe compiler and cached plan registry
+"""
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.providers.playwright_local import PlaywrightLocal
+from app.services.recipes import (
+    DEFAULT_RECIPES_DIR,
+    ClickStep,
+    RecipeError,
+    RecipeRegistry,
+    VisitStep,
+    compile_recipe,
+)
+
+RECIPE = b"""version: 1
+id: shop/buy_socks.v1
+steps:
+  - visit: "https://shop.example.com"
+  - search: "socks"
+  - click: "Add to cart"
+"""
+
+
+def write(path, content):
+    path.write_bytes(content)
+    # Make sure the change is visible to the stat check even on coarse-mtime filesystems
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+class TestCompileRecipe:
+    """Test parsing and validation"""
+
+    def test_compiles_typed_steps(self):
+        plan = compile_recipe(RECIPE)
+
+        assert plan.name == "shop/buy_socks" and plan.version == 1
+        assert plan.steps[0] == VisitStep(url="https://shop.example.com")
+        assert isinstance(plan.steps[2], ClickStep) and plan.steps[2].target == "Add to cart"
+
+    @pytest.mark.parametrize("content, message", [
+        (b"version: 2\nid: a.v1\nsteps: [{visit: x}]", "format version"),
+        (b"version: 1\nid: a\nsteps: [{visit: x}]", "version suffix"),
+        (b"version: 1\nid: a.v1\nsteps: []", "non-empty"),
+        (b"version: 1\nid: a.v1\nsteps: [{hover: x}]", "unknown step type"),
+        (b"version: 1\nid: a.v1\nsteps: [{visit: x, click: y}]", "single-key"),
+        (b"version: 1\nid: a.v1\nsteps: [{click: [1, 2]}]", r"step 0 \(click\)"),
+    ])
+    def test_rejects_invalid_recipes(self, content, message):
+        with pytest.raises(RecipeError, match=message):
+            compile_recipe(content)
+
+    def test_bundled_recipes_compile(self):
+        registry = RecipeRegistry(DEFAULT_RECIPES_DIR)
+
+        assert registry.load() == {}
+        assert registry.get("ecommerce/add_white_tshirt_to_cart.v1") is not None
+
+
+class TestRecipeRegistry:
+    """Test addressing, caching and hot reload"""
+
+    def test_lookup_by_id_and_version(self, tmp_path):
+        write(tmp_path / "v1.yaml", RECIPE)
+        write(tmp_path / "v2.yaml", RECIPE.replace(b".v1", b".v2"))
+        registry = RecipeRegistry(tmp_path)
+
+        assert registry.get("shop/buy_socks.v1").version == 1
+        assert registry.get("shop.buy_socks.v2").version == 2
+        assert registry.get("shop/buy_socks").version == 2
+        assert registry.get("shop/buy_socks", version=1).version == 1
+        assert registry.get("shop/buy_socks.v3") is None
+
+    def test_plans_are_cached_until_content_changes(self, tmp_path):
+        path = tmp_path / "socks.yaml"
+        write(path, RECIPE)
+        registry = RecipeRegistry(tmp_path, reload_interval=0)
+
+        first = registry.get("shop/buy_socks.v1")
+        # Touching the file without changing it doesn't recompile
+        write(path, RECIPE)
+        assert registry.get("shop/buy_socks.v1") is first
+        assert registry.stats()["compiled"] == 1
+
+        write(path, RECIPE.replace(b"socks\"", b"wool socks\""))
+        updated = registry.get("shop/buy_socks.v1")
+        assert updated.steps[1].query == "wool socks"
+        assert updated.content_hash != first.content_hash
+
+    def test_hot_reload_adds_removes_and_reports_errors(self, tmp_path):
+        registry = RecipeRegistry(tmp_path, reload_interval=0)
+        assert registry.get("shop/buy_socks.v1") is None
+
+        write(tmp_path / "socks.yaml", RECIPE)
+        write(tmp_path / "broken.yaml", b"version: 1\nid: broken.v1\nsteps: [{fly: away}]")
+        assert registry.get("shop/buy_socks.v1") is not None
+        assert "unknown step type" in registry.errors()["broken.yaml"]
+
+        (tmp_path / "socks.yaml").unlink()
+        assert registry.get("shop/buy_socks.v1") is None
+
+    def test_reload_interval_throttles_rescans(self, tmp_path):
+        registry = RecipeRegistry(tmp_path, reload_interval=60)
+        registry.load()
+
+        write(tmp_path / "socks.yaml", RECIPE)
+
+        assert registry.get("shop/buy_socks.v1") is None
+        registry.refresh(force=True)
+        assert registry.get("shop/buy_socks.v1") is not None
+
+
+@pytest.mark.asyncio
+async def test_playwright_local_runs_compiled_plan():
+    plan = compile_recipe(RECIPE)
+    with patch.object(PlaywrightLocal, "_execute", AsyncMock(return_value={"steps_executed": 3})) as execute:
+        result = await PlaywrightLocal().run_plan(plan)
+
+    # The typed steps go straight to the browser, no re-parsing
+    execute.assert_awaited_once_with(plan.steps, None)
+    assert result["steps_executed"] == 3
+    assert result["recipe"] == "shop/buy_socks.v1"
@@ -0,0 +1,131 @@
+"""
+Pytest tests for the run regression detector
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+DATAVIZ_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "dataviz")
+sys.path.insert(0, DATAVIZ_DIR)
+
+from regression_detect import (  # noqa: E402
+    build_report,
+    compare_groups,
+    holm_adjust,
+    mann_whitney,
+    rankdata,
+)
+
+
+def runs(n, model, latency_ms, tokens_per_second, success_rate, start="2025-10-06", seed=0):
+    """Synthetic runs with log-normal latency around `latency_ms`; successes extracted some products"""
+    rng = np.random.default_rng(seed)
+    ok = rng.random(n) < success_rate
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="h", tz="UTC"),
+        "modelName": model,
+        "advancedStealth": False,
+        "proxies": False,
+        "executionTimeMs": (latency_ms * rng.lognormal(0, 0.2, n)).astype(int),
+        "tokensPerSecond": tokens_per_second * rng.lognormal(0, 0.2, n),
+        "browserbaseStatus": "COMPLETED",
+        "productCount": np.where(ok, 3, 0),
+        "hasExtractionResults": ok,
+    })
+
+
+def by_metric(results):
+    return {r["metric"]: r for r in results}
+
+
+class TestRankTests:
+    """Test the numpy rank statistics against hand-computed values"""
+
+    def test_average_ranks_and_tie_term(self):
+        ranks, tie_term = rankdata([10, 20, 20, 30, 20])
+        assert ranks.tolist() == [1, 3, 3, 5, 3]
+        assert tie_term == 3 ** 3 - 3
+
+    def test_mann_whitney(self):
+        u, p, rank_biserial = mann_whitney(np.arange(1, 11), np.arange(11, 21))
+        assert u == 0 and rank_biserial == 1
+        assert p < 0.001
+
+        _, p, _ = mann_whitney(np.array([1.0, 2, 3, 4]), np.array([1.0, 2, 3, 4]))
+        assert p == 1.0
+
+    def test_holm_adjust(self):
+        assert holm_adjust([0.01, 0.04, 0.03]).round(6).tolist() == [0.03, 0.06, 0.06]
+
+
+class TestComparisons:
+    """Test verdicts on known shifts"""
+
+    def test_detects_latency_regression_and_success_drop(self):
+        df = pd.concat([
+            runs(200, "base", 30000, 400, 0.95, seed=1),
+            runs(200, "slow", 36000, 400, 0.70, seed=2),
+        ], ignore_index=True)
+
+        report = build_report(df, by=["modelName"], n_boot=500)
+        results = by_metric(report["results"])
+
+        assert not report["passed"]
+        assert results["latency"]["verdict"] == "regression"
+        lo, hi = results["latency"]["ci"]
+        assert 0 < lo < 0.2 < hi
+        assert results["success"]["verdict"] == "regression"
+        assert results["success"]["effect"] < -0.15
+        assert results["tokens_per_second"]["verdict"] == "no_change"
+
+    def test_faster_candidate_is_an_improvement(self):
+        df = pd.concat([runs(150, "base", 30000, 400, 0.9, seed=3), runs(150, "fast", 20000, 600, 0.9, seed=4)])
+
+        results = by_metric(build_report(df, by="modelName", n_boot=500)["results"])
+
+        assert results["latency"]["verdict"] == "improvement"
+        assert results["tokens_per_second"]["verdict"] == "improvement"
+
+    def test_same_distribution_is_not_flagged(self):
+        df = pd.concat([runs(150, "a", 30000, 400, 0.9, seed=5), runs(100, "b", 30000, 400, 0.9, seed=6)])
+
+        report = build_report(df, by="modelName", n_boot=500)
+
+        assert report["passed"]
+        assert report["counts"]["no_change"] == 3
+
+    def test_small_groups_are_insufficient(self):
+        df = pd.concat([runs(50, "a", 30000, 400, 0.9), runs(3, "b", 60000, 100, 0.1)])
+
+        results = compare_groups(df, "modelName", baseline="a")
+
+        assert len(results) == 3 and not any("p_value" in r for r in results)
+        assert build_report(df, by="modelName")["counts"]["insufficient_data"] == 3
+
+    def test_unknown_baseline(self):
+        with pytest.raises(ValueError):
+            compare_groups(runs(10, "a", 30000, 400, 0.9), "modelName", baseline="missing")
+
+    def test_time_windows(self):
+        df = pd.concat([
+            runs(120, "m", 30000, 400, 0.9, start="2025-10-06", seed=7),
+            runs(48, "m", 45000, 400, 0.9, start="2025-10-12", seed=8),
+        ], ignore_index=True)
+
+        report = build_report(df, window="2D", n_boot=500)
+        results = by_metric(report["results"])
+
+        assert results["latency"]["verdict"] == "regression"
+        assert results["latency"]["n_candidate"] == 48
+        assert results["latency"]["group"] == "all"
+
+    def test_reports_are_reproducible(self):
+        df = pd.concat([runs(80, "a", 30000, 400, 0.9), runs(80, "b", 33000, 380, 0.85, seed=9)])
+
+        first = build_report(df, by="modelName", n_boot=300, seed=4)["results"]
+        second = build_report(df, by="modelName", n_boot=300, seed=4)["results"]
+
+        assert first == second
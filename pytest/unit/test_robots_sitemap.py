@@ -0,0 +1,129 @@
+"""
+Pytest tests for sitemap discovery and enumeration
+"""
+import gzip
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.robots_service import RobotsAnalysisService
+
+
+def sitemap_response(body: bytes, status_code: int = 200, chunk_size: int = 7):
+    """Build a streamed requests response that yields body in small chunks"""
+    response = Mock()
+    response.status_code = status_code
+    response.iter_content = lambda chunk_size_=None, **_: (
+        body[i:i + chunk_size] for i in range(0, len(body), chunk_size)
+    )
+    return response
+
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url><loc>https://example.com/products/shirt</loc>
+    <image:image><image:loc>https://example.com/img/shirt.png</image:loc></image:image>
+  </url>
+  <url><loc>https://example.com/admin/login</loc></url>
+  <url><loc>https://example.com/cart</loc></url>
+</urlset>"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-products.xml.gz</loc></sitemap>
+</sitemapindex>"""
+
+
+class TestRobotsRules:
+    """Test compiled allow/disallow rules"""
+
+    def setup_method(self):
+        self.service = RobotsAnalysisService()
+
+    def test_longest_match_wins(self):
+        rules = self.service.compile_rules("User-agent: *\nDisallow: /shop\nAllow: /shop/public\n")
+
+        assert rules.is_allowed("https://example.com/shop/public/item") is True
+        assert rules.is_allowed("https://example.com/shop/private") is False
+        assert rules.is_allowed("https://example.com/about") is True
+
+    def test_wildcards_and_anchors(self):
+        rules = self.service.compile_rules("User-agent: *\nDisallow: /*.pdf$\nDisallow: /*?sort=\n")
+
+        assert rules.is_allowed("https://example.com/docs/manual.pdf") is False
+        assert rules.is_allowed("https://example.com/docs/manual.pdf.html") is True
+        assert rules.is_allowed("https://example.com/list?sort=price") is False
+
+    def test_agent_specific_group(self, sample_robots_txt):
+        gptbot = self.service.compile_rules(sample_robots_txt, "GPTBot/1.1")
+        anyone = self.service.compile_rules(sample_robots_txt, "ANSBot/1.0")
+
+        assert gptbot.is_allowed("https://example.com/public") is False
+        assert anyone.is_allowed("https://example.com/public") is True
+        assert anyone.is_allowed("https://example.com/admin") is False
+
+
+class TestSitemapEnumeration:
+    """Test sitemap discovery and streaming"""
+
+    def setup_method(self):
+        self.service = RobotsAnalysisService()
+
+    def test_extract_sitemaps(self, sample_robots_txt):
+        content = sample_robots_txt + "\nSITEMAP: /sitemap-news.xml\nSitemap: https://example.com/sitemap.xml"
+
+        sitemaps = self.service.extract_sitemaps(content, "https://example.com/robots.txt")
+
+        assert sitemaps == ["https://example.com/sitemap.xml", "https://example.com/sitemap-news.xml"]
+
+    def test_index_and_gzip_are_followed_and_filtered(self):
+        responses = {
+            "https://example.com/sitemap.xml": sitemap_response(INDEX),
+            "https://example.com/sitemap-products.xml.gz": sitemap_response(gzip.compress(URLSET)),
+        }
+        rules = self.service.compile_rules("User-agent: *\nDisallow: /admin\n")
+
+        with patch("requests.get", side_effect=lambda url, **_: responses[url]):
+            urls = list(self.service.iter_sitemap_urls(["https://example.com/sitemap.xml"], rules))
+
+        assert urls == ["https://example.com/products/shirt", "https://example.com/cart"]
+
+    def test_max_urls(self):
+        with patch("requests.get", return_value=sitemap_response(URLSET)):
+            urls = list(self.service.iter_sitemap_urls(["https://example.com/sitemap.xml"], max_urls=1))
+
+        assert urls == ["https://example.com/products/shirt"]
+
+    def test_max_bytes(self):
+        cutoff = URLSET.index(b"</url>") + len(b"</url>")
+
+        with patch("requests.get", return_value=sitemap_response(URLSET)):
+            urls = list(self.service.iter_sitemap_urls(["https://example.com/sitemap.xml"], max_bytes=cutoff))
+
+        assert urls == ["https://example.com/products/shirt"]
+
+    def test_unreachable_sitemap_is_skipped(self):
+        with patch("requests.get", side_effect=requests.exceptions.ConnectionError()):
+            urls = list(self.service.iter_sitemap_urls(["https://example.com/sitemap.xml"]))
+
+        assert urls == []
+
+    def test_sitemap_endpoint_streams_allowed_urls(self):
+        robots = "User-agent: *\nDisallow: /admin\nSitemap: https://example.com/sitemap.xml\n"
+
+        def fake_get(url, **kwargs):
+            if url.endswith("/robots.txt"):
+                response = Mock()
+                response.status_code = 200
+                response.text = robots
+                return response
+            return sitemap_response(URLSET)
+
+        with patch("requests.get", side_effect=fake_get):
+            response = TestClient(app).post("/v1/robots/sitemap", json={"url": "https://example.com/shop"})
+
+        assert response.status_code == 200
+        assert response.text.splitlines() == ["https://example.com/products/shirt", "https://example.com/cart"]
@@ -0,0 +1,110 @@
+"""
+Pytest tests for the memoized run-log analytics
+"""
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services.run_analytics import DEFAULT_RUN_LOG, INGEST_AVAILABLE, AnalyticsUnavailable, RunAnalytics
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "dataviz", "workflow-runs.csv")
+
+pytestmark = pytest.mark.skipif(not INGEST_AVAILABLE, reason="pandas or pyarrow not installed")
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "workflow-runs.csv"
+    shutil.copy(SAMPLE_CSV, path)
+    return path
+
+
+@pytest.fixture
+def analytics(log, tmp_path):
+    return RunAnalytics(str(log), str(tmp_path / "cache"))
+
+
+def append_rows(log, n):
+    with open(SAMPLE_CSV, encoding="utf-8") as f:
+        lines = f.read().splitlines()[1:n + 1]
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+class TestAggregates:
+    """Test the statistics themselves"""
+
+    def test_group_percentiles_match_numpy(self, analytics):
+        items = analytics.groups("model")["items"]
+
+        df = analytics._df
+        top = items[0]
+        latencies = df.loc[df["modelName"].astype(str) == top["key"], "executionTimeMs"].to_numpy()
+        assert top["count"] == len(latencies) == max(i["count"] for i in items)
+        assert top["latency_ms"]["p95"] == round(float(np.quantile(latencies, 0.95)), 1)
+        assert top["latency_ms"]["p50"] == round(float(np.median(latencies)), 1)
+        assert sum(i["count"] for i in items) == 154
+
+    def test_summary_and_series(self, analytics):
+        summary = analytics.summary()
+        assert summary["rows"] == 154
+        assert summary["overall"]["count"] == 154
+
+        daily = analytics.series("day")["points"]
+        assert sum(p["count"] for p in daily) == 154
+        assert [p["start"] for p in daily] == sorted(p["start"] for p in daily)
+        by_model = analytics.series("week", "model")["points"]
+        assert {p["group"] for p in by_model} == {i["key"] for i in analytics.groups("model")["items"]}
+        assert {datetime.fromisoformat(p["start"]).weekday() for p in by_model} == {0}
+
+
+    def test_completed_without_results_is_not_a_success(self, tmp_path):
+        with open(SAMPLE_CSV, encoding="utf-8") as f:
+            header, line = f.read().splitlines()[:2]
+        head = line.partition(',"{')[0]
+        assert '"COMPLETED"' in head
+        log = tmp_path / "runs.csv"
+        log.write_text(f"{header}\n{line}\n{head},\n", encoding="utf-8")
+
+        summary = RunAnalytics(str(log), str(tmp_path / "cache")).summary()
+
+        assert summary["overall"]["count"] == 2
+        assert summary["overall"]["success_rate"] == 0.5
+
+
+class TestCaching:
+    """Test memoization and invalidation"""
+
+    def test_repeat_lookups_hit_the_memo(self, analytics):
+        first = analytics.groups("search_term")
+        assert analytics.groups("search_term") is first
+        assert analytics.stats()["hits"] == 1 and analytics.stats()["refreshes"] == 1
+
+    def test_new_rows_invalidate(self, analytics, log):
+        before = analytics.summary()
+        append_rows(log, 2)
+
+        after = analytics.summary()
+
+        assert after is not before
+        assert after["rows"] == 156
+        assert analytics.stats()["refreshes"] == 2
+
+    def test_touch_without_new_rows_keeps_the_memo(self, analytics, log):
+        before = analytics.summary()
+        with open(log, "a", encoding="utf-8") as f:
+            f.write('"2025-10-14')  # partial line, not a row yet
+
+        assert analytics.summary() is before
+
+    def test_missing_log_is_unavailable(self, tmp_path):
+        analytics = RunAnalytics(str(tmp_path / "missing.csv"), str(tmp_path / "cache"))
+        with pytest.raises(AnalyticsUnavailable, match="RUN_LOG_CSV"):
+            analytics.summary()
+
+    def test_default_log_is_the_repo_log(self):
+        assert DEFAULT_RUN_LOG.is_file()
+        assert os.path.samefile(DEFAULT_RUN_LOG, SAMPLE_CSV)
@@ -0,0 +1,222 @@
+"""
+Pytest tests for the SQLite-backed run store and the async run engine
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import captures
+from app.services.captures import CaptureStore
+from app.services.event_log import RunEventLog
+from app.services.run_engine import RunEngine, execute_run, site_key
+from app.services.run_store import RunRecord, RunStore
+
+VARIANT = {"perception": "dom", "runtime": "playwright_local"}
+
+
+class RecordingExecutor:
+    """Executor that records start order and tracks peak concurrency per site"""
+
+    def __init__(self, delay=0.02, fail_tasks=()):
+        self.delay = delay
+        self.fail_tasks = set(fail_tasks)
+        self.started = []
+        self.active = {}
+        self.peak = {}
+
+    async def __call__(self, run, emit):
+        site = site_key(run.site)
+        self.started.append(run.task_id)
+        self.active[site] = self.active.get(site, 0) + 1
+        self.peak[site] = max(self.peak.get(site, 0), self.active[site])
+        try:
+            await emit("step", "act", details={"task": run.task_id})
+            await asyncio.sleep(self.delay)
+            if run.task_id in self.fail_tasks:
+                raise RuntimeError("selector not found")
+            return {"steps_executed": 1}
+        finally:
+            self.active[site] -= 1
+
+
+async def wait_for_counts(engine, done, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while engine.stats()["succeeded"] + engine.stats()["failed"] < done:
+        assert time.monotonic() < deadline, "runs did not finish"
+        await asyncio.sleep(0.01)
+
+
+class TestRunStore:
+    """Test persistence"""
+
+    def test_wal_mode_and_roundtrip(self, tmp_path):
+        store = RunStore(str(tmp_path / "runs.sqlite3"))
+        run = store.create_run("target", "t1", VARIANT, {"steps": []}, priority=3)
+
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        loaded = store.get_run(run.run_id)
+        assert loaded.status == "queued"
+        assert loaded.variant == VARIANT and loaded.priority == 3
+
+
+class TestRunEngine:
+    """Test ordering, limits, state transitions and recovery"""
+
+    @pytest.fixture(autouse=True)
+    def event_log(self, tmp_path):
+        self.events = RunEventLog(str(tmp_path / "events"), flush_interval=0.005)
+
+    @pytest.mark.asyncio
+    async def test_priority_then_fifo_order(self):
+        executor = RecordingExecutor(delay=0)
+        engine = RunEngine(RunStore(), self.events, executor, concurrency=1)
+        for task_id, priority in [("low-1", 0), ("low-2", 0), ("high", 5), ("low-3", 0)]:
+            await engine.enqueue("target", task_id, VARIANT, priority=priority)
+
+        await engine.start()
+        try:
+            await wait_for_counts(engine, 4)
+        finally:
+            await engine.stop()
+
+        assert executor.started == ["high", "low-1", "low-2", "low-3"]
+
+    @pytest.mark.asyncio
+    async def test_per_site_limit_is_enforced(self):
+        executor = RecordingExecutor(delay=0.03)
+        engine = RunEngine(RunStore(), self.events, executor, concurrency=6, per_site_limit=2)
+        await engine.start()
+        try:
+            for i in range(6):
+                await engine.enqueue("https://shop.example.com/", f"a{i}", VARIANT)
+                await engine.enqueue("other", f"b{i}", VARIANT)
+            await wait_for_counts(engine, 12)
+        finally:
+            await engine.stop()
+
+        assert executor.peak["shop.example.com"] == 2
+        assert executor.peak["other"] == 2
+
+    @pytest.mark.asyncio
+    async def test_states_and_events(self):
+        store = RunStore()
+        engine = RunEngine(store, self.events, RecordingExecutor(delay=0, fail_tasks={"bad"}), concurrency=2)
+        await engine.start()
+        try:
+            good = await engine.enqueue("target", "good", VARIANT)
+            bad = await engine.enqueue("target", "bad", VARIANT)
+            assert good.status == "queued"
+            await wait_for_counts(engine, 2)
+        finally:
+            await engine.stop()
+
+        good, bad = store.get_run(good.run_id), store.get_run(bad.run_id)
+        assert good.status == "succeeded" and good.started_at and good.finished_at
+        assert bad.status == "failed" and bad.error == "selector not found"
+        events, _ = self.events.read(bad.run_id)
+        assert [(e["action"], e["status"]) for e in events] == [("start", "ok"), ("act", "ok"), ("finish", "fail")]
+
+    @pytest.mark.asyncio
+    async def test_unstorable_result_fails_the_run_and_keeps_the_worker(self):
+        async def executor(run, emit):
+            return {"steps": object()} if run.task_id == "bad" else None
+
+        store = RunStore()
+        engine = RunEngine(store, self.events, executor, concurrency=1)
+        await engine.start()
+        try:
+            bad = await engine.enqueue("target", "bad", VARIANT)
+            good = await engine.enqueue("target", "good", VARIANT)
+            bad = await asyncio.wait_for(engine.wait(bad.run_id), 3)
+            good = await asyncio.wait_for(engine.wait(good.run_id), 3)
+        finally:
+            await engine.stop()
+
+        assert bad.status == "failed" and bad.error
+        assert good.status == "succeeded"
+        assert engine.stats()["failed"] == 1 and engine.stats()["succeeded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_enqueue_stays_fast_with_deep_queue(self, tmp_path):
+        engine = RunEngine(RunStore(str(tmp_path / "runs.sqlite3")), self.events, RecordingExecutor())
+        for i in range(2000):
+            await engine.enqueue("target", f"t{i}", VARIANT)
+
+        started = time.perf_counter()
+        await engine.enqueue("target", "last", VARIANT)
+
+        assert time.perf_counter() - started < 0.05
+        assert engine.stats()["queued"] == 2001
+
+    @pytest.mark.asyncio
+    async def test_pick_skips_blocked_site_without_rescanning(self):
+        engine = RunEngine(RunStore(), self.events, RecordingExecutor(), per_site_limit=1)
+        for i in range(3000):
+            await engine.enqueue("busy", f"busy-{i}", VARIANT, priority=5)
+        for i in range(3):
+            await engine.enqueue("quiet", f"quiet-{i}", VARIANT)
+
+        first = engine._next_runnable()  # busy-0 fills the busy site
+        started = time.perf_counter()
+        second = engine._next_runnable()
+        elapsed = time.perf_counter() - started
+
+        assert first[1] == "busy" and second[1] == "quiet"
+        assert elapsed < 0.05  # no pass over the 2,999 blocked runs
+        assert engine._next_runnable() is None  # both sites at their limit
+        assert engine.stats()["queued"] == 3000 + 3 - 2
+
+        engine._running_by_site["busy"] -= 1  # busy-0 finished
+        engine._mark_ready("busy")
+        run_id, site = engine._next_runnable()
+        assert site == "busy" and engine.store.get_run(run_id).task_id == "busy-1"
+
+    @pytest.mark.asyncio
+    async def test_interrupted_runs_are_requeued_on_start(self, tmp_path):
+        path = str(tmp_path / "runs.sqlite3")
+        store = RunStore(path)
+        run = store.create_run("target", "t1", VARIANT)
+        store.update_run(run.run_id, status="running")
+
+        engine = RunEngine(RunStore(path), self.events, RecordingExecutor(delay=0))
+        await engine.start()
+        try:
+            await wait_for_counts(engine, 1)
+        finally:
+            await engine.stop()
+
+        assert engine.store.get_run(run.run_id).status == "succeeded"
+
+
+class TestExecuteRun:
+    """Test how the default executor picks steps and network captures"""
+
+    @staticmethod
+    def record(variant, payload=None):
+        return RunRecord(
+            seq=1, run_id="run_1", site="https://example.com", task_id="ecommerce.add_white_tshirt_to_cart.v1",
+            variant=variant, payload=payload, status="running", created_at="now",
+        )
+
+    @pytest.mark.asyncio
+    async def test_recipe_capture_is_named_after_the_recipe(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(captures, "_store", CaptureStore(tmp_path))
+        provider = MagicMock(supports_capture=True)
+        provider.run_plan = AsyncMock(return_value={"steps_executed": 3})
+
+        with patch("app.services.run_engine.provider_for", return_value=provider):
+            await execute_run(self.record({**VARIANT, "network": "record"}), AsyncMock())
+
+        capture = provider.run_plan.await_args.kwargs["capture"]
+        assert capture.mode == "record"
+        assert capture.name == "ecommerce/add_white_tshirt_to_cart.v1"
+
+    @pytest.mark.asyncio
+    async def test_capture_needs_a_supporting_provider(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(captures, "_store", CaptureStore(tmp_path))
+        provider = MagicMock(supports_capture=False)
+
+        with patch("app.services.run_engine.provider_for", return_value=provider):
+            with pytest.raises(ValueError, match="does not support network mode"):
+                await execute_run(self.record({**VARIANT, "network": "record"}, {"steps": []}), AsyncMock())
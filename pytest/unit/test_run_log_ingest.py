@@ -0,0 +1,161 @@
+"""
+Pytest tests for the incremental workflow-runs.csv ingest
+"""
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from app.services import run_log_ingest
+from app.services.run_log_ingest import RunLogIngestor, complete_records, parse_rows
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "dataviz", "workflow-runs.csv")
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "workflow-runs.csv"
+    shutil.copy(SAMPLE_CSV, path)
+    return path
+
+
+def data_lines(n=None):
+    with open(SAMPLE_CSV, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return lines[0], lines[1:n + 1 if n else None]
+
+
+class TestParseRows:
+    """Test the vectorized row parser against the per-row JSON path"""
+
+    def test_matches_row_by_row_parsing(self):
+        header, lines = data_lines()
+        df = parse_rows(lines, header.split(","))
+
+        assert len(df) == len(lines)
+        expected = []
+        for line in lines:
+            blob = line.partition(',"{')[2]
+            results = json.loads("{" + blob[:-1]) if blob else {}
+            expected.append(len(results["products"]) if "products" in results else 0)
+        assert df["productCount"].tolist() == expected
+        assert df["executionTimeMs"].iloc[0] == int(lines[0].split(",")[7].strip('"').removesuffix("ms"))
+        assert df["executionTimeSeconds"].iloc[0] == df["executionTimeMs"].iloc[0] / 1000
+        assert "extractionResults" not in df.columns
+
+    def test_dictionary_encodes_repeated_strings(self):
+        header, lines = data_lines()
+        df = parse_rows(lines, header.split(","))
+
+        for col in ("modelName", "searchTerm", "url"):
+            assert isinstance(df[col].dtype, pd.CategoricalDtype)
+        assert df["advancedStealth"].dtype == bool
+
+    def test_accepts_properly_escaped_json(self):
+        header, _ = data_lines()
+        columns = header.split(",")
+        row = ['"2025-10-06T19:31:37.700Z"', '"BROWSERBASE"', '"m"', "false", "false", '"socks, wool"', '"https://x"', '"1500ms"']
+        row += ["0"] * (len(columns) - len(row) - 1)
+        row.append('"{""products"":[{""name"":""a""},{""name"":""b""}]}"')
+
+        df = parse_rows([",".join(row)], columns)
+
+        assert df["productCount"].tolist() == [2]
+        assert df["searchTerm"].tolist() == ["socks, wool"]
+
+    def test_product_counts_match_json_parsing(self):
+        header, (line,) = data_lines(1)
+        head = line.partition(',"{')[0]
+        blobs = [
+            '{"products":[{"name":"a","price":"$1"},{"name":"say \\"name\\": hi"}]}',
+            '{"products":[]}',
+            '{"success":true,"products":[{"name":"a"}],"flightInformation":{"name":"x"}}',
+            '{"products":[{"name":"cut off',
+            '{"message":"no products"}',
+        ]
+        lines = [f'{head},"{blob}"' for blob in blobs] + [head + ","]
+
+        df = parse_rows(lines, header.split(","))
+
+        assert df["productCount"].tolist() == [2, 0, 1, 0, 0, 0]
+        assert df["hasExtractionResults"].tolist() == [True] * 5 + [False]
+
+    def test_records_may_span_lines(self):
+        header, (line,) = data_lines(1)
+        fields = line.split(",")
+        fields[5] = '"wool\nsocks"'
+        multiline = ",".join(fields)
+        data = f"{line}\n{multiline}\n{line}\n".encode()
+
+        records, consumed = complete_records(data)
+        assert records == [line, multiline, line] and consumed == len(data)
+        assert parse_rows(records, header.split(","))["searchTerm"].tolist()[1] == "wool\nsocks"
+
+        cut = data.index(b"socks")
+        records, consumed = complete_records(data[:cut])
+        assert records == [line] and consumed == len(line) + 1
+
+
+class TestRunLogIngestor:
+    """Test checkpointed, append-only ingest"""
+
+    def test_second_ingest_only_reads_appended_rows(self, log, tmp_path):
+        ingestor = RunLogIngestor(str(log), str(tmp_path / "cache"))
+        assert ingestor.ingest() == 154
+        assert ingestor.ingest() == 0
+
+        _, lines = data_lines(3)
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        assert ingestor.ingest() == 3
+        df = ingestor.load()
+        assert len(df) == 157
+        assert isinstance(df["modelName"].dtype, pd.CategoricalDtype)
+
+    def test_partial_last_line_waits_for_the_next_ingest(self, log, tmp_path):
+        ingestor = RunLogIngestor(str(log), str(tmp_path / "cache"))
+        ingestor.ingest()
+        _, (line,) = data_lines(1)
+
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(line[:40])
+        assert ingestor.ingest() == 0
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(line[40:] + "\n")
+        assert ingestor.ingest() == 1
+        assert len(ingestor.load()) == 155
+
+    def test_chunked_parse_matches_one_pass(self, log, tmp_path, monkeypatch):
+        whole = RunLogIngestor(str(log), str(tmp_path / "whole"))
+        whole.ingest()
+        monkeypatch.setattr(run_log_ingest, "PARSE_CHUNK_ROWS", 10)
+        chunked = RunLogIngestor(str(log), str(tmp_path / "chunked"))
+        assert chunked.ingest() == 154
+
+        pd.testing.assert_frame_equal(chunked.load(), whole.load())
+
+    def test_rewritten_log_triggers_a_rebuild(self, log, tmp_path):
+        ingestor = RunLogIngestor(str(log), str(tmp_path / "cache"))
+        ingestor.ingest()
+
+        header, lines = data_lines(2)
+        log.write_text(header + "\n" + "\n".join(lines) + "\n", encoding="utf-8")
+
+        assert ingestor.ingest() == 2
+        assert len(ingestor.load()) == 2
+
+    def test_compaction_keeps_every_row(self, log, tmp_path):
+        ingestor = RunLogIngestor(str(log), str(tmp_path / "cache"), max_parts=2)
+        ingestor.ingest()
+        _, lines = data_lines(2)
+        for line in lines * 2:
+            with open(log, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            ingestor.ingest()
+
+        parts = [name for name in os.listdir(tmp_path / "cache") if name.startswith("part-")]
+        assert len(parts) <= 2
+        assert len(ingestor.load()) == 158
@@ -0,0 +1,172 @@
+"""
+Pytest tests for the variant-matrix scheduler
+"""
+import asyncio
+import pytest
+import pytest_asyncio
+from pydantic import ValidationError
+
+from app.schemas import MatrixRequest
+from app.services.event_log import RunEventLog
+from app.services.run_engine import RunEngine
+from app.services.run_matrix import MatrixScheduler, expand_matrix
+from app.services.run_store import RunStore
+
+
+class ModelExecutor:
+    """Executor that tracks peak concurrency overall and per model, failing for some models"""
+
+    def __init__(self, delay=0.02, fail_models=()):
+        self.delay = delay
+        self.fail_models = set(fail_models)
+        self.calls = 0
+        self.active = {}
+        self.peak = {}
+        self.total = 0
+        self.peak_total = 0
+
+    async def __call__(self, run, emit):
+        model = run.variant.get("model")
+        self.calls += 1
+        self.active[model] = self.active.get(model, 0) + 1
+        self.peak[model] = max(self.peak.get(model, 0), self.active[model])
+        self.total += 1
+        self.peak_total = max(self.peak_total, self.total)
+        try:
+            await asyncio.sleep(self.delay)
+            if model in self.fail_models:
+                raise RuntimeError("model refused")
+            return {"steps_executed": 1}
+        finally:
+            self.active[model] -= 1
+            self.total -= 1
+
+
+class CollectingStream:
+    stream_id = "matrix-test"
+
+    def __init__(self):
+        self.events = []
+
+    async def publish(self, data):
+        self.events.append(data)
+        return len(self.events)
+
+
+def matrix(**overrides):
+    spec = {
+        "sites": ["https://a.example.com", "https://b.example.com"],
+        "task_ids": ["ecommerce.add_white_tshirt_to_cart.v1"],
+        "dimensions": {"model": ["gpt-4o", "gpt-4o-mini"], "stealth": [True, False]},
+        "concurrency": 4,
+    }
+    return MatrixRequest(**{**spec, **overrides})
+
+
+class TestExpandMatrix:
+    """Test the cartesian product"""
+
+    def test_cells_cover_every_combination(self):
+        cells = expand_matrix(matrix(variant={"perception": "vision"}))
+
+        assert len(cells) == 2 * 1 * 2 * 2
+        assert cells[0].variant == {
+            "perception": "vision", "runtime": "playwright_local", "network": "live",
+            "model": "gpt-4o", "stealth": True,
+        }
+        assert cells[0].dims == {
+            "site": "https://a.example.com", "task_id": "ecommerce.add_white_tshirt_to_cart.v1",
+            "model": "gpt-4o", "stealth": "True",
+        }
+        assert len({tuple(sorted(c.dims.items())) for c in cells}) == len(cells)
+
+    def test_dimension_limits_are_validated(self):
+        assert matrix(dimension_limits={"site": 1, "task_id": 1, "model": 2}).dimension_limits["model"] == 2
+        # A zero limit would leave every cell waiting forever; an unknown name would never apply
+        for limits in ({"model": 0}, {"site": -1}, {"browser": 1}):
+            with pytest.raises(ValidationError):
+                matrix(dimension_limits=limits)
+
+
+class TestMatrixScheduler:
+    """Test limits, reuse and aggregation against a real engine"""
+
+    @pytest_asyncio.fixture
+    async def engine_factory(self, tmp_path):
+        engines = []
+
+        async def factory(executor):
+            engine = RunEngine(
+                RunStore(),
+                RunEventLog(str(tmp_path / "events"), flush_interval=0.005),
+                executor=executor,
+                concurrency=8,
+                per_site_limit=8,
+            )
+            await engine.start()
+            engines.append(engine)
+            return engine
+
+        yield factory
+        for engine in engines:
+            await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_global_and_dimension_limits(self, engine_factory):
+        executor = ModelExecutor()
+        engine = await engine_factory(executor)
+        stream = CollectingStream()
+
+        await MatrixScheduler(engine, matrix(concurrency=3, dimension_limits={"model": 1})).run(stream)
+
+        assert executor.calls == 8
+        assert executor.peak_total <= 2  # at most one per model
+        assert max(executor.peak.values()) == 1
+        assert stream.events[0]["cells"] == 8
+        assert stream.events[-1]["status"] == "completed"
+        assert len([e for e in stream.events if "cell" in e]) == 8
+
+    @pytest.mark.asyncio
+    async def test_aggregates_by_dimension(self, engine_factory):
+        engine = await engine_factory(ModelExecutor(fail_models={"gpt-4o-mini"}))
+        stream = CollectingStream()
+
+        await MatrixScheduler(engine, matrix()).run(stream)
+
+        final = stream.events[-1]["aggregates"]
+        assert final["model"]["gpt-4o"]["success_rate"] == 1.0
+        assert final["model"]["gpt-4o-mini"]["success_rate"] == 0.0
+        assert final["stealth"]["True"]["completed"] == 4
+        assert final["site"]["https://a.example.com"]["latency_ms"]["p50"] is not None
+        # Per-cell events only carry the groups that cell touched
+        cell_event = stream.events[1]
+        assert set(cell_event["aggregates"]) == {"site", "task_id", "model", "stealth"}
+        assert all(len(values) == 1 for values in cell_event["aggregates"].values())
+
+    @pytest.mark.asyncio
+    async def test_fresh_cells_are_reused(self, engine_factory):
+        executor = ModelExecutor(fail_models={"gpt-4o-mini"})
+        engine = await engine_factory(executor)
+        await MatrixScheduler(engine, matrix()).run(CollectingStream())
+        assert executor.calls == 8
+
+        stream = CollectingStream()
+        await MatrixScheduler(engine, matrix()).run(stream)
+
+        # Only the failed cells run again
+        assert executor.calls == 12
+        cells = [e["cell"] for e in stream.events if "cell" in e]
+        assert sum(c["reused"] for c in cells) == 4
+        assert stream.events[-1]["aggregates"]["model"]["gpt-4o"]["reused"] == 4
+
+        await MatrixScheduler(engine, matrix(max_age_seconds=0)).run(CollectingStream())
+        assert executor.calls == 20
+
+    @pytest.mark.asyncio
+    async def test_different_payloads_are_not_reused(self, engine_factory):
+        executor = ModelExecutor()
+        engine = await engine_factory(executor)
+        await MatrixScheduler(engine, matrix(payload={"steps": [{"visit": "https://a"}]})).run(CollectingStream())
+        await MatrixScheduler(engine, matrix(payload={"steps": [{"visit": "https://b"}]})).run(CollectingStream())
+
+        assert executor.calls == 16
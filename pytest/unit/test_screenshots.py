@@ -0,0 +1,117 @@
+"""
+Pytest tests for the capture-time screenshot pipeline
+"""
+import io
+import threading
+import pytest
+from PIL import Image
+
+from app.services.screenshots import ScreenshotPipeline, ScreenshotSettings, encode_screenshot
+
+
+def png(width=640, height=480, color=(200, 30, 30)):
+    buffered = io.BytesIO()
+    image = Image.new("RGB", (width, height), color)
+    # Some detail so lossy formats have something to compress
+    for x in range(0, width, 8):
+        image.putpixel((x, x % height), (0, 0, 0))
+    image.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+class FakePage:
+    def __init__(self):
+        self.fingerprint = ["https://shop.example.com", 0, 0, 640, 480, 1]
+        self.image = png()
+        self.screenshots = []
+
+    async def evaluate(self, script):
+        return list(self.fingerprint)
+
+    async def screenshot(self, **kwargs):
+        self.screenshots.append(kwargs)
+        return self.image
+
+
+class TestEncodeScreenshot:
+    """Test format conversion and cropping"""
+
+    @pytest.mark.parametrize("fmt", ["jpeg", "webp"])
+    def test_encodes_and_crops(self, fmt):
+        data, width, height = encode_screenshot(png(640, 3000), fmt, 70, max_height=1000)
+
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == fmt.upper()
+            assert image.size == (640, 1000) == (width, height)
+
+    def test_converts_alpha(self):
+        buffered = io.BytesIO()
+        Image.new("RGBA", (10, 10), (0, 0, 0, 0)).save(buffered, format="PNG")
+
+        data, _, _ = encode_screenshot(buffered.getvalue(), "jpeg", 80, 100)
+        assert data[:2] == b"\xff\xd8"
+
+
+class TestScreenshotSession:
+    """Test capture, change detection and storage"""
+
+    @pytest.mark.asyncio
+    async def test_skips_unchanged_pages(self):
+        pipeline = ScreenshotPipeline(ScreenshotSettings(format="webp"))
+        session, page = pipeline.session(), FakePage()
+
+        first = await session.capture(page, 0)
+        second = await session.capture(page, 1)
+        page.fingerprint[-1] = 2  # DOM changed
+        page.image = png(color=(30, 30, 200))
+        third = await session.capture(page, 2)
+
+        assert first["image"].startswith("data:image/webp;base64,")
+        assert second == {"step": 1, "same_as": 0}
+        assert third["step"] == 2 and "image" in third
+        assert len(page.screenshots) == 2
+        assert pipeline.stats()["captured"] == 2 and pipeline.stats()["skipped"] == 1
+        pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_identical_pixels_are_not_reencoded(self):
+        pipeline = ScreenshotPipeline()
+        session, page = pipeline.session(), FakePage()
+
+        await session.capture(page, 0)
+        page.fingerprint[-1] = 2  # DOM changed but nothing visible did
+        shot = await session.capture(page, 1)
+
+        assert shot == {"step": 1, "same_as": 0}
+        assert pipeline.stats()["captured"] == 1
+        pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_full_page_is_clipped_to_max_height(self):
+        pipeline = ScreenshotPipeline(ScreenshotSettings(full_page=True, max_height=2000))
+        page = FakePage()
+        page.fingerprint[4] = 12000
+
+        await pipeline.session().capture(page, 0)
+
+        assert page.screenshots[0] == {"full_page": True, "clip": {"x": 0, "y": 0, "width": 640, "height": 2000}}
+        pipeline.close()
+
+    @pytest.mark.asyncio
+    async def test_encodes_off_the_event_loop_and_writes_files(self, tmp_path, monkeypatch):
+        pipeline = ScreenshotPipeline(ScreenshotSettings(output_dir=str(tmp_path)))
+        page = FakePage()
+        threads = []
+        real_save = Image.Image.save
+
+        def save(image, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return real_save(image, *args, **kwargs)
+
+        monkeypatch.setattr(Image.Image, "save", save)
+        shot = await pipeline.session().capture(page, 3)
+
+        assert shot["image"].endswith("-step-03.jpg")
+        assert (tmp_path / shot["image"].rsplit("/", 1)[-1]).stat().st_size == shot["bytes"]
+        assert threads and all(name.startswith("screenshot") for name in threads)
+        pipeline.close()
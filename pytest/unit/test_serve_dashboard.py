@@ -0,0 +1,159 @@
+"""
+Pytest tests for the dashboard server's static caching and live-tail mode
+"""
+import gzip
+import http.client
+import json
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+DATAVIZ_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "dataviz")
+sys.path.insert(0, DATAVIZ_DIR)
+
+from serve_dashboard import LiveAggregates, LiveFeed, LogTail, make_server  # noqa: E402
+
+SAMPLE_CSV = os.path.join(DATAVIZ_DIR, "workflow-runs.csv")
+
+
+def sample_lines():
+    with open(SAMPLE_CSV, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "workflow-runs.csv"
+    shutil.copy(SAMPLE_CSV, path)
+    return path
+
+
+@pytest.fixture
+def server(tmp_path, log):
+    feed = LiveFeed(str(log), poll_interval=3600)  # polled by hand in the tests
+    feed.start()
+    (tmp_path / "app.js").write_text("console.log('dashboard');\n" * 200)
+    httpd = make_server(0, directory=str(tmp_path), live=feed)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1], feed
+    httpd.shutdown()
+    httpd.server_close()
+    feed.stop()
+
+
+def read_event(response):
+    fields = {}
+    while True:
+        line = response.fp.readline().decode()
+        if line == "\n":
+            return fields
+        key, _, value = line.rstrip("\n").partition(": ")
+        fields[key] = value
+
+
+class TestLiveAggregates:
+    """Test incremental aggregation"""
+
+    def test_deltas_only_carry_touched_groups(self):
+        agg = LiveAggregates()
+        agg.add([
+            {"modelName": "m1", "searchTerm": "socks", "executionTimeMs": 100, "browserbaseStatus": "COMPLETED",
+             "productCount": 3},
+            {"modelName": "m2", "searchTerm": "socks", "executionTimeMs": 300, "browserbaseStatus": "FAILED"},
+        ])
+
+        changed = agg.add([{"modelName": "m1", "searchTerm": "socks", "executionTimeMs": 200,
+                            "browserbaseStatus": "COMPLETED", "productCount": 0, "hasExtractionResults": True}])
+
+        assert set(changed["models"]) == {"m1"}
+        assert changed["searchTerms"]["socks"]["count"] == 3
+        assert changed["searchTerms"]["socks"]["successRate"] == round(2 / 3, 4)
+        assert changed["models"]["m1"]["latencyMs"] == {"mean": 150.0, "p50": 100, "p95": 200}
+        assert agg.snapshot()["total"] == 3
+
+    def test_success_needs_extracted_results(self):
+        agg = LiveAggregates()
+        changed = agg.add([
+            {"modelName": "m1", "browserbaseStatus": "COMPLETED", "productCount": 0, "hasExtractionResults": False},
+            {"modelName": "m1", "browserbaseStatus": "COMPLETED", "productCount": 2, "hasExtractionResults": True},
+            {"modelName": "m1", "browserbaseStatus": "FAILED", "productCount": 2, "hasExtractionResults": True},
+        ])
+
+        assert changed["models"]["m1"]["successRate"] == round(1 / 3, 4)
+
+
+class TestLogTail:
+    """Test following the log"""
+
+    def test_partial_lines_and_truncation(self, log):
+        tail = LogTail(str(log))
+        assert len(tail.poll()[1]) == 154
+
+        line = sample_lines()[1]
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(line[:30])
+        assert tail.poll() == (False, [])
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(line[30:] + "\n")
+        assert tail.poll() == (False, [line])
+
+        log.write_text("\n".join(sample_lines()[:3]) + "\n", encoding="utf-8")
+        reset, lines = tail.poll()
+        assert reset and len(lines) == 2
+
+
+class TestDashboardServer:
+    """Test static caching and the SSE feed over real sockets"""
+
+    def test_static_files_are_gzipped_and_revalidated(self, server):
+        port, _ = server
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("GET", "/app.js", headers={"Accept-Encoding": "gzip"})
+        r = conn.getresponse()
+        body = r.read()
+        assert r.status == 200 and r.getheader("Content-Encoding") == "gzip"
+        assert gzip.decompress(body).startswith(b"console.log")
+
+        conn.request("GET", "/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": r.getheader("ETag")})
+        r = conn.getresponse()
+        r.read()
+        assert r.status == 304
+
+        conn.request("GET", "/app.js")
+        r = conn.getresponse()
+        assert r.getheader("Content-Encoding") is None and r.read().startswith(b"console.log")
+
+    def test_appended_rows_are_pushed_as_deltas(self, server, log):
+        port, feed = server
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", "/events")
+        r = conn.getresponse()
+        snapshot = read_event(r)
+        assert snapshot["event"] == "snapshot" and json.loads(snapshot["data"])["total"] == 154
+
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("\n".join(sample_lines()[1:3]) + "\n")
+        assert feed.poll() == 2
+
+        delta = read_event(r)
+        data = json.loads(delta["data"])
+        assert delta["event"] == "delta"
+        assert (data["first"], data["total"], len(data["rows"])) == (154, 156, 2)
+        assert data["rows"][0]["executionTimeMs"] == 42386
+        assert data["rows"][0]["timestamp"].endswith("Z")
+        conn.close()
+
+    def test_aggregates_endpoint_supports_etags(self, server):
+        port, _ = server
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("GET", "/api/aggregates")
+        r = conn.getresponse()
+        assert json.loads(r.read())["total"] == 154
+
+        conn.request("GET", "/api/aggregates", headers={"If-None-Match": r.getheader("ETag")})
+        r = conn.getresponse()
+        r.read()
+        assert r.status == 304
@@ -0,0 +1,111 @@
+"""
+Pytest tests for the warm Browserbase session pool, run against the fake Browserbase server
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.fakes.browserbase import create_app
+from app.services import browserbase
+from app.services.session_pool import BrowserbaseSessionPool, SessionPoolKey, session_payload
+
+KEY = SessionPoolKey(os="linux", advanced_stealth=False, proxies=False, viewport=(1280, 720))
+
+
+def make_pool(fake, **kwargs):
+    """Pool whose create/release calls go to the in-process fake Browserbase"""
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake")
+
+    async def create(key):
+        data = await browserbase.create_session("test-key", session_payload(key, "proj"), client)
+        debug = await browserbase.get_debug_urls("test-key", data["id"], client)
+        return {**data, **debug}
+
+    async def release(session_id):
+        await browserbase.release_session("test-key", "proj", session_id, client)
+
+    kwargs.setdefault("refill_interval", 0.01)
+    return BrowserbaseSessionPool(create, release, **kwargs)
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestSessionPool:
+    """Test pool refill, hits/misses and expiry"""
+
+    @pytest.mark.asyncio
+    async def test_warm_key_is_prefilled_and_hit(self):
+        fake = create_app(latency_ms=0)
+        pool = make_pool(fake, min_size=2, max_size=4)
+        await pool.start(warm_keys=(KEY,))
+        try:
+            await wait_for(lambda: pool.stats()["keys"][KEY.label()]["idle"] == 2)
+
+            session = await pool.acquire(KEY)
+
+            assert session["debuggerFullscreenUrl"].endswith(session["id"])
+            assert fake.state.sessions[session["id"]]["browserSettings"]["viewport"] == {"width": 1280, "height": 720}
+            stats = pool.stats()
+            assert stats["hits"] == 1 and stats["misses"] == 0
+            assert stats["hit_rate"] == 1.0
+            # The taken session is replaced in the background
+            await wait_for(lambda: pool.stats()["keys"][KEY.label()]["idle"] == 2)
+        finally:
+            await pool.stop()
+
+        assert all(s["status"] == "COMPLETED" for sid, s in fake.state.sessions.items() if sid != session["id"])
+
+    @pytest.mark.asyncio
+    async def test_miss_creates_inline_and_grows_target(self):
+        fake = create_app(latency_ms=0)
+        pool = make_pool(fake, min_size=1, max_size=3)
+        await pool.start()
+        try:
+            await pool.acquire(KEY)
+            await pool.acquire(KEY._replace(os="mac", advanced_stealth=True))
+            await pool.acquire(KEY)
+
+            stats = pool.stats()
+            assert stats["misses"] >= 2
+            assert stats["keys"][KEY.label()]["target"] >= 1
+            assert stats["keys"][KEY.label()]["target"] <= 3
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_expired_sessions_are_released(self):
+        fake = create_app(latency_ms=0)
+        pool = make_pool(fake, min_size=1, max_size=1, ttl_seconds=0.05)
+        await pool.start(warm_keys=(KEY,))
+        try:
+            await wait_for(lambda: pool.stats()["expired"] >= 1)
+            await wait_for(lambda: any(s["status"] == "COMPLETED" for s in fake.state.sessions.values()))
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_disabled_pool_passes_through(self):
+        fake = create_app(latency_ms=0)
+        pool = make_pool(fake, max_size=0)
+        await pool.start(warm_keys=(KEY,))
+
+        session = await pool.acquire(KEY)
+
+        assert session["id"] in fake.state.sessions
+        assert len(fake.state.sessions) == 1
+        assert pool.stats()["enabled"] is False
+
+
+def test_pool_stats_endpoint():
+    from app.main import app
+
+    response = TestClient(app).get("/v1/sessions/pool")
+
+    assert response.status_code == 200
+    assert {"hits", "misses", "hit_rate", "keys"} <= set(response.json())
@@ -0,0 +1,136 @@
+"""
+Pytest tests for the session lifecycle registry (quotas, queueing, idle reaping)
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.fakes.browserbase import create_app
+from app.main import app
+from app.services import http_client, session_registry, session_status
+from app.services.session_registry import SessionRegistry
+
+
+class RecordingRelease:
+    def __init__(self):
+        self.released = []
+
+    async def __call__(self, session_id):
+        self.released.append(session_id)
+
+
+class TestSessionRegistry:
+    """Test quota enforcement and reaping"""
+
+    @pytest.mark.asyncio
+    async def test_client_quota_queues_until_release(self):
+        registry = SessionRegistry(RecordingRelease(), max_per_project=10, max_per_client=1)
+        async with registry.slot("proj", "alice") as slot:
+            slot.bind("s1")
+
+        async def second():
+            async with registry.slot("proj", "alice") as slot:
+                slot.bind("s2")
+
+        waiter = asyncio.create_task(second())
+        await asyncio.sleep(0.02)
+        assert not waiter.done()
+        assert registry.stats()["waiting"] == 1
+
+        # Other clients are unaffected
+        async with registry.slot("proj", "bob") as slot:
+            slot.bind("s3")
+
+        await registry.release("s1")
+        await asyncio.wait_for(waiter, 1)
+        assert set(registry.stats()["by_client"]) == {"alice", "bob"}
+        assert registry.stats()["queued"] == 1
+
+    @pytest.mark.asyncio
+    async def test_project_quota_times_out_with_429(self):
+        registry = SessionRegistry(RecordingRelease(), max_per_project=1, queue_timeout_seconds=0.05)
+        async with registry.slot("proj", "alice") as slot:
+            slot.bind("s1")
+
+        with pytest.raises(HTTPException) as exc:
+            async with registry.slot("proj", "bob"):
+                pass
+
+        assert exc.value.status_code == 429
+        assert registry.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unbound_slot_is_returned(self):
+        registry = SessionRegistry(RecordingRelease(), max_per_client=1)
+
+        with pytest.raises(RuntimeError):
+            async with registry.slot("proj", "alice"):
+                raise RuntimeError("create failed")
+
+        async with registry.slot("proj", "alice") as slot:
+            slot.bind("s1")
+        assert registry.stats()["active"] == 1
+        assert registry.stats()["reserved"] == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_are_reaped(self):
+        release = RecordingRelease()
+        registry = SessionRegistry(release, idle_timeout_seconds=0.05)
+        for sid in ("idle", "busy"):
+            async with registry.slot("proj", "alice") as slot:
+                slot.bind(sid)
+
+        await asyncio.sleep(0.06)
+        registry.touch("busy")
+
+        assert await registry.reap_idle() == 1
+        assert release.released == ["idle"]
+        assert registry.get("busy") is not None
+        assert registry.stats()["reaped"] == 1
+
+
+class TestSessionRegistryRoutes:
+    """Test that created sessions are tracked and can be released"""
+
+    @pytest.fixture(autouse=True)
+    def fake_browserbase(self, monkeypatch):
+        fake = create_app(latency_ms=0)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake")
+        monkeypatch.setattr(http_client, "_client", client)
+        monkeypatch.setattr(session_registry, "_registry", None)
+        monkeypatch.setattr(session_status, "_cache", None)
+        monkeypatch.setenv("BROWSERBASE_API_KEY", "test-key")
+        monkeypatch.setenv("BROWSERBASE_PROJECT_ID", "proj")
+        monkeypatch.setattr("app.routes.sessions.BB_KEY", "test-key")
+        monkeypatch.setattr("app.routes.sessions.BB_PROJECT", "proj")
+        self.fake = fake
+
+    def test_create_track_and_release(self):
+        client = TestClient(app)
+
+        created = client.post("/v1/session/create", json={"url": "https://example.com"}, headers={"x-client-id": "ui-1"})
+        session_id = created.json()["sessionId"]
+
+        stats = client.get("/v1/sessions/registry").json()
+        assert stats["active"] == 1
+        assert stats["by_client"] == {"testclient": 1}
+        assert stats["by_label"] == {"ui-1": 1}
+
+        released = client.delete(f"/v1/sessions/{session_id}")
+        assert released.status_code == 200
+        assert self.fake.state.sessions[session_id]["status"] == "COMPLETED"
+        assert client.get("/v1/sessions/registry").json()["active"] == 0
+
+    def test_rotating_client_id_header_shares_the_quota(self, monkeypatch):
+        monkeypatch.setenv("BB_MAX_SESSIONS_PER_CLIENT", "1")
+        monkeypatch.setenv("BB_SESSION_QUEUE_TIMEOUT", "0.05")
+        client = TestClient(app)
+
+        first = client.post("/v1/session/create", json={"url": "https://example.com"}, headers={"x-client-id": "a"})
+        second = client.post("/v1/session/create", json={"url": "https://example.com"}, headers={"x-client-id": "b"})
+
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert client.get("/v1/sessions/registry").json()["by_client"] == {"testclient": 1}
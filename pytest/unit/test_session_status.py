@@ -0,0 +1,135 @@
+"""
+Pytest tests for coalesced/cached session status lookups and the batch status endpoint
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.fakes.browserbase import create_app
+from app.main import app
+from app.services import http_client, session_registry, session_status
+from app.services.session_status import SessionStatusCache
+
+
+class CountingFetch:
+    def __init__(self, status="RUNNING", delay=0.02, fail=False):
+        self.calls = 0
+        self.status = status
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, session_id):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {"id": session_id, "status": self.status}
+
+
+class TestSessionStatusCache:
+    """Test single-flight coalescing and TTL behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_are_coalesced(self):
+        fetch = CountingFetch()
+        cache = SessionStatusCache(fetch, ttl_seconds=5)
+
+        results = await asyncio.gather(*(cache.get("s1") for _ in range(20)))
+
+        assert fetch.calls == 1
+        assert all(r["status"] == "RUNNING" for r in results)
+        assert cache.stats()["coalesced"] == 19
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        fetch = CountingFetch(delay=0)
+        cache = SessionStatusCache(fetch, ttl_seconds=0.05)
+
+        await cache.get("s1")
+        await cache.get("s1")
+        assert fetch.calls == 1
+
+        await asyncio.sleep(0.06)
+        await cache.get("s1")
+        assert fetch.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_terminal_status_uses_longer_ttl(self):
+        fetch = CountingFetch(status="COMPLETED", delay=0)
+        cache = SessionStatusCache(fetch, ttl_seconds=0.01, terminal_ttl_seconds=5)
+
+        await cache.get("s1")
+        await asyncio.sleep(0.02)
+        await cache.get("s1")
+
+        assert fetch.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        fetch = CountingFetch(fail=True, delay=0)
+        cache = SessionStatusCache(fetch, ttl_seconds=5)
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.get("s1")
+
+        assert fetch.calls == 2
+        assert cache.stats()["errors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_fetch(self):
+        fetch = CountingFetch(delay=0.05)
+        cache = SessionStatusCache(fetch, ttl_seconds=5)
+
+        leader = asyncio.create_task(cache.get("s1"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get("s1"))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert (await follower)["status"] == "RUNNING"
+        assert fetch.calls == 1
+
+
+class TestBatchStatusEndpoint:
+    """Test POST /v1/sessions/status against the fake Browserbase"""
+
+    @pytest.fixture(autouse=True)
+    def fake_browserbase(self, monkeypatch):
+        fake = create_app(latency_ms=0)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake")
+        monkeypatch.setattr(http_client, "_client", client)
+        monkeypatch.setattr(session_status, "_cache", None)
+        monkeypatch.setattr(session_registry, "_registry", None)
+        monkeypatch.setenv("BROWSERBASE_API_KEY", "test-key")
+        monkeypatch.setattr("app.routes.sessions.BB_KEY", "test-key")
+        self.fake = fake
+
+    def test_batch_returns_slim_items_and_errors(self):
+        client = TestClient(app)
+        ids = [client.post("/v1/sessions/add-to-cart", json={"url": "https://example.com"}).json()["id"] for _ in range(3)]
+
+        response = client.post("/v1/sessions/status", json={"session_ids": ids + [ids[0], "missing"]})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert set(body["items"]) == set(ids)
+        assert all(set(item) == {"id", "status", "debuggerFullscreenUrl"} for item in body["items"].values())
+        assert "missing" in body["errors"]
+        assert self.fake.state.calls["get"] == 4
+
+    def test_single_lookup_is_cached_and_slim_optional(self):
+        client = TestClient(app)
+        session_id = client.post("/v1/sessions/add-to-cart", json={"url": "https://example.com"}).json()["id"]
+
+        full = client.get(f"/v1/sessions/{session_id}").json()
+        slim = client.get(f"/v1/sessions/{session_id}", params={"slim": True}).json()
+
+        assert "raw" in full and "raw" not in slim
+        assert self.fake.state.calls["get"] == 1
+
+    def test_batch_size_is_limited(self):
+        response = TestClient(app).post("/v1/sessions/status", json={"session_ids": [f"s{i}" for i in range(101)]})
+
+        assert response.status_code == 400
@@ -0,0 +1,184 @@
+"""
+Pytest tests for span tracing, traceparent propagation and run waterfalls
+"""
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services.tracing import (
+    InMemoryCollector,
+    JsonlFileExporter,
+    Tracer,
+    TracingMiddleware,
+    current_traceparent,
+    parse_traceparent,
+    waterfall,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def names(spans):
+    return sorted(s.name for s in spans)
+
+
+class TestTraceparent:
+    """Test W3C header parsing"""
+
+    def test_parses_valid_headers(self):
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+
+    @pytest.mark.parametrize("header", [
+        None, "", "garbage", f"ff-{TRACE_ID}-{PARENT_ID}-01",
+        f"00-{'0' * 32}-{PARENT_ID}-01", f"00-{TRACE_ID}-{'0' * 16}-01", f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    ])
+    def test_rejects_invalid_headers(self, header):
+        assert parse_traceparent(header) is None
+
+
+class TestTracer:
+    """Test nesting, sampling and export"""
+
+    @pytest.mark.asyncio
+    async def test_spans_nest_across_tasks_and_threads(self):
+        tracer = Tracer()
+
+        def blocking():
+            with tracer.span("thread.work"):
+                pass
+
+        async def child(i):
+            with tracer.span("task.work", i=i):
+                await asyncio.to_thread(blocking)
+
+        with tracer.span("root") as root:
+            await asyncio.gather(child(1), child(2))
+
+        spans = tracer.collector.trace(root.trace_id)
+        by_name = {}
+        for s in spans:
+            by_name.setdefault(s.name, []).append(s)
+        assert names(spans) == ["root", "task.work", "task.work", "thread.work", "thread.work"]
+        assert all(s.parent_id == root.span_id for s in by_name["task.work"])
+        task_ids = {s.span_id for s in by_name["task.work"]}
+        assert {s.parent_id for s in by_name["thread.work"]} == task_ids
+
+    def test_errors_are_recorded(self):
+        tracer = Tracer()
+        with pytest.raises(ValueError):
+            with tracer.span("root") as root:
+                raise ValueError("boom")
+
+        (span,) = tracer.collector.trace(root.trace_id)
+        assert span.status == "error"
+        assert span.attributes["error"] == "ValueError: boom"
+
+    def test_continues_incoming_trace(self):
+        tracer = Tracer()
+        with tracer.span("server", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as span:
+            assert current_traceparent() == f"00-{TRACE_ID}-{span.span_id}-01"
+
+        assert span.trace_id == TRACE_ID and span.parent_id == PARENT_ID
+
+    def test_unsampled_traces_record_nothing_but_still_propagate(self):
+        tracer = Tracer(sample_rate=0)
+        with tracer.span("root"):
+            with tracer.span("child") as child:
+                assert current_traceparent().endswith("-00")
+                child.set("ignored", True)
+
+        with tracer.span("server", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-00"):
+            assert current_traceparent() == f"00-{TRACE_ID}-{PARENT_ID}-00"
+
+        assert tracer.stats()["spans"] == 0
+
+    def test_collector_keeps_recent_traces_and_indexes_runs(self):
+        tracer = Tracer(InMemoryCollector(max_traces=2))
+        for i in range(3):
+            with tracer.span("run.execute", run_id=f"run_{i}"):
+                pass
+
+        assert tracer.collector.trace_id_for_run("run_0") is None
+        assert tracer.collector.trace_id_for_run("run_2") is not None
+
+    def test_file_exporter_writes_jsonl(self, tmp_path):
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(exporters=(JsonlFileExporter(str(path), flush_interval=0.01),))
+        with tracer.span("root", run_id="run_1"):
+            with tracer.span("child"):
+                pass
+        tracer.close()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["name"] for r in records] == ["child", "root"]
+        assert records[1]["attributes"] == {"run_id": "run_1"}
+
+
+class TestWaterfall:
+    """Test layout and critical path on hand-timed spans"""
+
+    def test_critical_path_follows_the_blocking_children(self):
+        tracer = Tracer()
+        ms = 1_000_000
+        with tracer.span("root") as root:
+            pass
+        base = root.start_ns
+        root.end_ns = base + 100 * ms
+        # session (0-30ms), then two parallel steps; the slower one (30-90ms) blocks
+        tracer.record("session.create", base, base + 30 * ms, parent=root)
+        tracer.record("browser.step", base + 30 * ms, base + 50 * ms, parent=root, index=0)
+        tracer.record("browser.step", base + 30 * ms, base + 90 * ms, parent=root, index=1)
+
+        result = waterfall(tracer.collector.trace(root.trace_id))
+
+        assert result["duration_ms"] == 100
+        assert [(row["name"], row["depth"]) for row in result["spans"]][0] == ("root", 0)
+        assert [row["offset_ms"] for row in result["spans"]] == [0, 0, 30, 30]
+        path = [(p["name"], p["self_ms"]) for p in result["critical_path"]]
+        assert path == [("root", 10.0), ("session.create", 30.0), ("browser.step", 60.0)]
+        assert sum(p["self_ms"] for p in result["critical_path"]) == result["duration_ms"]
+
+    def test_async_children_extend_the_trace(self):
+        tracer = Tracer()
+        ms = 1_000_000
+        with tracer.span("HTTP POST /v1/runs") as request:
+            pass
+        base = request.start_ns
+        request.end_ns = base + 5 * ms
+        # The run executes after the request returned
+        tracer.record("run.queued", base + 2 * ms, base + 20 * ms, parent=request)
+        tracer.record("run.execute", base + 20 * ms, base + 120 * ms, parent=request)
+
+        result = waterfall(tracer.collector.trace(request.trace_id))
+
+        assert result["duration_ms"] == 120
+        assert [p["name"] for p in result["critical_path"]] == ["HTTP POST /v1/runs", "run.queued", "run.execute"]
+
+
+class TestTracingMiddleware:
+    """Test request spans and header propagation"""
+
+    def test_request_span_and_response_header(self):
+        tracer = Tracer()
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+
+        @app.get("/items/{item_id}")
+        def item(item_id: str):
+            with tracer.span("lookup"):
+                return {"traceparent": current_traceparent()}
+
+        with TestClient(app) as client:
+            r = client.get("/items/42", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+        trace_id, span_id, sampled = parse_traceparent(r.headers["traceparent"])
+        assert trace_id == TRACE_ID and sampled
+        spans = tracer.collector.trace(TRACE_ID)
+        assert names(spans) == ["HTTP GET /items/{item_id}", "lookup"]
+        server = next(s for s in spans if s.name.startswith("HTTP"))
+        assert server.span_id == span_id and server.parent_id == PARENT_ID
+        assert server.attributes["status_code"] == 200
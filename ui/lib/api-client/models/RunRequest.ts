@@ -13,6 +13,14 @@
  */
 
 import { mapValues } from '../runtime';
+import type { RunRequestVariant } from './RunRequestVariant';
+import {
+    RunRequestVariantFromJSON,
+    RunRequestVariantFromJSONTyped,
+    RunRequestVariantToJSON,
+    RunRequestVariantToJSONTyped,
+} from './RunRequestVariant';
+
 /**
  * 
  * @export
@@ -24,64 +32,40 @@ export interface RunRequest {
      * @type {string}
      * @memberof RunRequest
      */
-    taskType: string;
+    site: string;
     /**
      * 
      * @type {string}
      * @memberof RunRequest
      */
-    prompt?: string | null;
+    taskId: string;
     /**
      * 
-     * @type {string}
+     * @type {RunRequestVariant}
      * @memberof RunRequest
      */
-    url: string;
+    variant: RunRequestVariant;
     /**
      * 
-     * @type {string}
-     * @memberof RunRequest
-     */
-    model: string;
-    /**
-     * 
-     * @type {string}
-     * @memberof RunRequest
-     */
-    env?: string;
-    /**
-     * 
-     * @type {string}
+     * @type {{ [key: string]: any; }}
      * @memberof RunRequest
      */
-    stealth?: RunRequestStealthEnum;
+    payload?: { [key: string]: any; } | null;
     /**
      * 
-     * @type {{ [key: string]: any; }}
+     * @type {number}
      * @memberof RunRequest
      */
-    proxies?: { [key: string]: any; } | null;
+    priority?: number;
 }
 
-
-/**
- * @export
- */
-export const RunRequestStealthEnum = {
-    None: 'none',
-    Basic: 'basic',
-    Aggressive: 'aggressive'
-} as const;
-export type RunRequestStealthEnum = typeof RunRequestStealthEnum[keyof typeof RunRequestStealthEnum];
-
-
 /**
  * Check if a given object implements the RunRequest interface.
  */
 export function instanceOfRunRequest(value: object): value is RunRequest {
-    if (!('taskType' in value) || value['taskType'] === undefined) return false;
-    if (!('url' in value) || value['url'] === undefined) return false;
-    if (!('model' in value) || value['model'] === undefined) return false;
+    if (!('site' in value) || value['site'] === undefined) return false;
+    if (!('taskId' in value) || value['taskId'] === undefined) return false;
+    if (!('variant' in value) || value['variant'] === undefined) return false;
     return true;
 }
 
@@ -95,13 +79,11 @@ export function RunRequestFromJSONTyped(json: any, ignoreDiscriminator: boolean)
     }
     return {
         
-        'taskType': json['task_type'],
-        'prompt': json['prompt'] == null ? undefined : json['prompt'],
-        'url': json['url'],
-        'model': json['model'],
-        'env': json['env'] == null ? undefined : json['env'],
-        'stealth': json['stealth'] == null ? undefined : json['stealth'],
-        'proxies': json['proxies'] == null ? undefined : json['proxies'],
+        'site': json['site'],
+        'taskId': json['task_id'],
+        'variant': RunRequestVariantFromJSON(json['variant']),
+        'payload': json['payload'] == null ? undefined : json['payload'],
+        'priority': json['priority'] == null ? undefined : json['priority'],
     };
 }
 
@@ -116,12 +98,10 @@ export function RunRequestToJSONTyped(value?: RunRequest | null, ignoreDiscrimin
 
     return {
         
-        'task_type': value['taskType'],
-        'prompt': value['prompt'],
-        'url': value['url'],
-        'model': value['model'],
-        'env': value['env'],
-        'stealth': value['stealth'],
-        'proxies': value['proxies'],
+        'site': value['site'],
+        'task_id': value['taskId'],
+        'variant': RunRequestVariantToJSON(value['variant']),
+        'payload': value['payload'],
+        'priority': value['priority'],
     };
 }
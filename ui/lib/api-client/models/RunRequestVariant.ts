@@ -0,0 +1,110 @@
+/* tslint:disable */
+/* eslint-disable */
+/**
+ * Agent Navigability Simulator API
+ * No description provided (generated by Openapi Generator https://github.com/openapitools/openapi-generator)
+ *
+ * The version of the OpenAPI document: 1.0.0
+ * 
+ *
+ * NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+ * https://openapi-generator.tech
+ * Do not edit the class manually.
+ */
+
+import { mapValues } from '../runtime';
+/**
+ * 
+ * @export
+ * @interface RunRequestVariant
+ */
+export interface RunRequestVariant {
+    /**
+     * 
+     * @type {string}
+     * @memberof RunRequestVariant
+     */
+    perception?: RunRequestVariantPerceptionEnum;
+    /**
+     * 
+     * @type {string}
+     * @memberof RunRequestVariant
+     */
+    runtime?: RunRequestVariantRuntimeEnum;
+    /**
+     * record saves the run's traffic as a HAR capture; replay serves every request from it
+     * @type {string}
+     * @memberof RunRequestVariant
+     */
+    network?: RunRequestVariantNetworkEnum;
+}
+
+
+/**
+ * @export
+ */
+export const RunRequestVariantPerceptionEnum = {
+    Dom: 'dom',
+    Vision: 'vision'
+} as const;
+export type RunRequestVariantPerceptionEnum = typeof RunRequestVariantPerceptionEnum[keyof typeof RunRequestVariantPerceptionEnum];
+
+/**
+ * @export
+ */
+export const RunRequestVariantRuntimeEnum = {
+    PlaywrightLocal: 'playwright_local',
+    BrowserProvider: 'browser_provider'
+} as const;
+export type RunRequestVariantRuntimeEnum = typeof RunRequestVariantRuntimeEnum[keyof typeof RunRequestVariantRuntimeEnum];
+
+/**
+ * @export
+ */
+export const RunRequestVariantNetworkEnum = {
+    Live: 'live',
+    Record: 'record',
+    Replay: 'replay'
+} as const;
+export type RunRequestVariantNetworkEnum = typeof RunRequestVariantNetworkEnum[keyof typeof RunRequestVariantNetworkEnum];
+
+
+/**
+ * Check if a given object implements the RunRequestVariant interface.
+ */
+export function instanceOfRunRequestVariant(value: object): value is RunRequestVariant {
+    return true;
+}
+
+export function RunRequestVariantFromJSON(json: any): RunRequestVariant {
+    return RunRequestVariantFromJSONTyped(json, false);
+}
+
+export function RunRequestVariantFromJSONTyped(json: any, ignoreDiscriminator: boolean): RunRequestVariant {
+    if (json == null) {
+        return json;
+    }
+    return {
+        
+        'perception': json['perception'] == null ? undefined : json['perception'],
+        'runtime': json['runtime'] == null ? undefined : json['runtime'],
+        'network': json['network'] == null ? undefined : json['network'],
+    };
+}
+
+export function RunRequestVariantToJSON(json: any): RunRequestVariant {
+    return RunRequestVariantToJSONTyped(json, false);
+}
+
+export function RunRequestVariantToJSONTyped(value?: RunRequestVariant | null, ignoreDiscriminator: boolean = false): any {
+    if (value == null) {
+        return value;
+    }
+
+    return {
+        
+        'perception': value['perception'],
+        'runtime': value['runtime'],
+        'network': value['network'],
+    };
+}
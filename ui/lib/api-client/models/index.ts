@@ -9,4 +9,5 @@ export * from './ModelError';
 export * from './RobotsAnalysisRequest';
 export * from './RobotsAnalysisResponse';
 export * from './RunRequest';
+export * from './RunRequestVariant';
 export * from './RunResponse';
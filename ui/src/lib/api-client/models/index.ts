@@ -12,6 +12,7 @@ export * from './RobotsAnalysisRequest';
 export * from './RobotsAnalysisResponse';
 export * from './RunEvent';
 export * from './RunRequest';
+export * from './RunRequestVariant';
 export * from './RunResponse';
 export * from './RunSummary';
 export * from './RunSummaryLinks';